@@ -1,14 +1,41 @@
 
 
+from __future__ import annotations
+
+import io
 import os
+import re
 import json
-import pandas as pd
-from datetime import datetime
+import base64
+import time
+import pickle
+import sqlite3
+import hashlib
+import tempfile
+import asyncio
+import threading
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from functools import lru_cache
+from datetime import date, datetime, timedelta
+from decimal import Decimal
 from typing import Optional, List, Dict, Any
-import google.generativeai as genai
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Header, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, PlainTextResponse
 from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool, iterate_in_threadpool
+from analytics import AnalyticsEngine, SNAPSHOT_QUERY
+from llm import create_backend, estimate_tokens
+from telemetry import MetricsRegistry, Telemetry, SIZE_BUCKETS
+from lazyimport import lazy_import, load_modules, module_stats
+from sqlguard import SQLGuard, SQLGuardError, showplan_cost
+from llmclient import AdaptiveLimiter, CircuitBreaker, LLMClient, LLMUnavailable, set_llm_priority
+
+# pandas / numpy load on first use (or during the lifespan warm-up), not at import
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
 
 # ============================================================================
 # Configuration
@@ -16,7 +43,6 @@ from pydantic import BaseModel
 
 # Gemini API Configuration - Set your API key here or via environment variable
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "API_KEY")
-genai.configure(api_key=GEMINI_API_KEY)
 
 # Database Configuration
 DB_CONFIG = {
@@ -26,14 +52,216 @@ DB_CONFIG = {
     "password": os.getenv("DB_PASSWORD", "PASSWORD"),
 }
 
-# Initialize Gemini Model
-model = genai.GenerativeModel('gemini-2.5-flash')
+# Connection Pool Configuration
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "2"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+DB_POOL_ACQUIRE_TIMEOUT = float(os.getenv("DB_POOL_ACQUIRE_TIMEOUT", "30"))
+DB_POOL_IDLE_TIMEOUT = float(os.getenv("DB_POOL_IDLE_TIMEOUT", "300"))
+DB_POOL_HEALTH_CHECK_INTERVAL = float(os.getenv("DB_POOL_HEALTH_CHECK_INTERVAL", "30"))
+DB_QUERY_WORKERS = int(os.getenv("DB_QUERY_WORKERS", str(DB_POOL_MAX_SIZE)))
+# Prepared statements (one cursor per distinct SQL text) kept open per pooled connection
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "32"))
+# Distinct SQL statements tracked by the per-query timing stats
+QUERY_STATS_MAX_STATEMENTS = int(os.getenv("QUERY_STATS_MAX_STATEMENTS", "256"))
+
+# NL-to-SQL Translation Cache Configuration
+# Exact tier (normalized question text) plus a normalized tier that ignores stopwords:
+# content words (entities, regions, query types, numbers, directions) must match in order.
+NL_SQL_CACHE_SIZE = int(os.getenv("NL_SQL_CACHE_SIZE", "512"))
+NL_SQL_CACHE_TTL = float(os.getenv("NL_SQL_CACHE_TTL", "86400"))
+
+# Query Result Cache Configuration
+# RESULT_CACHE_DIR: optional directory for an on-disk Parquet tier (memory only when empty)
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR", "")
+RESULT_CACHE_GENERATION_TTL = float(os.getenv("RESULT_CACHE_GENERATION_TTL", "30"))
+
+# Streaming Response Configuration
+# Rows fetched from the cursor per round trip when streaming NDJSON / Arrow results
+STREAM_FETCH_SIZE = int(os.getenv("STREAM_FETCH_SIZE", "5000"))
+
+# Generated SQL Guard Configuration
+# SQL from /api/ask is limited to one SELECT over gold objects named in SCHEMA_CONTEXT.
+# SQL_GUARD_MAX_COST: refuse plans whose estimated subtree cost (SHOWPLAN_XML) exceeds this (0 = off)
+# SQL_GUARD_TIMEOUT: driver query timeout in seconds; the statement is also cancelled if it overruns
+SQL_GUARD_MAX_ROWS = int(os.getenv("SQL_GUARD_MAX_ROWS", "100"))
+SQL_GUARD_MAX_COST = float(os.getenv("SQL_GUARD_MAX_COST", "50"))
+SQL_GUARD_TIMEOUT = int(os.getenv("SQL_GUARD_TIMEOUT", "30"))
+
+# Batch Report Configuration
+BATCH_REPORT_LLM_CONCURRENCY = int(os.getenv("BATCH_REPORT_LLM_CONCURRENCY", "4"))
+BATCH_REPORT_RATE_PER_MINUTE = int(os.getenv("BATCH_REPORT_RATE_PER_MINUTE", "60"))
+BATCH_REPORT_MAX_JOBS = int(os.getenv("BATCH_REPORT_MAX_JOBS", "100"))
+BATCH_REPORT_SUBJECTS_PER_SITE = int(os.getenv("BATCH_REPORT_SUBJECTS_PER_SITE", "50"))
+
+# Precomputed Insights Configuration
+# INSIGHT_PRECOMPUTE: "on" regenerates study insights and site recommendations after every warehouse load
+# INSIGHT_SERVE_STALE: "on" serves the previous load's result while the new one is being computed
+INSIGHT_PRECOMPUTE = os.getenv("INSIGHT_PRECOMPUTE", "on").lower() == "on"
+INSIGHT_STORE_PATH = os.getenv(
+    "INSIGHT_STORE_PATH", os.path.join(tempfile.gettempdir(), "clinical-ai-api", "insights.db")
+)
+INSIGHT_STORE_KEEP_GENERATIONS = int(os.getenv("INSIGHT_STORE_KEEP_GENERATIONS", "3"))
+INSIGHT_REFRESH_INTERVAL = float(os.getenv("INSIGHT_REFRESH_INTERVAL", "60"))
+INSIGHT_PRECOMPUTE_CONCURRENCY = int(os.getenv("INSIGHT_PRECOMPUTE_CONCURRENCY", "4"))
+INSIGHT_PRECOMPUTE_RATE_PER_MINUTE = int(os.getenv("INSIGHT_PRECOMPUTE_RATE_PER_MINUTE", "60"))
+INSIGHT_SERVE_STALE = os.getenv("INSIGHT_SERVE_STALE", "on").lower() == "on"
+
+# Trend Configuration (daily metric snapshots, gold/ddl_metric_snapshots.sql)
+TRENDS_DEFAULT_DAYS = int(os.getenv("TRENDS_DEFAULT_DAYS", "90"))
+TRENDS_MAX_DAYS = int(os.getenv("TRENDS_MAX_DAYS", "1095"))
+
+# Prompt Assembly Configuration
+# PROMPT_CONTEXT_CACHE: "on" keeps SCHEMA_CONTEXT in Gemini cached content instead of every prompt
+# PROMPT_CONTEXT_CACHE_MIN_TOKENS: smallest cached content GEMINI_MODEL accepts (see its context
+# caching limits); a smaller schema is always sent inline
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "6000"))
+PROMPT_SCHEMA_FRAGMENTS = int(os.getenv("PROMPT_SCHEMA_FRAGMENTS", "4"))
+PROMPT_FLOAT_DIGITS = int(os.getenv("PROMPT_FLOAT_DIGITS", "2"))
+PROMPT_CONTEXT_CACHE = os.getenv("PROMPT_CONTEXT_CACHE", "off").lower() == "on"
+PROMPT_CONTEXT_CACHE_TTL = float(os.getenv("PROMPT_CONTEXT_CACHE_TTL", "3600"))
+PROMPT_CONTEXT_CACHE_MIN_TOKENS = int(os.getenv("PROMPT_CONTEXT_CACHE_MIN_TOKENS", "1024"))
+
+# Startup Configuration
+# STARTUP_WARMUP: "background" (serve immediately, warm up concurrently), "wait" (finish warm-up
+# before accepting requests) or "off". Warm-up fills the connection pool, loads pandas/numpy and
+# validates the LLM backend.
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "background").lower()
+STARTUP_WARMUP_TIMEOUT = float(os.getenv("STARTUP_WARMUP_TIMEOUT", "30"))
+
+# LLM Backend Configuration
+# LLM_BACKEND: "gemini", "record" (Gemini + append exchanges to LLM_RECORD_PATH),
+# "replay" (answer from LLM_RECORD_PATH, no network) or "stub" (canned responses)
+# LLM_REPLAY_TIMING: "recorded" (scaled by LLM_REPLAY_SPEED) or "synthetic" (LLM_LATENCY_MS / LLM_TOKENS_PER_SECOND)
+GEMINI_MODEL_NAME = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini").lower()
+LLM_RECORD_PATH = os.getenv("LLM_RECORD_PATH", "llm_recordings.jsonl")
+LLM_LATENCY_MS = float(os.getenv("LLM_LATENCY_MS", "0"))
+LLM_TOKENS_PER_SECOND = float(os.getenv("LLM_TOKENS_PER_SECOND", "0"))
+LLM_REPLAY_TIMING = os.getenv("LLM_REPLAY_TIMING", "recorded").lower()
+LLM_REPLAY_SPEED = float(os.getenv("LLM_REPLAY_SPEED", "1"))
+LLM_REPLAY_FALLBACK = os.getenv("LLM_REPLAY_FALLBACK", "off").lower() == "on"
+
+# LLM Call Resilience Configuration
+# Concurrency starts at LLM_CONCURRENCY_INITIAL, grows while calls stay under LLM_LATENCY_TARGET
+# seconds and halves on rate limiting (429) or slow calls. Waiting calls are admitted
+# interactive (/api/ask) first, then standard (reports, on-demand insights), then batch.
+# LLM_DEADLINE_*: seconds per call (interactive: for the whole request) including queueing, retries
+# and streaming; the time left is passed to the model as its request timeout
+# LLM_HEDGE_AFTER: seconds before a slow interactive call gets a duplicate attempt (0 = off)
+# LLM_BREAKER_*: consecutive provider failures that open the circuit, and seconds until a probe
+LLM_CONCURRENCY_INITIAL = int(os.getenv("LLM_CONCURRENCY_INITIAL", "8"))
+LLM_CONCURRENCY_MIN = int(os.getenv("LLM_CONCURRENCY_MIN", "1"))
+LLM_CONCURRENCY_MAX = int(os.getenv("LLM_CONCURRENCY_MAX", "32"))
+LLM_LATENCY_TARGET = float(os.getenv("LLM_LATENCY_TARGET", "20"))
+LLM_RETRIES = int(os.getenv("LLM_RETRIES", "2"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "8"))
+LLM_HEDGE_AFTER = float(os.getenv("LLM_HEDGE_AFTER", "10"))
+LLM_DEADLINE_INTERACTIVE = float(os.getenv("LLM_DEADLINE_INTERACTIVE", "30"))
+LLM_DEADLINE_STANDARD = float(os.getenv("LLM_DEADLINE_STANDARD", "60"))
+LLM_DEADLINE_BATCH = float(os.getenv("LLM_DEADLINE_BATCH", "300"))
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_RESET = float(os.getenv("LLM_BREAKER_RESET", "30"))
+
+# Initialize LLM Backend
+llm_backend = create_backend(
+    LLM_BACKEND,
+    model_name=GEMINI_MODEL_NAME,
+    api_key=GEMINI_API_KEY,
+    record_path=LLM_RECORD_PATH,
+    latency_ms=LLM_LATENCY_MS,
+    tokens_per_second=LLM_TOKENS_PER_SECOND,
+    replay_timing=LLM_REPLAY_TIMING,
+    replay_speed=LLM_REPLAY_SPEED,
+    replay_fallback=LLM_REPLAY_FALLBACK
+)
+
+
+class Warmup:
+    """Startup work kept off the import path: pooled connections, deferred imports, model check"""
+
+    def __init__(self, mode: str = STARTUP_WARMUP, timeout: float = STARTUP_WARMUP_TIMEOUT):
+        self.mode = mode
+        self.timeout = timeout
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self.total_ms: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def _step(self, name: str, func, executor=None):
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        try:
+            await loop.run_in_executor(executor, func)
+            self.steps[name] = {"ok": True, "ms": round((time.perf_counter() - start) * 1000, 1)}
+        except Exception as e:
+            print(f"Warning: warm-up step '{name}' failed: {str(e)}")
+            self.steps[name] = {"ok": False, "ms": round((time.perf_counter() - start) * 1000, 1), "error": str(e)}
+
+    async def run(self):
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.gather(
+                self._step("db_pool", db_pool.fill, db_executor),
+                self._step("imports", lambda: load_modules(pd, np)),
+                self._step("llm_backend", ai.model.validate)
+            ), self.timeout)
+        except asyncio.TimeoutError:
+            print(f"Warning: warm-up did not finish within {self.timeout:.0f}s")
+        self.total_ms = round((time.perf_counter() - start) * 1000, 1)
+
+    async def start(self):
+        if self.mode == "wait":
+            await self.run()
+        elif self.mode != "off":
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    @property
+    def ready(self) -> bool:
+        return self.total_ms is not None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "ready": self.ready,
+            "total_ms": self.total_ms,
+            "steps": dict(self.steps),
+            "deferred_imports": module_stats(pd, np)
+        }
+
+
+warmup = Warmup()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm up and start background workers on startup; release them on shutdown"""
+    await warmup.start()
+    batch_reports.start()
+    insight_scheduler.start()
+    yield
+    await warmup.stop()
+    await insight_scheduler.stop()
+    await batch_reports.stop()
+    db_pool.close()
+    db_executor.shutdown(wait=False)
+    telemetry.shutdown()
+
 
 # Initialize FastAPI
 app = FastAPI(
     title="Clinical Trial AI API",
     description="AI-powered insights for clinical trial data using Gemini",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS Configuration
@@ -45,47 +273,732 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ============================================================================
+# Telemetry
+# ============================================================================
+
+metrics_registry = MetricsRegistry()
+telemetry = Telemetry(metrics_registry)
+
+http_request_seconds = metrics_registry.histogram(
+    "clinical_ai_http_request_duration_seconds", "Time to response headers by route, method and status"
+)
+llm_first_token_seconds = metrics_registry.histogram(
+    "clinical_ai_llm_time_to_first_token_seconds", "Time to the first streamed chunk by prompt kind"
+)
+llm_prompt_tokens = metrics_registry.histogram(
+    "clinical_ai_llm_prompt_tokens", "Estimated prompt tokens by prompt kind", SIZE_BUCKETS
+)
+llm_response_tokens = metrics_registry.histogram(
+    "clinical_ai_llm_response_tokens", "Estimated response tokens by prompt kind", SIZE_BUCKETS
+)
+db_rows_returned = metrics_registry.histogram(
+    "clinical_ai_db_rows_returned", "Rows fetched per executed query", SIZE_BUCKETS
+)
+llm_queue_wait_seconds = metrics_registry.histogram(
+    "clinical_ai_llm_queue_wait_seconds", "Time waiting for an LLM concurrency slot by priority"
+)
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        http_request_seconds.observe(
+            time.perf_counter() - start,
+            route=getattr(route, "path", "unmatched"), method=request.method, status=status
+        )
+
+
+def component_samples():
+    """Numeric stats of the pool, caches and workers as gauges (sampled at scrape time)"""
+    components = {
+        "db_pool": db_pool.stats,
+        "result_cache": result_cache.stats,
+        "nl_sql_cache": nl_sql_cache.stats,
+        "single_flight": single_flight.stats,
+        "insight_store": insight_store.stats,
+        "insight_scheduler": insight_scheduler.stats,
+        "analytics": analytics.stats,
+        "sql_guard": sql_guard.stats,
+        "llm_client": llm_client.stats,
+        "llm_backend": lambda: ai.model.stats()
+    }
+    for component, stats in components.items():
+        for key, value in stats().items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                name = re.sub(r"[^a-zA-Z0-9_]", "_", f"clinical_ai_{component}_{key}")
+                yield name, "gauge", f"{component} {key}", {}, value
+
+
+metrics_registry.collector(component_samples)
+
 # ============================================================================
 # Database Connection
 # ============================================================================
 
-def get_db_connection():
-    """Create database connection"""
+DB_CONNECTION_STRING = (
+    f"DRIVER={{ODBC Driver 17 for SQL Server}};"
+    f"SERVER={DB_CONFIG['server']};"
+    f"DATABASE={DB_CONFIG['database']};"
+    f"UID={DB_CONFIG['username']};"
+    f"PWD={DB_CONFIG['password']}"
+)
+
+
+@lru_cache(maxsize=1)
+def odbc_driver():
+    """pyodbc, imported once per process (None when not installed)"""
     try:
         import pyodbc
-        conn_str = (
-            f"DRIVER={{ODBC Driver 17 for SQL Server}};"
-            f"SERVER={DB_CONFIG['server']};"
-            f"DATABASE={DB_CONFIG['database']};"
-            f"UID={DB_CONFIG['username']};"
-            f"PWD={DB_CONFIG['password']}"
-        )
-        return pyodbc.connect(conn_str)
+        return pyodbc
     except ImportError:
         print("Warning: pyodbc not installed. Using mock data.")
         return None
 
 
-def execute_query(query: str) -> pd.DataFrame:
-    """Execute SQL query and return DataFrame"""
-    conn = get_db_connection()
-    if conn:
+def get_db_connection():
+    """Create database connection"""
+    pyodbc = odbc_driver()
+    if pyodbc is None:
+        return None
+    return pyodbc.connect(DB_CONNECTION_STRING)
+
+
+class ConnectionPool:
+    """Thread-safe database connection pool with health checks and idle recycling"""
+
+    def __init__(
+        self,
+        factory,
+        min_size: int = DB_POOL_MIN_SIZE,
+        max_size: int = DB_POOL_MAX_SIZE,
+        acquire_timeout: float = DB_POOL_ACQUIRE_TIMEOUT,
+        idle_timeout: float = DB_POOL_IDLE_TIMEOUT,
+        health_check_interval: float = DB_POOL_HEALTH_CHECK_INTERVAL,
+        statement_cache_size: int = DB_STATEMENT_CACHE_SIZE
+    ):
+        self.factory = factory
+        self.min_size = min_size
+        self.max_size = max(max_size, 1)
+        self.acquire_timeout = acquire_timeout
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.statement_cache_size = statement_cache_size
+        
+        # Idle connections as (connection, last_used); most recently used on the right
+        self._idle = deque()
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        # id(connection) -> {sql: cursor}, least recently used first
+        self._statements: Dict[int, OrderedDict] = {}
+        self._counters = {
+            "created": 0,
+            "recycled": 0,
+            "health_check_failures": 0,
+            "acquire_waits": 0,
+            "statements_prepared": 0,
+            "statement_reuses": 0
+        }
+    
+    def _release_slot(self):
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+    
+    def _close_quietly(self, conn):
+        self.forget_statements(conn)
         try:
-            df = pd.read_sql(query, conn)
             conn.close()
-            return df
+        except Exception:
+            pass
+    
+    def prepared(self, conn, sql: str):
+        """
+        Cursor dedicated to sql on this connection. Drivers keep the last
+        statement a cursor executed prepared, so running the same SQL text on
+        it again only sends new parameter values.
+        """
+        if self.statement_cache_size <= 0:
+            return conn.cursor()
+        with self._cond:
+            statements = self._statements.setdefault(id(conn), OrderedDict())
+            cursor = statements.get(sql)
+            if cursor is not None:
+                statements.move_to_end(sql)
+                self._counters["statement_reuses"] += 1
+                return cursor
+        
+        cursor = conn.cursor()
+        evicted = None
+        with self._cond:
+            statements[sql] = cursor
+            self._counters["statements_prepared"] += 1
+            if len(statements) > self.statement_cache_size:
+                _, evicted = statements.popitem(last=False)
+        if evicted is not None:
+            try:
+                evicted.close()
+            except Exception:
+                pass
+        return cursor
+    
+    def forget_statement(self, conn, sql: str):
+        """Drop a statement whose cursor may be unusable (e.g. after an error)"""
+        with self._cond:
+            cursor = self._statements.get(id(conn), {}).pop(sql, None)
+        if cursor is not None:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+    
+    def forget_statements(self, conn):
+        with self._cond:
+            statements = self._statements.pop(id(conn), {})
+        for cursor in statements.values():
+            try:
+                cursor.close()
+            except Exception:
+                pass
+    
+    @staticmethod
+    def _is_healthy(conn) -> bool:
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            cursor.close()
+            return True
+        except Exception:
+            return False
+    
+    def _reap_idle(self) -> List[Any]:
+        """Pop connections idle longer than idle_timeout (caller holds the lock)"""
+        expired = []
+        now = time.monotonic()
+        while self._idle and self._size > self.min_size:
+            conn, last_used = self._idle[0]
+            if now - last_used < self.idle_timeout:
+                break
+            self._idle.popleft()
+            self._size -= 1
+            self._counters["recycled"] += 1
+            expired.append(conn)
+        return expired
+    
+    def acquire(self):
+        """Borrow a connection, or None when no database driver is available"""
+        deadline = time.monotonic() + self.acquire_timeout
+        
+        while True:
+            conn, last_used = None, None
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise Exception("Database error: connection pool is closed")
+                    if self._idle:
+                        conn, last_used = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise Exception("Database error: timed out waiting for a pooled connection")
+                    self._counters["acquire_waits"] += 1
+                    self._cond.wait(remaining)
+            
+            if conn is None:
+                try:
+                    conn = self.factory()
+                except Exception:
+                    self._release_slot()
+                    raise
+                if conn is None:
+                    self._release_slot()
+                    return None
+                with self._cond:
+                    self._counters["created"] += 1
+                return conn
+            
+            # Validate connections that have been sitting idle before handing them out
+            if time.monotonic() - last_used >= self.health_check_interval and not self._is_healthy(conn):
+                with self._cond:
+                    self._counters["health_check_failures"] += 1
+                self._close_quietly(conn)
+                self._release_slot()
+                continue
+            
+            return conn
+    
+    def release(self, conn, discard: bool = False):
+        """Return a connection to the pool, closing it if discarded or the pool is closed"""
+        if conn is None:
+            return
+        with self._cond:
+            if discard or self._closed:
+                self._size -= 1
+                expired = [conn]
+            else:
+                self._idle.append((conn, time.monotonic()))
+                expired = self._reap_idle()
+            self._cond.notify()
+        for stale in expired:
+            self._close_quietly(stale)
+    
+    @contextmanager
+    def connection(self):
+        """Context manager yielding a pooled connection (None in mock mode)"""
+        conn = self.acquire()
+        try:
+            yield conn
+        except Exception:
+            # Keep the connection unless the failure left it unusable
+            self.release(conn, discard=conn is not None and not self._is_healthy(conn))
+            raise
+        else:
+            self.release(conn)
+    
+    def fill(self):
+        """Pre-open connections up to min_size"""
+        opened = []
+        try:
+            while len(opened) < self.min_size:
+                conn = self.acquire()
+                if conn is None:
+                    break
+                opened.append(conn)
+        finally:
+            for conn in opened:
+                self.release(conn)
+    
+    def close(self):
+        """Close all idle connections and refuse new checkouts"""
+        with self._cond:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._size -= len(idle)
+            self._idle.clear()
+            self._cond.notify_all()
+        for conn in idle:
+            self._close_quietly(conn)
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "open": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "statements_open": sum(len(statements) for statements in self._statements.values()),
+                **self._counters
+            }
+
+
+db_pool = ConnectionPool(get_db_connection)
+
+# Bounded worker pool so blocking driver calls never run on the event loop
+db_executor = ThreadPoolExecutor(max_workers=DB_QUERY_WORKERS, thread_name_prefix="db-query")
+
+
+# ============================================================================
+# Query Result Cache
+# ============================================================================
+
+LOAD_GENERATION_QUERY = "SELECT generation_id FROM gold.vw_current_load_generation"
+
+
+def fetch_load_generation() -> Optional[int]:
+    """Read the warehouse load generation marker bumped by bronze/silver loads"""
+    try:
+        with db_pool.connection() as conn:
+            if conn is None:
+                return 0
+            cursor = conn.cursor()
+            cursor.execute(LOAD_GENERATION_QUERY)
+            row = cursor.fetchone()
+            cursor.close()
+            return int(row[0]) if row else 0
+    except Exception as e:
+        print(f"Warning: could not read load generation, result cache bypassed: {str(e)}")
+        return None
+
+
+class QueryResultCache:
+    """Parquet-encoded cache of gold-layer query results, invalidated per load generation"""
+    
+    def __init__(
+        self,
+        max_bytes: int = RESULT_CACHE_MAX_BYTES,
+        cache_dir: str = RESULT_CACHE_DIR,
+        generation_ttl: float = RESULT_CACHE_GENERATION_TTL
+    ):
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.generation_ttl = generation_ttl
+        
+        # key -> (format, payload bytes), least recently used first
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._generation = None
+        self._generation_checked = 0.0
+        self._lock = threading.Lock()
+        self._counters = {
+            "hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "invalidations": 0,
+            "load_races": 0,
+            "serialization_errors": 0
+        }
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+    
+    @staticmethod
+    def normalize_sql(query: str) -> str:
+        return re.sub(r"\s+", " ", query).strip().rstrip(";").strip()
+    
+    @classmethod
+    def cache_key(cls, query: str, params: Optional[tuple] = None) -> str:
+        text = cls.normalize_sql(query)
+        if params:
+            text += "\x00" + json.dumps(list(params), default=json_default)
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+    
+    @staticmethod
+    def is_cacheable(query: str) -> bool:
+        """Only gold-layer reads are cached; they change only when a load runs"""
+        return "gold." in query.lower()
+    
+    def current_generation(self, fresh: bool = False) -> Optional[int]:
+        """Load generation, re-read from the warehouse at most every generation_ttl seconds (always when fresh)"""
+        now = time.monotonic()
+        with self._lock:
+            if not fresh and self._generation is not None and now - self._generation_checked < self.generation_ttl:
+                return self._generation
+        
+        generation = fetch_load_generation()
+        with self._lock:
+            if generation is None:
+                return None
+            if generation != self._generation:
+                if self._generation is not None:
+                    self._entries.clear()
+                    self._bytes = 0
+                    self._counters["invalidations"] += 1
+                    self._remove_stale_files(generation)
+                self._generation = generation
+            self._generation_checked = now
+            return generation
+    
+    def _disk_path(self, generation: int, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{generation}_{key}.parquet")
+    
+    def _remove_stale_files(self, generation: int):
+        if not self.cache_dir:
+            return
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".parquet") and not name.startswith(f"{generation}_"):
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+    
+    def _serialize(self, df: pd.DataFrame):
+        buffer = io.BytesIO()
+        try:
+            df.to_parquet(buffer, index=False)
+            return "parquet", buffer.getvalue()
+        except ImportError:
+            # No Parquet engine installed - fall back to pickled frames
+            return "pickle", pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL)
+    
+    @staticmethod
+    def _deserialize(fmt: str, payload: bytes) -> pd.DataFrame:
+        if fmt == "parquet":
+            return pd.read_parquet(io.BytesIO(payload))
+        return pickle.loads(payload)
+    
+    def _remember(self, key: str, fmt: str, payload: bytes):
+        """Add an entry and evict least recently used ones (caller holds the lock)"""
+        if key in self._entries:
+            self._bytes -= len(self._entries.pop(key)[1])
+        self._entries[key] = (fmt, payload)
+        self._bytes += len(payload)
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+            self._counters["evictions"] += 1
+    
+    def get(self, query: str, params: Optional[tuple] = None) -> tuple:
+        """Return (DataFrame or None, generation the lookup was made under)"""
+        generation = self.current_generation()
+        if generation is None:
+            return None, None
+        key = self.cache_key(query, params)
+        
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._counters["hits"] += 1
+        if entry is not None:
+            return self._deserialize(*entry), generation
+        
+        if self.cache_dir:
+            path = self._disk_path(generation, key)
+            if os.path.exists(path):
+                try:
+                    with open(path, "rb") as f:
+                        payload = f.read()
+                    df = self._deserialize("parquet", payload)
+                    with self._lock:
+                        self._remember(key, "parquet", payload)
+                        self._counters["disk_hits"] += 1
+                    return df, generation
+                except Exception:
+                    pass
+        
+        with self._lock:
+            self._counters["misses"] += 1
+        return None, generation
+    
+    def put(self, query: str, df: pd.DataFrame, generation: Optional[int], params: Optional[tuple] = None):
+        """Store a result computed under generation, unless a load has happened since"""
+        if generation is None:
+            return
+        # A load that committed while the query ran may be in the result; the
+        # generation read before the query would then label newer data
+        if self.current_generation(fresh=True) != generation:
+            with self._lock:
+                self._counters["load_races"] += 1
+            return
+        try:
+            fmt, payload = self._serialize(df)
+        except Exception:
+            with self._lock:
+                self._counters["serialization_errors"] += 1
+            return
+        if len(payload) > self.max_bytes:
+            return
+        key = self.cache_key(query, params)
+        
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._remember(key, fmt, payload)
+            self._counters["stores"] += 1
+        
+        if self.cache_dir and fmt == "parquet":
+            try:
+                with open(self._disk_path(generation, key), "wb") as f:
+                    f.write(payload)
+            except OSError as e:
+                print(f"Warning: could not write result cache file: {str(e)}")
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._generation = None
+            self._counters["invalidations"] += 1
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["disk_hits"] + self._counters["misses"]
+            hits = self._counters["hits"] + self._counters["disk_hits"]
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "load_generation": self._generation,
+                "disk_tier": bool(self.cache_dir),
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                **self._counters
+            }
+
+
+result_cache = QueryResultCache()
+
+
+# ============================================================================
+# Query Execution
+# ============================================================================
+
+def where_clause(filters: Dict[str, Any], alias: str = "") -> tuple:
+    """
+    WHERE clause with ? parameter markers for the filters that are set, and
+    its parameter values. List values become IN (?, ...). Values are bound,
+    never interpolated, so every study/site shares one cached plan.
+    """
+    prefix = f"{alias}." if alias else ""
+    clauses, params = [], []
+    for column, value in filters.items():
+        if value is None or value == "" or value == []:
+            continue
+        if isinstance(value, (list, tuple, set)):
+            values = list(value)
+            clauses.append(f"{prefix}{column} IN ({', '.join('?' for _ in values)})")
+            params.extend(values)
+        else:
+            clauses.append(f"{prefix}{column} = ?")
+            params.append(value)
+    return ("WHERE " + " AND ".join(clauses) if clauses else ""), tuple(params)
+
+
+def keyset_clause(columns: List[str], after: Optional[List[Any]]) -> tuple:
+    """
+    Predicate for rows that sort after the key `after` (ascending on every
+    column), and its parameter values. The leading column is also bounded on
+    its own so the index seek starts at the cursor instead of at the first row.
+    """
+    if not after:
+        return "", ()
+    branches, params = [], [after[0]]
+    for i, column in enumerate(columns):
+        terms = [f"{previous} = ?" for previous in columns[:i]] + [f"{column} > ?"]
+        branches.append("(" + " AND ".join(terms) + ")")
+        params.extend(after[:i + 1])
+    return f"{columns[0]} >= ? AND ({' OR '.join(branches)})", tuple(params)
+
+
+def encode_cursor(values: List[Any]) -> str:
+    """Opaque page cursor for a keyset (the last row's sort key)"""
+    raw = json.dumps(values, default=json_default, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], size: int) -> Optional[List[Any]]:
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        values = None
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+class QueryTimings:
+    """Execution count, time and rows per distinct SQL statement (parameters excluded)"""
+    
+    def __init__(self, max_statements: int = QUERY_STATS_MAX_STATEMENTS):
+        self.max_statements = max_statements
+        self._statements = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def record(self, query: str, duration_ms: float, rows: int = 0, error: bool = False):
+        sql = QueryResultCache.normalize_sql(query)
+        with self._lock:
+            entry = self._statements.get(sql)
+            if entry is None:
+                entry = {"calls": 0, "errors": 0, "rows": 0, "total_ms": 0.0, "max_ms": 0.0}
+                self._statements[sql] = entry
+                while len(self._statements) > self.max_statements:
+                    self._statements.popitem(last=False)
+            else:
+                self._statements.move_to_end(sql)
+            entry["calls"] += 1
+            entry["errors"] += int(error)
+            entry["rows"] += rows
+            entry["total_ms"] += duration_ms
+            entry["max_ms"] = max(entry["max_ms"], duration_ms)
+    
+    def stats(self, top: int = 20) -> Dict[str, Any]:
+        with self._lock:
+            items = [(sql, dict(entry)) for sql, entry in self._statements.items()]
+        items.sort(key=lambda item: item[1]["total_ms"], reverse=True)
+        return {
+            "statements": len(items),
+            "slowest": [
+                {
+                    "sql": sql[:300],
+                    **entry,
+                    "total_ms": round(entry["total_ms"], 1),
+                    "avg_ms": round(entry["total_ms"] / entry["calls"], 2) if entry["calls"] else 0.0,
+                    "max_ms": round(entry["max_ms"], 1)
+                }
+                for sql, entry in items[:top]
+            ]
+        }
+
+
+query_timings = QueryTimings()
+
+
+def run_statement(conn, query: str, params: tuple = ()) -> pd.DataFrame:
+    """Execute on the connection's prepared cursor for this SQL text and fetch the result"""
+    start = time.perf_counter()
+    cursor = db_pool.prepared(conn, query)
+    try:
+        with telemetry.span("db.query"):
+            if params:
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
+            columns = [col[0] for col in cursor.description] if cursor.description else []
+            rows = [tuple(row) for row in cursor.fetchall()] if columns else []
+    except Exception:
+        db_pool.forget_statement(conn, query)
+        query_timings.record(query, (time.perf_counter() - start) * 1000, error=True)
+        raise
+    query_timings.record(query, (time.perf_counter() - start) * 1000, len(rows))
+    db_rows_returned.observe(len(rows))
+    with telemetry.span("serialize.dataframe"):
+        return pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+
+
+def execute_query(query: str, params: Optional[tuple] = None, use_cache: bool = True) -> pd.DataFrame:
+    """Execute a SQL query (with ? parameters) on a pooled connection and return DataFrame"""
+    params = tuple(params or ())
+    generation = None
+    cacheable = use_cache and result_cache.is_cacheable(query)
+    if cacheable:
+        with telemetry.span("db.result_cache"):
+            cached, generation = result_cache.get(query, params)
+        if cached is not None:
+            return cached
+    
+    with db_pool.connection() as conn:
+        if not conn:
+            # Return mock data for testing without database
+            return get_mock_data(query)
+        try:
+            df = run_statement(conn, query, params)
         except Exception as e:
             raise Exception(f"Database error: {str(e)}")
-    else:
-        # Return mock data for testing without database
-        return get_mock_data(query)
+    # Stored after the connection is back: put re-reads the generation on a pooled connection
+    if cacheable:
+        result_cache.put(query, df, generation, params)
+    return df
+
+
+async def execute_query_async(query: str, params: Optional[tuple] = None) -> pd.DataFrame:
+    """Execute SQL query on the DB worker pool without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(db_executor, execute_query, query, params)
 
 
 def get_mock_data(query: str) -> pd.DataFrame:
     """Return mock data for testing"""
     query_lower = query.lower()
     
-    if 'agg_site_performance' in query_lower or 'site' in query_lower:
+    if query == SNAPSHOT_QUERY:
+        # Subject-level rows for the analytics engine, spread over the mock sites below
+        return get_mock_subject_metrics()
+    elif 'agg_site_performance' in query_lower or 'site' in query_lower:
         return pd.DataFrame({
             'study_id': ['STUDY001'] * 5,
             'site_id': ['SITE-001', 'SITE-002', 'SITE-003', 'SITE-004', 'SITE-005'],
@@ -97,21 +1010,404 @@ def get_mock_data(query: str) -> pd.DataFrame:
             'total_open_queries': [3, 34, 18, 19, 8]
         })
     elif 'fact_subject_metrics' in query_lower:
-        return pd.DataFrame({
-            'study_id': ['STUDY001'] * 10,
-            'site_id': ['SITE-001'] * 10,
-            'subject_id': [f'SUB-{i:04d}' for i in range(1, 11)],
-            'data_quality_index': [92, 88, 75, 68, 45, 82, 91, 55, 78, 85],
-            'is_clean_patient': [1, 1, 0, 0, 0, 1, 1, 0, 0, 1],
-            'total_queries': [0, 1, 5, 8, 15, 2, 0, 12, 4, 1],
-            'missing_visits': [0, 0, 2, 3, 5, 1, 0, 4, 1, 0]
-        })
+        return get_mock_subject_metrics()
     else:
         return pd.DataFrame({
             'result': ['No data available for this query']
         })
 
 
+def get_mock_subject_metrics() -> pd.DataFrame:
+    """Mock gold.fact_subject_metrics rows: two subjects per mock site"""
+    return pd.DataFrame({
+        'study_id': ['STUDY001'] * 10,
+        'site_id': [f'SITE-{i:03d}' for i in (1, 1, 2, 2, 3, 3, 4, 4, 5, 5)],
+        'subject_id': [f'SUB-{i:04d}' for i in range(1, 11)],
+        'region': ['US', 'US', 'EU', 'EU', 'EU', 'EU', 'ASIA', 'ASIA', 'US', 'US'],
+        'country': ['USA', 'USA', 'Germany', 'Germany', 'France', 'France', 'Japan', 'Japan', 'Canada', 'Canada'],
+        'data_quality_index': [92, 88, 75, 68, 45, 82, 91, 55, 78, 85],
+        'is_clean_patient': [1, 1, 0, 0, 0, 1, 1, 0, 0, 1],
+        'total_queries': [0, 1, 5, 8, 15, 2, 0, 12, 4, 1],
+        'dm_queries': [0, 1, 3, 5, 9, 1, 0, 7, 2, 1],
+        'clinical_queries': [0, 0, 1, 2, 3, 1, 0, 3, 1, 0],
+        'medical_queries': [0, 0, 1, 0, 2, 0, 0, 1, 0, 0],
+        'safety_queries': [0, 0, 0, 1, 1, 0, 0, 1, 1, 0],
+        'coding_queries': [0] * 10,
+        'site_queries': [0] * 10,
+        'field_monitor_queries': [0] * 10,
+        'missing_visits': [0, 0, 2, 3, 5, 1, 0, 4, 1, 0],
+        'expected_visits': [12] * 10,
+        'missing_pages': [0, 0, 1, 2, 4, 0, 0, 3, 1, 0],
+        'pages_non_conformant': [0, 0, 0, 1, 2, 0, 0, 1, 0, 0],
+        'crfs_require_sdv': [20] * 10,
+        'forms_verified': [20, 20, 15, 12, 5, 18, 20, 8, 14, 19],
+        'crfs_overdue_90': [0, 0, 0, 1, 2, 0, 0, 1, 0, 0],
+        'pds_confirmed': [0, 0, 1, 0, 1, 0, 0, 1, 0, 0],
+        'uncoded_terms': [0, 0, 1, 2, 3, 0, 0, 2, 1, 0]
+    })
+
+
+# In-memory snapshot of gold.fact_subject_metrics for risk scores and dashboards
+analytics = AnalyticsEngine(
+    loader=lambda: execute_query(SNAPSHOT_QUERY, use_cache=False),
+    generation=result_cache.current_generation
+)
+
+
+# ============================================================================
+# Streaming Results
+# ============================================================================
+
+STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "arrow": "application/vnd.apache.arrow.stream"
+}
+
+# Gold views that may be exported in full through /api/export/{view}
+EXPORT_VIEWS = {
+    "fact_subject_metrics",
+    "fact_query_metrics",
+    "vw_query_aging",
+    "fact_sdv_status",
+    "fact_missing_visits",
+    "fact_missing_pages",
+    "fact_non_conformant",
+    "fact_signature_status",
+    "fact_sae_dashboard",
+    "fact_coding_status",
+    "fact_lab_issues",
+    "fact_inactivated_records",
+    "fact_protocol_deviations",
+    "fact_crf_lock_freeze",
+    "fact_edrr_issues",
+    "agg_site_performance",
+    "agg_country_performance",
+    "agg_study_summary",
+    "vw_action_items",
+    "vw_site_metric_trend"
+}
+
+
+def negotiate_stream_format(format: Optional[str], accept: Optional[str]) -> Optional[str]:
+    """Pick a streaming format from the format parameter or Accept header (None = regular JSON)"""
+    if format:
+        format = format.lower()
+        if format == "json":
+            return None
+        if format not in STREAM_MEDIA_TYPES:
+            raise HTTPException(status_code=400, detail=f"Unsupported format '{format}'. Use json, ndjson or arrow")
+        return format
+    for name, media_type in STREAM_MEDIA_TYPES.items():
+        if accept and media_type in accept:
+            return name
+    return None
+
+
+class QueryStream:
+    """Row stream read from a cursor in fetchmany batches, holding one pooled connection until closed"""
+    
+    def __init__(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        fetch_size: int = STREAM_FETCH_SIZE,
+        guarded: bool = False
+    ):
+        self.query = query
+        self.params = tuple(params or ())
+        self.fetch_size = fetch_size
+        # Generated SQL: cost ceiling, query timeout and a row cap
+        self.guarded = guarded
+        self.columns: List[tuple] = []  # (name, python type) per column
+        self._remaining = SQL_GUARD_MAX_ROWS if guarded else None
+        self._conn = None
+        self._cursor = None
+        self._mock_rows = None
+    
+    def open(self):
+        """Execute the query; column metadata is available afterwards"""
+        self._conn = db_pool.acquire()
+        if self._conn is None:
+            # Mock mode: stream the mock DataFrame through the same interface
+            df = get_mock_data(self.query)
+            self.columns = [(name, self._dtype_to_type(dtype)) for name, dtype in df.dtypes.items()]
+            self._mock_rows = df.itertuples(index=False, name=None)
+            return
+        try:
+            if self.guarded:
+                GuardedQuery(self.query).check_cost(self._conn)
+                self._cursor = timed_cursor(self._conn, SQL_GUARD_TIMEOUT)
+            else:
+                self._cursor = self._conn.cursor()
+            if self.params:
+                self._cursor.execute(self.query, self.params)
+            else:
+                self._cursor.execute(self.query)
+            self.columns = [(col[0], col[1]) for col in self._cursor.description]
+        except SQLGuardError:
+            self.close()
+            raise
+        except Exception as e:
+            self.close(failed=True)
+            raise Exception(f"Database error: {str(e)}")
+    
+    @staticmethod
+    def _dtype_to_type(dtype) -> type:
+        if pd.api.types.is_bool_dtype(dtype):
+            return bool
+        if pd.api.types.is_integer_dtype(dtype):
+            return int
+        if pd.api.types.is_float_dtype(dtype):
+            return float
+        if pd.api.types.is_datetime64_any_dtype(dtype):
+            return datetime
+        return str
+    
+    def fetch(self) -> List[tuple]:
+        """Next batch of rows; empty when the result set is exhausted"""
+        if self._mock_rows is not None:
+            batch = []
+            for row in self._mock_rows:
+                batch.append(row)
+                if len(batch) >= self.fetch_size:
+                    break
+            return batch
+        if self._cursor is None:
+            return []
+        size = self.fetch_size
+        if self._remaining is not None:
+            size = min(size, self._remaining)
+            if size <= 0:
+                sql_guard.count("truncated")
+                self.close()
+                return []
+        try:
+            rows = [tuple(row) for row in self._cursor.fetchmany(size)]
+            if self._remaining is not None:
+                self._remaining -= len(rows)
+            return rows
+        except Exception as e:
+            self.close(failed=True)
+            raise Exception(f"Database error: {str(e)}")
+    
+    def close(self, failed: bool = False):
+        """Release the cursor and return the connection to the pool"""
+        if self._cursor is not None:
+            try:
+                self._cursor.close()
+            except Exception:
+                pass
+            self._cursor = None
+        if self._conn is not None:
+            db_pool.release(self._conn, discard=failed and not db_pool._is_healthy(self._conn))
+            self._conn = None
+        self._mock_rows = None
+
+
+def json_default(value):
+    """JSON encoder for driver value types"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (np.integer, np.floating, np.bool_)):
+        return value.item()
+    if isinstance(value, bytes):
+        return value.hex()
+    return str(value)
+
+
+class NDJSONEncoder:
+    """One JSON object per row, newline-delimited"""
+    
+    def __init__(self, columns: List[tuple]):
+        self.names = [name for name, _ in columns]
+    
+    def header(self) -> bytes:
+        return b""
+    
+    def encode(self, rows: List[tuple]) -> bytes:
+        names = self.names
+        lines = [json.dumps(dict(zip(names, row)), default=json_default) for row in rows]
+        return ("\n".join(lines) + "\n").encode("utf-8")
+    
+    def footer(self) -> bytes:
+        return b""
+
+
+class ArrowEncoder:
+    """Arrow IPC stream: schema message, one record batch per fetch, end-of-stream marker"""
+    
+    def __init__(self, columns: List[tuple]):
+        import pyarrow as pa
+        self.pa = pa
+        type_map = {
+            bool: pa.bool_(),
+            int: pa.int64(),
+            float: pa.float64(),
+            Decimal: pa.float64(),
+            datetime: pa.timestamp("us"),
+            date: pa.date32(),
+            bytes: pa.binary(),
+            bytearray: pa.binary()
+        }
+        self.schema = pa.schema([(name, type_map.get(col_type, pa.string())) for name, col_type in columns])
+        self._sink = io.BytesIO()
+        self._writer = pa.ipc.new_stream(self._sink, self.schema)
+    
+    def _drain(self) -> bytes:
+        data = self._sink.getvalue()
+        self._sink.seek(0)
+        self._sink.truncate()
+        return data
+    
+    def header(self) -> bytes:
+        return self._drain()
+    
+    def _column(self, values: list, field):
+        pa = self.pa
+        if pa.types.is_floating(field.type):
+            values = [float(v) if v is not None else None for v in values]
+        elif pa.types.is_string(field.type):
+            values = [str(v) if v is not None else None for v in values]
+        return pa.array(values, type=field.type)
+    
+    def encode(self, rows: List[tuple]) -> bytes:
+        arrays = [self._column(list(values), field) for values, field in zip(zip(*rows), self.schema)]
+        self._writer.write_batch(self.pa.RecordBatch.from_arrays(arrays, schema=self.schema))
+        return self._drain()
+    
+    def footer(self) -> bytes:
+        self._writer.close()
+        return self._drain()
+
+
+def sse_event(event: str, data: Any) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=json_default)}\n\n"
+
+
+def sse_response(metrics: Dict[str, Any], chunks) -> StreamingResponse:
+    """Server-Sent Events: the metrics payload first, then LLM text chunks as they arrive"""
+    
+    async def body():
+        yield sse_event("metrics", metrics)
+        started = time.perf_counter()
+        try:
+            # chunks is a blocking generator; each step runs in the threadpool
+            async for text in iterate_in_threadpool(chunks):
+                yield sse_event("token", {"text": text})
+        except Exception as e:
+            yield sse_event("error", {"detail": f"AI processing error: {str(e)}"})
+            return
+        yield sse_event("done", {
+            "generated_at": datetime.now().isoformat(),
+            "generation_ms": round((time.perf_counter() - started) * 1000, 1)
+        })
+    
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+async def open_query_stream(
+    query: str,
+    format: str,
+    params: Optional[tuple] = None,
+    guarded: bool = False
+) -> StreamingResponse:
+    """Execute a query and stream its rows as NDJSON or Arrow IPC without materializing the result"""
+    loop = asyncio.get_running_loop()
+    stream = QueryStream(query, params, guarded=guarded)
+    # Open before responding so query errors still surface as HTTP errors
+    await loop.run_in_executor(db_executor, stream.open)
+    
+    try:
+        encoder = ArrowEncoder(stream.columns) if format == "arrow" else NDJSONEncoder(stream.columns)
+    except ImportError:
+        db_executor.submit(stream.close)
+        raise HTTPException(status_code=406, detail="Arrow streaming requires pyarrow")
+    
+    async def body():
+        try:
+            yield encoder.header()
+            while True:
+                rows = await loop.run_in_executor(db_executor, stream.fetch)
+                if not rows:
+                    break
+                with telemetry.span(f"serialize.{format}"):
+                    chunk = encoder.encode(rows)
+                yield chunk
+            yield encoder.footer()
+        finally:
+            # Runs on completion and on client disconnect
+            db_executor.submit(stream.close)
+    
+    return StreamingResponse(body(), media_type=STREAM_MEDIA_TYPES[format])
+
+
+# ============================================================================
+# Execution Engine
+# ============================================================================
+
+class ExecutionPlan:
+    """Dependency graph of async stages; each stage starts as soon as its inputs are ready"""
+    
+    def __init__(self):
+        # name -> (coroutine function, names of stages whose results it takes)
+        self._stages: Dict[str, tuple] = {}
+        self.timings: Dict[str, Dict[str, float]] = {}
+    
+    def stage(self, name: str, fn, *depends_on: str) -> "ExecutionPlan":
+        """Register a stage; fn receives the results of depends_on positionally"""
+        for dep in depends_on:
+            if dep not in self._stages:
+                raise ValueError(f"Stage '{name}' depends on unknown stage '{dep}'")
+        self._stages[name] = (fn, depends_on)
+        return self
+    
+    def db(self, name: str, query: str, *depends_on: str, params: Optional[tuple] = None) -> "ExecutionPlan":
+        """Register a stage that runs a (parameterized) SQL query on the DB worker pool"""
+        return self.stage(name, lambda *_: execute_query_async(query, params), *depends_on)
+    
+    def llm(self, name: str, fn, *depends_on: str) -> "ExecutionPlan":
+        """Register a stage that runs a blocking LLM call in the threadpool"""
+        return self.stage(name, lambda *inputs: run_in_threadpool(fn, *inputs), *depends_on)
+    
+    async def run(self) -> Dict[str, Any]:
+        """Run all stages concurrently, respecting dependencies; returns results by stage name"""
+        plan_start = time.perf_counter()
+        tasks: Dict[str, asyncio.Task] = {}
+        
+        async def run_stage(name: str):
+            fn, depends_on = self._stages[name]
+            inputs = await asyncio.gather(*(tasks[dep] for dep in depends_on))
+            started = time.perf_counter()
+            try:
+                return await fn(*inputs)
+            finally:
+                finished = time.perf_counter()
+                self.timings[name] = {
+                    "start_ms": round((started - plan_start) * 1000, 1),
+                    "duration_ms": round((finished - started) * 1000, 1)
+                }
+        
+        # Stages are registered after their dependencies, so tasks exist before they are awaited
+        for name in self._stages:
+            tasks[name] = asyncio.ensure_future(run_stage(name))
+        try:
+            results = await asyncio.gather(*tasks.values())
+        except Exception:
+            for task in tasks.values():
+                task.cancel()
+            raise
+        finally:
+            self.timings["total"] = {"start_ms": 0.0, "duration_ms": round((time.perf_counter() - plan_start) * 1000, 1)}
+        return dict(zip(tasks.keys(), results))
+
+
 # ============================================================================
 # Schema Context for Gemini
 # ============================================================================
@@ -140,7 +1436,8 @@ FACT VIEWS:
   * data_quality_index (0-100 score, higher is better)
   * is_clean_patient (1=clean, 0=not clean)
 
-- gold.fact_query_metrics: Query tracking with days_since_open, query_status, query_age_bucket
+- gold.fact_query_metrics: One row per query with days_since_open, query_status, query_age_bucket
+  (use only when individual queries are needed)
 - gold.fact_sdv_status: SDV verification tracking
 - gold.fact_missing_visits: Overdue visit tracking with days_outstanding
 - gold.fact_sae_dashboard: Safety event tracking
@@ -149,7 +1446,18 @@ AGGREGATE VIEWS:
 - gold.agg_site_performance: Site-level KPIs (avg_data_quality_index, total_open_queries, pct_clean_subjects)
 - gold.agg_country_performance: Country-level KPIs
 - gold.agg_study_summary: Study executive summary with submission_readiness
-- gold.vw_action_items: Prioritized action list (priority, action_type, responsible_party)
+- gold.vw_query_aging: Query counts per study_id, site_id, form_name, action_owner, marking_group_name,
+  query_status and query_age_bucket ('0-7 Days' .. '60+ Days') with query_count, responded_count,
+  avg_days_to_response, oldest_open_date, max_days_since_open; use for query aging counts and distributions
+- gold.vw_action_items: Prioritized action list (priority 'P1' critical .. 'P4' low, action_type, action_category, item_count, responsible_party)
+
+TREND VIEWS (daily history; use for trend / over time questions):
+- gold.vw_site_metric_trend: One row per site per snapshot_date with week_start_date, month_start_date, year_month,
+  study_id, site_id, region, country, subjects, avg_data_quality_index, open_queries, safety_queries,
+  missing_visits, pct_sdv_complete, pct_clean_subjects
+- gold.agg_site_metrics_snapshot: Same history as additive measures (dqi_sum, dqi_count, open_queries,
+  sdv_required, sdv_verified, clean_subjects, subjects); roll up with SUM(dqi_sum) / SUM(dqi_count)
+- gold.dim_calendar: date_key, week_start_date, month_start_date, year_month, quarter_num, year_num, is_weekend
 
 Key metrics to know:
 - Data Quality Index (DQI): 0-100, higher is better (>=90 excellent, >=75 good, >=50 fair, <50 poor)
@@ -162,53 +1470,832 @@ Key metrics to know:
 
 
 # ============================================================================
-# Pydantic Models
+# Prompt Assembly
 # ============================================================================
 
-class NLQueryRequest(BaseModel):
-    question: str
-    study_id: Optional[str] = None
-    include_sql: bool = False
-
-
-class ReportRequest(BaseModel):
-    study_id: str
-    site_id: str
-    report_type: str = "full"
+def compact_value(value: Any, digits: int = PROMPT_FLOAT_DIGITS) -> Any:
+    """Round floats and unwrap numpy/driver scalars, recursively"""
+    if isinstance(value, dict):
+        return {k: compact_value(v, digits) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [compact_value(v, digits) for v in value]
+    if isinstance(value, (np.integer, np.floating, np.bool_)):
+        value = value.item()
+    if isinstance(value, Decimal):
+        value = float(value)
+    if isinstance(value, float):
+        if value != value:  # NaN
+            return None
+        rounded = round(value, digits)
+        return int(rounded) if rounded.is_integer() else rounded
+    return value
+
+
+def compact_json(value: Any) -> str:
+    """JSON without indentation or spaces, numerics rounded"""
+    return json.dumps(compact_value(value), separators=(",", ":"), default=json_default)
+
+
+class PromptTable:
+    """DataFrame rendered as columnar JSON; shrinks by halving the rows shown"""
+    
+    def __init__(self, df: pd.DataFrame, max_rows: int = 20):
+        self.df = df
+        self.rows = min(max_rows, len(df))
+    
+    def render(self) -> str:
+        shown = self.df.head(self.rows)
+        text = compact_json({col: shown[col].tolist() for col in shown.columns})
+        omitted = len(self.df) - self.rows
+        if omitted > 0:
+            text += f"\n(+{omitted} more rows not shown)"
+        return text
+    
+    def shrink(self) -> bool:
+        if self.rows <= 1:
+            return False
+        self.rows //= 2
+        return True
 
 
-class NLQueryResponse(BaseModel):
-    answer: str
-    data: Optional[List[Dict]] = None
-    sql_query: Optional[str] = None
-    visualization_hint: Optional[str] = None
+class PromptSchema:
+    """Schema fragments ranked by relevance; shrinks by dropping the least relevant one"""
+    
+    def __init__(self, fragments: List[tuple], required: int, inline: bool = True):
+        # fragments: (section header, text) in relevance order; the first `required` are never dropped
+        self.fragments = fragments
+        self.required = required
+        self.inline = inline
+    
+    def render(self) -> str:
+        if not self.inline:
+            # Full schema is already in the provider-side cached context
+            return ""
+        selected = set(text for _, text in self.fragments)
+        lines = [SCHEMA_PREAMBLE]
+        for header, texts in SCHEMA_SECTIONS:
+            chosen = [text for text in texts if text in selected]
+            if chosen:
+                lines.append(f"\n{header}")
+                lines.extend(chosen)
+        lines.append(f"\n{SCHEMA_GLOSSARY}")
+        return "\n".join(lines)
+    
+    def shrink(self) -> bool:
+        if len(self.fragments) <= self.required:
+            return False
+        self.fragments = self.fragments[:-1]
+        return True
+
+
+def parse_schema_context(schema: str) -> tuple:
+    """Split SCHEMA_CONTEXT into preamble, [(section header, [object fragments])] and glossary"""
+    body, _, glossary = schema.strip().partition("Key metrics to know:")
+    preamble, sections = [], []
+    for line in body.splitlines():
+        stripped = line.strip()
+        if not stripped:
+            continue
+        if stripped.startswith("- gold."):
+            sections[-1][1].append(line)
+        elif line.startswith("  ") and sections and sections[-1][1]:
+            sections[-1][1][-1] += "\n" + line
+        elif stripped.endswith(":") and stripped.upper() == stripped:
+            sections.append((stripped, []))
+        else:
+            preamble.append(line)
+    return "\n".join(preamble), sections, ("Key metrics to know:" + glossary).rstrip()
+
+
+SCHEMA_PREAMBLE, SCHEMA_SECTIONS, SCHEMA_GLOSSARY = parse_schema_context(SCHEMA_CONTEXT)
+
+# Question words that should pull in schema objects whose text uses a different term
+SCHEMA_SYNONYMS = {
+    "safety": {"sae"},
+    "sae": {"safety"},
+    "adverse": {"sae", "safety"},
+    "verification": {"sdv"},
+    "verified": {"sdv"},
+    "visit": {"missing_visits"},
+    "overdue": {"missing_visits", "days_outstanding"},
+    "action": {"action_items"},
+    "priority": {"action_items"},
+    "readiness": {"submission_readiness"},
+    "submission": {"submission_readiness"},
+    "aging": {"query_age_bucket"},
+    "older": {"aging"},
+    "oldest": {"aging"},
+    "trend": {"snapshot_date"},
+    "history": {"snapshot_date"},
+    "over": {"snapshot_date"},
+    "weekly": {"week_start_date"},
+    "monthly": {"month_start_date"},
+    "age": {"query_age_bucket"},
+    "clean": {"pct_clean_subjects"},
+}
 
 
-class InsightResponse(BaseModel):
-    summary: str
-    key_findings: List[str]
-    recommendations: List[str]
-    risk_areas: List[Dict[str, Any]]
-    timestamp: str
+def schema_terms(text: str) -> set:
+    """Lower-cased word stems of a question or schema fragment"""
+    terms = set()
+    for word in re.findall(r"[a-z0-9_]+", text.lower()):
+        for part in {word, *word.split("_")}:
+            if len(part) < 3:
+                continue
+            if part.endswith("ies") and len(part) > 4:
+                part = part[:-3] + "y"
+            elif part.endswith("s") and len(part) > 3:
+                part = part[:-1]
+            terms.add(part)
+    return terms
 
 
-# ============================================================================
-# AI Functions
+class SchemaContextCache:
+    """Provider-side cached content holding SCHEMA_CONTEXT; falls back to inline schema on any failure"""
+    
+    def __init__(
+        self,
+        enabled: bool = PROMPT_CONTEXT_CACHE,
+        ttl: float = PROMPT_CONTEXT_CACHE_TTL,
+        min_tokens: int = PROMPT_CONTEXT_CACHE_MIN_TOKENS
+    ):
+        self.enabled = enabled
+        self.ttl = ttl
+        schema_tokens = estimate_tokens(SCHEMA_CONTEXT)
+        if enabled and schema_tokens < min_tokens:
+            # The provider refuses cached content this small; do not fail a create per refresh
+            print(
+                f"Warning: schema context (~{schema_tokens} tokens) is below the {min_tokens} token "
+                "minimum for cached content. Sending schema inline."
+            )
+            self.enabled = False
+        self._model = None
+        self._expires = 0.0
+        self._lock = threading.Lock()
+    
+    def model(self):
+        """Model bound to the cached schema, or None when prompts must carry the schema inline"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            # Refresh a minute early so a prompt built now never outlives its cache
+            if self._model is not None and time.monotonic() < self._expires - 60:
+                return self._model
+            try:
+                self._model = llm_backend.cached_model(SCHEMA_CONTEXT, self.ttl)
+                self._expires = time.monotonic() + self.ttl
+            except Exception as e:
+                print(f"Warning: schema context caching unavailable ({str(e)}). Sending schema inline.")
+                self.enabled = False
+                self._model = None
+            return self._model
+
+
+class Prompt(str):
+    """Prompt text that remembers which model it was assembled for and its kind"""
+    model = None
+    kind = None
+
+
+class PromptBuilder:
+    """Assembles compact prompts within a token budget and keeps size metrics per prompt kind"""
+    
+    def __init__(
+        self,
+        token_budget: int = PROMPT_TOKEN_BUDGET,
+        max_fragments: int = PROMPT_SCHEMA_FRAGMENTS,
+        context_cache: Optional[SchemaContextCache] = None
+    ):
+        self.token_budget = token_budget
+        self.max_fragments = max_fragments
+        self.context_cache = context_cache or SchemaContextCache()
+        self.full_schema_tokens = estimate_tokens(SCHEMA_CONTEXT)
+        # Cached translations are only valid for the schema they were prompted with
+        self.schema_hash = hashlib.sha256(SCHEMA_CONTEXT.encode("utf-8")).hexdigest()
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Dict[str, int]] = {}
+    
+    def schema(self, question: Optional[str] = None, objects: tuple = ("gold.fact_subject_metrics",)) -> PromptSchema:
+        """Schema fragments for the named objects plus those most relevant to the question"""
+        fragments = [(header, text) for header, texts in SCHEMA_SECTIONS for text in texts]
+        required = [f for f in fragments if any(f[1].lstrip("- ").startswith(obj + ":") for obj in objects)]
+        
+        ranked = []
+        if question:
+            terms = schema_terms(question)
+            for word in list(terms):
+                terms |= SCHEMA_SYNONYMS.get(word, set())
+            for fragment in fragments:
+                if fragment in required:
+                    continue
+                name = fragment[1].split(":")[0]
+                score = 2 * len(terms & schema_terms(name)) + len(terms & schema_terms(fragment[1]))
+                if score:
+                    ranked.append((score, fragment))
+            ranked.sort(key=lambda item: -item[0])
+        
+        selected = required + [fragment for _, fragment in ranked[:self.max_fragments]]
+        return PromptSchema(selected, len(required))
+    
+    def build(self, kind: str, template: str, **fields) -> Prompt:
+        """Fill the template, shrinking tables then schema fragments until within the token budget"""
+        cached_model = None
+        if any(isinstance(value, PromptSchema) for value in fields.values()):
+            cached_model = self.context_cache.model()
+            for value in fields.values():
+                if isinstance(value, PromptSchema):
+                    value.inline = cached_model is None
+        
+        def render() -> str:
+            rendered = {}
+            for name, value in fields.items():
+                if isinstance(value, (PromptTable, PromptSchema)):
+                    rendered[name] = value.render()
+                elif isinstance(value, (dict, list)):
+                    rendered[name] = compact_json(value)
+                else:
+                    rendered[name] = value
+            return template.format(**rendered)
+        
+        # Tables give way before schema fragments
+        shrinkable = [v for v in fields.values() if isinstance(v, PromptTable)]
+        shrinkable += [v for v in fields.values() if isinstance(v, PromptSchema)]
+        text = render()
+        shrunk = False
+        while estimate_tokens(text) > self.token_budget:
+            if not any(item.shrink() for item in shrinkable):
+                break
+            shrunk = True
+            text = render()
+        tokens = estimate_tokens(text)
+        
+        with self._lock:
+            metrics = self._metrics.setdefault(kind, {
+                "prompts": 0, "tokens_total": 0, "tokens_max": 0, "shrunk": 0, "over_budget": 0
+            })
+            metrics["prompts"] += 1
+            metrics["tokens_total"] += tokens
+            metrics["tokens_max"] = max(metrics["tokens_max"], tokens)
+            metrics["shrunk"] += int(shrunk)
+            metrics["over_budget"] += int(tokens > self.token_budget)
+        
+        prompt = Prompt(text)
+        prompt.model = cached_model
+        prompt.kind = kind
+        return prompt
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            kinds = {
+                kind: {**m, "tokens_avg": round(m["tokens_total"] / m["prompts"], 1)}
+                for kind, m in self._metrics.items()
+            }
+        return {
+            "token_budget": self.token_budget,
+            "full_schema_tokens": self.full_schema_tokens,
+            "context_cache": self.context_cache.enabled,
+            "kinds": kinds
+        }
+
+
+prompt_builder = PromptBuilder()
+
+
+# ============================================================================
+# NL-to-SQL Translation Cache
+# ============================================================================
+
+# Words that carry no meaning of their own in a question; every other token
+# (entities, regions, countries, query types, numbers, directions such as
+# "lowest" or "not", and connectives such as "and", "or" and "by") must match
+# in order for a normalized hit
+QUESTION_STOPWORDS = {
+    "a", "an", "the", "of", "in", "on", "at", "for", "to", "from", "with",
+    "is", "are", "was", "were", "be", "do", "does", "did", "have", "has", "there",
+    "what", "which", "who", "how", "many", "much", "me", "my", "i", "we",
+    "show", "list", "give", "get", "find", "display", "tell", "please", "all", "any", "that", "this"
+}
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation"""
+    return re.sub(r"\s+", " ", question.strip().lower()).rstrip(" ?!.")
+
+
+def question_signature(normalized: str) -> tuple:
+    """Content words and numbers of a normalized question, in order"""
+    tokens = re.findall(r"[a-z0-9_-]+(?:\.\d+)?", normalized)
+    return tuple(t for t in tokens if t not in QUESTION_STOPWORDS)
+
+
+class TranslationCache:
+    """
+    Exact + normalized cache of natural language to SQL translations. The
+    normalized tier serves a question whose content words equal a cached
+    question's in the same order, so rewordings that only add or drop
+    stopwords and punctuation hit; paraphrases with other words miss.
+    """
+    
+    def __init__(self, max_size: int = NL_SQL_CACHE_SIZE, ttl: float = NL_SQL_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        
+        # (study_key, normalized_question) -> entry, least recently used first
+        self._entries = OrderedDict()
+        # (study_key, signature) -> key of the latest entry with that signature
+        self._by_signature = {}
+        # Key answered by a normalized hit -> key of the entry that answered it
+        self._served_from = OrderedDict()
+        self._schema_hash = prompt_builder.schema_hash
+        self._lock = threading.Lock()
+        self._counters = {
+            "exact_hits": 0,
+            "normalized_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0
+        }
+    
+    def _check_schema(self):
+        """Drop every entry when the prompt schema has changed (caller holds the lock)"""
+        if prompt_builder.schema_hash != self._schema_hash:
+            self._entries.clear()
+            self._by_signature.clear()
+            self._served_from.clear()
+            self._schema_hash = prompt_builder.schema_hash
+            self._counters["invalidations"] += 1
+    
+    def _remove(self, key: tuple):
+        """Drop an entry and its signature index (caller holds the lock)"""
+        entry = self._entries.pop(key, None)
+        if entry is not None and self._by_signature.get(entry["signature"]) == key:
+            del self._by_signature[entry["signature"]]
+    
+    def _live(self, key: tuple, now: float) -> Optional[dict]:
+        """Unexpired entry for key, or None (caller holds the lock)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if now - entry["created"] > self.ttl:
+            self._remove(key)
+            self._counters["expirations"] += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+    
+    def get(self, question: str, study_id: Optional[str] = None) -> Optional[str]:
+        """Return cached SQL for the question, or None on a miss"""
+        normalized = normalize_question(question)
+        study_key = (study_id or "").strip().upper()
+        key = (study_key, normalized)
+        now = time.monotonic()
+        
+        with self._lock:
+            self._check_schema()
+            
+            # Exact tier
+            entry = self._live(key, now)
+            if entry is not None:
+                self._counters["exact_hits"] += 1
+                return entry["sql"]
+            
+            # Normalized tier
+            source = self._by_signature.get((study_key, question_signature(normalized)))
+            entry = self._live(source, now) if source is not None else None
+            if entry is not None:
+                self._served_from[key] = source
+                while len(self._served_from) > self.max_size:
+                    self._served_from.popitem(last=False)
+                self._counters["normalized_hits"] += 1
+                return entry["sql"]
+            
+            self._counters["misses"] += 1
+            return None
+    
+    def put(self, question: str, study_id: Optional[str], sql: str):
+        """Store a translation, evicting the least recently used entries"""
+        if not sql:
+            return
+        normalized = normalize_question(question)
+        study_key = (study_id or "").strip().upper()
+        key = (study_key, normalized)
+        signature = (study_key, question_signature(normalized))
+        with self._lock:
+            self._check_schema()
+            self._remove(key)
+            self._entries[key] = {"sql": sql, "signature": signature, "created": time.monotonic()}
+            self._by_signature[signature] = key
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+                self._counters["evictions"] += 1
+    
+    def discard(self, question: str, study_id: Optional[str] = None):
+        """Forget a translation (and the entry that served it from the normalized tier), e.g. after the SQL failed"""
+        key = ((study_id or "").strip().upper(), normalize_question(question))
+        with self._lock:
+            self._remove(key)
+            source = self._served_from.pop(key, None)
+            if source is not None:
+                self._remove(source)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_signature.clear()
+            self._served_from.clear()
+            self._counters["invalidations"] += 1
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._counters["exact_hits"] + self._counters["normalized_hits"] + self._counters["misses"]
+            hits = self._counters["exact_hits"] + self._counters["normalized_hits"]
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                **self._counters
+            }
+
+
+nl_sql_cache = TranslationCache()
+
+
+# ============================================================================
+# Generated SQL Guard
+# ============================================================================
+
+# Gold objects the model is shown, plus the views exportable in full
+sql_guard = SQLGuard(
+    set(re.findall(r"gold\.(\w+)", SCHEMA_CONTEXT)) | EXPORT_VIEWS,
+    max_rows=SQL_GUARD_MAX_ROWS,
+    max_cost=SQL_GUARD_MAX_COST
+)
+
+
+def timed_cursor(conn, timeout: int):
+    """New cursor with a driver query timeout (pyodbc applies Connection.timeout as cursors are created)"""
+    if timeout <= 0 or not hasattr(conn, "timeout"):
+        return conn.cursor()
+    previous = conn.timeout
+    conn.timeout = timeout
+    try:
+        return conn.cursor()
+    finally:
+        conn.timeout = previous
+
+
+class GuardedQuery:
+    """
+    One execution of guard-checked SQL: estimated cost ceiling, driver query
+    timeout and a fetch cap. cancel() interrupts it from another thread.
+    """
+    
+    def __init__(self, query: str, max_rows: int = SQL_GUARD_MAX_ROWS, timeout: int = SQL_GUARD_TIMEOUT):
+        self.query = query
+        self.max_rows = max_rows
+        self.timeout = timeout
+        self.cancelled = False
+        self._conn = None
+        self._cursor = None
+        self._lock = threading.Lock()
+    
+    def check_cost(self, conn):
+        """Raise SQLGuardError when the estimated plan cost is over the limit"""
+        if sql_guard.max_cost <= 0:
+            return
+        with telemetry.span("db.showplan"):
+            cost = showplan_cost(conn, self.query)
+        if cost is None:
+            sql_guard.count("cost_unavailable")
+            return
+        sql_guard.count("cost_checked")
+        if cost > sql_guard.max_cost:
+            sql_guard.count("cost_rejected")
+            raise SQLGuardError(
+                f"Estimated query cost {cost:.1f} is over the limit of {sql_guard.max_cost:g}; "
+                f"try a narrower question"
+            )
+    
+    def run(self) -> pd.DataFrame:
+        generation = None
+        cacheable = result_cache.is_cacheable(self.query)
+        if cacheable:
+            with telemetry.span("db.result_cache"):
+                cached, generation = result_cache.get(self.query)
+            if cached is not None:
+                return cached
+        
+        with db_pool.connection() as conn:
+            if not conn:
+                return get_mock_data(self.query)
+            self.check_cost(conn)
+            df = self._execute(conn)
+        if cacheable:
+            result_cache.put(self.query, df, generation)
+        return df
+    
+    def _execute(self, conn) -> pd.DataFrame:
+        start = time.perf_counter()
+        cursor = timed_cursor(conn, self.timeout)
+        with self._lock:
+            self._conn, self._cursor = conn, cursor
+        truncated = False
+        try:
+            if self.cancelled:
+                raise Exception("query cancelled")
+            with telemetry.span("db.query"):
+                cursor.execute(self.query)
+                columns = [col[0] for col in cursor.description] if cursor.description else []
+                rows = [tuple(row) for row in cursor.fetchmany(self.max_rows)] if columns else []
+                truncated = bool(columns) and cursor.fetchone() is not None
+        except Exception as e:
+            query_timings.record(self.query, (time.perf_counter() - start) * 1000, error=True)
+            if not self.cancelled and "HYT00" in str(e):
+                sql_guard.count("timeouts")
+            raise Exception(f"Database error: {str(e)}")
+        finally:
+            with self._lock:
+                self._conn = self._cursor = None
+            if truncated:
+                sql_guard.count("truncated")
+                # Stop the server producing rows nobody will read
+                self._interrupt(conn, cursor)
+            try:
+                cursor.close()
+            except Exception:
+                pass
+        query_timings.record(self.query, (time.perf_counter() - start) * 1000, len(rows))
+        db_rows_returned.observe(len(rows))
+        with telemetry.span("serialize.dataframe"):
+            return pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+    
+    @staticmethod
+    def _interrupt(conn, cursor):
+        try:
+            if hasattr(cursor, "cancel"):
+                cursor.cancel()
+            elif hasattr(conn, "interrupt"):
+                conn.interrupt()
+        except Exception:
+            pass
+    
+    def cancel(self):
+        """Interrupt the running statement (safe to call from any thread)"""
+        with self._lock:
+            self.cancelled = True
+            conn, cursor = self._conn, self._cursor
+        if cursor is not None:
+            self._interrupt(conn, cursor)
+
+
+async def execute_guarded_async(query: str) -> pd.DataFrame:
+    """Run guard-checked SQL on the DB worker pool, cancelling it if it overruns the timeout"""
+    execution = GuardedQuery(query)
+    loop = asyncio.get_running_loop()
+    try:
+        # Backstop for drivers without a query timeout, and for abandoned requests
+        return await asyncio.wait_for(
+            loop.run_in_executor(db_executor, execution.run),
+            execution.timeout + 1
+        )
+    except asyncio.TimeoutError:
+        execution.cancel()
+        sql_guard.count("timeouts")
+        raise Exception(f"Database error: query ran longer than {execution.timeout}s and was cancelled")
+    except asyncio.CancelledError:
+        execution.cancel()
+        raise
+
+
+# ============================================================================
+# Request Coalescing
+# ============================================================================
+
+class SingleFlight:
+    """Concurrent identical requests share one execution (one DB query, one LLM call) and its result"""
+    
+    def __init__(self):
+        # key -> asyncio.Task of the leading request
+        self._flights: Dict[tuple, asyncio.Task] = {}
+        self._counters: Dict[str, Dict[str, int]] = {}
+    
+    @staticmethod
+    def key(endpoint: str, **params) -> tuple:
+        """Endpoint plus parameters normalized so equivalent requests collide"""
+        normalized = tuple(sorted(
+            (name, str(value).strip()) for name, value in params.items()
+            if value is not None and str(value).strip()
+        ))
+        return (endpoint,) + normalized
+    
+    async def run(self, key: tuple, func):
+        """Await func() once per key among concurrent callers; failures are shared too"""
+        counters = self._counters.setdefault(key[0], {"leaders": 0, "coalesced": 0})
+        task = self._flights.get(key)
+        if task is None:
+            counters["leaders"] += 1
+            task = asyncio.ensure_future(func())
+            self._flights[key] = task
+            task.add_done_callback(lambda _: self._flights.pop(key, None))
+        else:
+            counters["coalesced"] += 1
+        # Shielded so a disconnecting caller never cancels the work others are waiting on
+        return await asyncio.shield(task)
+    
+    def stats(self) -> Dict[str, Any]:
+        leaders = sum(c["leaders"] for c in self._counters.values())
+        coalesced = sum(c["coalesced"] for c in self._counters.values())
+        return {
+            "in_flight": len(self._flights),
+            "leaders": leaders,
+            "coalesced": coalesced,
+            "coalesced_rate": round(coalesced / (leaders + coalesced), 4) if leaders + coalesced else 0.0,
+            "endpoints": {endpoint: dict(c) for endpoint, c in self._counters.items()}
+        }
+
+
+single_flight = SingleFlight()
+
+
+# ============================================================================
+# Pydantic Models
+# ============================================================================
+
+class NLQueryRequest(BaseModel):
+    question: str
+    study_id: Optional[str] = None
+    include_sql: bool = False
+
+
+class ReportRequest(BaseModel):
+    study_id: str
+    site_id: str
+    report_type: str = "full"
+
+
+class BatchReportRequest(BaseModel):
+    study_id: Optional[str] = None
+    region: Optional[str] = None
+    site_ids: Optional[List[str]] = None
+    report_type: str = "full"
+
+
+class NLQueryResponse(BaseModel):
+    answer: str
+    data: Optional[List[Dict]] = None
+    sql_query: Optional[str] = None
+    visualization_hint: Optional[str] = None
+    timings: Optional[Dict[str, Dict[str, float]]] = None
+
+
+class InsightResponse(BaseModel):
+    summary: str
+    key_findings: List[str]
+    recommendations: List[str]
+    risk_areas: List[Dict[str, Any]]
+    timestamp: str
+
+
+# ============================================================================
+# LLM Call Resilience
+# ============================================================================
+
+llm_client = LLMClient(
+    AdaptiveLimiter(LLM_CONCURRENCY_INITIAL, LLM_CONCURRENCY_MIN, LLM_CONCURRENCY_MAX, LLM_LATENCY_TARGET),
+    CircuitBreaker(LLM_BREAKER_FAILURES, LLM_BREAKER_RESET),
+    deadlines={
+        "interactive": LLM_DEADLINE_INTERACTIVE,
+        "standard": LLM_DEADLINE_STANDARD,
+        "batch": LLM_DEADLINE_BATCH
+    },
+    retries=LLM_RETRIES,
+    backoff_base=LLM_BACKOFF_BASE,
+    backoff_max=LLM_BACKOFF_MAX,
+    hedge_after=LLM_HEDGE_AFTER,
+    on_queue_wait=lambda seconds, priority: llm_queue_wait_seconds.observe(seconds, priority=priority)
+)
+
+# Answers served when the model is unavailable or returns unparseable JSON;
+# always marked degraded so callers (and the insight store) can tell them apart
+SITE_RECOMMENDATIONS_FALLBACK = {
+    "risk_level": "MEDIUM",
+    "risk_score": 50,
+    "summary": "Unable to fully analyze. Manual review recommended.",
+    "recommendations": [{
+        "priority": "HIGH",
+        "action": "Review site metrics manually and develop improvement plan",
+        "responsible_party": "CRA",
+        "expected_impact": "Identify specific improvement areas",
+        "timeline": "Within 1 week"
+    }],
+    "positive_observations": []
+}
+
+INSIGHTS_FALLBACK = {
+    "overall_status": "UNKNOWN",
+    "summary": "Unable to generate insights. Please check data availability.",
+    "key_findings": [],
+    "risk_areas": [],
+    "recommendations": ["Review data manually"],
+    "submission_readiness": {
+        "status": "UNKNOWN",
+        "blockers": ["Data analysis incomplete"],
+        "estimated_timeline": "TBD"
+    }
+}
+
+
+def degraded_answer(fallback: Dict[str, Any], reason: str) -> Dict[str, Any]:
+    """Copy of a canned fallback answer marked degraded with the reason ("llm_unavailable" or "invalid_json")"""
+    llm_client.count("degraded")
+    return {**json.loads(json.dumps(fallback)), "degraded": True, "degraded_reason": reason}
+
+
+def parse_json_response(response) -> Dict[str, Any]:
+    """JSON object from a model response, tolerating a markdown code fence"""
+    text = response.text.strip()
+    if text.startswith("```json"):
+        text = text[7:]
+    if text.startswith("```"):
+        text = text[3:]
+    if text.endswith("```"):
+        text = text[:-3]
+    parsed = json.loads(text)
+    if not isinstance(parsed, dict):
+        raise ValueError("Expected a JSON object")
+    return parsed
+
+
+def llm_unavailable_error(error: LLMUnavailable) -> HTTPException:
+    """503 with Retry-After for calls refused by the LLM client"""
+    return HTTPException(
+        status_code=503,
+        detail=f"AI service unavailable: {str(error)}",
+        headers={"Retry-After": str(max(1, int(round(error.retry_after))))}
+    )
+
+
+# ============================================================================
+# AI Functions
 # ============================================================================
 
 class ClinicalTrialAI:
     """AI-powered clinical trial analysis using Gemini"""
     
     def __init__(self):
-        self.model = model
+        self.model = llm_backend
+        self.prompts = prompt_builder
+    
+    def generate(self, prompt: str, stream: bool = False):
+        """Send a prompt to the model it was assembled for (cached schema context or plain)"""
+        target = getattr(prompt, "model", None) or self.model
+        kind = getattr(prompt, "kind", None) or "adhoc"
+        llm_prompt_tokens.observe(estimate_tokens(prompt), kind=kind)
+        if stream:
+            return self._timed_stream(kind, target, prompt)
+        with telemetry.span(f"llm.{kind}", prompt_tokens=estimate_tokens(prompt)):
+            response = llm_client.call(
+                lambda timeout: target.generate_content(prompt, stream=False, timeout=timeout)
+            )
+        try:
+            llm_response_tokens.observe(estimate_tokens(response.text), kind=kind)
+        except ValueError:
+            pass
+        return response
+    
+    def _timed_stream(self, kind: str, target, prompt: str):
+        """Streamed response with time to first chunk, total time and response tokens recorded"""
+        start = time.perf_counter()
+        outcome, response_chars, first = "ok", 0, True
+        try:
+            for chunk in llm_client.stream(lambda timeout: target.generate_content(prompt, stream=True, timeout=timeout)):
+                if first:
+                    llm_first_token_seconds.observe(time.perf_counter() - start, kind=kind)
+                    first = False
+                try:
+                    response_chars += len(chunk.text or "")
+                except ValueError:
+                    pass
+                yield chunk
+        except BaseException:
+            outcome = "error"
+            raise
+        finally:
+            telemetry.span_seconds.observe(time.perf_counter() - start, span=f"llm.{kind}.stream", outcome=outcome)
+            llm_response_tokens.observe(max(1, response_chars // 4), kind=kind)
     
     def natural_language_to_sql(self, question: str, study_id: Optional[str] = None) -> str:
         """Convert natural language question to SQL query"""
         
+        cached_sql = nl_sql_cache.get(question, study_id)
+        if cached_sql is not None:
+            return cached_sql
+        
         study_filter = f"Filter by study_id = '{study_id}'" if study_id else "No study filter (query all)"
         
-        prompt = f"""
-{SCHEMA_CONTEXT}
+        prompt = self.prompts.build("nl_to_sql", """
+{schema}
 
 Convert this question to a SQL Server query. Return ONLY the SQL query, no explanations.
 The query should be safe and read-only (SELECT only).
@@ -222,12 +2309,13 @@ Important:
 - Use TOP 100 to limit results
 - Use proper SQL Server syntax
 - Only use tables/views mentioned in the schema above
+- For query counts by age bucket, status, site, form or owner use gold.vw_query_aging and SUM(query_count), not COUNT(*) over gold.fact_query_metrics
 - Return just the SQL, no markdown formatting
 
 SQL Query:
-"""
+""", schema=self.prompts.schema(question), study_filter=study_filter, question=question)
         
-        response = self.model.generate_content(prompt)
+        response = self.generate(prompt)
         sql = response.text.strip()
         
         # Clean up the response
@@ -238,25 +2326,29 @@ SQL Query:
         if sql.endswith("```"):
             sql = sql[:-3]
         
-        return sql.strip()
+        # Raises SQLGuardError (nothing cached) for anything but a bounded gold SELECT
+        sql = sql_guard.check(sql.strip()).sql
+        nl_sql_cache.put(question, study_id, sql)
+        return sql
     
-    def answer_question(self, question: str, data: pd.DataFrame) -> str:
-        """Generate natural language answer from query results"""
-        
-        if data.empty:
-            return "No data found matching your query."
-        
-        # Convert DataFrame to string representation
-        if len(data) > 20:
-            data_str = data.head(20).to_string()
-            data_str += f"\n... and {len(data) - 20} more rows"
-        else:
-            data_str = data.to_string()
+    def stream_text(self, prompt: str):
+        """Yield response text chunks as Gemini generates them"""
+        for chunk in self.generate(prompt, stream=True):
+            try:
+                text = chunk.text
+            except ValueError:
+                # Chunks without text parts (e.g. safety or finish metadata)
+                continue
+            if text:
+                yield text
+    
+    def build_answer_prompt(self, question: str, data: pd.DataFrame) -> str:
+        """Prompt for answering a question from query results"""
         
-        prompt = f"""
-Based on this clinical trial data:
+        return self.prompts.build("answer", """
+Based on this clinical trial data (columnar JSON):
 
-{data_str}
+{data}
 
 Question: {question}
 
@@ -266,18 +2358,37 @@ Provide a clear, concise answer in natural language. Include:
 3. Any concerning trends (if applicable)
 
 Keep the response professional and under 200 words.
-"""
+""", data=PromptTable(data, max_rows=20), question=question)
+    
+    def answer_question(self, question: str, data: pd.DataFrame) -> str:
+        """Generate natural language answer from query results"""
+        
+        if data.empty:
+            return "No data found matching your query."
         
-        response = self.model.generate_content(prompt)
+        response = self.generate(self.build_answer_prompt(question, data))
         return response.text.strip()
     
-    def generate_cra_report(self, study_id: str, site_id: str, site_data: Dict, subject_data: pd.DataFrame) -> str:
-        """Generate AI-powered CRA monitoring report"""
+    def answer_question_stream(self, question: str, data: pd.DataFrame):
+        """Stream the natural language answer chunk by chunk"""
         
-        subject_summary = subject_data.describe().to_string() if not subject_data.empty else "No subject data available"
+        if data.empty:
+            yield "No data found matching your query."
+            return
         
-        prompt = f"""
-{SCHEMA_CONTEXT}
+        yield from self.stream_text(self.build_answer_prompt(question, data))
+    
+    def build_cra_report_prompt(self, study_id: str, site_id: str, site_data: Dict, subject_data: pd.DataFrame) -> str:
+        """Prompt for a CRA monitoring report"""
+        
+        if subject_data.empty:
+            subject_summary = "No subject data available"
+        else:
+            summary = subject_data.describe()
+            subject_summary = PromptTable(summary.reset_index().rename(columns={"index": "stat"}), max_rows=len(summary))
+        
+        return self.prompts.build("cra_report", """
+{schema}
 
 Generate a professional CRA (Clinical Research Associate) monitoring report.
 
@@ -285,9 +2396,9 @@ Study: {study_id}
 Site: {site_id}
 
 Site Metrics:
-{json.dumps(site_data, indent=2, default=str)}
+{site_data}
 
-Subject Summary Statistics:
+Subject Summary Statistics (columnar JSON):
 {subject_summary}
 
 Create a comprehensive report with these sections:
@@ -314,21 +2425,36 @@ Create a comprehensive report with these sections:
 (What should happen before next monitoring visit)
 
 Use professional clinical trial terminology. Be specific with numbers.
-"""
+""",
+            schema=self.prompts.schema(objects=("gold.fact_subject_metrics", "gold.agg_site_performance")),
+            study_id=study_id,
+            site_id=site_id,
+            site_data=site_data,
+            subject_summary=subject_summary
+        )
+    
+    def generate_cra_report(self, study_id: str, site_id: str, site_data: Dict, subject_data: pd.DataFrame) -> str:
+        """Generate AI-powered CRA monitoring report"""
         
-        response = self.model.generate_content(prompt)
+        prompt = self.build_cra_report_prompt(study_id, site_id, site_data, subject_data)
+        response = self.generate(prompt)
         return response.text.strip()
     
+    def generate_cra_report_stream(self, study_id: str, site_id: str, site_data: Dict, subject_data: pd.DataFrame):
+        """Stream the CRA monitoring report chunk by chunk"""
+        
+        yield from self.stream_text(self.build_cra_report_prompt(study_id, site_id, site_data, subject_data))
+    
     def get_site_recommendations(self, site_id: str, metrics: Dict) -> Dict:
         """Generate AI-powered recommendations for a site"""
         
-        prompt = f"""
-{SCHEMA_CONTEXT}
+        prompt = self.prompts.build("recommendations", """
+{schema}
 
 Analyze these metrics for site {site_id} and provide recommendations:
 
 Metrics:
-{json.dumps(metrics, indent=2, default=str)}
+{metrics}
 
 Provide a JSON response with this exact structure:
 {{
@@ -348,40 +2474,23 @@ Provide a JSON response with this exact structure:
 }}
 
 Return ONLY valid JSON, no other text.
-"""
+""", schema=self.prompts.schema(), site_id=site_id, metrics=metrics)
         
-        response = self.model.generate_content(prompt)
+        try:
+            response = self.generate(prompt)
+        except LLMUnavailable:
+            return degraded_answer(SITE_RECOMMENDATIONS_FALLBACK, "llm_unavailable")
         
         try:
-            text = response.text.strip()
-            # Clean JSON from markdown
-            if text.startswith("```json"):
-                text = text[7:]
-            if text.startswith("```"):
-                text = text[3:]
-            if text.endswith("```"):
-                text = text[:-3]
-            return json.loads(text)
-        except:
-            return {
-                "risk_level": "MEDIUM",
-                "risk_score": 50,
-                "summary": "Unable to fully analyze. Manual review recommended.",
-                "recommendations": [{
-                    "priority": "HIGH",
-                    "action": "Review site metrics manually and develop improvement plan",
-                    "responsible_party": "CRA",
-                    "expected_impact": "Identify specific improvement areas",
-                    "timeline": "Within 1 week"
-                }],
-                "positive_observations": []
-            }
+            return parse_json_response(response)
+        except ValueError:
+            return degraded_answer(SITE_RECOMMENDATIONS_FALLBACK, "invalid_json")
     
     def generate_insights(self, study_id: Optional[str] = None) -> Dict:
         """Generate comprehensive data quality insights"""
         
         # Build query
-        where_clause = f"WHERE study_id = '{study_id}'" if study_id else ""
+        where_sql, params = where_clause({"study_id": study_id})
         
         query = f"""
         SELECT 
@@ -396,24 +2505,24 @@ Return ONLY valid JSON, no other text.
             COUNT(DISTINCT site_id) as total_sites,
             COUNT(DISTINCT region) as total_regions
         FROM gold.fact_subject_metrics
-        {where_clause}
+        {where_sql}
         """
         
         try:
-            data = execute_query(query)
+            data = execute_query(query, params)
             metrics = data.iloc[0].to_dict() if not data.empty else {}
         except:
             metrics = {}
         
-        prompt = f"""
-{SCHEMA_CONTEXT}
+        prompt = self.prompts.build("insights", """
+{schema}
 
 Analyze this clinical trial data quality summary and provide insights:
 
 Metrics:
-{json.dumps(metrics, indent=2, default=str)}
+{metrics}
 
-Study Filter: {study_id if study_id else 'All Studies'}
+Study Filter: {study_filter}
 
 Provide a JSON response with this structure:
 {{
@@ -439,32 +2548,18 @@ Provide a JSON response with this structure:
 }}
 
 Return ONLY valid JSON.
-"""
-        
-        response = self.model.generate_content(prompt)
+""",
+            schema=self.prompts.schema(objects=("gold.fact_subject_metrics", "gold.agg_study_summary")),
+            metrics=metrics,
+            study_filter=study_id if study_id else 'All Studies'
+        )
         
         try:
-            text = response.text.strip()
-            if text.startswith("```json"):
-                text = text[7:]
-            if text.startswith("```"):
-                text = text[3:]
-            if text.endswith("```"):
-                text = text[:-3]
-            insights = json.loads(text)
-        except:
-            insights = {
-                "overall_status": "UNKNOWN",
-                "summary": "Unable to generate insights. Please check data availability.",
-                "key_findings": [],
-                "risk_areas": [],
-                "recommendations": ["Review data manually"],
-                "submission_readiness": {
-                    "status": "UNKNOWN",
-                    "blockers": ["Data analysis incomplete"],
-                    "estimated_timeline": "TBD"
-                }
-            }
+            insights = parse_json_response(self.generate(prompt))
+        except LLMUnavailable:
+            insights = degraded_answer(INSIGHTS_FALLBACK, "llm_unavailable")
+        except ValueError:
+            insights = degraded_answer(INSIGHTS_FALLBACK, "invalid_json")
         
         insights["metrics"] = metrics
         insights["timestamp"] = datetime.now().isoformat()
@@ -477,10 +2572,521 @@ Return ONLY valid JSON.
 ai = ClinicalTrialAI()
 
 
+# ============================================================================
+# Batch Report Jobs
+# ============================================================================
+
+class RateLimiter:
+    """Async token bucket: at most `rate` acquisitions per `period` seconds"""
+    
+    def __init__(self, rate: int, period: float = 60.0):
+        self.rate = max(rate, 1)
+        self.period = period
+        self._tokens = float(self.rate)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate / self.period)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) * self.period / self.rate)
+
+
+class BatchReportJob:
+    """State and results of one batch report run"""
+    
+    def __init__(self, request: "BatchReportRequest"):
+        self.job_id = hashlib.sha256(f"{time.time_ns()}-{id(self)}".encode()).hexdigest()[:16]
+        self.request = request
+        self.status = "queued"  # queued -> running -> completed / failed
+        self.created_at = datetime.now().isoformat()
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+        self.total_sites = 0
+        self.completed_sites = 0
+        self.failed_sites = 0
+        self.error: Optional[str] = None
+        self.results: List[Dict[str, Any]] = []
+    
+    def progress(self) -> Dict[str, Any]:
+        done = self.completed_sites + self.failed_sites
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "filters": self.request.dict(),
+            "total_sites": self.total_sites,
+            "completed_sites": self.completed_sites,
+            "failed_sites": self.failed_sites,
+            "percent_complete": round(done / self.total_sites * 100, 1) if self.total_sites else 0.0,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error
+        }
+
+
+class BatchReportQueue:
+    """In-memory job queue generating CRA reports for many sites with bounded LLM concurrency"""
+    
+    def __init__(
+        self,
+        llm_concurrency: int = BATCH_REPORT_LLM_CONCURRENCY,
+        rate_per_minute: int = BATCH_REPORT_RATE_PER_MINUTE,
+        max_jobs: int = BATCH_REPORT_MAX_JOBS,
+        subjects_per_site: int = BATCH_REPORT_SUBJECTS_PER_SITE
+    ):
+        self.llm_concurrency = max(llm_concurrency, 1)
+        self.rate_per_minute = rate_per_minute
+        self.max_jobs = max_jobs
+        self.subjects_per_site = subjects_per_site
+        self.jobs: "OrderedDict[str, BatchReportJob]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._limiter: Optional[RateLimiter] = None
+    
+    def start(self):
+        """Start the background worker on the running event loop"""
+        self._queue = asyncio.Queue()
+        self._semaphore = asyncio.Semaphore(self.llm_concurrency)
+        self._limiter = RateLimiter(self.rate_per_minute)
+        self._worker = asyncio.create_task(self._work())
+    
+    async def stop(self):
+        if self._worker:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+    
+    def submit(self, request: "BatchReportRequest") -> BatchReportJob:
+        if self._queue is None:
+            raise Exception("Batch report worker is not running")
+        job = BatchReportJob(request)
+        self.jobs[job.job_id] = job
+        # Forget the oldest finished jobs beyond max_jobs
+        while len(self.jobs) > self.max_jobs:
+            oldest = next((jid for jid, j in self.jobs.items() if j.status in ("completed", "failed")), None)
+            if oldest is None:
+                break
+            del self.jobs[oldest]
+        self._queue.put_nowait(job)
+        return job
+    
+    def get(self, job_id: str) -> Optional[BatchReportJob]:
+        return self.jobs.get(job_id)
+    
+    async def _work(self):
+        # Report calls queue behind interactive and on-demand LLM calls
+        set_llm_priority("batch")
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run_job(job)
+            except Exception as e:
+                job.status = "failed"
+                job.error = str(e)
+                job.finished_at = datetime.now().isoformat()
+            finally:
+                self._queue.task_done()
+    
+    def _where(self, request: "BatchReportRequest", alias: str = "") -> tuple:
+        return where_clause(
+            {"study_id": request.study_id, "region": request.region, "site_id": request.site_ids}, alias
+        )
+    
+    async def _run_job(self, job: BatchReportJob):
+        job.status = "running"
+        job.started_at = datetime.now().isoformat()
+        
+        # One set-based query per dataset for the whole portfolio
+        site_where, site_params = self._where(job.request)
+        site_query = f"""
+        SELECT * FROM gold.agg_site_performance
+        {site_where}
+        ORDER BY study_id, site_id
+        """
+        subject_where, subject_params = self._where(job.request, "fsm")
+        subject_query = f"""
+        SELECT * FROM (
+            SELECT fsm.*,
+                ROW_NUMBER() OVER (
+                    PARTITION BY fsm.study_id, fsm.site_id
+                    ORDER BY fsm.data_quality_index ASC
+                ) AS site_rank
+            FROM gold.fact_subject_metrics fsm
+            {subject_where}
+        ) ranked
+        WHERE site_rank <= ?
+        """
+        results = await (
+            ExecutionPlan()
+            .db("sites", site_query, params=site_params)
+            .db("subjects", subject_query, params=subject_params + (int(self.subjects_per_site),))
+            .run()
+        )
+        site_data, subject_data = results["sites"], results["subjects"]
+        
+        if {"study_id", "site_id"} <= set(subject_data.columns):
+            subjects_by_site = {
+                key: group.drop(columns=["site_rank"], errors="ignore")
+                for key, group in subject_data.groupby(["study_id", "site_id"], sort=False)
+            }
+        else:
+            subjects_by_site = {}
+        
+        sites = site_data.to_dict(orient="records")
+        job.total_sites = len(sites)
+        
+        async def report_for(site: Dict[str, Any]) -> Dict[str, Any]:
+            study_id, site_id = site.get("study_id"), site.get("site_id")
+            subjects = subjects_by_site.get((study_id, site_id), subject_data.iloc[0:0])
+            async with self._semaphore:
+                await self._limiter.acquire()
+                try:
+                    report = await run_in_threadpool(ai.generate_cra_report, study_id, site_id, site, subjects)
+                except Exception as e:
+                    job.failed_sites += 1
+                    return {"study_id": study_id, "site_id": site_id, "status": "failed", "error": str(e)}
+            job.completed_sites += 1
+            return {
+                "study_id": study_id,
+                "site_id": site_id,
+                "status": "completed",
+                "report_type": job.request.report_type,
+                "generated_at": datetime.now().isoformat(),
+                "report": report,
+                "site_metrics": site,
+                "subject_count": len(subjects)
+            }
+        
+        job.results = await asyncio.gather(*(report_for(site) for site in sites))
+        job.status = "completed"
+        job.finished_at = datetime.now().isoformat()
+
+
+batch_reports = BatchReportQueue()
+
+
+# ============================================================================
+# Precomputed Insights
+# ============================================================================
+
+class InsightStore:
+    """SQLite store of generated insights and recommendations, versioned by warehouse load generation"""
+    
+    def __init__(self, path: str = INSIGHT_STORE_PATH, keep_generations: int = INSIGHT_STORE_KEEP_GENERATIONS):
+        self.path = path
+        self.keep_generations = max(keep_generations, 1)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "stale_hits": 0, "misses": 0, "stores": 0, "pruned": 0}
+        self._ready = False
+    
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread; the schema is created on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        if not self._ready:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS precomputed_insight (
+                    kind            TEXT    NOT NULL,
+                    scope           TEXT    NOT NULL,
+                    generation      INTEGER NOT NULL,
+                    payload         TEXT    NOT NULL,
+                    generated_at    TEXT    NOT NULL,
+                    duration_ms     REAL,
+                    PRIMARY KEY (kind, scope, generation)
+                )
+            """)
+            conn.commit()
+            self._ready = True
+        return conn
+    
+    def _count(self, counter: str, amount: int = 1):
+        with self._lock:
+            self._counters[counter] += amount
+    
+    def get(self, kind: str, scope: str, generation: Optional[int], allow_stale: bool = INSIGHT_SERVE_STALE) -> Optional[Dict[str, Any]]:
+        """Stored result for the generation (or the newest older one when allow_stale)"""
+        conn = self._connection()
+        if generation is not None and not allow_stale:
+            row = conn.execute(
+                "SELECT payload, generation, generated_at FROM precomputed_insight "
+                "WHERE kind = ? AND scope = ? AND generation = ?",
+                (kind, scope, generation)
+            ).fetchone()
+        else:
+            row = conn.execute(
+                "SELECT payload, generation, generated_at FROM precomputed_insight "
+                "WHERE kind = ? AND scope = ? ORDER BY generation DESC LIMIT 1",
+                (kind, scope)
+            ).fetchone()
+        if row is None:
+            self._count("misses")
+            return None
+        stale = generation is not None and row[1] != generation
+        self._count("stale_hits" if stale else "hits")
+        return {"payload": json.loads(row[0]), "generation": row[1], "generated_at": row[2], "stale": stale}
+    
+    def has(self, kind: str, scope: str, generation: int) -> bool:
+        row = self._connection().execute(
+            "SELECT 1 FROM precomputed_insight WHERE kind = ? AND scope = ? AND generation = ?",
+            (kind, scope, generation)
+        ).fetchone()
+        return row is not None
+    
+    def put(self, kind: str, scope: str, generation: int, payload: Dict[str, Any], duration_ms: float = 0.0):
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO precomputed_insight (kind, scope, generation, payload, generated_at, duration_ms) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (kind, scope, generation, json.dumps(payload, default=json_default),
+             datetime.now().isoformat(), round(duration_ms, 1))
+        )
+        conn.commit()
+        self._count("stores")
+    
+    def prune(self):
+        """Drop results older than the newest keep_generations load generations"""
+        conn = self._connection()
+        cursor = conn.execute(
+            "DELETE FROM precomputed_insight WHERE generation NOT IN ("
+            "SELECT DISTINCT generation FROM precomputed_insight ORDER BY generation DESC LIMIT ?)",
+            (self.keep_generations,)
+        )
+        conn.commit()
+        self._count("pruned", cursor.rowcount)
+    
+    def stats(self) -> Dict[str, Any]:
+        try:
+            rows = self._connection().execute(
+                "SELECT kind, generation, COUNT(*) FROM precomputed_insight GROUP BY kind, generation"
+            ).fetchall()
+        except Exception:
+            rows = []
+        with self._lock:
+            return {
+                "path": self.path,
+                "entries": {f"{kind}@{generation}": count for kind, generation, count in rows},
+                **self._counters
+            }
+
+
+def insight_scope(study_id: Optional[str], site_id: Optional[str] = None) -> str:
+    """Store scope of a study (or all studies) and optionally one site"""
+    study = (study_id or "").strip() or "*"
+    return f"{study}|{site_id.strip()}" if site_id else study
+
+
+async def compute_insights(study_id: Optional[str], generation: Optional[int]) -> Dict[str, Any]:
+    """Generate study insights once across concurrent callers and store them for the generation"""
+    async def generate():
+        start = time.perf_counter()
+        payload = await run_in_threadpool(ai.generate_insights, study_id)
+        # Degraded fallbacks are served but never stored, so the next request retries the model
+        if generation is not None and not payload.get("degraded"):
+            await run_in_threadpool(
+                insight_store.put, "insights", insight_scope(study_id), generation, payload,
+                (time.perf_counter() - start) * 1000
+            )
+        return payload
+    return await single_flight.run(SingleFlight.key("insights", study_id=study_id), generate)
+
+
+async def compute_recommendations(
+    site_id: str,
+    study_id: Optional[str],
+    generation: Optional[int],
+    site_scope: bool = False
+) -> Dict[str, Any]:
+    """
+    Generate site recommendations once across concurrent callers and store them
+    for the generation; site_scope also stores them for lookups without a
+    study (the site belongs to one study only)
+    """
+    async def generate():
+        start = time.perf_counter()
+        payload = await site_recommendations(site_id, study_id)
+        if generation is not None and not payload["ai_analysis"].get("degraded"):
+            scopes = [insight_scope(study_id, site_id)] + ([insight_scope(None, site_id)] if site_scope else [])
+            for scope in scopes:
+                await run_in_threadpool(
+                    insight_store.put, "recommendations", scope, generation, payload,
+                    (time.perf_counter() - start) * 1000
+                )
+        return payload
+    return await single_flight.run(SingleFlight.key("recommendations", site_id=site_id, study_id=study_id), generate)
+
+
+async def current_generation_async() -> Optional[int]:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(db_executor, result_cache.current_generation)
+
+
+class InsightScheduler:
+    """Regenerates insights per study and recommendations per site whenever the load generation moves"""
+    
+    def __init__(
+        self,
+        enabled: bool = INSIGHT_PRECOMPUTE,
+        interval: float = INSIGHT_REFRESH_INTERVAL,
+        concurrency: int = INSIGHT_PRECOMPUTE_CONCURRENCY,
+        rate_per_minute: int = INSIGHT_PRECOMPUTE_RATE_PER_MINUTE
+    ):
+        self.enabled = enabled
+        self.interval = interval
+        self.concurrency = max(concurrency, 1)
+        self.rate_per_minute = rate_per_minute
+        self.generation: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._counters = {
+            "runs": 0,
+            "computed": 0,
+            "skipped": 0,
+            "failed": 0,
+            "last_generation": None,
+            "last_run_at": None,
+            "last_duration_ms": 0.0,
+            "last_error": None
+        }
+    
+    def start(self):
+        """Start polling on the running event loop (no-op when disabled)"""
+        if self.enabled:
+            self._task = asyncio.create_task(self._loop())
+    
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def _loop(self):
+        set_llm_priority("batch")
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                self._counters["last_error"] = str(e)
+                print(f"Warning: insight precompute failed: {str(e)}")
+            await asyncio.sleep(self.interval)
+    
+    async def refresh(self, force: bool = False):
+        """Precompute everything missing for the current load generation"""
+        generation = await current_generation_async()
+        if generation is None or (generation == self.generation and not force):
+            return
+        
+        start = time.perf_counter()
+        sites = await execute_query_async("SELECT study_id, site_id FROM gold.agg_site_performance ORDER BY study_id, site_id")
+        if not {"study_id", "site_id"} <= set(sites.columns):
+            sites = sites.iloc[0:0].reindex(columns=["study_id", "site_id"])
+        site_keys = list(sites[["study_id", "site_id"]].itertuples(index=False, name=None))
+        studies = [None] + sorted({study for study, _ in site_keys if study is not None})
+        # GET /api/recommendations/{site_id} without study_id looks up the site-only scope
+        site_studies: Dict[str, List[Optional[str]]] = {}
+        for study, site in site_keys:
+            site_studies.setdefault(site, []).append(study)
+        
+        semaphore = asyncio.Semaphore(self.concurrency)
+        limiter = RateLimiter(self.rate_per_minute)
+        
+        async def precompute(kind: str, scopes: List[str], func):
+            present = [await run_in_threadpool(insight_store.has, kind, scope, generation) for scope in scopes]
+            if all(present):
+                self._counters["skipped"] += 1
+                return
+            async with semaphore:
+                await limiter.acquire()
+                try:
+                    await func()
+                    self._counters["computed"] += 1
+                except Exception as e:
+                    self._counters["failed"] += 1
+                    self._counters["last_error"] = f"{kind} {scopes[0]}: {str(e)}"
+        
+        def site_scopes(study: Optional[str], site: str) -> List[str]:
+            shared = len(site_studies[site]) > 1
+            return [insight_scope(study, site)] + ([] if shared else [insight_scope(None, site)])
+        
+        await asyncio.gather(
+            *(precompute("insights", [insight_scope(study)], lambda study=study: compute_insights(study, generation))
+              for study in studies),
+            *(precompute("recommendations", site_scopes(study, site),
+                         lambda study=study, site=site: compute_recommendations(
+                             site, study, generation, site_scope=len(site_studies[site]) == 1
+                         ))
+              for study, site in site_keys),
+            # Sites in several studies get their own all-studies analysis
+            *(precompute("recommendations", [insight_scope(None, site)],
+                         lambda site=site: compute_recommendations(site, None, generation))
+              for site, site_study_ids in site_studies.items() if len(site_study_ids) > 1)
+        )
+        await run_in_threadpool(insight_store.prune)
+        
+        self.generation = generation
+        self._counters.update({
+            "runs": self._counters["runs"] + 1,
+            "last_generation": generation,
+            "last_run_at": datetime.now().isoformat(),
+            "last_duration_ms": round((time.perf_counter() - start) * 1000, 1)
+        })
+    
+    def stats(self) -> Dict[str, Any]:
+        return {"enabled": self.enabled, "interval_seconds": self.interval, **self._counters}
+
+
+insight_store = InsightStore()
+insight_scheduler = InsightScheduler()
+
+
+def precomputed_response(stored: Dict[str, Any]) -> Dict[str, Any]:
+    """Stored payload annotated with the load generation it was computed for"""
+    return {
+        **stored["payload"],
+        "precomputed": {
+            "generation": stored["generation"],
+            "generated_at": stored["generated_at"],
+            "stale": stored["stale"]
+        }
+    }
+
+
 # ============================================================================
 # API Endpoints
 # ============================================================================
 
+def visualization_hint(question: str) -> Optional[str]:
+    """Suggest a chart type from the wording of the question"""
+    question_lower = question.lower()
+    if any(word in question_lower for word in ['compare', 'by region', 'by country', 'by site']):
+        return "bar_chart"
+    elif any(word in question_lower for word in ['distribution', 'breakdown', 'percentage']):
+        return "pie_chart"
+    elif any(word in question_lower for word in ['trend', 'over time', 'timeline']):
+        return "line_chart"
+    elif any(word in question_lower for word in ['list', 'show', 'top', 'bottom']):
+        return "table"
+    return None
+
+
 @app.get("/")
 async def root():
     """API Health Check"""
@@ -492,14 +3098,53 @@ async def root():
         "endpoints": {
             "ask": "POST /api/ask - Natural language queries",
             "report": "POST /api/generate-report - Generate CRA report",
-            "recommendations": "GET /api/recommendations/{site_id} - Site recommendations",
-            "insights": "GET /api/insights - Data quality insights"
-        }
+            "recommendations": "GET /api/recommendations/{site_id} - Site recommendations (precomputed per load, ?fresh=true regenerates)",
+            "insights": "GET /api/insights - Data quality insights (precomputed per load, ?fresh=true regenerates)",
+            "export": "GET /api/export/{view} - Stream a gold view as NDJSON or Arrow",
+            "batch_reports": "POST /api/batch-reports - Queue CRA reports for many sites",
+            "risk_scores": "GET /api/risk-scores - Site risk scores",
+            "dashboard": "GET /api/dashboard - Dashboard KPIs and rollups",
+            "trends": "GET /api/trends - DQI, open query and SDV completion trends from daily snapshots",
+            "query_aging": "GET /api/query-aging - Query counts per age bucket by status, site, form or owner",
+            "metrics": "GET /metrics - Prometheus metrics"
+        },
+        "startup": warmup.stats(),
+        "database_pool": db_pool.stats(),
+        "llm_backend": ai.model.stats(),
+        "analytics_snapshot": analytics.stats(),
+        "sql_guard": sql_guard.stats(),
+        "llm_client": llm_client.stats()
+    }
+
+
+@app.get("/api/cache/stats")
+async def cache_stats():
+    """Hit/miss counters for the API caches"""
+    return {
+        "nl_to_sql": nl_sql_cache.stats(),
+        "query_results": result_cache.stats(),
+        "prompts": prompt_builder.stats(),
+        "single_flight": single_flight.stats(),
+        "queries": query_timings.stats(),
+        "precomputed_insights": {**insight_store.stats(), "scheduler": insight_scheduler.stats()}
     }
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics: request, LLM, DB and serialization timings plus component stats"""
+    return PlainTextResponse(
+        metrics_registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 @app.post("/api/ask", response_model=NLQueryResponse)
-async def ask_question(request: NLQueryRequest):
+async def ask_question(
+    request: NLQueryRequest,
+    format: Optional[str] = Query(None, description="Response format: json (default), ndjson or arrow"),
+    accept: Optional[str] = Header(None)
+):
     """
     Natural language query endpoint
     
@@ -509,45 +3154,140 @@ async def ask_question(request: NLQueryRequest):
     - "Show me all critical safety queries"
     - "What is the SDV completion rate by region?"
     - "List the top 5 underperforming sites"
+    
+    With format=ndjson|arrow (or a matching Accept header) the full result set
+    is streamed from the cursor instead of answering in natural language.
     """
+    stream_format = negotiate_stream_format(format, accept)
+    set_llm_priority("interactive", LLM_DEADLINE_INTERACTIVE)
     try:
         # Convert question to SQL
-        sql_query = ai.natural_language_to_sql(request.question, request.study_id)
+        plan = ExecutionPlan().llm(
+            "translate",
+            lambda: ai.natural_language_to_sql(request.question, request.study_id)
+        )
         
-        # Execute query
-        try:
-            data = execute_query(sql_query)
-            data_dict = data.to_dict(orient='records')
-        except Exception as e:
+        if stream_format:
+            sql_query = (await plan.run())["translate"]
+            try:
+                response = await open_query_stream(sql_query, stream_format, guarded=True)
+            except HTTPException:
+                raise
+            except Exception as e:
+                nl_sql_cache.discard(request.question, request.study_id)
+                raise HTTPException(status_code=400, detail=f"Query error: {str(e)}")
+            if request.include_sql:
+                response.headers["X-SQL-Query"] = " ".join(sql_query.split())
+            return response
+        
+        # Execute query, then generate the natural language answer from its result
+        query_errors = []
+        
+        async def run_query(sql_query: str):
+            try:
+                return await execute_guarded_async(sql_query)
+            except Exception as e:
+                query_errors.append(e)
+                return None
+        
+        async def run_answer(data: Optional[pd.DataFrame]):
+            if data is None:
+                return None
+            return await run_in_threadpool(ai.answer_question, request.question, data)
+        
+        plan.stage("query", run_query, "translate").stage("answer", run_answer, "query")
+        results = await plan.run()
+        sql_query, data, answer = results["translate"], results["query"], results["answer"]
+        
+        if query_errors:
+            nl_sql_cache.discard(request.question, request.study_id)
             return NLQueryResponse(
-                answer=f"I understood your question but encountered a query error: {str(e)}. Try rephrasing your question.",
-                sql_query=sql_query if request.include_sql else None
+                answer=f"I understood your question but encountered a query error: {str(query_errors[0])}. Try rephrasing your question.",
+                sql_query=sql_query if request.include_sql else None,
+                timings=plan.timings
             )
+        with telemetry.span("serialize.records"):
+            data_dict = data.head(100).to_dict(orient='records')
         
-        # Generate natural language answer
-        answer = ai.answer_question(request.question, data)
-        
-        # Determine visualization hint
-        viz_hint = None
-        question_lower = request.question.lower()
-        if any(word in question_lower for word in ['compare', 'by region', 'by country', 'by site']):
-            viz_hint = "bar_chart"
-        elif any(word in question_lower for word in ['distribution', 'breakdown', 'percentage']):
-            viz_hint = "pie_chart"
-        elif any(word in question_lower for word in ['trend', 'over time', 'timeline']):
-            viz_hint = "line_chart"
-        elif any(word in question_lower for word in ['list', 'show', 'top', 'bottom']):
-            viz_hint = "table"
-        
-        return NLQueryResponse(
-            answer=answer,
-            data=data_dict[:100] if data_dict else None,
-            sql_query=sql_query if request.include_sql else None,
-            visualization_hint=viz_hint
-        )
+        with telemetry.span("serialize.response"):
+            return NLQueryResponse(
+                answer=answer,
+                data=data_dict if data_dict else None,
+                sql_query=sql_query if request.include_sql else None,
+                visualization_hint=visualization_hint(request.question),
+                timings=plan.timings
+            )
         
+    except HTTPException:
+        raise
+    except SQLGuardError as e:
+        raise HTTPException(status_code=422, detail=f"Generated SQL rejected: {str(e)}")
+    except LLMUnavailable as e:
+        raise llm_unavailable_error(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"AI processing error: {str(e)}")
+
+
+REPORT_SITE_QUERY = """
+    SELECT * FROM gold.agg_site_performance 
+    WHERE study_id = ? AND site_id = ?
+    """
+
+REPORT_SUBJECT_QUERY = """
+    SELECT TOP 50 * FROM gold.fact_subject_metrics 
+    WHERE study_id = ? AND site_id = ?
+    ORDER BY data_quality_index ASC
+    """
+
+
+def report_plan(request: ReportRequest) -> ExecutionPlan:
+    """Site metrics and lowest-DQI subjects queries for a CRA report, run concurrently"""
+    params = (request.study_id, request.site_id)
+    return (
+        ExecutionPlan()
+        .db("site_metrics", REPORT_SITE_QUERY, params=params)
+        .db("subject_metrics", REPORT_SUBJECT_QUERY, params=params)
+    )
+
+
+@app.post("/api/ask/stream")
+async def ask_question_stream(request: NLQueryRequest):
+    """
+    Natural language query endpoint streaming the answer as Server-Sent Events
+    
+    Events: metrics (query rows, SQL and visualization hint), token (answer
+    text chunks), done, or error
+    """
+    set_llm_priority("interactive", LLM_DEADLINE_INTERACTIVE)
+    try:
+        plan = (
+            ExecutionPlan()
+            .llm("translate", lambda: ai.natural_language_to_sql(request.question, request.study_id))
+            .stage("query", execute_guarded_async, "translate")
+        )
+        results = await plan.run()
+    except SQLGuardError as e:
+        if "query" in plan.timings:
+            nl_sql_cache.discard(request.question, request.study_id)
+        raise HTTPException(status_code=422, detail=f"Generated SQL rejected: {str(e)}")
+    except LLMUnavailable as e:
+        raise llm_unavailable_error(e)
     except Exception as e:
+        if "query" in plan.timings:
+            nl_sql_cache.discard(request.question, request.study_id)
         raise HTTPException(status_code=500, detail=f"AI processing error: {str(e)}")
+    
+    sql_query, data = results["translate"], results["query"]
+    with telemetry.span("serialize.records"):
+        data_dict = data.head(100).to_dict(orient='records')
+    metrics = {
+        "data": data_dict if data_dict else None,
+        "row_count": len(data),
+        "sql_query": sql_query if request.include_sql else None,
+        "visualization_hint": visualization_hint(request.question),
+        "timings": plan.timings
+    }
+    return sse_response(metrics, ai.answer_question_stream(request.question, data))
 
 
 @app.post("/api/generate-report")
@@ -556,31 +3296,25 @@ async def generate_report(request: ReportRequest):
     Generate AI-powered CRA monitoring report for a specific site
     """
     try:
-        # Get site metrics
-        site_query = f"""
-        SELECT * FROM gold.agg_site_performance 
-        WHERE study_id = '{request.study_id}' AND site_id = '{request.site_id}'
-        """
-        
-        subject_query = f"""
-        SELECT TOP 50 * FROM gold.fact_subject_metrics 
-        WHERE study_id = '{request.study_id}' AND site_id = '{request.site_id}'
-        ORDER BY data_quality_index ASC
-        """
-        
-        site_data = execute_query(site_query)
-        subject_data = execute_query(subject_query)
+        # Both queries run concurrently; the report starts once both are in
+        plan = (
+            report_plan(request)
+            .llm(
+                "report",
+                lambda site_data, subject_data: ai.generate_cra_report(
+                    request.study_id,
+                    request.site_id,
+                    site_data.iloc[0].to_dict() if not site_data.empty else {},
+                    subject_data
+                ),
+                "site_metrics", "subject_metrics"
+            )
+        )
+        results = await plan.run()
+        site_data, subject_data, report = results["site_metrics"], results["subject_metrics"], results["report"]
         
         site_dict = site_data.iloc[0].to_dict() if not site_data.empty else {}
         
-        # Generate report
-        report = ai.generate_cra_report(
-            request.study_id,
-            request.site_id,
-            site_dict,
-            subject_data
-        )
-        
         return {
             "study_id": request.study_id,
             "site_id": request.site_id,
@@ -588,119 +3322,518 @@ async def generate_report(request: ReportRequest):
             "generated_at": datetime.now().isoformat(),
             "report": report,
             "site_metrics": site_dict,
-            "subject_count": len(subject_data)
+            "subject_count": len(subject_data),
+            "timings": plan.timings
         }
         
+    except LLMUnavailable as e:
+        raise llm_unavailable_error(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Report generation error: {str(e)}")
 
 
+@app.post("/api/generate-report/stream")
+async def generate_report_stream(request: ReportRequest):
+    """
+    Stream a CRA monitoring report as Server-Sent Events
+    
+    Events: metrics (site metrics, sent once the queries finish), token (report
+    text chunks as Gemini generates them), done, or error
+    """
+    try:
+        plan = report_plan(request)
+        results = await plan.run()
+        site_data, subject_data = results["site_metrics"], results["subject_metrics"]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Report generation error: {str(e)}")
+    
+    site_dict = site_data.iloc[0].to_dict() if not site_data.empty else {}
+    metrics = {
+        "study_id": request.study_id,
+        "site_id": request.site_id,
+        "report_type": request.report_type,
+        "site_metrics": site_dict,
+        "subject_count": len(subject_data),
+        "timings": plan.timings
+    }
+    return sse_response(
+        metrics,
+        ai.generate_cra_report_stream(request.study_id, request.site_id, site_dict, subject_data)
+    )
+
+
+@app.post("/api/batch-reports", status_code=202)
+async def create_batch_report(request: BatchReportRequest):
+    """
+    Enqueue CRA reports for every site in a study, region or site list
+    """
+    if not (request.study_id or request.region or request.site_ids):
+        raise HTTPException(status_code=400, detail="Provide study_id, region or site_ids")
+    try:
+        job = batch_reports.submit(request)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return job.progress()
+
+
+@app.get("/api/batch-reports/{job_id}")
+async def get_batch_report_progress(job_id: str):
+    """
+    Poll the progress of a batch report job
+    """
+    job = batch_reports.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job.progress()
+
+
+@app.get("/api/batch-reports/{job_id}/results")
+async def get_batch_report_results(
+    job_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500)
+):
+    """
+    Retrieve generated reports of a finished batch job
+    """
+    job = batch_reports.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    if job.status in ("queued", "running"):
+        raise HTTPException(status_code=409, detail=f"Job {job_id} is still {job.status}")
+    return {
+        **job.progress(),
+        "offset": offset,
+        "reports": job.results[offset:offset + limit]
+    }
+
+
+async def site_recommendations(site_id: str, study_id: Optional[str]) -> Dict[str, Any]:
+    """Site metrics query and AI analysis behind /api/recommendations"""
+    where_sql, params = where_clause({"site_id": site_id, "study_id": study_id})
+    
+    query = f"""
+    SELECT 
+        study_id, site_id, region, country,
+        COUNT(DISTINCT subject_id) as total_subjects,
+        AVG(data_quality_index) as avg_dqi,
+        SUM(is_clean_patient) as clean_subjects,
+        SUM(total_queries) as open_queries,
+        SUM(safety_queries) as safety_queries,
+        SUM(missing_visits) as missing_visits,
+        SUM(crfs_overdue_90) as critical_signatures
+    FROM gold.fact_subject_metrics
+    {where_sql}
+    GROUP BY study_id, site_id, region, country
+    """
+    
+    data = await execute_query_async(query, params)
+    
+    if data.empty:
+        raise HTTPException(status_code=404, detail=f"Site {site_id} not found")
+    
+    metrics = data.iloc[0].to_dict()
+    recommendations = await run_in_threadpool(ai.get_site_recommendations, site_id, metrics)
+    
+    return {
+        "site_id": site_id,
+        "study_id": study_id or "ALL",
+        "metrics": metrics,
+        "ai_analysis": recommendations,
+        "generated_at": datetime.now().isoformat()
+    }
+
+
 @app.get("/api/recommendations/{site_id}")
 async def get_recommendations(
     site_id: str,
-    study_id: Optional[str] = Query(None, description="Filter by study ID")
+    study_id: Optional[str] = Query(None, description="Filter by study ID"),
+    fresh: bool = Query(False, description="Regenerate now instead of serving the precomputed result")
 ):
     """
     Get AI-powered recommendations for a specific site
+    
+    Served from the result precomputed after the last warehouse load when
+    available; concurrent identical on-demand requests share one query and
+    one LLM call
+    """
+    try:
+        generation = await current_generation_async()
+        if not fresh:
+            stored = await run_in_threadpool(
+                insight_store.get, "recommendations", insight_scope(study_id, site_id), generation
+            )
+            if stored is not None:
+                return precomputed_response(stored)
+        return await compute_recommendations(site_id, study_id, generation)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Recommendation error: {str(e)}")
+
+
+@app.get("/api/insights")
+async def get_insights(
+    study_id: Optional[str] = Query(None, description="Filter by study ID"),
+    fresh: bool = Query(False, description="Regenerate now instead of serving the precomputed result")
+):
+    """
+    Get comprehensive AI-powered data quality insights
+    
+    Served from the result precomputed after the last warehouse load when
+    available; concurrent identical on-demand requests share one query and
+    one LLM call
+    """
+    try:
+        generation = await current_generation_async()
+        if not fresh:
+            stored = await run_in_threadpool(insight_store.get, "insights", insight_scope(study_id), generation)
+            if stored is not None:
+                return precomputed_response(stored)
+        return await compute_insights(study_id, generation)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Insights generation error: {str(e)}")
+
+
+# Priority names accepted by /api/action-items, mapped to the queue's priority codes
+ACTION_PRIORITIES = {"critical": "P1", "high": "P2", "medium": "P3", "low": "P4"}
+
+# gold.priority_action_queue clustered key: the worklist order and the page cursor
+ACTION_ITEM_KEY = ["priority", "sort_order", "study_id", "site_id", "subject_id"]
+
+
+@app.get("/api/action-items")
+async def get_action_items(
+    study_id: Optional[str] = Query(None),
+    site_id: Optional[str] = Query(None),
+    responsible_party: Optional[str] = Query(None, description="Filter by owner: CRA, DM, Safety Team, Coder, Investigator"),
+    priority: Optional[str] = Query(None, description="Filter by priority: Critical, High, Medium, Low (or P1-P4)"),
+    limit: int = Query(20, ge=1, description="Max items (up to 100 unless streaming)"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    format: Optional[str] = Query(None, description="Response format: json (default), ndjson or arrow"),
+    accept: Optional[str] = Header(None)
+):
     """
+    Get prioritized action items from the persisted action queue, in worklist
+    order. Pages are keyset-paginated: pass next_cursor to continue.
+    """
+    stream_format = negotiate_stream_format(format, accept)
+    if limit > 100 and not stream_format:
+        raise HTTPException(status_code=422, detail="limit above 100 requires format=ndjson or arrow")
+    priority_code = None
+    if priority:
+        priority_code = ACTION_PRIORITIES.get(priority.strip().lower(), priority.strip().upper())
+        if priority_code not in ACTION_PRIORITIES.values():
+            raise HTTPException(status_code=422, detail="priority must be Critical, High, Medium, Low or P1-P4")
+    after = decode_cursor(cursor, len(ACTION_ITEM_KEY))
     try:
-        where_clause = f"WHERE site_id = '{site_id}'"
-        if study_id:
-            where_clause += f" AND study_id = '{study_id}'"
+        where_sql, params = where_clause({
+            "study_id": study_id, "site_id": site_id,
+            "responsible_party": responsible_party, "priority": priority_code
+        })
+        keyset_sql, keyset_params = keyset_clause(ACTION_ITEM_KEY, after)
+        if keyset_sql:
+            where_sql = f"{where_sql} AND {keyset_sql}" if where_sql else f"WHERE {keyset_sql}"
         
         query = f"""
-        SELECT 
-            study_id, site_id, region, country,
-            COUNT(DISTINCT subject_id) as total_subjects,
-            AVG(data_quality_index) as avg_dqi,
-            SUM(is_clean_patient) as clean_subjects,
-            SUM(total_queries) as open_queries,
-            SUM(safety_queries) as safety_queries,
-            SUM(missing_visits) as missing_visits,
-            SUM(crfs_overdue_90) as critical_signatures
-        FROM gold.fact_subject_metrics
-        {where_clause}
-        GROUP BY study_id, site_id, region, country
+        SELECT TOP (?) * FROM gold.vw_action_items
+        {where_sql}
+        ORDER BY {', '.join(ACTION_ITEM_KEY)}
         """
         
-        data = execute_query(query)
+        params = (limit,) + params + keyset_params
+        if stream_format:
+            return await open_query_stream(query, stream_format, params)
         
-        if data.empty:
-            raise HTTPException(status_code=404, detail=f"Site {site_id} not found")
+        data = await execute_query_async(query, params)
+        if not set(ACTION_ITEM_KEY) <= set(data.columns):
+            # Mock data (no database driver) has no action queue: empty page
+            data = data.iloc[0:0].reindex(columns=ACTION_ITEM_KEY)
+        with telemetry.span("serialize.records"):
+            items = data.to_dict(orient='records')
         
-        metrics = data.iloc[0].to_dict()
-        recommendations = ai.get_site_recommendations(site_id, metrics)
+        next_cursor = None
+        if len(items) == limit:
+            next_cursor = encode_cursor([items[-1][column] for column in ACTION_ITEM_KEY])
         
         return {
-            "site_id": site_id,
-            "study_id": study_id or "ALL",
-            "metrics": metrics,
-            "ai_analysis": recommendations,
+            "total_items": len(items),
+            "filters": {
+                "study_id": study_id, "site_id": site_id,
+                "responsible_party": responsible_party, "priority": priority_code
+            },
+            "action_items": items,
+            "next_cursor": next_cursor,
             "generated_at": datetime.now().isoformat()
         }
         
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Recommendation error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/api/insights")
-async def get_insights(
-    study_id: Optional[str] = Query(None, description="Filter by study ID")
+@app.get("/api/risk-scores")
+async def get_risk_scores(
+    study_id: Optional[str] = Query(None),
+    region: Optional[str] = Query(None),
+    country: Optional[str] = Query(None),
+    site_id: Optional[str] = Query(None),
+    risk_level: Optional[str] = Query(None, description="Filter: CRITICAL, HIGH, MEDIUM, LOW")
 ):
     """
-    Get comprehensive AI-powered data quality insights
+    Weighted site risk scores (same model as gold.sp_get_site_risk_score),
+    computed from the in-memory subject metrics snapshot
     """
     try:
-        insights = ai.generate_insights(study_id)
-        return insights
+        sites = await run_in_threadpool(
+            analytics.risk_scores,
+            study_id=study_id, region=region, country=country, site_id=site_id, risk_level=risk_level
+        )
+        return {
+            "total_sites": len(sites),
+            "filters": {"study_id": study_id, "region": region, "country": country,
+                        "site_id": site_id, "risk_level": risk_level},
+            "sites": sites,
+            "generated_at": datetime.now().isoformat()
+        }
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Insights generation error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Risk scoring error: {str(e)}")
 
 
-@app.get("/api/action-items")
-async def get_action_items(
+@app.get("/api/dashboard")
+async def get_dashboard(
     study_id: Optional[str] = Query(None),
-    priority: Optional[str] = Query(None, description="Filter by priority: Critical, High, Medium"),
-    limit: int = Query(20, le=100)
+    region: Optional[str] = Query(None),
+    country: Optional[str] = Query(None),
+    site_id: Optional[str] = Query(None)
 ):
     """
-    Get prioritized action items with AI-enhanced descriptions
+    Dashboard KPIs, regional/country/site rollups, query and DQI distributions
+    (same result sets as gold.sp_get_dashboard_data, minus action items which
+    are served by /api/action-items)
     """
     try:
-        where_clauses = []
-        if study_id:
-            where_clauses.append(f"study_id = '{study_id}'")
-        if priority:
-            where_clauses.append(f"priority = '{priority}'")
-        
-        where_sql = "WHERE " + " AND ".join(where_clauses) if where_clauses else ""
+        dashboard = await run_in_threadpool(
+            analytics.dashboard,
+            study_id=study_id, region=region, country=country, site_id=site_id
+        )
+        return {
+            **dashboard,
+            "filters": {"study_id": study_id, "region": region, "country": country, "site_id": site_id},
+            "generated_at": datetime.now().isoformat()
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Dashboard error: {str(e)}")
+
+
+# /api/trends period column per grain and grouping columns per level
+TREND_GRAINS = {"day": "c.date_key", "week": "c.week_start_date", "month": "c.month_start_date"}
+TREND_GROUPS = {
+    "none": [],
+    "study": ["s.study_id"],
+    "region": ["s.region"],
+    "country": ["s.region", "s.country"],
+    "site": ["s.study_id", "s.site_id"]
+}
+
+
+@app.get("/api/trends")
+async def get_trends(
+    study_id: Optional[str] = Query(None),
+    region: Optional[str] = Query(None),
+    country: Optional[str] = Query(None),
+    site_id: Optional[str] = Query(None),
+    start_date: Optional[date] = Query(None, description="First snapshot day (default: TRENDS_DEFAULT_DAYS before end_date)"),
+    end_date: Optional[date] = Query(None, description="Last snapshot day (default: today)"),
+    grain: str = Query("day", description="Period: day, week or month"),
+    group_by: str = Query("none", description="Series per: none, study, region, country or site")
+):
+    """
+    DQI, open query and SDV completion trends from the daily site snapshots
+    (gold.agg_site_metrics_snapshot). Ratios are taken over summed numerators
+    and denominators; open queries and subjects are averaged over the snapshot
+    days in each period.
+    """
+    if grain not in TREND_GRAINS:
+        raise HTTPException(status_code=422, detail=f"grain must be one of {', '.join(TREND_GRAINS)}")
+    if group_by not in TREND_GROUPS:
+        raise HTTPException(status_code=422, detail=f"group_by must be one of {', '.join(TREND_GROUPS)}")
+    end_date = end_date or date.today()
+    start_date = start_date or end_date - timedelta(days=TRENDS_DEFAULT_DAYS)
+    if start_date > end_date:
+        raise HTTPException(status_code=422, detail="start_date is after end_date")
+    if (end_date - start_date).days > TRENDS_MAX_DAYS:
+        raise HTTPException(status_code=422, detail=f"Date range is limited to {TRENDS_MAX_DAYS} days")
+    try:
+        where_sql, params = where_clause(
+            {"study_id": study_id, "region": region, "country": country, "site_id": site_id}, alias="s"
+        )
+        range_sql = "s.snapshot_date BETWEEN ? AND ?"
+        where_sql = f"{where_sql} AND {range_sql}" if where_sql else f"WHERE {range_sql}"
+        params = params + (start_date, end_date)
         
+        period = TREND_GRAINS[grain]
+        groups = "".join(f", {column}" for column in TREND_GROUPS[group_by])
         query = f"""
-        SELECT TOP {limit} * FROM gold.vw_action_items
+        SELECT
+            {period} AS period{groups},
+            COUNT(DISTINCT s.snapshot_date) AS snapshot_days,
+            CAST(SUM(s.dqi_sum) AS FLOAT) / NULLIF(SUM(s.dqi_count), 0) AS avg_data_quality_index,
+            CAST(SUM(s.open_queries) AS FLOAT) / COUNT(DISTINCT s.snapshot_date) AS open_queries,
+            CAST(SUM(s.sdv_verified) AS FLOAT) * 100 / NULLIF(SUM(s.sdv_required), 0) AS pct_sdv_complete,
+            CAST(SUM(s.clean_subjects) AS FLOAT) * 100 / NULLIF(SUM(s.subjects), 0) AS pct_clean_subjects,
+            CAST(SUM(s.subjects) AS FLOAT) / COUNT(DISTINCT s.snapshot_date) AS subjects
+        FROM gold.agg_site_metrics_snapshot s
+        INNER JOIN gold.dim_calendar c
+            ON c.date_key = s.snapshot_date
         {where_sql}
-        ORDER BY 
-            CASE priority 
-                WHEN 'CRITICAL' THEN 1 
-                WHEN 'HIGH' THEN 2 
-                WHEN 'MEDIUM' THEN 3 
-                ELSE 4 
-            END
+        GROUP BY {period}{groups}
+        ORDER BY {period}{groups}
         """
         
-        data = execute_query(query)
-        items = data.to_dict(orient='records')
+        data = await execute_query_async(query, params)
+        columns = ["period"] + [column.split(".")[-1] for column in TREND_GROUPS[group_by]]
+        measures = [
+            "snapshot_days", "avg_data_quality_index", "open_queries",
+            "pct_sdv_complete", "pct_clean_subjects", "subjects"
+        ]
+        if not set(columns + measures) <= set(data.columns):
+            # Mock data (no database driver) has no snapshot history: empty series
+            data = data.iloc[0:0].reindex(columns=columns + measures)
+        with telemetry.span("serialize.records"):
+            series = data.round(2).to_dict(orient='records')
         
         return {
-            "total_items": len(items),
-            "filters": {"study_id": study_id, "priority": priority},
-            "action_items": items,
+            "grain": grain,
+            "group_by": group_by,
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat(),
+            "filters": {"study_id": study_id, "region": region, "country": country, "site_id": site_id},
+            "series": series,
             "generated_at": datetime.now().isoformat()
         }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Trends error: {str(e)}")
+
+
+# /api/query-aging buckets (upper bound in days since open) and grouping columns
+QUERY_AGE_BUCKETS = [(7, "0-7 Days"), (14, "8-14 Days"), (30, "15-30 Days"), (60, "31-60 Days")]
+QUERY_AGE_OVERFLOW = "60+ Days"
+QUERY_AGING_GROUPS = {
+    "study": "study_id",
+    "site": "site_id",
+    "form": "form_name",
+    "action_owner": "action_owner",
+    "marking_group": "marking_group_name",
+    "status": "query_status"
+}
+
+
+@app.get("/api/query-aging")
+async def get_query_aging(
+    study_id: Optional[str] = Query(None),
+    site_id: Optional[str] = Query(None),
+    status: Optional[str] = Query(None, description="Query status, e.g. Open"),
+    action_owner: Optional[str] = Query(None),
+    group_by: str = Query("status", description="Comma-separated: study, site, form, action_owner, marking_group, status")
+):
+    """
+    Query counts per age bucket from the open-date cube (gold.agg_query_open_day).
+    Ages are measured against today, so buckets stay current between loads
+    without touching the query history.
+    """
+    dimensions = [name.strip() for name in group_by.split(",") if name.strip()]
+    unknown = [name for name in dimensions if name not in QUERY_AGING_GROUPS]
+    if unknown:
+        raise HTTPException(
+            status_code=422,
+            detail=f"group_by must be drawn from {', '.join(QUERY_AGING_GROUPS)}"
+        )
+    try:
+        where_sql, params = where_clause(
+            {"study_id": study_id, "site_id": site_id, "query_status": status, "action_owner": action_owner},
+            alias="a"
+        )
+        # Opened on or after the cutoff = at most that many days old
+        today = date.today()
+        cutoffs = tuple(today - timedelta(days=days) for days, _ in QUERY_AGE_BUCKETS)
+        bucket_case = "\n".join(
+            f"                    WHEN a.query_open_date >= ? THEN {i}" for i in range(len(QUERY_AGE_BUCKETS))
+        )
+        columns = [QUERY_AGING_GROUPS[name] for name in dict.fromkeys(dimensions)]
+        groups = "".join(f"{column}, " for column in columns)
+        query = f"""
+        SELECT
+            {groups}bucket,
+            SUM(query_count) AS query_count,
+            SUM(responded_count) AS responded_count,
+            CAST(SUM(response_days_sum) AS FLOAT) / NULLIF(SUM(responded_count), 0) AS avg_days_to_response,
+            MIN(query_open_date) AS oldest_open_date
+        FROM (
+            SELECT
+                a.*,
+                CASE
+{bucket_case}
+                    ELSE {len(QUERY_AGE_BUCKETS)}
+                END AS bucket
+            FROM gold.agg_query_open_day a
+            {where_sql}
+        ) aged
+        GROUP BY {groups}bucket
+        ORDER BY {groups}bucket
+        """
         
+        data = await execute_query_async(query, cutoffs + params)
+        measures = ["bucket", "query_count", "responded_count", "avg_days_to_response", "oldest_open_date"]
+        if not set(columns + measures) <= set(data.columns):
+            # Mock data (no database driver) has no aging shape: empty series
+            data = data.iloc[0:0].reindex(columns=columns + measures)
+        labels = [label for _, label in QUERY_AGE_BUCKETS] + [QUERY_AGE_OVERFLOW]
+        with telemetry.span("serialize.records"):
+            # No responded queries -> NULL average, which JSON can carry but NaN cannot
+            data = data.round(2)
+            rows = data.astype(object).where(data.notna(), None).to_dict(orient='records')
+            for row in rows:
+                row["query_age_bucket"] = labels[int(row.pop("bucket"))]
+        
+        return {
+            "as_of": today.isoformat(),
+            "group_by": [name for name in dict.fromkeys(dimensions)],
+            "filters": {"study_id": study_id, "site_id": site_id, "status": status, "action_owner": action_owner},
+            "buckets": labels,
+            "total_queries": int(sum(row["query_count"] for row in rows)),
+            "rows": rows,
+            "generated_at": datetime.now().isoformat()
+        }
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=500, detail=f"Query aging error: {str(e)}")
+
+
+@app.get("/api/export/{view}")
+async def export_view(
+    view: str,
+    study_id: Optional[str] = Query(None),
+    site_id: Optional[str] = Query(None),
+    format: Optional[str] = Query(None, description="Export format: ndjson (default) or arrow"),
+    accept: Optional[str] = Header(None)
+):
+    """
+    Stream a full gold view (e.g. fact_query_metrics) as NDJSON or Arrow IPC
+    with flat memory usage
+    """
+    if view not in EXPORT_VIEWS:
+        raise HTTPException(status_code=404, detail=f"View {view} is not exportable")
+    stream_format = negotiate_stream_format(format, accept) or "ndjson"
+    
+    where_sql, params = where_clause({"study_id": study_id, "site_id": site_id})
+    
+    try:
+        return await open_query_stream(f"SELECT * FROM gold.{view} {where_sql}", stream_format, params)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Export error: {str(e)}")
 
 
 # ============================================================================
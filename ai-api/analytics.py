@@ -0,0 +1,528 @@
+"""
+In-Process Analytics Engine
+
+Keeps a compact NumPy snapshot of gold.fact_subject_metrics in memory (one per
+warehouse load generation) and answers site risk scoring, dashboard KPIs and
+readiness checks with vectorized passes over it. Mirrors the logic of
+gold.sp_get_site_risk_score, gold.sp_get_dashboard_data and
+gold.sp_check_submission_readiness so filter changes never hit the database.
+"""
+
+from __future__ import annotations
+
+import time
+import threading
+from datetime import datetime
+from typing import Optional, List, Dict, Any
+from lazyimport import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+# ============================================================================
+# Snapshot Definition
+# ============================================================================
+
+DIMENSIONS = ("study_id", "site_id", "subject_id", "region", "country")
+
+MEASURES = (
+    "is_clean_patient", "data_quality_index",
+    "total_queries", "dm_queries", "clinical_queries", "medical_queries",
+    "safety_queries", "coding_queries", "site_queries", "field_monitor_queries",
+    "missing_visits", "expected_visits", "missing_pages", "pages_non_conformant",
+    "crfs_require_sdv", "forms_verified", "crfs_overdue_90", "pds_confirmed",
+    "uncoded_terms"
+)
+
+SNAPSHOT_QUERY = f"SELECT {', '.join(DIMENSIONS + MEASURES)} FROM gold.fact_subject_metrics"
+
+# Weights used by gold.sp_get_site_risk_score (component -> weight)
+RISK_WEIGHTS = {
+    "query_risk": 0.30,
+    "visit_risk": 0.10,
+    "page_risk": 0.10,
+    "conformant_risk": 0.05,
+    "sdv_risk": 0.30,
+    "signature_risk": 0.05,
+    "pd_risk": 0.05,
+    "safety_risk": 0.05
+}
+
+RISK_ACTIONS = {
+    "CRITICAL": "IMMEDIATE INTERVENTION REQUIRED - Schedule urgent site visit",
+    "HIGH": "Schedule site review within 1 week",
+    "MEDIUM": "Monitor closely - Review in next scheduled visit",
+    "LOW": "Standard monitoring"
+}
+
+QUERY_TYPES = (
+    ("DM", "dm_queries", "#3B82F6"),
+    ("Clinical", "clinical_queries", "#10B981"),
+    ("Medical", "medical_queries", "#8B5CF6"),
+    ("Safety", "safety_queries", "#EF4444"),
+    ("Coding", "coding_queries", "#F59E0B"),
+    ("Site", "site_queries", "#6366F1"),
+    ("Field Monitor", "field_monitor_queries", "#EC4899")
+)
+
+# (lower bound, label, color), best first
+DQI_BUCKETS = (
+    (90, "90-100 (Excellent)", "#22C55E"),
+    (75, "75-89 (Good)", "#84CC16"),
+    (50, "50-74 (Fair)", "#EAB308"),
+    (25, "25-49 (Poor)", "#F97316"),
+    (float("-inf"), "0-24 (Critical)", "#EF4444")
+)
+
+
+# Largest groups x labels presence bitmap used for COUNT(DISTINCT) (bytes)
+DISTINCT_BITMAP_LIMIT = 16 * 1024 * 1024
+
+
+def _round(values, digits: int = 2):
+    """Round an array or scalar for output, mapping NaN to None"""
+    if np.ndim(values) == 0:
+        return None if np.isnan(values) else round(float(values), digits)
+    return [None if np.isnan(v) else round(float(v), digits) for v in values]
+
+
+def _column(values: np.ndarray, digits: int = 2) -> List[Any]:
+    """Round a whole column at once for output, mapping NaN to None"""
+    rounded = np.round(np.asarray(values, dtype=np.float64), digits)
+    out = rounded.astype(object)
+    out[np.isnan(rounded)] = None
+    return out.tolist()
+
+
+def _fold(value: Any) -> Any:
+    """Case-insensitive comparison key for a dimension label (non-strings unchanged)"""
+    return value.casefold() if isinstance(value, str) else value
+
+
+def _ints(values: np.ndarray) -> List[int]:
+    return np.asarray(values).astype(np.int64).tolist()
+
+
+def _records(columns: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """Column lists -> list of row dicts"""
+    names = list(columns)
+    return [dict(zip(names, row)) for row in zip(*columns.values())]
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray, scale: float = 1.0) -> np.ndarray:
+    """numerator / denominator * scale, NaN where the denominator is zero (NULLIF semantics)"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator > 0, numerator / np.where(denominator > 0, denominator, 1) * scale, np.nan)
+
+
+# ============================================================================
+# Snapshot
+# ============================================================================
+
+class SubjectMetricsSnapshot:
+    """Dictionary-encoded dimensions and float32 measures of gold.fact_subject_metrics"""
+
+    def __init__(self, df: pd.DataFrame, generation: Optional[int]):
+        self.generation = generation
+        self.loaded_at = datetime.now().isoformat()
+        self.rows = len(df)
+
+        # Dimensions as int32 codes into a label array (NULL is a label of its own, as in GROUP BY)
+        self.codes: Dict[str, np.ndarray] = {}
+        self.labels: Dict[str, np.ndarray] = {}
+        # Case-folded labels for filtering (SQL Server's default collation is case-insensitive)
+        self.folded: Dict[str, np.ndarray] = {}
+        for dim in DIMENSIONS:
+            column = df[dim] if dim in df.columns else pd.Series([None] * self.rows, dtype=object)
+            codes, labels = pd.factorize(column, use_na_sentinel=False)
+            self.codes[dim] = codes.astype(np.int32)
+            self.labels[dim] = np.asarray(labels, dtype=object)
+            self.folded[dim] = np.asarray([_fold(label) for label in labels], dtype=object)
+
+        # Measures: SUM ignores NULL, so NULL -> 0; DQI keeps a validity mask for AVG
+        self.values: Dict[str, np.ndarray] = {}
+        for measure in MEASURES:
+            column = pd.to_numeric(df[measure], errors="coerce") if measure in df.columns else pd.Series(np.nan, index=df.index)
+            values = column.to_numpy(dtype=np.float32, na_value=np.nan)
+            if measure == "data_quality_index":
+                self.dqi_valid = ~np.isnan(values)
+            self.values[measure] = np.nan_to_num(values, nan=0.0)
+
+        # Site group = (study, site, region, country), matching the procedures' GROUP BY
+        site_keys = np.stack([self.codes[d] for d in ("study_id", "site_id", "region", "country")], axis=1)
+        self.site_keys, site_group = np.unique(site_keys, axis=0, return_inverse=True)
+        self.site_group = site_group.reshape(-1).astype(np.int32)
+
+        country_keys = np.stack([self.codes["region"], self.codes["country"]], axis=1)
+        self.country_keys, country_group = np.unique(country_keys, axis=0, return_inverse=True)
+        self.country_group = country_group.reshape(-1).astype(np.int32)
+
+    def nbytes(self) -> int:
+        arrays = list(self.codes.values()) + list(self.values.values()) + [self.dqi_valid, self.site_group, self.country_group]
+        return int(sum(a.nbytes for a in arrays))
+
+    def mask(self, **filters: Optional[str]) -> np.ndarray:
+        """Row mask for case-insensitive equality filters on dimension columns (None = no filter)"""
+        mask = np.ones(self.rows, dtype=bool)
+        for dim, value in filters.items():
+            if value is None:
+                continue
+            # Labels differing only in case fold together, so several codes may match
+            matches = np.flatnonzero(self.folded[dim] == _fold(value))
+            if len(matches) == 0:
+                return np.zeros(self.rows, dtype=bool)
+            mask &= np.isin(self.codes[dim], matches)
+        return mask
+
+    def group_sums(self, mask: np.ndarray, group: np.ndarray, n_groups: int, measures) -> Dict[str, np.ndarray]:
+        """Per-group row count, measure sums and AVG(data_quality_index) in one bincount pass each"""
+        # Filtered-out rows go to an extra bucket instead of gathering every measure through the mask
+        idx = np.where(mask, group, n_groups)
+        size = n_groups + 1
+        sums = {"rows": np.bincount(idx, minlength=size)[:n_groups].astype(np.float64)}
+        for measure in measures:
+            sums[measure] = np.bincount(idx, weights=self.values[measure], minlength=size)[:n_groups]
+        dqi_sum = np.bincount(idx, weights=self.values["data_quality_index"], minlength=size)[:n_groups]
+        dqi_count = np.bincount(idx, weights=self.dqi_valid, minlength=size)[:n_groups]
+        sums["avg_dqi"] = _ratio(dqi_sum, dqi_count)
+        return sums
+
+    def totals(self, mask: np.ndarray, measures) -> Dict[str, float]:
+        """SUM(measure) over the masked rows"""
+        weights = mask.astype(np.float64)
+        return {measure: float(np.dot(self.values[measure], weights)) for measure in measures}
+
+    def distinct_per_group(self, mask: np.ndarray, group: np.ndarray, n_groups: int, dim: str) -> np.ndarray:
+        """COUNT(DISTINCT dim) per group"""
+        n_labels = len(self.labels[dim])
+        pairs = group[mask].astype(np.int64) * n_labels + self.codes[dim][mask]
+        if n_groups * n_labels <= DISTINCT_BITMAP_LIMIT:
+            # Presence bitmap avoids hashing/sorting the pairs
+            seen = np.zeros(n_groups * n_labels, dtype=bool)
+            seen[pairs] = True
+            return seen.reshape(n_groups, n_labels).sum(axis=1)
+        return np.bincount(np.unique(pairs) // n_labels, minlength=n_groups)
+
+    def distinct(self, mask: np.ndarray, dim: str) -> int:
+        return int(np.count_nonzero(np.bincount(self.codes[dim][mask], minlength=len(self.labels[dim]))))
+
+    def label(self, dim: str, codes: np.ndarray) -> List[Any]:
+        return [None if isinstance(v, float) and np.isnan(v) else v for v in self.labels[dim][codes]]
+
+
+# ============================================================================
+# Analytics Engine
+# ============================================================================
+
+class AnalyticsEngine:
+    """Serves risk scores and dashboard data from a snapshot reloaded once per load generation"""
+
+    def __init__(self, loader, generation):
+        # loader() -> DataFrame with SNAPSHOT_QUERY columns; generation() -> current load generation
+        self.loader = loader
+        self.generation = generation
+        self._snapshot: Optional[SubjectMetricsSnapshot] = None
+        self._lock = threading.Lock()
+        self._counters = {"reloads": 0, "last_load_ms": 0.0, "requests": 0, "last_compute_ms": 0.0}
+
+    def snapshot(self) -> SubjectMetricsSnapshot:
+        """Current snapshot, reloaded when the warehouse load generation has moved"""
+        generation = self.generation()
+        snapshot = self._snapshot
+        if snapshot is not None and (generation is None or generation == snapshot.generation):
+            return snapshot
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and (generation is None or generation == snapshot.generation):
+                return snapshot
+            start = time.perf_counter()
+            snapshot = SubjectMetricsSnapshot(self.loader(), generation)
+            self._snapshot = snapshot
+            self._counters["reloads"] += 1
+            self._counters["last_load_ms"] = round((time.perf_counter() - start) * 1000, 1)
+            return snapshot
+
+    def _timed(self, start: float):
+        self._counters["requests"] += 1
+        self._counters["last_compute_ms"] = round((time.perf_counter() - start) * 1000, 3)
+
+    def _site_table(self, snap: SubjectMetricsSnapshot, mask: np.ndarray, measures) -> tuple:
+        """Site-level sums restricted to sites that have rows under the mask"""
+        n_sites = len(snap.site_keys)
+        sums = snap.group_sums(mask, snap.site_group, n_sites, measures)
+        present = np.flatnonzero(sums["rows"] > 0)
+        return {k: v[present] for k, v in sums.items()}, snap.site_keys[present]
+
+    # ------------------------------------------------------------------------
+    # Risk scores (gold.sp_get_site_risk_score)
+    # ------------------------------------------------------------------------
+
+    def risk_scores(
+        self,
+        study_id: Optional[str] = None,
+        region: Optional[str] = None,
+        country: Optional[str] = None,
+        site_id: Optional[str] = None,
+        risk_level: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Weighted site risk scores, highest risk first"""
+        start = time.perf_counter()
+        snap = self.snapshot()
+        mask = snap.mask(study_id=study_id, region=region, country=country, site_id=site_id)
+        sums, keys = self._site_table(snap, mask, (
+            "is_clean_patient", "total_queries", "missing_visits", "missing_pages",
+            "pages_non_conformant", "crfs_require_sdv", "forms_verified", "crfs_overdue_90",
+            "pds_confirmed", "safety_queries", "expected_visits"
+        ))
+        subjects = sums["rows"]
+        sdv_pending = sums["crfs_require_sdv"] - sums["forms_verified"]
+
+        def capped(numerator, denominator, scale):
+            return np.nan_to_num(np.minimum(100.0, _ratio(numerator, denominator, scale)), nan=0.0)
+
+        components = {
+            "query_risk": capped(sums["total_queries"], subjects, 10),
+            "visit_risk": capped(sums["missing_visits"], sums["expected_visits"], 100),
+            "page_risk": capped(sums["missing_pages"], subjects, 5),
+            "conformant_risk": capped(sums["pages_non_conformant"], subjects, 10),
+            "sdv_risk": capped(sdv_pending, sums["crfs_require_sdv"], 100),
+            "signature_risk": capped(sums["crfs_overdue_90"], subjects, 20),
+            "pd_risk": capped(sums["pds_confirmed"], subjects, 15),
+            "safety_risk": np.where(sums["safety_queries"] > 0, 100.0, 0.0)
+        }
+        score = sum(components[name] * weight for name, weight in RISK_WEIGHTS.items())
+        levels = np.select([score >= 75, score >= 50, score >= 25], ["CRITICAL", "HIGH", "MEDIUM"], "LOW")
+
+        keep = np.ones(len(score), dtype=bool) if risk_level is None else levels == risk_level.upper()
+        order = np.lexsort((-subjects, -np.round(score, 2)))
+        order = order[keep[order]]
+
+        keys = keys[order]
+        ordered_levels = levels[order].tolist()
+        results = _records({
+            "study_id": snap.label("study_id", keys[:, 0]),
+            "site_id": snap.label("site_id", keys[:, 1]),
+            "region": snap.label("region", keys[:, 2]),
+            "country": snap.label("country", keys[:, 3]),
+            "total_subjects": _ints(subjects[order]),
+            "clean_subjects": _ints(sums["is_clean_patient"][order]),
+            "avg_data_quality_index": _column(sums["avg_dqi"][order]),
+            "risk_score": _column(score[order]),
+            "risk_level": ordered_levels,
+            "query_risk_pct": _column(components["query_risk"][order]),
+            "visit_risk_pct": _column(components["visit_risk"][order]),
+            "sdv_risk_pct": _column(components["sdv_risk"][order]),
+            "signature_risk_pct": _column(components["signature_risk"][order]),
+            "open_queries": _ints(sums["total_queries"][order]),
+            "missing_visits": _ints(sums["missing_visits"][order]),
+            "sdv_pending": _ints(sdv_pending[order]),
+            "signatures_overdue": _ints(sums["crfs_overdue_90"][order]),
+            "protocol_deviations": _ints(sums["pds_confirmed"][order]),
+            "safety_issues": _ints(sums["safety_queries"][order]),
+            "recommended_action": [RISK_ACTIONS[level] for level in ordered_levels]
+        })
+        self._timed(start)
+        return results
+
+    # ------------------------------------------------------------------------
+    # Dashboard (gold.sp_get_dashboard_data)
+    # ------------------------------------------------------------------------
+
+    def _summary(self, snap: SubjectMetricsSnapshot, mask: np.ndarray, study_id: Optional[str],
+                 min_dqi: float, min_sdv_pct: float, min_clean_pct: float) -> Dict[str, Any]:
+        """KPI cards plus submission readiness checks"""
+        sums = snap.totals(mask, (
+            "is_clean_patient", "crfs_require_sdv", "forms_verified", "safety_queries", "uncoded_terms",
+            "crfs_overdue_90", "total_queries", "missing_visits", "pds_confirmed"
+        ))
+        total = sums.__getitem__
+
+        subjects = snap.distinct(mask, "subject_id")
+        clean = total("is_clean_patient")
+        valid = snap.dqi_valid[mask]
+        avg_dqi = float(snap.values["data_quality_index"][mask][valid].mean(dtype=np.float64)) if valid.any() else np.nan
+        sdv_required, sdv_done = total("crfs_require_sdv"), total("forms_verified")
+        safety, uncoded, overdue = total("safety_queries"), total("uncoded_terms"), total("crfs_overdue_90")
+        pct_clean = clean / subjects * 100 if subjects else np.nan
+        pct_sdv = sdv_done / sdv_required * 100 if sdv_required else np.nan
+
+        if avg_dqi >= 90 and safety == 0 and uncoded == 0:
+            readiness = "Ready"
+        elif avg_dqi >= 75:
+            readiness = "Near Ready"
+        else:
+            readiness = "Not Ready"
+
+        # Same checks as gold.sp_check_submission_readiness (SDV counts as complete when nothing requires it)
+        sdv_for_check = 100.0 if np.isnan(pct_sdv) else pct_sdv
+        checks = {
+            "dqi_check": avg_dqi >= min_dqi,
+            "clean_patient_check": (0.0 if np.isnan(pct_clean) else pct_clean) >= min_clean_pct,
+            "safety_query_check": safety == 0,
+            "coding_check": uncoded == 0,
+            "sdv_check": sdv_for_check >= min_sdv_pct,
+            "signature_check": overdue == 0
+        }
+
+        return {
+            "study_id": study_id or "ALL STUDIES",
+            "total_studies": snap.distinct(mask, "study_id"),
+            "total_regions": snap.distinct(mask, "region"),
+            "total_countries": snap.distinct(mask, "country"),
+            "total_sites": snap.distinct(mask, "site_id"),
+            "total_subjects": subjects,
+            "clean_subjects": int(clean),
+            "pct_clean": _round(pct_clean),
+            "avg_dqi": _round(avg_dqi),
+            "total_open_queries": int(total("total_queries")),
+            "safety_queries": int(safety),
+            "total_missing_visits": int(total("missing_visits")),
+            "total_uncoded_terms": int(uncoded),
+            "sdv_completion_pct": _round(pct_sdv),
+            "critical_signatures": int(overdue),
+            "protocol_deviations": int(total("pds_confirmed")),
+            "submission_readiness": readiness,
+            "readiness_checks": {name: "PASS" if passed else "FAIL" for name, passed in checks.items()}
+        }
+
+    def _regions(self, snap: SubjectMetricsSnapshot, mask: np.ndarray) -> List[Dict[str, Any]]:
+        n = len(snap.labels["region"])
+        group = snap.codes["region"]
+        sums = snap.group_sums(mask, group, n, ("is_clean_patient", "total_queries"))
+        countries = snap.distinct_per_group(mask, group, n, "country")
+        sites = snap.distinct_per_group(mask, group, n, "site_id")
+        subjects = snap.distinct_per_group(mask, group, n, "subject_id")
+        present = np.flatnonzero(sums["rows"] > 0)
+        avg = sums["avg_dqi"]
+        present = present[np.argsort(-np.nan_to_num(avg[present], nan=-np.inf), kind="stable")]
+        names = snap.label("region", present)
+        return [
+            {
+                "region": names[j],
+                "countries": int(countries[i]),
+                "sites": int(sites[i]),
+                "subjects": int(subjects[i]),
+                "clean_subjects": int(sums["is_clean_patient"][i]),
+                "avg_dqi": _round(avg[i]),
+                "open_queries": int(sums["total_queries"][i]),
+                "status": "good" if avg[i] >= 85 else "warning" if avg[i] >= 70 else "critical"
+            }
+            for j, i in enumerate(present)
+        ]
+
+    def _countries(self, snap: SubjectMetricsSnapshot, mask: np.ndarray) -> List[Dict[str, Any]]:
+        n = len(snap.country_keys)
+        group = snap.country_group
+        sums = snap.group_sums(mask, group, n, ("is_clean_patient", "total_queries", "missing_visits"))
+        sites = snap.distinct_per_group(mask, group, n, "site_id")
+        subjects = snap.distinct_per_group(mask, group, n, "subject_id")
+        present = np.flatnonzero(sums["rows"] > 0)
+        regions = snap.label("region", snap.country_keys[:, 0])
+        countries = snap.label("country", snap.country_keys[:, 1])
+        # ORDER BY region, avg_dqi DESC
+        present = sorted(present, key=lambda i: (str(regions[i]), -np.nan_to_num(sums["avg_dqi"][i], nan=-np.inf)))
+        return [
+            {
+                "region": regions[i],
+                "country": countries[i],
+                "sites": int(sites[i]),
+                "subjects": int(subjects[i]),
+                "clean_subjects": int(sums["is_clean_patient"][i]),
+                "pct_clean": _round(_ratio(sums["is_clean_patient"][i], subjects[i], 100)),
+                "avg_dqi": _round(sums["avg_dqi"][i]),
+                "open_queries": int(sums["total_queries"][i]),
+                "missing_visits": int(sums["missing_visits"][i])
+            }
+            for i in present
+        ]
+
+    def _sites(self, snap: SubjectMetricsSnapshot, mask: np.ndarray, top_n: int, min_dqi: float) -> List[Dict[str, Any]]:
+        sums, keys = self._site_table(snap, mask, (
+            "is_clean_patient", "total_queries", "missing_visits", "crfs_overdue_90",
+            "crfs_require_sdv", "forms_verified", "safety_queries", "uncoded_terms"
+        ))
+        avg = sums["avg_dqi"]
+        subjects = sums["rows"]
+        levels = np.select(
+            [(avg < 50) | (sums["safety_queries"] > 0), (avg < 70) | (sums["crfs_overdue_90"] > 0), avg < 85],
+            ["CRITICAL", "HIGH", "MEDIUM"],
+            "LOW"
+        )
+        ready = (avg >= min_dqi) & (sums["safety_queries"] == 0) & (sums["uncoded_terms"] == 0)
+        # Worst DQI first
+        order = np.argsort(np.nan_to_num(avg, nan=-np.inf), kind="stable")[:top_n]
+        keys = keys[order]
+        return _records({
+            "study_id": snap.label("study_id", keys[:, 0]),
+            "site_id": snap.label("site_id", keys[:, 1]),
+            "region": snap.label("region", keys[:, 2]),
+            "country": snap.label("country", keys[:, 3]),
+            "subjects": _ints(subjects[order]),
+            "clean_subjects": _ints(sums["is_clean_patient"][order]),
+            "pct_clean": _column(_ratio(sums["is_clean_patient"], subjects, 100)[order]),
+            "avg_dqi": _column(avg[order]),
+            "open_queries": _ints(sums["total_queries"][order]),
+            "missing_visits": _ints(sums["missing_visits"][order]),
+            "sig_overdue": _ints(sums["crfs_overdue_90"][order]),
+            "sdv_pct": _column(_ratio(sums["forms_verified"], sums["crfs_require_sdv"], 100)[order]),
+            "risk_level": levels[order].tolist(),
+            "site_readiness": np.where(ready[order], "READY", "NOT READY").tolist()
+        })
+
+    def _query_distribution(self, snap: SubjectMetricsSnapshot, mask: np.ndarray) -> List[Dict[str, Any]]:
+        sums = snap.totals(mask, [measure for _, measure, _ in QUERY_TYPES])
+        return [
+            {"query_type": name, "count": int(sums[measure]), "color": color}
+            for name, measure, color in QUERY_TYPES
+        ]
+
+    def _dqi_distribution(self, snap: SubjectMetricsSnapshot, mask: np.ndarray) -> List[Dict[str, Any]]:
+        # NULL DQI falls through every CASE branch into the last bucket, as in the procedure
+        dqi = np.where(snap.dqi_valid[mask], snap.values["data_quality_index"][mask], -np.inf)
+        bounds = np.array([b[0] for b in DQI_BUCKETS])
+        bucket = np.argmax(dqi[:, None] >= bounds[None, :], axis=1) if len(dqi) else np.array([], dtype=int)
+        counts = np.bincount(bucket, minlength=len(DQI_BUCKETS))
+        return [
+            {"dqi_range": label, "subject_count": int(counts[i]), "color": color}
+            for i, (_, label, color) in enumerate(DQI_BUCKETS)
+            if counts[i]
+        ]
+
+    def dashboard(
+        self,
+        study_id: Optional[str] = None,
+        region: Optional[str] = None,
+        country: Optional[str] = None,
+        site_id: Optional[str] = None,
+        top_sites: int = 50,
+        min_dqi: float = 90.0,
+        min_sdv_pct: float = 95.0,
+        min_clean_pct: float = 80.0
+    ) -> Dict[str, Any]:
+        """Dashboard result sets; each applies the same filters as the procedure's result set"""
+        start = time.perf_counter()
+        snap = self.snapshot()
+        all_filters = snap.mask(study_id=study_id, region=region, country=country, site_id=site_id)
+        study_only = snap.mask(study_id=study_id)
+
+        result = {
+            "summary": self._summary(snap, all_filters, study_id, min_dqi, min_sdv_pct, min_clean_pct),
+            "regions": self._regions(snap, study_only),
+            "countries": self._countries(snap, snap.mask(study_id=study_id, region=region)),
+            "sites": self._sites(snap, all_filters, top_sites, min_dqi),
+            "query_distribution": self._query_distribution(snap, study_only),
+            "dqi_distribution": self._dqi_distribution(snap, study_only),
+            "snapshot": {"load_generation": snap.generation, "loaded_at": snap.loaded_at}
+        }
+        self._timed(start)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        return {
+            "rows": snapshot.rows if snapshot else 0,
+            "bytes": snapshot.nbytes() if snapshot else 0,
+            "load_generation": snapshot.generation if snapshot else None,
+            "loaded_at": snapshot.loaded_at if snapshot else None,
+            **self._counters
+        }
@@ -0,0 +1,623 @@
+"""
+End-to-End API Benchmark
+
+Drives every API endpoint in-process (httpx over ASGI, app lifespan included)
+at a fixed concurrency and reports p50/p95/p99 latency, throughput, errors and
+peak traced memory per scenario.
+
+- Database: a SQLite stand-in of the gold layer built from datagen.py
+  (fact_subject_metrics, daily site snapshots, the action queue and the
+  aggregate and action item views, taken from ddl_gold.sql), or
+  --database live for the SQL Server configured via DB_*
+- Live mode also times the gold stored procedures; load the synthetic CSVs
+  first (datagen.py -> ingest.py -> silver.sp_load_silver -> gold refresh)
+- LLM: the stub backend answering each prompt kind (SQL, JSON, report text),
+  or --llm replay to answer from a recording made with LLM_BACKEND=record;
+  --llm-latency / --llm-tokens-per-second add synthetic model time
+- --json writes the results; --baseline compares against a previous run and
+  exits non-zero when p95 or throughput regress beyond --tolerance
+- Startup: `import aiapi` is timed in fresh interpreters first and the run
+  fails when the median exceeds --startup-budget-ms
+
+Usage:
+    python benchmark.py
+    python benchmark.py --studies 10 --sites 40 --subjects 50 --requests 200 --concurrency 16
+    python benchmark.py --scenarios ask,dashboard,export_arrow --llm-latency 400 --llm-tokens-per-second 80
+    python benchmark.py --json results.json
+    python benchmark.py --baseline results.json --tolerance 0.25
+    python benchmark.py --llm replay --llm-recordings llm_recordings.jsonl
+    python benchmark.py --database live
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import zlib
+import sqlite3
+import asyncio
+import argparse
+import platform
+import tempfile
+import subprocess
+import tracemalloc
+from datetime import date, datetime, timedelta
+from typing import Optional, List, Dict, Any, Callable
+
+from datagen import TrialGenerator, DATAGEN_SEED
+
+# ============================================================================
+# Configuration
+# ============================================================================
+
+GOLD_DDL_PATH = os.getenv(
+    "GOLD_DDL_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "dataWarehouse", "scripts", "gold", "ddl_gold.sql")
+)
+
+# Days of daily site snapshots in the SQLite stand-in (gold.agg_site_metrics_snapshot)
+SNAPSHOT_DAYS = int(os.getenv("BENCHMARK_SNAPSHOT_DAYS", "90"))
+
+# Gold objects recreated in the SQLite stand-in (views read straight from ddl_gold.sql)
+STANDIN_VIEWS = (
+    "agg_site_performance", "agg_country_performance", "agg_study_summary",
+    "vw_priority_action_source", "vw_action_items"
+)
+
+QUESTIONS = (
+    "Which sites have the lowest data quality?",
+    "How many open queries are there by region?",
+    "Which subjects have missing visits?",
+    "List the top 10 sites by open queries",
+    "Show subjects with overdue PI signatures",
+    "What is the SDV completion rate by country?",
+    "Which studies are closest to submission readiness?",
+    "Show me all subjects with uncoded terms",
+)
+
+# Canned translations returned by the stub model (valid on SQL Server and the stand-in)
+STUB_SQL = (
+    "SELECT TOP 100 study_id, site_id, avg_data_quality_index FROM gold.agg_site_performance ORDER BY avg_data_quality_index ASC",
+    "SELECT TOP 100 region, SUM(total_open_queries) AS open_queries FROM gold.agg_site_performance GROUP BY region",
+    "SELECT TOP 100 study_id, site_id, subject_id, missing_visits FROM gold.fact_subject_metrics WHERE missing_visits > 0 ORDER BY missing_visits DESC",
+    "SELECT TOP 100 study_id, site_id, total_open_queries FROM gold.agg_site_performance ORDER BY total_open_queries DESC",
+    "SELECT TOP 100 study_id, site_id, subject_id, crfs_overdue_90 FROM gold.fact_subject_metrics WHERE crfs_overdue_90 > 0",
+    "SELECT TOP 100 study_id, country, AVG(pct_sdv_complete) AS pct_sdv_complete FROM gold.fact_subject_metrics GROUP BY study_id, country",
+    "SELECT TOP 100 study_id, avg_data_quality_index, submission_readiness FROM gold.agg_study_summary ORDER BY avg_data_quality_index DESC",
+    "SELECT TOP 100 study_id, site_id, subject_id, uncoded_terms FROM gold.fact_subject_metrics WHERE uncoded_terms > 0",
+)
+
+STUB_RECOMMENDATIONS = {
+    "risk_level": "MEDIUM",
+    "risk_score": 48,
+    "summary": "Query backlog and SDV lag are the main risks at this site.",
+    "recommendations": [{
+        "priority": "HIGH",
+        "action": "Schedule a focused SDV visit for subjects with unverified CRFs",
+        "responsible_party": "CRA",
+        "expected_impact": "SDV completion above 90%",
+        "timeline": "Within 2 weeks"
+    }],
+    "positive_observations": ["Visit adherence is on track"]
+}
+
+STUB_INSIGHTS = {
+    "overall_status": "FAIR",
+    "summary": "Data quality is acceptable overall with a concentrated query backlog.",
+    "key_findings": ["Open queries cluster in a few sites", "Coding is nearly complete"],
+    "risk_areas": [{"area": "Queries", "severity": "MEDIUM", "description": "Aging open queries"}],
+    "recommendations": ["Prioritize query resolution at the lowest-DQI sites"],
+    "submission_readiness": {"status": "NEAR_READY", "blockers": ["Open queries"], "estimated_timeline": "6 weeks"}
+}
+
+STUB_REPORT = (
+    "## Executive Summary\nThe site shows moderate data quality with an open query backlog.\n\n"
+    "## Key Metrics Analysis\nSDV completion and signature timeliness trail the study average.\n\n"
+    "## Priority Actions\n1. Resolve queries open for more than 30 days.\n2. Complete pending SDV.\n\n"
+    "## Subject-Level Concerns\nA small number of subjects account for most missing visits.\n\n"
+    "## Recommendations\nSchedule a monitoring visit and follow up on overdue PI signatures."
+)
+
+
+# ============================================================================
+# SQLite Gold Stand-in
+# ============================================================================
+
+TOP_PATTERN = re.compile(r"^\s*SELECT\s+TOP\s*\(?\s*(\d+|\?)\s*\)?\s+", re.IGNORECASE)
+
+
+def translate_tsql(query: str, params: tuple = ()) -> tuple:
+    """
+    Rewrite the T-SQL the API emits into SQLite: leading TOP n / TOP (?)
+    becomes LIMIT (moving its parameter last), schema prefixes are dropped
+    """
+    query = re.sub(r"\bgold\.", "", query, flags=re.IGNORECASE)
+    match = TOP_PATTERN.match(query)
+    if match:
+        query = "SELECT " + query[match.end():].rstrip().rstrip(";") + f"\nLIMIT {match.group(1)}"
+        if match.group(1) == "?":
+            params = tuple(params[1:]) + (params[0],)
+    return query, params
+
+
+class TSQLCursor(sqlite3.Cursor):
+    def execute(self, query, params=()):
+        return super().execute(*translate_tsql(query, tuple(params)))
+
+
+class TSQLConnection(sqlite3.Connection):
+    """sqlite3 connection accepting the SQL Server dialect used by the API"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.create_function("CONCAT", -1, lambda *parts: "".join("" if p is None else str(p) for p in parts))
+        self.create_function("ISNULL", 2, lambda value, default: default if value is None else value)
+        self.create_function("LEN", 1, lambda value: None if value is None else len(str(value).rstrip()))
+        self.create_function("GETDATE", 0, lambda: datetime.now().isoformat(sep=" "))
+
+    def cursor(self, factory=TSQLCursor):
+        return super().cursor(factory)
+
+    def execute(self, query, params=()):
+        return self.cursor().execute(query, params)
+
+
+def gold_ddl_objects(ddl: str) -> Dict[str, Any]:
+    """fact_subject_metrics columns and the stand-in view bodies parsed from ddl_gold.sql"""
+    table = re.search(r"CREATE TABLE gold\.fact_subject_metrics\s*\((.*?)\n\);", ddl, re.DOTALL)
+    columns = [line.split()[0] for line in table.group(1).strip().splitlines() if line.strip()]
+    views = {}
+    for name in STANDIN_VIEWS:
+        match = re.search(rf"CREATE VIEW\s+gold\.{name} AS\s*\n(.*?);?\s*\nGO", ddl, re.DOTALL | re.IGNORECASE)
+        views[name] = translate_tsql(match.group(1))[0]
+    return {"columns": columns, "views": views}
+
+
+def calendar_frame(first: date, last: date):
+    """gold.dim_calendar rows (the columns the API reads) for first..last"""
+    import pandas as pd
+
+    days = pd.date_range(first, last, freq="D")
+    return pd.DataFrame({
+        "date_key": days.strftime("%Y-%m-%d"),
+        "day_of_month": days.day,
+        "month_num": days.month,
+        "year_num": days.year,
+        "quarter_num": days.quarter,
+        "iso_week": days.isocalendar().week.to_numpy(),
+        "is_weekend": (days.weekday >= 5).astype(int),
+        "week_start_date": (days - pd.to_timedelta(days.weekday, unit="D")).strftime("%Y-%m-%d"),
+        "month_start_date": days.to_period("M").to_timestamp().strftime("%Y-%m-%d"),
+        "year_month": days.strftime("%Y-%m")
+    })
+
+
+def build_standin(path: str, generator: TrialGenerator, snapshot_days: int = SNAPSHOT_DAYS) -> Dict[str, int]:
+    """Create the SQLite gold stand-in at path; returns row counts"""
+    with open(GOLD_DDL_PATH, encoding="utf-8") as f:
+        objects = gold_ddl_objects(f.read())
+
+    df = generator.subject_metrics_frame()
+    snapshots = generator.site_snapshot_frame(snapshot_days, df)
+    query_days = generator.query_open_day_frame()
+    conn = sqlite3.connect(path, factory=TSQLConnection)
+    try:
+        df[objects["columns"]].to_sql("fact_subject_metrics", conn, index=False, if_exists="replace")
+        conn.execute("CREATE INDEX IX_fact_subject_metrics ON fact_subject_metrics (study_id, site_id, subject_id)")
+        # Daily history (sp_append_metric_snapshot) and the calendar it joins to
+        snapshots.to_sql("agg_site_metrics_snapshot", conn, index=False, if_exists="replace")
+        conn.execute(
+            "CREATE UNIQUE INDEX PK_agg_site_metrics_snapshot "
+            "ON agg_site_metrics_snapshot (snapshot_date, study_id, site_id)"
+        )
+        calendar_frame(generator.as_of - timedelta(days=max(snapshot_days, 1) + 366), generator.as_of).to_sql(
+            "dim_calendar", conn, index=False, if_exists="replace"
+        )
+        conn.execute("CREATE UNIQUE INDEX PK_dim_calendar ON dim_calendar (date_key)")
+        # Query aging cube (sp_refresh_query_aging @full_rebuild = 1)
+        query_days.to_sql("agg_query_open_day", conn, index=False, if_exists="replace")
+        conn.execute(
+            "CREATE INDEX CIX_agg_query_open_day "
+            "ON agg_query_open_day (study_id, site_id, query_status, query_open_date)"
+        )
+        for name, body in objects["views"].items():
+            conn.execute(f"CREATE VIEW {name} AS {body}")
+        # Full build of the persisted action queue (sp_refresh_priority_action_queue @full_rebuild = 1)
+        conn.execute(
+            "CREATE TABLE priority_action_queue AS "
+            "SELECT *, 1 AS generation_id FROM vw_priority_action_source WHERE item_count > 0"
+        )
+        conn.execute(
+            "CREATE UNIQUE INDEX PK_priority_action_queue "
+            "ON priority_action_queue (priority, sort_order, study_id, site_id, subject_id)"
+        )
+        conn.execute("CREATE TABLE vw_current_load_generation (generation_id INTEGER, loaded_at TEXT)")
+        conn.execute("INSERT INTO vw_current_load_generation VALUES (1, ?)", (datetime.now().isoformat(),))
+        conn.commit()
+        sites = conn.execute("SELECT COUNT(*) FROM agg_site_performance").fetchone()[0]
+    finally:
+        conn.close()
+    return {"subjects": len(df), "sites": sites, "snapshots": len(snapshots), "query_days": len(query_days)}
+
+
+# ============================================================================
+# Stub LLM Responses
+# ============================================================================
+
+def stub_response(prompt: str) -> str:
+    """Benchmark answers per prompt kind: SQL varying with the question, JSON, report text"""
+    if prompt.rstrip().endswith("SQL Query:"):
+        question = re.search(r"Question:\s*(.*)", prompt)
+        key = question.group(1).strip() if question else prompt
+        return STUB_SQL[zlib.crc32(key.encode("utf-8")) % len(STUB_SQL)]
+    if '"risk_level"' in prompt:
+        return json.dumps(STUB_RECOMMENDATIONS)
+    if '"overall_status"' in prompt:
+        return json.dumps(STUB_INSIGHTS)
+    return STUB_REPORT
+
+
+# ============================================================================
+# Scenarios
+# ============================================================================
+
+class Scenario:
+    """One benchmarked endpoint call; request(client, i) returns the httpx response"""
+
+    def __init__(self, name: str, request: Callable, uses_llm: bool = False):
+        self.name = name
+        self.request = request
+        self.uses_llm = uses_llm
+
+
+def api_scenarios(study_id: str, site_id: str, as_of: date) -> List[Scenario]:
+    """HTTP scenarios covering every API endpoint"""
+
+    def question(i: int) -> str:
+        return QUESTIONS[i % len(QUESTIONS)]
+
+    async def batch_report(client, i):
+        response = await client.post("/api/batch-reports", json={"study_id": study_id})
+        if response.status_code >= 400:
+            return response
+        job_id = response.json()["job_id"]
+        while True:
+            progress = await client.get(f"/api/batch-reports/{job_id}")
+            if progress.status_code >= 400 or progress.json()["status"] not in ("queued", "running"):
+                break
+            await asyncio.sleep(0.01)
+        return await client.get(f"/api/batch-reports/{job_id}/results")
+
+    report = {"study_id": study_id, "site_id": site_id}
+    trend_range = {"start_date": (as_of - timedelta(days=89)).isoformat(), "end_date": as_of.isoformat()}
+    return [
+        Scenario("health", lambda c, i: c.get("/")),
+        Scenario("ask", lambda c, i: c.post("/api/ask", json={"question": question(i)}), uses_llm=True),
+        Scenario("ask_ndjson", lambda c, i: c.post("/api/ask?format=ndjson", json={"question": question(i)}), uses_llm=True),
+        Scenario("ask_stream", lambda c, i: c.post("/api/ask/stream", json={"question": question(i)}), uses_llm=True),
+        Scenario("generate_report", lambda c, i: c.post("/api/generate-report", json=report), uses_llm=True),
+        Scenario("generate_report_stream", lambda c, i: c.post("/api/generate-report/stream", json=report), uses_llm=True),
+        Scenario("recommendations", lambda c, i: c.get(f"/api/recommendations/{site_id}", params={"study_id": study_id}), uses_llm=True),
+        Scenario("insights", lambda c, i: c.get("/api/insights", params={"study_id": study_id}), uses_llm=True),
+        Scenario("insights_fresh", lambda c, i: c.get("/api/insights", params={"study_id": study_id, "fresh": "true"}), uses_llm=True),
+        Scenario("action_items", lambda c, i: c.get("/api/action-items", params={"limit": 100})),
+        Scenario("action_items_cra", lambda c, i: c.get("/api/action-items", params={"limit": 100, "responsible_party": "CRA"})),
+        Scenario("action_items_ndjson", lambda c, i: c.get("/api/action-items", params={"limit": 5000, "format": "ndjson"})),
+        Scenario("risk_scores", lambda c, i: c.get("/api/risk-scores")),
+        Scenario("dashboard", lambda c, i: c.get("/api/dashboard", params={"study_id": study_id})),
+        Scenario("trends", lambda c, i: c.get("/api/trends", params=trend_range)),
+        Scenario("trends_weekly_site", lambda c, i: c.get("/api/trends", params={**trend_range, "grain": "week", "group_by": "site"})),
+        Scenario("query_aging", lambda c, i: c.get("/api/query-aging", params={"study_id": study_id, "group_by": "site,status"})),
+        Scenario("export_ndjson", lambda c, i: c.get("/api/export/fact_subject_metrics")),
+        Scenario("export_arrow", lambda c, i: c.get("/api/export/fact_subject_metrics", params={"format": "arrow"})),
+        Scenario("batch_reports", batch_report, uses_llm=True),
+    ]
+
+
+def procedure_scenarios(aiapi, study_id: str, site_id: str) -> List[Scenario]:
+    """Gold stored procedures called directly on a pooled connection (live database only)"""
+    procedures = {
+        "sp_get_site_risk_score": ("EXEC gold.sp_get_site_risk_score @study_id = ?", (study_id,)),
+        "sp_get_dashboard_data": ("EXEC gold.sp_get_dashboard_data @study_id = ?", (study_id,)),
+        "sp_check_submission_readiness": ("EXEC gold.sp_check_submission_readiness @study_id = ?", (study_id,)),
+        "sp_get_priority_actions": ("EXEC gold.sp_get_priority_actions @study_id = ?", (study_id,)),
+        "sp_generate_cra_report": ("EXEC gold.sp_generate_cra_report @study_id = ?, @site_id = ?", (study_id, site_id)),
+    }
+
+    def run(sql: str, params: tuple):
+        with aiapi.db_pool.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(sql, *params)
+                # Drain every result set, as a client rendering the procedure would
+                while True:
+                    if cursor.description:
+                        cursor.fetchall()
+                    if not cursor.nextset():
+                        break
+            finally:
+                cursor.close()
+
+    def scenario(name: str, sql: str, params: tuple) -> Scenario:
+        async def call(client, i):
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(aiapi.db_executor, run, sql, params)
+        return Scenario(f"proc:{name}", call)
+
+    return [scenario(name, sql, params) for name, (sql, params) in procedures.items()]
+
+
+# ============================================================================
+# Runner
+# ============================================================================
+
+def measure_startup(runs: int) -> Dict[str, Any]:
+    """Median wall time of `import aiapi` in fresh interpreters (same environment as the run)"""
+    script = "import time; start = time.perf_counter(); import aiapi; print((time.perf_counter() - start) * 1000)"
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, (here, os.environ.get("PYTHONPATH"))))}
+    timings = []
+    for _ in range(max(runs, 1)):
+        out = subprocess.run([sys.executable, "-c", script], cwd=here, env=env, capture_output=True, text=True, check=True)
+        timings.append(float(out.stdout.strip().splitlines()[-1]))
+    return {"import_ms": round(percentile(timings, 50), 1), "runs": [round(t, 1) for t in timings]}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not values:
+        return 0.0
+    rank = max(int(round(pct / 100.0 * len(values) + 0.5)) - 1, 0)
+    return values[min(rank, len(values) - 1)]
+
+
+async def run_scenario(client, scenario: Scenario, requests: int, concurrency: int,
+                       warmup: int, trace_memory: bool) -> Dict[str, Any]:
+    """Run requests calls of one scenario with at most concurrency in flight"""
+    latencies: List[float] = []
+    errors: List[str] = []
+
+    async def call(i: int, record: bool):
+        start = time.perf_counter()
+        try:
+            response = await scenario.request(client, i)
+            if response is not None and response.status_code >= 400:
+                raise Exception(f"HTTP {response.status_code}: {response.text[:200]}")
+        except Exception as e:
+            if record:
+                errors.append(str(e))
+            return
+        if record:
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    for i in range(warmup):
+        await call(i, record=False)
+
+    if trace_memory:
+        tracemalloc.reset_peak()
+        baseline_memory = tracemalloc.get_traced_memory()[0]
+
+    next_index = iter(range(requests))
+
+    async def worker():
+        for i in next_index:
+            await call(i, record=True)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(min(concurrency, requests), 1))))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "scenario": scenario.name,
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "max_ms": round(latencies[-1], 2) if latencies else 0.0,
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed > 0 else 0.0,
+        "peak_memory_mb": (
+            round((tracemalloc.get_traced_memory()[1] - baseline_memory) / (1024 * 1024), 2) if trace_memory else None
+        ),
+    }
+
+
+async def run_benchmark(aiapi, scenarios: List[Scenario], args) -> List[Dict[str, Any]]:
+    import httpx
+
+    results = []
+    async with aiapi.lifespan(aiapi.app):
+        transport = httpx.ASGITransport(app=aiapi.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+            for scenario in scenarios:
+                requests = args.requests if not scenario.name.startswith("batch") else max(args.requests // 10, 1)
+                result = await run_scenario(client, scenario, requests, args.concurrency, args.warmup, args.trace_memory)
+                results.append(result)
+                print_result(result)
+    return results
+
+
+# ============================================================================
+# Reporting
+# ============================================================================
+
+def print_result(result: Dict[str, Any]):
+    memory = f"{result['peak_memory_mb']:>9.2f}" if result["peak_memory_mb"] is not None else f"{'-':>9}"
+    print(f"{result['scenario']:<34}{result['p50_ms']:>9.1f}{result['p95_ms']:>9.1f}{result['p99_ms']:>9.1f}"
+          f"{result['throughput_rps']:>10.1f}{result['errors']:>7}{memory}")
+    if result["first_error"]:
+        print(f"    !! {result['first_error']}")
+
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Scenarios whose p95 or throughput regressed beyond tolerance against the baseline run"""
+    previous = {r["scenario"]: r for r in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        before = previous.get(result["scenario"])
+        if not before:
+            continue
+        if before["p95_ms"] > 0 and result["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{result['scenario']}: p95 {before['p95_ms']} -> {result['p95_ms']} ms")
+        if before["throughput_rps"] > 0 and result["throughput_rps"] < before["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{result['scenario']}: throughput {before['throughput_rps']} -> {result['throughput_rps']} req/s"
+            )
+        if result["errors"] > before["errors"]:
+            regressions.append(f"{result['scenario']}: errors {before['errors']} -> {result['errors']}")
+    return regressions
+
+
+# ============================================================================
+# Main Entry Point
+# ============================================================================
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="End-to-end benchmark of the Clinical Trial AI API")
+    parser.add_argument("--database", choices=("sqlite", "live"), default="sqlite",
+                        help="sqlite: synthetic gold stand-in; live: SQL Server from DB_* settings")
+    parser.add_argument("--studies", type=int, default=3)
+    parser.add_argument("--sites", type=int, default=10, help="Sites per study")
+    parser.add_argument("--subjects", type=int, default=20, help="Subjects per site")
+    parser.add_argument("--visits", type=int, default=12, help="Scheduled visits per subject")
+    parser.add_argument("--seed", type=int, default=DATAGEN_SEED)
+    parser.add_argument("--requests", type=int, default=50, help="Measured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=2, help="Unmeasured requests per scenario")
+    parser.add_argument("--scenarios", default="", help="Comma separated scenario names (default: all)")
+    parser.add_argument("--llm", choices=("stub", "replay"), default="stub", help="LLM backend (never the live API)")
+    parser.add_argument("--llm-recordings", default="llm_recordings.jsonl", help="Recording replayed by --llm replay")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Synthetic first-token latency per call (ms)")
+    parser.add_argument("--llm-tokens-per-second", type=float, default=0.0, help="Synthetic output rate (0 = instant)")
+    parser.add_argument("--cold", action="store_true", help="Disable the NL-to-SQL and query result caches")
+    parser.add_argument("--precompute", action="store_true", help="Run the insight precompute scheduler during the run")
+    parser.add_argument("--no-trace-memory", dest="trace_memory", action="store_false",
+                        help="Skip tracemalloc (lower overhead, no peak memory column)")
+    parser.add_argument("--json", dest="json_path", help="Write results to this file")
+    parser.add_argument("--baseline", help="Results file of a previous run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed p95/throughput regression (fraction)")
+    parser.add_argument("--startup-budget-ms", type=float, default=800.0, help="Allowed median `import aiapi` time (0 = skip)")
+    parser.add_argument("--startup-runs", type=int, default=3, help="Fresh interpreters timed for the startup budget")
+    args = parser.parse_args()
+
+    # Settings read by aiapi at import time
+    os.environ.setdefault("BATCH_REPORT_RATE_PER_MINUTE", "100000")
+    os.environ["LLM_BACKEND"] = args.llm
+    os.environ["LLM_RECORD_PATH"] = args.llm_recordings
+    os.environ["LLM_LATENCY_MS"] = str(args.llm_latency)
+    os.environ["LLM_TOKENS_PER_SECOND"] = str(args.llm_tokens_per_second)
+    if args.llm_latency or args.llm_tokens_per_second:
+        os.environ["LLM_REPLAY_TIMING"] = "synthetic"
+    if args.cold:
+        os.environ["NL_SQL_CACHE_SIZE"] = "0"
+        os.environ["RESULT_CACHE_MAX_BYTES"] = "0"
+
+    # Precomputed insights go to a throwaway store; the scheduler only runs with --precompute
+    store_dir = tempfile.TemporaryDirectory(prefix="benchmark-insights-")
+    os.environ["INSIGHT_STORE_PATH"] = os.path.join(store_dir.name, "insights.db")
+    os.environ["INSIGHT_PRECOMPUTE"] = "on" if args.precompute else "off"
+    # Measured requests should not overlap the warm-up
+    os.environ.setdefault("STARTUP_WARMUP", "wait")
+
+    startup = None
+    if args.startup_budget_ms > 0:
+        startup = measure_startup(args.startup_runs)
+        status = "within" if startup["import_ms"] <= args.startup_budget_ms else "OVER"
+        print(f">> import aiapi: {startup['import_ms']:.0f} ms median of {len(startup['runs'])} "
+              f"({status} the {args.startup_budget_ms:.0f} ms budget)")
+
+    standin_dir = None
+    generator = TrialGenerator(args.studies, args.sites, args.subjects, args.visits, args.seed)
+    if args.database == "sqlite":
+        standin_dir = tempfile.TemporaryDirectory(prefix="benchmark-gold-")
+        path = os.path.join(standin_dir.name, "gold.db")
+        start = time.perf_counter()
+        counts = build_standin(path, generator)
+        print(f">> SQLite gold stand-in: {counts['subjects']} subjects, {counts['sites']} sites, {counts['snapshots']} site snapshots, "
+              f"{counts['query_days']} query aging rows "
+              f"({time.perf_counter() - start:.1f} seconds)")
+
+    import aiapi
+
+    if args.database == "sqlite":
+        aiapi.db_pool = aiapi.ConnectionPool(
+            lambda: sqlite3.connect(path, factory=TSQLConnection, check_same_thread=False)
+        )
+    if args.llm == "stub":
+        aiapi.llm_backend.responder = stub_response
+
+    # A site that exists in the benchmarked database
+    sites = aiapi.execute_query(
+        "SELECT TOP 1 study_id, site_id FROM gold.agg_site_performance ORDER BY study_id, site_id", use_cache=False
+    )
+    if sites.empty or "site_id" not in sites.columns:
+        print("ERROR: no sites in gold.agg_site_performance")
+        return 2
+    study_id, site_id = str(sites.iloc[0]["study_id"]), str(sites.iloc[0]["site_id"])
+
+    scenarios = api_scenarios(study_id, site_id, generator.as_of if args.database == "sqlite" else date.today())
+    if args.database == "live":
+        scenarios += procedure_scenarios(aiapi, study_id, site_id)
+    if args.scenarios:
+        wanted = {name.strip() for name in args.scenarios.split(",") if name.strip()}
+        unknown = wanted - {s.name for s in scenarios}
+        if unknown:
+            print(f"ERROR: unknown scenarios: {', '.join(sorted(unknown))}")
+            return 2
+        scenarios = [s for s in scenarios if s.name in wanted]
+
+    print("=" * 86)
+    print(f"Database: {args.database} | Study: {study_id} | Site: {site_id} | "
+          f"Requests: {args.requests} | Concurrency: {args.concurrency}{' | cold caches' if args.cold else ''}")
+    print("=" * 86)
+    print(f"{'scenario':<34}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>10}{'errors':>7}{'peak MB':>9}")
+
+    if args.trace_memory:
+        tracemalloc.start()
+    try:
+        results = asyncio.run(run_benchmark(aiapi, scenarios, args))
+    finally:
+        if args.trace_memory:
+            tracemalloc.stop()
+        if standin_dir is not None:
+            standin_dir.cleanup()
+        store_dir.cleanup()
+
+    print("=" * 86)
+    print(f"LLM backend: {json.dumps(aiapi.llm_backend.stats())}")
+
+    report = {
+        "generated_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "settings": {key: value for key, value in vars(args).items() if key not in ("json_path", "baseline")},
+        "startup": startup,
+        "results": results,
+    }
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.json_path}")
+
+    exit_code = 1 if any(r["errors"] for r in results) else 0
+    if startup is not None and startup["import_ms"] > args.startup_budget_ms:
+        print(f"STARTUP: import aiapi took {startup['import_ms']:.0f} ms (budget {args.startup_budget_ms:.0f} ms)")
+        exit_code = 1
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("REGRESSIONS:")
+            for line in regressions:
+                print(f"  - {line}")
+            exit_code = 1
+        else:
+            print(f"No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
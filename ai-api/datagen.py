@@ -0,0 +1,546 @@
+"""
+Synthetic Clinical Trial Data Generator
+
+Writes deterministic CSV extracts for every bronze source, laid out the way
+ingest.py loads them (one folder per source under the output root, one file
+per study), so bronze/silver/gold loads and the AI API can be measured at a
+chosen scale.
+
+- Scale is studies x sites per study x subjects per site x visits per subject
+- Same seed and scale produce byte-identical files; every subject draws from
+  its own seeded generator, so adding studies never changes existing ones
+- Columns follow the bronze DDL order; cpid_edc_subject_metrics gets the
+  header rows its FIRSTROW expects
+- subject_metrics_frame() returns the matching gold.fact_subject_metrics rows
+  for database stand-ins (see benchmark.py); site_snapshot_frame() a daily
+  gold.agg_site_metrics_snapshot history ending at the extract date
+
+Usage:
+    python datagen.py --out ./synthetic                           # 3 studies x 10 sites x 20 subjects x 12 visits
+    python datagen.py --out ./synthetic --studies 20 --sites 40 --subjects 50 --visits 16 --seed 7
+"""
+
+import os
+import csv
+import time
+import random
+import argparse
+from datetime import date, timedelta
+from typing import Optional, List, Dict, Any, Iterator
+
+from ingest import SOURCES
+
+# ============================================================================
+# Configuration
+# ============================================================================
+
+DATAGEN_SEED = int(os.getenv("DATAGEN_SEED", "42"))
+DATAGEN_AS_OF = date.fromisoformat(os.getenv("DATAGEN_AS_OF", "2025-09-30"))
+
+# Bronze columns per source, in DDL (= CSV) order
+COLUMNS = {
+    "cpid_edc_sdv": (
+        "study_id", "region", "country", "site_id", "subject_id",
+        "folder_name", "data_page_name", "visit_date_raw", "verification_status"),
+    "cpid_edc_crf_unlocked": (
+        "study_id", "region", "country", "site_id", "subject_id",
+        "page_name", "lock_unlock_status", "visit_date_raw"),
+    "cpid_edc_crf_freeze": (
+        "study_id", "region", "country", "site_id", "subject_id",
+        "page_name", "freeze_status", "visit_date_raw"),
+    "cpid_edc_crf_locked": (
+        "study_id", "region", "country", "site_id", "subject_id",
+        "page_name", "lock_status", "visit_date_raw"),
+    "cpid_edc_crf_unfreeze": (
+        "study_id", "region", "country", "site_id", "subject_id",
+        "page_name", "unfreeze_status", "visit_date_raw"),
+    "cpid_edc_pi_signature_report": (
+        "study_id", "region", "country", "site_id", "subject_id",
+        "visit_name", "form_name", "page_require_signature", "audit_action",
+        "visit_date_raw", "date_last_pi_sign_raw", "no_of_days", "pending_since_pi_signed"),
+    "cpid_edc_non_conformant": (
+        "study_id", "region", "country", "site_id", "subject_id",
+        "folder_name", "page_name", "log_no", "field_oid", "audit_time_raw", "visit_date_raw"),
+    "cpid_edc_query_report_cra_action": (
+        "study_id", "region", "country", "site_id", "subject_id",
+        "folder_name", "form_name", "field_oid", "log_no", "visit_date_raw",
+        "query_status", "action_owner", "marking_group_name", "query_open_date_raw",
+        "query_response", "days_since_open", "days_since_response"),
+    "cpid_edc_query_protocol_deviation": (
+        "study_id", "region", "country", "site_id", "subject_id",
+        "folder_name", "form_name", "log_no", "pd_status", "visit_date_raw"),
+    "cpid_edc_sv": (
+        "project_name", "region", "country", "site_id", "subject_name", "folder_name", "visit_date"),
+    "cpid_edc_subject_metrics": (
+        "study_id", "region", "country", "site_id", "subject_id", "latest_visit", "subject_status",
+        "missing_visits", "missing_pages", "coded_terms", "uncoded_terms",
+        "open_issues_lnr", "open_issues_edrr", "inactivated_forms", "esae_review_dm", "esae_review_safety",
+        "expected_visits", "pages_entered", "pages_non_conformant", "crfs_with_issues", "crfs_clean",
+        "percent_clean_crf", "dm_queries", "clinical_queries", "medical_queries", "site_queries",
+        "field_monitor_queries", "coding_queries", "safety_queries", "total_queries",
+        "crfs_require_verification", "forms_verified", "crfs_frozen", "crfs_not_frozen",
+        "crfs_locked", "crfs_unlocked", "pds_confirmed", "pds_proposed", "crfs_signed",
+        "crfs_overdue_45", "crfs_overdue_45_90", "crfs_overdue_90", "broken_signatures", "crfs_never_signed"),
+    "visit_projection_tracker": (
+        "study_id", "country", "site_id", "subject_id", "visit", "projected_date", "days_outstanding"),
+    "missing_lab_ranges": (
+        "study_id", "country", "site_id", "subject_id", "visit", "form_name", "lab_category",
+        "lab_date", "test_name", "test_description", "issue", "comments"),
+    "sae_dashboard_dm": (
+        "discrepancy_id", "study_id", "country", "site_id", "patient_id", "form_name",
+        "discrepancy_ts", "review_status", "action_status"),
+    "sae_dashboard_safety": (
+        "discrepancy_id", "study_id", "site_id", "patient_id", "case_status",
+        "discrepancy_ts", "review_status", "action_status"),
+    "inactivated_forms_loglines": (
+        "study_id", "country", "site_id", "subject_id", "folder", "form",
+        "data_on_form", "record_position", "audit_action"),
+    "missing_pages_all": (
+        "study_id", "site_group", "site_id", "subject_id", "overall_subject_status",
+        "visit_level_subject_status", "folder_name", "page_name", "visit_date_raw", "days_page_missing"),
+    "missing_pages_visit_level": (
+        "study_id", "site_group", "site_id", "subject_id", "overall_subject_status",
+        "visit_level_subject_status", "form_subject_status", "visit_name", "folder_name",
+        "form_name", "visit_date", "days_page_missing"),
+    "compiled_edrr": (
+        "study_id", "subject_id", "total_open_issue_count_per_subject"),
+    "globalcodingreport_meddra": (
+        "report_type", "study_id", "dictionary", "dictionary_version", "subject_id",
+        "form_oid", "logline", "field_oid", "coding_status", "require_coding"),
+}
+COLUMNS["cpid_edc_query_report_site_action"] = COLUMNS["cpid_edc_query_report_cra_action"]
+COLUMNS["cpid_edc_query_report_cumulative"] = COLUMNS["cpid_edc_query_report_cra_action"]
+COLUMNS["globalcodingreport_whodra"] = COLUMNS["globalcodingreport_meddra"]
+
+REGIONS = {
+    "EMEA": ("DEU", "FRA", "ESP", "GBR", "POL"),
+    "AMERICAS": ("USA", "CAN", "BRA", "MEX"),
+    "APAC": ("JPN", "CHN", "AUS", "IND", "KOR"),
+}
+
+FORMS = ("Demographics", "Vital Signs", "Adverse Events", "Concomitant Medications",
+         "Laboratory", "ECG", "Physical Exam", "Drug Accountability")
+
+# Query marking group -> subject metrics column
+QUERY_GROUPS = (
+    ("DM Review", "dm_queries"),
+    ("Clinical Review", "clinical_queries"),
+    ("Medical Review", "medical_queries"),
+    ("Site Review", "site_queries"),
+    ("Field Monitor Review", "field_monitor_queries"),
+    ("Coding Review", "coding_queries"),
+    ("Safety Review", "safety_queries"),
+)
+
+LAB_TESTS = (("ALT", "Alanine aminotransferase"), ("AST", "Aspartate aminotransferase"),
+             ("HGB", "Hemoglobin"), ("CREAT", "Creatinine"), ("GLUC", "Glucose"))
+
+
+def raw_date(value: Optional[date]) -> str:
+    """Dates as the extracts carry them (e.g. 15 SEP 2025, CONVERT style 106)"""
+    return value.strftime("%d %b %Y").upper() if value else ""
+
+
+# ============================================================================
+# Generator
+# ============================================================================
+
+class TrialGenerator:
+    """Deterministic synthetic portfolio of studies, sites and subjects"""
+
+    def __init__(
+        self,
+        studies: int = 3,
+        sites: int = 10,
+        subjects: int = 20,
+        visits: int = 12,
+        seed: int = DATAGEN_SEED,
+        as_of: date = DATAGEN_AS_OF
+    ):
+        self.studies = studies
+        self.sites = sites
+        self.subjects = subjects
+        self.visits = visits
+        self.seed = seed
+        self.as_of = as_of
+
+    def rng(self, *key) -> random.Random:
+        """Independent generator per entity so output never depends on iteration order"""
+        return random.Random("/".join(str(part) for part in (self.seed,) + key))
+
+    def study_sites(self, study_no: int) -> Iterator[Dict[str, Any]]:
+        """Sites of one study with their region, country and data quality profile"""
+        regions = sorted(REGIONS)
+        for site_no in range(1, self.sites + 1):
+            rng = self.rng(study_no, site_no)
+            region = regions[rng.randrange(len(regions))]
+            yield {
+                "study_id": f"Study {study_no}",
+                "site_id": f"Site {study_no * 1000 + site_no}",
+                "region": region,
+                "country": rng.choice(REGIONS[region]),
+                # Share of well-behaved data; drives every issue probability below
+                "quality": rng.uniform(0.55, 0.99),
+            }
+
+    def subject(self, site: Dict[str, Any], subject_no: int) -> Dict[str, Any]:
+        """Rows of every bronze source for one subject, plus its subject metrics"""
+        study_no = int(site["study_id"].split()[1])
+        site_no = int(site["site_id"].split()[1])
+        rng = self.rng(study_no, site_no, subject_no)
+        risk = 1.0 - site["quality"]
+
+        subject_id = f"Subject {site_no * 100 + subject_no}"
+        base = {
+            "study_id": site["study_id"], "region": site["region"], "country": site["country"],
+            "site_id": site["site_id"], "subject_id": subject_id,
+        }
+        rows = {source: [] for source in COLUMNS}
+        m = {column: 0 for column in COLUMNS["cpid_edc_subject_metrics"][7:]}
+
+        enrolled = self.as_of - timedelta(days=rng.randint(30, 540))
+        status = rng.choices(("Screening", "On Trial", "Follow-Up", "Completed", "Discontinued"),
+                             weights=(2, 10, 3, 3, 1))[0]
+        visit_dates = [enrolled + timedelta(days=28 * i) for i in range(self.visits)]
+        due = [d for d in visit_dates if d <= self.as_of]
+        latest_visit = "Screening"
+        log_no = 0
+
+        for visit_no, visit_date in enumerate(due):
+            folder = "Screening" if visit_no == 0 else f"Visit {visit_no}"
+            days_late = (self.as_of - visit_date).days
+            rows["visit_projection_tracker"].append({
+                **base, "visit": folder, "projected_date": raw_date(visit_date),
+                "days_outstanding": str(days_late) if days_late > 0 else "0"})
+            m["expected_visits"] += 1
+
+            if rng.random() < 0.08 + 0.25 * risk:
+                # Missed visit: every page of it is missing
+                m["missing_visits"] += 1
+                for form in FORMS[:4]:
+                    rows["missing_pages_visit_level"].append({
+                        **base, "site_group": site["region"], "overall_subject_status": status,
+                        "visit_level_subject_status": "Expected", "form_subject_status": "Missing",
+                        "visit_name": folder, "folder_name": folder, "form_name": form,
+                        "visit_date": raw_date(visit_date), "days_page_missing": days_late})
+                continue
+
+            latest_visit = folder
+            rows["cpid_edc_sv"].append({
+                "project_name": base["study_id"], "region": base["region"], "country": base["country"],
+                "site_id": base["site_id"], "subject_name": subject_id, "folder_name": folder,
+                "visit_date": raw_date(visit_date)})
+
+            for form in FORMS[:rng.randint(4, len(FORMS))]:
+                log_no += 1
+                page = {**base, "visit_date_raw": raw_date(visit_date)}
+                if rng.random() < 0.05 + 0.2 * risk:
+                    m["missing_pages"] += 1
+                    rows["missing_pages_all"].append({
+                        **page, "site_group": site["region"], "overall_subject_status": status,
+                        "visit_level_subject_status": "Entered", "folder_name": folder, "page_name": form,
+                        "days_page_missing": days_late})
+                    continue
+                m["pages_entered"] += 1
+                page_has_issue = False
+
+                verified = rng.random() < 0.95 - 0.6 * risk
+                m["crfs_require_verification"] += 1
+                m["forms_verified"] += verified
+                rows["cpid_edc_sdv"].append({
+                    **page, "folder_name": folder, "data_page_name": form,
+                    "verification_status": "Verified" if verified else "Require Verification"})
+
+                frozen = rng.random() < 0.7
+                locked = frozen and rng.random() < 0.6
+                m["crfs_frozen" if frozen else "crfs_not_frozen"] += 1
+                m["crfs_locked" if locked else "crfs_unlocked"] += 1
+                rows["cpid_edc_crf_freeze"].append({
+                    **page, "page_name": form, "freeze_status": "Frozen" if frozen else "Not Frozen"})
+                rows["cpid_edc_crf_locked"].append({
+                    **page, "page_name": form, "lock_status": "Locked" if locked else "Not Locked"})
+                if not locked:
+                    rows["cpid_edc_crf_unlocked"].append({
+                        **page, "page_name": form, "lock_unlock_status": "Unlocked"})
+                if frozen and rng.random() < 0.05:
+                    rows["cpid_edc_crf_unfreeze"].append({
+                        **page, "page_name": form, "unfreeze_status": "Unfrozen"})
+
+                if rng.random() < 0.02 + 0.1 * risk:
+                    page_has_issue = True
+                    m["pages_non_conformant"] += 1
+                    rows["cpid_edc_non_conformant"].append({
+                        **page, "folder_name": folder, "page_name": form, "log_no": log_no,
+                        "field_oid": f"{form[:4].upper()}_{rng.randint(1, 20):02d}",
+                        "audit_time_raw": raw_date(visit_date + timedelta(days=rng.randint(0, 5)))})
+
+                for _ in range(rng.choices((0, 1, 2, 3), weights=(14 - 10 * risk, 3, 1, 1))[0]):
+                    page_has_issue = True
+                    group, column = rng.choice(QUERY_GROUPS)
+                    opened = visit_date + timedelta(days=rng.randint(1, 20))
+                    opened = min(opened, self.as_of)
+                    state = rng.choices(("Open", "Answered", "Closed"), weights=(2 + 6 * risk, 2, 6))[0]
+                    answered = state != "Open"
+                    query = {
+                        **page, "folder_name": folder, "form_name": form,
+                        "field_oid": f"{form[:4].upper()}_{rng.randint(1, 20):02d}", "log_no": log_no,
+                        "query_status": state, "marking_group_name": group,
+                        "action_owner": "Site Review" if state == "Open" else "CRA Review",
+                        "query_open_date_raw": raw_date(opened),
+                        "query_response": "Data corrected" if answered else "",
+                        "days_since_open": (self.as_of - opened).days,
+                        "days_since_response": rng.randint(0, 10) if answered else ""}
+                    rows["cpid_edc_query_report_cumulative"].append(query)
+                    target = "cpid_edc_query_report_site_action" if state == "Open" else "cpid_edc_query_report_cra_action"
+                    rows[target].append(query)
+                    if state != "Closed":
+                        m[column] += 1
+                        m["total_queries"] += 1
+                m["crfs_with_issues"] += page_has_issue
+
+                if form in ("Adverse Events", "Concomitant Medications", "Demographics", "Laboratory"):
+                    signed = rng.random() < 0.9 - 0.5 * risk
+                    pending = 0 if signed else max((self.as_of - visit_date).days, 0)
+                    if signed:
+                        m["crfs_signed"] += 1
+                    elif pending > 90:
+                        m["crfs_overdue_90"] += 1
+                    elif pending > 45:
+                        m["crfs_overdue_45_90"] += 1
+                    elif pending > 0:
+                        m["crfs_overdue_45"] += 1
+                    else:
+                        m["crfs_never_signed"] += 1
+                    broken = signed and rng.random() < 0.02
+                    m["broken_signatures"] += broken
+                    rows["cpid_edc_pi_signature_report"].append({
+                        **page, "visit_name": folder, "form_name": form, "page_require_signature": "Yes",
+                        "audit_action": "Signature Broken" if broken else ("Signed" if signed else "Awaiting Signature"),
+                        "date_last_pi_sign_raw": raw_date(visit_date + timedelta(days=rng.randint(1, 30))) if signed else "",
+                        "no_of_days": pending, "pending_since_pi_signed": f"{pending} days" if pending else ""})
+
+                if form in ("Adverse Events", "Concomitant Medications"):
+                    source = "globalcodingreport_meddra" if form == "Adverse Events" else "globalcodingreport_whodra"
+                    coded = rng.random() < 0.93 - 0.4 * risk
+                    m["coded_terms" if coded else "uncoded_terms"] += 1
+                    rows[source].append({
+                        "report_type": "Coding Report", "study_id": base["study_id"],
+                        "dictionary": "MedDRA" if source.endswith("meddra") else "WHODrug",
+                        "dictionary_version": "27.0" if source.endswith("meddra") else "B3 2024 Mar",
+                        "subject_id": subject_id, "form_oid": form.upper().replace(" ", "_"), "logline": log_no,
+                        "field_oid": "AETERM" if source.endswith("meddra") else "CMTRT",
+                        "coding_status": "Coded Term" if coded else "UnCoded Term", "require_coding": "Yes"})
+
+                if form == "Adverse Events" and rng.random() < 0.05 + 0.1 * risk:
+                    for source, column in (("sae_dashboard_dm", "esae_review_dm"), ("sae_dashboard_safety", "esae_review_safety")):
+                        completed = rng.random() < 0.6
+                        m[column] += not completed
+                        discrepancy = {
+                            "discrepancy_id": f"{study_no}-{site_no}-{subject_no}-{log_no}", "study_id": base["study_id"],
+                            "site_id": base["site_id"], "patient_id": subject_id.split()[1],
+                            "discrepancy_ts": raw_date(visit_date + timedelta(days=2)),
+                            "review_status": "Completed" if completed else "Pending for Review",
+                            "action_status": "No action required" if completed else "Open"}
+                        if source == "sae_dashboard_dm":
+                            discrepancy.update(country=base["country"], form_name=form)
+                        else:
+                            discrepancy.update(case_status="Open" if not completed else "Closed")
+                        rows[source].append(discrepancy)
+
+                if form == "Laboratory" and rng.random() < 0.03 + 0.1 * risk:
+                    m["open_issues_lnr"] += 1
+                    test, description = rng.choice(LAB_TESTS)
+                    rows["missing_lab_ranges"].append({
+                        **base, "visit": folder, "form_name": form, "lab_category": "Chemistry",
+                        "lab_date": raw_date(visit_date), "test_name": test, "test_description": description,
+                        "issue": "Missing Lab Range", "comments": ""})
+
+                if rng.random() < 0.01 + 0.03 * risk:
+                    m["inactivated_forms"] += 1
+                    rows["inactivated_forms_loglines"].append({
+                        **base, "folder": folder, "form": form, "data_on_form": "Y",
+                        "record_position": log_no, "audit_action": "Record inactivated"})
+
+            if visit_no and rng.random() < 0.01 + 0.05 * risk:
+                confirmed = rng.random() < 0.6
+                m["pds_confirmed" if confirmed else "pds_proposed"] += 1
+                rows["cpid_edc_query_protocol_deviation"].append({
+                    **base, "folder_name": folder, "form_name": "Protocol Deviation", "log_no": log_no,
+                    "pd_status": "Confirmed" if confirmed else "Proposed", "visit_date_raw": raw_date(visit_date)})
+
+        m["open_issues_edrr"] = rng.choices((0, 1, 2, 3), weights=(10 - 6 * risk, 2, 1, 1))[0]
+        rows["compiled_edrr"].append({
+            "study_id": base["study_id"], "subject_id": subject_id,
+            "total_open_issue_count_per_subject": m["open_issues_edrr"]})
+
+        m["crfs_clean"] = m["pages_entered"] - m["crfs_with_issues"]
+        m["percent_clean_crf"] = round(m["crfs_clean"] / m["pages_entered"] * 100, 2) if m["pages_entered"] else 0.0
+        metrics = {**base, "latest_visit": latest_visit, "subject_status": status, **m}
+        rows["cpid_edc_subject_metrics"].append(metrics)
+        return {"rows": rows, "metrics": metrics}
+
+    def study_subjects(self, study_no: int) -> Iterator[Dict[str, Any]]:
+        for site in self.study_sites(study_no):
+            for subject_no in range(1, self.subjects + 1):
+                yield self.subject(site, subject_no)
+
+    def write(self, out_dir: str) -> Dict[str, int]:
+        """Write one CSV per source and study; returns rows written per source"""
+        counts = {source: 0 for source in COLUMNS}
+        for source in COLUMNS:
+            os.makedirs(os.path.join(out_dir, source), exist_ok=True)
+
+        for study_no in range(1, self.studies + 1):
+            files, writers = {}, {}
+            try:
+                for source, columns in COLUMNS.items():
+                    path = os.path.join(out_dir, source, f"{source}_study_{study_no:03d}.csv")
+                    files[source] = open(path, "w", encoding="utf-8", newline="")
+                    writer = csv.writer(files[source])
+                    # Extract banner rows before the header, as the first data row expects
+                    for banner in range(SOURCES[source] - 2):
+                        writer.writerow([f"Study {study_no} subject level metrics"] if banner == 0 else [])
+                    writer.writerow(columns)
+                    writers[source] = writer
+
+                for subject in self.study_subjects(study_no):
+                    for source, rows in subject["rows"].items():
+                        columns = COLUMNS[source]
+                        writers[source].writerows([[row.get(c, "") for c in columns] for row in rows])
+                        counts[source] += len(rows)
+            finally:
+                for f in files.values():
+                    f.close()
+        return counts
+
+    def subject_metrics_frame(self):
+        """gold.fact_subject_metrics rows for the generated subjects (formulas of vw_fact_subject_metrics_source)"""
+        import pandas as pd
+
+        records = [s["metrics"] for n in range(1, self.studies + 1) for s in self.study_subjects(n)]
+        df = pd.DataFrame.from_records(records)
+        df = df.rename(columns={"crfs_require_verification": "crfs_require_sdv"})
+
+        expected = df["expected_visits"].where(df["expected_visits"] > 0)
+        coded_total = (df["coded_terms"] + df["uncoded_terms"]).where(lambda s: s > 0)
+        sdv_total = df["crfs_require_sdv"].where(df["crfs_require_sdv"] > 0)
+        open_issues = df["open_issues_lnr"] + df["open_issues_edrr"] + df["esae_review_dm"] + df["esae_review_safety"]
+
+        df["pct_missing_visits"] = (df["missing_visits"] / expected * 100).fillna(0.0)
+        df["pct_coded_terms"] = (df["coded_terms"] / coded_total * 100).fillna(100.0)
+        df["pct_sdv_complete"] = (df["forms_verified"] / sdv_total * 100).fillna(100.0)
+        df["data_quality_index"] = (
+            ((1 - df["missing_visits"] / expected) * 15).fillna(15.0)
+            + df["percent_clean_crf"].fillna(0) * 0.20
+            + (df["total_queries"] == 0) * 15.0
+            + ((df["coded_terms"] / coded_total) * 15).fillna(15.0)
+            + ((df["forms_verified"] / sdv_total) * 15).fillna(15.0)
+            + (open_issues == 0) * 20.0
+        ).round(2)
+        df["is_clean_patient"] = (
+            (df["missing_visits"] == 0) & (df["total_queries"] == 0) & (df["missing_pages"] == 0)
+            & (df["pages_non_conformant"] == 0) & (df["uncoded_terms"] == 0)
+            & ((df["crfs_require_sdv"] == 0) | (df["crfs_require_sdv"] == df["forms_verified"]))
+        ).astype(int)
+        df["snapshot_date"] = self.as_of.isoformat()
+        return df
+
+    def site_snapshot_frame(self, days: int = 90, metrics=None):
+        """
+        gold.agg_site_metrics_snapshot rows for the `days` days up to as_of.
+        The last day matches subject_metrics_frame(); earlier days have more
+        open queries and less SDV, DQI and clean subjects, with per-site noise.
+        """
+        import pandas as pd
+
+        df = metrics if metrics is not None else self.subject_metrics_frame()
+        sites = df.groupby(["study_id", "site_id"], sort=True).agg(
+            region=("region", "max"),
+            country=("country", "max"),
+            subjects=("subject_id", "count"),
+            dqi_sum=("data_quality_index", "sum"),
+            dqi_count=("data_quality_index", "count"),
+            open_queries=("total_queries", "sum"),
+            safety_queries=("safety_queries", "sum"),
+            missing_visits=("missing_visits", "sum"),
+            sdv_required=("crfs_require_sdv", "sum"),
+            sdv_verified=("forms_verified", "sum"),
+            clean_subjects=("is_clean_patient", "sum")
+        ).reset_index()
+
+        records = []
+        for site in sites.to_dict(orient="records"):
+            for days_ago in range(days - 1, -1, -1):
+                rng = self.rng("snapshot", site["study_id"], site["site_id"], days_ago)
+                lag = days_ago / max(days, 1)  # 0 today .. ~1 at the start of the history
+                noise = 1 + rng.uniform(-0.05, 0.05) if days_ago else 1.0
+                backlog = (1 + 0.6 * lag) * noise
+                progress = max(0.0, 1 - 0.35 * lag) / noise
+                records.append({
+                    **site,
+                    "snapshot_date": (self.as_of - timedelta(days=days_ago)).isoformat(),
+                    "dqi_sum": round(site["dqi_sum"] * max(0.0, 1 - 0.15 * lag) / noise, 2),
+                    "open_queries": round(site["open_queries"] * backlog),
+                    "safety_queries": round(site["safety_queries"] * backlog),
+                    "missing_visits": round(site["missing_visits"] * backlog),
+                    "sdv_verified": min(site["sdv_required"], round(site["sdv_verified"] * progress)),
+                    "clean_subjects": min(site["subjects"], round(site["clean_subjects"] * progress)),
+                    "generation_id": 1
+                })
+        return pd.DataFrame.from_records(records)
+
+
+    def query_open_day_frame(self):
+        """
+        gold.agg_query_open_day rows (sp_refresh_query_aging) for the generated
+        queries; open -> response days are days_since_open - days_since_response
+        """
+        import pandas as pd
+
+        keys = ["study_id", "site_id", "form_name", "action_owner", "marking_group_name", "query_status"]
+        records = []
+        for n in range(1, self.studies + 1):
+            for subject in self.study_subjects(n):
+                for query in subject["rows"]["cpid_edc_query_report_cumulative"]:
+                    opened = self.as_of - timedelta(days=query["days_since_open"])
+                    answered = query["days_since_response"] != ""
+                    records.append({
+                        **{key: query[key] for key in keys},
+                        "query_open_date": opened.isoformat(),
+                        "responded": int(answered),
+                        "response_days": max(0, query["days_since_open"] - query["days_since_response"]) if answered else 0
+                    })
+        df = pd.DataFrame.from_records(records)
+        return df.groupby(keys + ["query_open_date"], sort=True).agg(
+            query_count=("responded", "size"),
+            responded_count=("responded", "sum"),
+            response_days_sum=("response_days", "sum")
+        ).reset_index()
+
+# ============================================================================
+# Main Entry Point
+# ============================================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Deterministic synthetic clinical trial CSV generator")
+    parser.add_argument("--out", default="synthetic", help="Output root (one folder per bronze source)")
+    parser.add_argument("--studies", type=int, default=3)
+    parser.add_argument("--sites", type=int, default=10, help="Sites per study")
+    parser.add_argument("--subjects", type=int, default=20, help="Subjects per site")
+    parser.add_argument("--visits", type=int, default=12, help="Scheduled visits per subject")
+    parser.add_argument("--seed", type=int, default=DATAGEN_SEED)
+    parser.add_argument("--as-of", type=date.fromisoformat, default=DATAGEN_AS_OF, help="Extract date (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    generator = TrialGenerator(args.studies, args.sites, args.subjects, args.visits, args.seed, args.as_of)
+    counts = generator.write(args.out)
+
+    print("=" * 60)
+    print(f"Synthetic data written to {os.path.abspath(args.out)}")
+    print(f"Studies: {args.studies} | Sites: {args.studies * args.sites} | "
+          f"Subjects: {args.studies * args.sites * args.subjects} | Seed: {args.seed}")
+    for source in sorted(counts):
+        print(f">> {source}: {counts[source]} rows")
+    print(f"Total Rows: {sum(counts.values())} | Duration: {time.perf_counter() - start:.1f} seconds")
+    print("=" * 60)
@@ -0,0 +1,347 @@
+"""
+Parallel Bronze Ingestion Pipeline
+
+Loads the clinical trial CSV extracts into the bronze layer. It replaces
+the cursor-driven BULK INSERT loops in the bronze.load_*_csv procedures.
+
+- Discovers the CSV files of every source folder under INGEST_ROOT
+- Loads many sources and files concurrently with batched fast_executemany inserts
+- Records per-file timings, row counts and checksums in bronze.load_file_manifest
+- Incremental mode (default) skips unchanged sources, appends new files and
+  reloads a source only when one of its loaded files changed or disappeared
+
+Usage:
+    python ingest.py                                    # incremental, all sources
+    python ingest.py --full                             # truncate + reload all sources
+    python ingest.py --sources cpid_edc_sdv missing_pages_all --workers 8
+"""
+
+import os
+import csv
+import time
+import hashlib
+import argparse
+import threading
+from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, List, Dict, Any
+
+# ============================================================================
+# Configuration
+# ============================================================================
+
+# Database Configuration (same variables as aiapi.py)
+DB_CONFIG = {
+    "server": os.getenv("DB_SERVER", "SERVER"),
+    "database": os.getenv("DB_NAME", "DATABASE"),
+    "username": os.getenv("DB_USER", "USERID"),
+    "password": os.getenv("DB_PASSWORD", "PASSWORD"),
+}
+
+INGEST_ROOT = os.getenv("INGEST_ROOT", r"C:\DataWarehouseNovartis")
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "8"))
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "5000"))
+
+# Bronze sources: folder / table name -> first data row (1-based, as in BULK INSERT FIRSTROW)
+SOURCES = {
+    "compiled_edrr": 2,
+    "cpid_edc_crf_freeze": 2,
+    "cpid_edc_crf_locked": 2,
+    "cpid_edc_crf_unfreeze": 2,
+    "cpid_edc_crf_unlocked": 2,
+    "cpid_edc_non_conformant": 2,
+    "cpid_edc_pi_signature_report": 2,
+    "cpid_edc_query_protocol_deviation": 2,
+    "cpid_edc_query_report_cra_action": 2,
+    "cpid_edc_query_report_cumulative": 2,
+    "cpid_edc_query_report_site_action": 2,
+    "cpid_edc_sdv": 2,
+    "cpid_edc_subject_metrics": 5,
+    "cpid_edc_sv": 2,
+    "globalcodingreport_meddra": 2,
+    "globalcodingreport_whodra": 2,
+    "inactivated_forms_loglines": 2,
+    "missing_lab_ranges": 2,
+    "missing_pages_all": 2,
+    "missing_pages_visit_level": 2,
+    "sae_dashboard_dm": 2,
+    "sae_dashboard_safety": 2,
+    "visit_projection_tracker": 2,
+}
+
+
+# ============================================================================
+# Database Connection
+# ============================================================================
+
+_local = threading.local()
+
+
+def get_db_connection():
+    """Create database connection"""
+    import pyodbc
+    conn_str = (
+        f"DRIVER={{ODBC Driver 17 for SQL Server}};"
+        f"SERVER={DB_CONFIG['server']};"
+        f"DATABASE={DB_CONFIG['database']};"
+        f"UID={DB_CONFIG['username']};"
+        f"PWD={DB_CONFIG['password']}"
+    )
+    return pyodbc.connect(conn_str, autocommit=False)
+
+
+def thread_connection():
+    """One connection per worker thread, reused across files"""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = get_db_connection()
+        _local.conn = conn
+    return conn
+
+
+# ============================================================================
+# File Discovery
+# ============================================================================
+
+def file_checksum(path: str) -> str:
+    """SHA-256 of the file contents"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def discover_files(root: str, source: str) -> Dict[str, str]:
+    """Map of file name -> checksum for every CSV in the source folder"""
+    folder = os.path.join(root, source)
+    if not os.path.isdir(folder):
+        return {}
+    names = sorted(n for n in os.listdir(folder) if n.lower().endswith(".csv"))
+    return {name: file_checksum(os.path.join(folder, name)) for name in names}
+
+
+# ============================================================================
+# Manifest
+# ============================================================================
+
+def current_manifest(conn, source: str) -> Dict[str, str]:
+    """Files (and checksums) currently loaded in the bronze table"""
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT file_name, checksum FROM bronze.load_file_manifest "
+        "WHERE source_name = ? AND is_current = 1",
+        source
+    )
+    rows = {row.file_name: row.checksum for row in cursor.fetchall()}
+    cursor.close()
+    return rows
+
+
+def plan_source(source: str, files: Dict[str, str], loaded: Dict[str, str], full: bool) -> tuple:
+    """Decide how to bring a source up to date: (mode, files to load)"""
+    if not files:
+        return "empty", []
+    if full or not loaded:
+        return "full", sorted(files)
+    changed = [name for name, checksum in loaded.items() if files.get(name) != checksum]
+    if changed:
+        # Rows carry no file lineage, so a changed or removed file means a full reload
+        return "full", sorted(files)
+    new_files = sorted(name for name in files if name not in loaded)
+    if new_files:
+        return "append", new_files
+    return "unchanged", []
+
+
+# ============================================================================
+# Loading
+# ============================================================================
+
+def table_columns(conn, source: str) -> List[type]:
+    """Python types of the bronze table columns, in insert order"""
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT TOP 0 * FROM bronze.{source}")
+    types = [col[1] for col in cursor.description]
+    cursor.close()
+    return types
+
+
+def convert_value(value: str, col_type: type):
+    """Convert a CSV field like BULK INSERT would: blanks become NULL"""
+    value = value.strip()
+    if value == "":
+        return None
+    try:
+        if col_type is int:
+            return int(float(value))
+        if col_type is float:
+            return float(value)
+        if col_type is Decimal:
+            return Decimal(value)
+    except ValueError:
+        return None
+    return value
+
+
+def load_file(source: str, file_name: str, checksum: str, first_row: int,
+              col_types: List[type], load_mode: str, batch_size: int) -> Dict[str, Any]:
+    """Insert one CSV file in batches and record it in the manifest"""
+    path = os.path.join(INGEST_ROOT, source, file_name)
+    width = len(col_types)
+    placeholders = ", ".join("?" * width)
+    insert_sql = f"INSERT INTO bronze.{source} VALUES ({placeholders})"
+
+    start = time.perf_counter()
+    rows_loaded = 0
+    conn = thread_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.fast_executemany = True
+        batch = []
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            reader = csv.reader(f)
+            for line_no, record in enumerate(reader, start=1):
+                if line_no < first_row or not any(field.strip() for field in record):
+                    continue
+                record = (record + [""] * width)[:width]
+                batch.append([convert_value(v, t) for v, t in zip(record, col_types)])
+                if len(batch) >= batch_size:
+                    cursor.executemany(insert_sql, batch)
+                    rows_loaded += len(batch)
+                    batch = []
+        if batch:
+            cursor.executemany(insert_sql, batch)
+            rows_loaded += len(batch)
+
+        duration_ms = int((time.perf_counter() - start) * 1000)
+        cursor.execute(
+            "INSERT INTO bronze.load_file_manifest "
+            "(source_name, file_name, checksum, rows_loaded, duration_ms, load_mode, status, is_current) "
+            "VALUES (?, ?, ?, ?, ?, ?, 'loaded', 1)",
+            source, file_name, checksum, rows_loaded, duration_ms, load_mode
+        )
+        conn.commit()
+        cursor.close()
+        status, error = "loaded", None
+    except Exception as e:
+        conn.rollback()
+        duration_ms = int((time.perf_counter() - start) * 1000)
+        rows_loaded = 0
+        status, error = "failed", str(e)
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                "INSERT INTO bronze.load_file_manifest "
+                "(source_name, file_name, checksum, rows_loaded, duration_ms, load_mode, status, is_current, error_message) "
+                "VALUES (?, ?, ?, 0, ?, ?, 'failed', 0, ?)",
+                source, file_name, checksum, duration_ms, load_mode, error[:4000]
+            )
+            conn.commit()
+            cursor.close()
+        except Exception:
+            conn.rollback()
+
+    return {
+        "source": source,
+        "file": file_name,
+        "rows": rows_loaded,
+        "duration_ms": duration_ms,
+        "status": status,
+        "error": error
+    }
+
+
+def prepare_source(conn, source: str, mode: str):
+    """Truncate the bronze table and retire its manifest entries before a full load"""
+    if mode != "full":
+        return
+    cursor = conn.cursor()
+    cursor.execute(f"TRUNCATE TABLE bronze.{source}")
+    cursor.execute(
+        "UPDATE bronze.load_file_manifest SET is_current = 0 "
+        "WHERE source_name = ? AND is_current = 1",
+        source
+    )
+    conn.commit()
+    cursor.close()
+
+
+def bump_load_generation(conn, source: str):
+    """Signal downstream caches that bronze data changed"""
+    cursor = conn.cursor()
+    cursor.execute("EXEC gold.sp_bump_load_generation @layer = 'bronze', @source_name = ?", source)
+    conn.commit()
+    cursor.close()
+
+
+def run(sources: List[str], full: bool = False, workers: int = INGEST_WORKERS,
+        batch_size: int = INGEST_BATCH_SIZE) -> List[Dict[str, Any]]:
+    """Bring the requested bronze sources up to date; returns per-file results"""
+    batch_start = time.perf_counter()
+    control = get_db_connection()
+
+    print("=" * 60)
+    print("Loading Bronze Layer")
+    print(f"Source Folder: {INGEST_ROOT}")
+    print(f"Mode: {'FULL' if full else 'INCREMENTAL'} | Workers: {workers}")
+    print("=" * 60)
+
+    # Plan every source up front (checksums are computed concurrently)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        discovered = dict(zip(sources, pool.map(lambda s: discover_files(INGEST_ROOT, s), sources)))
+
+    tasks = []
+    for source in sources:
+        files = discovered[source]
+        mode, to_load = plan_source(source, files, current_manifest(control, source), full)
+        print(f">> {source}: {mode} ({len(to_load)} of {len(files)} files)")
+        if not to_load:
+            continue
+        prepare_source(control, source, mode)
+        col_types = table_columns(control, source)
+        for name in to_load:
+            tasks.append((source, name, files[name], SOURCES[source], col_types, mode, batch_size))
+
+    results = []
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ingest") as pool:
+        futures = [pool.submit(load_file, *task) for task in tasks]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if result["status"] == "loaded":
+                print(f">> Loaded {result['source']}/{result['file']}: "
+                      f"{result['rows']} rows in {result['duration_ms']} ms")
+            else:
+                print(f">> FAILED {result['source']}/{result['file']}: {result['error']}")
+
+    for source in sorted({r["source"] for r in results if r["status"] == "loaded"}):
+        bump_load_generation(control, source)
+    control.close()
+
+    total_rows = sum(r["rows"] for r in results)
+    failed = [r for r in results if r["status"] == "failed"]
+    elapsed = time.perf_counter() - batch_start
+    print("=" * 60)
+    print(f"Bronze Load {'Completed With Errors' if failed else 'Completed Successfully'}")
+    print(f"Files: {len(results)} | Failed: {len(failed)} | Rows: {total_rows}")
+    print(f"Total Load Duration: {elapsed:.1f} seconds")
+    print("=" * 60)
+    return results
+
+
+# ============================================================================
+# Main Entry Point
+# ============================================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parallel bronze-layer CSV ingestion")
+    parser.add_argument("--sources", nargs="*", default=sorted(SOURCES), choices=sorted(SOURCES),
+                        help="Sources to load (default: all)")
+    parser.add_argument("--full", action="store_true", help="Truncate and reload instead of incremental")
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS, help="Concurrent file loads")
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE, help="Rows per executemany batch")
+    args = parser.parse_args()
+
+    results = run(args.sources, full=args.full, workers=args.workers, batch_size=args.batch_size)
+    raise SystemExit(1 if any(r["status"] == "failed" for r in results) else 0)
@@ -0,0 +1,64 @@
+"""
+Deferred Imports
+
+Module proxies that import heavy dependencies (pandas, numpy) on first
+attribute access instead of at import time, so API workers start serving
+quickly and the lifespan warm-up loads them off the request path.
+"""
+
+import time
+import importlib
+import threading
+from typing import Dict, Any
+
+
+class LazyModule:
+    """Stands in for a module until one of its attributes is first used
+
+    Only underscore-prefixed names live on the proxy itself so that module
+    attributes such as numpy.load are never shadowed.
+    """
+
+    def __init__(self, name: str):
+        self.__dict__.update(_name=name, _module=None, _load_ms=None, _lock=threading.Lock())
+
+    def _load(self):
+        """Import the module now (idempotent, thread-safe)"""
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    start = time.perf_counter()
+                    module = importlib.import_module(self._name)
+                    self.__dict__["_load_ms"] = round((time.perf_counter() - start) * 1000, 1)
+                    self.__dict__["_module"] = module
+        return self._module
+
+    def __getattr__(self, attr: str):
+        value = getattr(self._load(), attr)
+        # Later lookups of the same name skip __getattr__
+        self.__dict__[attr] = value
+        return value
+
+    def __setattr__(self, attr: str, value):
+        setattr(self._load(), attr, value)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    return LazyModule(name)
+
+
+def load_modules(*modules: LazyModule):
+    """Import deferred modules ahead of first use (called from warm-up)"""
+    for module in modules:
+        module._load()
+
+
+def module_stats(*modules: LazyModule) -> Dict[str, Any]:
+    return {
+        module._name: {"loaded": module._module is not None, "load_ms": module._load_ms}
+        for module in modules
+    }
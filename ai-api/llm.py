@@ -0,0 +1,373 @@
+"""
+LLM Model Backends
+
+Pluggable stand-ins for genai.GenerativeModel behind the same
+generate_content(prompt, stream) interface used by ClinicalTrialAI:
+
+- gemini: the Gemini API (the only backend that needs network access)
+- record: wraps Gemini and appends every prompt -> response pair to a JSONL file
+- replay: answers from a recording, with recorded or synthetic latency/token rate
+- stub:   deterministic canned responses per prompt kind, no network
+
+Responses expose .text; streamed responses yield chunks with .text, so the API
+code is identical for every backend.
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import Optional, List, Dict, Any, Callable
+
+# ============================================================================
+# Responses
+# ============================================================================
+
+class LLMResponse:
+    """Response or streamed chunk with the text attribute of Gemini responses"""
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for Gemini on English/SQL text)"""
+    return max(1, len(text) // 4)
+
+
+def prompt_key(prompt: str, context: str = "") -> str:
+    """Stable key of a prompt and the cached system context it was sent with"""
+    return hashlib.sha256(f"{context}\x00{prompt}".encode("utf-8")).hexdigest()
+
+
+class SyntheticTiming:
+    """Sleeps that model first-token latency and output token rate (0 = instant)"""
+
+    def __init__(self, latency_ms: float = 0.0, tokens_per_second: float = 0.0):
+        self.latency_ms = latency_ms
+        self.tokens_per_second = tokens_per_second
+
+    def first_token(self):
+        if self.latency_ms > 0:
+            time.sleep(self.latency_ms / 1000.0)
+
+    def tokens(self, text: str):
+        if self.tokens_per_second > 0:
+            time.sleep(estimate_tokens(text) / self.tokens_per_second)
+
+    def respond(self, text: str) -> LLMResponse:
+        self.first_token()
+        self.tokens(text)
+        return LLMResponse(text)
+
+    def stream(self, chunks: List[str]):
+        self.first_token()
+        for chunk in chunks:
+            self.tokens(chunk)
+            yield LLMResponse(chunk)
+
+
+def split_chunks(text: str) -> List[str]:
+    """Line-sized chunks, roughly what a streaming Gemini response delivers"""
+    return text.splitlines(keepends=True) or [text]
+
+
+# ============================================================================
+# Backends
+# ============================================================================
+
+class ModelBackend:
+    """Interface shared by all backends"""
+
+    name = "base"
+
+    def __init__(self):
+        self.context = ""
+        self._lock = threading.Lock()
+        self._counters = {"calls": 0, "stream_calls": 0}
+
+    def _count(self, counter: str, amount: int = 1):
+        with self._lock:
+            self._counters[counter] = self._counters.get(counter, 0) + amount
+
+    def generate_content(self, prompt: str, stream: bool = False, timeout: Optional[float] = None):
+        """LLMResponse, or an iterator of LLMResponse chunks when stream=True (timeout: request seconds)"""
+        raise NotImplementedError
+
+    def cached_model(self, system_instruction: str, ttl: float) -> "ModelBackend":
+        """Backend whose prompts run against a cached system instruction"""
+        raise NotImplementedError(f"{self.name} backend has no cached content")
+
+    def validate(self):
+        """Cheap readiness check run during warm-up; raises when the backend cannot serve"""
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"backend": self.name, **self._counters}
+
+
+class GeminiBackend(ModelBackend):
+    """Gemini API via google.generativeai (configured on first use, not at import)"""
+
+    name = "gemini"
+
+    def __init__(self, model_name: str, api_key: str, model=None):
+        super().__init__()
+        self.model_name = model_name
+        self.api_key = api_key
+        self._model = model
+        self._configured = None
+
+    def _genai(self):
+        if self._configured is None:
+            import google.generativeai as genai
+            genai.configure(api_key=self.api_key)
+            self._configured = genai
+        return self._configured
+
+    def _target(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = self._genai().GenerativeModel(self.model_name)
+        return self._model
+
+    def generate_content(self, prompt: str, stream: bool = False, timeout: Optional[float] = None):
+        self._count("stream_calls" if stream else "calls")
+        if timeout:
+            return self._target().generate_content(prompt, stream=stream, request_options={"timeout": timeout})
+        return self._target().generate_content(prompt, stream=stream)
+
+    def cached_model(self, system_instruction: str, ttl: float) -> "GeminiBackend":
+        from datetime import timedelta
+        genai = self._genai()
+        from google.generativeai import caching
+        cached = caching.CachedContent.create(
+            model=f"models/{self.model_name}",
+            system_instruction=system_instruction,
+            ttl=timedelta(seconds=ttl)
+        )
+        backend = GeminiBackend(
+            self.model_name, self.api_key,
+            model=genai.GenerativeModel.from_cached_content(cached_content=cached)
+        )
+        backend.context = prompt_key(system_instruction)
+        return backend
+
+    def validate(self):
+        """Resolve the model (checks the API key and model name) and build the client"""
+        self._genai().get_model(f"models/{self.model_name}")
+        self._target()
+
+
+class RecordingBackend(ModelBackend):
+    """Passes prompts to another backend and appends each exchange to a JSONL recording"""
+
+    name = "record"
+
+    def __init__(self, inner: ModelBackend, path: str, _file_lock: Optional[threading.Lock] = None):
+        super().__init__()
+        self.inner = inner
+        self.path = path
+        self.context = inner.context
+        self._file_lock = _file_lock or threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    def _write(self, prompt: str, chunks: List[str], first_token_ms: float, total_ms: float, stream: bool):
+        record = {
+            "key": prompt_key(prompt, self.context),
+            "backend": self.inner.name,
+            "stream": stream,
+            "prompt_tokens": estimate_tokens(prompt),
+            "first_token_ms": round(first_token_ms, 1),
+            "total_ms": round(total_ms, 1),
+            "chunks": chunks,
+            "prompt": prompt,
+            "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+        }
+        line = json.dumps(record, ensure_ascii=False)
+        with self._file_lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        self._count("recorded")
+
+    def generate_content(self, prompt: str, stream: bool = False, timeout: Optional[float] = None):
+        self._count("stream_calls" if stream else "calls")
+        start = time.perf_counter()
+        response = self.inner.generate_content(prompt, stream=stream, timeout=timeout)
+        if not stream:
+            elapsed = (time.perf_counter() - start) * 1000
+            self._write(str(prompt), [response.text], elapsed, elapsed, stream)
+            return response
+        return self._record_stream(str(prompt), response, start)
+
+    def _record_stream(self, prompt: str, response, start: float):
+        chunks, first_token_ms = [], None
+        for chunk in response:
+            try:
+                text = chunk.text
+            except ValueError:
+                text = ""
+            if first_token_ms is None:
+                first_token_ms = (time.perf_counter() - start) * 1000
+            if text:
+                chunks.append(text)
+            yield chunk
+        total_ms = (time.perf_counter() - start) * 1000
+        self._write(prompt, chunks, first_token_ms or total_ms, total_ms, True)
+
+    def cached_model(self, system_instruction: str, ttl: float) -> "RecordingBackend":
+        return RecordingBackend(self.inner.cached_model(system_instruction, ttl), self.path, self._file_lock)
+
+    def validate(self):
+        self.inner.validate()
+
+
+class ReplayBackend(ModelBackend):
+    """Answers prompts from a recording; unknown prompts fail or fall back to a stub"""
+
+    name = "replay"
+
+    def __init__(
+        self,
+        path: str,
+        timing: str = "recorded",
+        speed: float = 1.0,
+        synthetic: Optional[SyntheticTiming] = None,
+        fallback: Optional[ModelBackend] = None,
+        _recordings: Optional[Dict[str, Dict[str, Any]]] = None
+    ):
+        super().__init__()
+        self.path = path
+        self.timing = timing  # "recorded" (scaled by speed) or "synthetic"
+        self.speed = speed if speed > 0 else 1.0
+        self.synthetic = synthetic or SyntheticTiming()
+        self.fallback = fallback
+        self._recordings = _recordings if _recordings is not None else self._load(path)
+        self._counters.update({"recordings": len(self._recordings), "hits": 0, "misses": 0})
+
+    @staticmethod
+    def _load(path: str) -> Dict[str, Dict[str, Any]]:
+        recordings = {}
+        if not os.path.exists(path):
+            print(f"Warning: LLM recording {path} not found; every prompt is a replay miss.")
+            return recordings
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    recordings[record["key"]] = record  # latest recording of a prompt wins
+        return recordings
+
+    def _timing(self, record: Dict[str, Any]) -> SyntheticTiming:
+        if self.timing == "synthetic":
+            return self.synthetic
+        # Recorded timing: first-token latency plus the recorded generation rate
+        first_token = record.get("first_token_ms", 0.0) / self.speed
+        generation_ms = max(record.get("total_ms", 0.0) / self.speed - first_token, 0.0)
+        tokens = sum(estimate_tokens(chunk) for chunk in record["chunks"])
+        rate = tokens / (generation_ms / 1000.0) if generation_ms > 0 else 0.0
+        return SyntheticTiming(first_token, rate)
+
+    def generate_content(self, prompt: str, stream: bool = False, timeout: Optional[float] = None):
+        self._count("stream_calls" if stream else "calls")
+        record = self._recordings.get(prompt_key(str(prompt), self.context))
+        if record is None:
+            self._count("misses")
+            if self.fallback is None:
+                raise Exception(f"LLM replay miss: no recorded response for prompt {prompt_key(str(prompt), self.context)[:12]}")
+            return self.fallback.generate_content(prompt, stream=stream, timeout=timeout)
+
+        self._count("hits")
+        timing = self._timing(record)
+        if stream:
+            return timing.stream(record["chunks"])
+        return timing.respond("".join(record["chunks"]))
+
+    def cached_model(self, system_instruction: str, ttl: float) -> "ReplayBackend":
+        backend = ReplayBackend(
+            self.path, self.timing, self.speed, self.synthetic, self.fallback, _recordings=self._recordings
+        )
+        backend.context = prompt_key(system_instruction)
+        return backend
+
+    def validate(self):
+        if not self._recordings and self.fallback is None:
+            raise RuntimeError(f"LLM recording {self.path} is empty and no fallback is configured")
+
+
+def stub_response(prompt: str) -> str:
+    """Generic deterministic answer matching what each prompt kind asks for"""
+    if prompt.rstrip().endswith("SQL Query:"):
+        return "SELECT TOP 100 * FROM gold.agg_site_performance ORDER BY avg_data_quality_index ASC"
+    if '"risk_level"' in prompt:
+        return json.dumps({
+            "risk_level": "MEDIUM", "risk_score": 50, "summary": "Stub assessment.",
+            "recommendations": [], "positive_observations": []
+        })
+    if '"overall_status"' in prompt:
+        return json.dumps({
+            "overall_status": "FAIR", "summary": "Stub insights.", "key_findings": [], "risk_areas": [],
+            "recommendations": [],
+            "submission_readiness": {"status": "NOT_READY", "blockers": [], "estimated_timeline": "TBD"}
+        })
+    return "Stub response generated without a language model.\n"
+
+
+class StubBackend(ModelBackend):
+    """Deterministic canned responses with synthetic latency and token rate"""
+
+    name = "stub"
+
+    def __init__(self, timing: Optional[SyntheticTiming] = None, responder: Callable[[str], str] = stub_response):
+        super().__init__()
+        self.timing = timing or SyntheticTiming()
+        self.responder = responder
+
+    def generate_content(self, prompt: str, stream: bool = False, timeout: Optional[float] = None):
+        self._count("stream_calls" if stream else "calls")
+        text = self.responder(str(prompt))
+        if stream:
+            return self.timing.stream(split_chunks(text))
+        return self.timing.respond(text)
+
+    def cached_model(self, system_instruction: str, ttl: float) -> "StubBackend":
+        # Shapes prompts like the cached Gemini path without any network call
+        return self
+
+
+# ============================================================================
+# Factory
+# ============================================================================
+
+LLM_BACKENDS = ("gemini", "record", "replay", "stub")
+
+
+def create_backend(
+    name: str,
+    model_name: str,
+    api_key: str,
+    record_path: str = "llm_recordings.jsonl",
+    latency_ms: float = 0.0,
+    tokens_per_second: float = 0.0,
+    replay_timing: str = "recorded",
+    replay_speed: float = 1.0,
+    replay_fallback: bool = False
+) -> ModelBackend:
+    """Backend by name; latency_ms / tokens_per_second drive stub and synthetic replay timing"""
+    name = name.lower()
+    timing = SyntheticTiming(latency_ms, tokens_per_second)
+    if name == "gemini":
+        return GeminiBackend(model_name, api_key)
+    if name == "record":
+        return RecordingBackend(GeminiBackend(model_name, api_key), record_path)
+    if name == "replay":
+        return ReplayBackend(
+            record_path, replay_timing, replay_speed, timing,
+            fallback=StubBackend(timing) if replay_fallback else None
+        )
+    if name == "stub":
+        return StubBackend(timing)
+    raise ValueError(f"Unknown LLM backend {name!r} (expected one of {', '.join(LLM_BACKENDS)})")
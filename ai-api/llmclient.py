@@ -0,0 +1,448 @@
+"""
+LLM Call Resilience
+
+Admission control and failure handling around model calls:
+
+- AdaptiveLimiter: concurrency limit that adapts by AIMD (grows by about one
+  slot per limit's worth of fast calls, halves on rate limiting or slow
+  calls) and admits waiting calls in priority order, so interactive requests
+  go ahead of batch work
+- CircuitBreaker: fails fast while the provider keeps failing and lets a
+  single probe through after a cool-down
+- LLMClient: per-call deadlines, retries with jittered exponential backoff
+  and a hedged second attempt for slow interactive calls
+
+Priority and deadline travel with the request in context variables, so the
+endpoints decide them rather than the prompt builders.
+"""
+
+import time
+import heapq
+import random
+import itertools
+import threading
+from contextvars import ContextVar
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Optional, Dict, Any, Callable
+
+# ============================================================================
+# Request Context
+# ============================================================================
+
+# Lower value = admitted first
+PRIORITIES = {"interactive": 0, "standard": 1, "batch": 2}
+
+llm_priority: ContextVar[str] = ContextVar("llm_priority", default="standard")
+# Absolute time.monotonic() by which every LLM call of the request must finish
+llm_deadline: ContextVar[Optional[float]] = ContextVar("llm_deadline", default=None)
+
+
+def set_llm_priority(priority: str, deadline_seconds: Optional[float] = None):
+    """Priority (and optionally one deadline for all calls) of the current request or task"""
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown LLM priority {priority!r}")
+    llm_priority.set(priority)
+    llm_deadline.set(time.monotonic() + deadline_seconds if deadline_seconds else None)
+
+
+class LLMUnavailable(Exception):
+    """Call refused or given up: circuit open, no capacity or time left, or retries exhausted"""
+
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+# A timeout this close to the request deadline (seconds) is the caller's deadline running out
+DEADLINE_SLACK = 0.05
+
+# Provider exception names (google.api_core.exceptions and HTTP clients) by failure class
+OVERLOAD_ERRORS = {"ResourceExhausted", "TooManyRequests"}
+TRANSIENT_ERRORS = {
+    "ServiceUnavailable", "InternalServerError", "BadGateway", "GatewayTimeout",
+    "DeadlineExceeded", "RetryError", "ConnectError", "ReadTimeout", "RemoteDisconnected"
+}
+
+
+def classify_error(error: BaseException) -> str:
+    """'overload' (429), 'transient' (5xx, timeouts, connection) or 'fatal' for a failed model call"""
+    name = type(error).__name__
+    code = getattr(error, "code", None)
+    message = str(error).lower()
+    if name in OVERLOAD_ERRORS or code == 429 or "429" in message or "rate limit" in message or "quota" in message:
+        return "overload"
+    if (name in TRANSIENT_ERRORS or code in (500, 502, 503, 504)
+            or isinstance(error, (TimeoutError, ConnectionError))):
+        return "transient"
+    return "fatal"
+
+
+# ============================================================================
+# Adaptive Concurrency Limit
+# ============================================================================
+
+class AdaptiveLimiter:
+    """Blocking AIMD concurrency limit with priority-ordered admission"""
+
+    def __init__(
+        self,
+        initial: int = 8,
+        min_limit: int = 1,
+        max_limit: int = 32,
+        latency_target: float = 20.0,
+        decrease_ratio: float = 0.5,
+        cooldown: float = 1.0
+    ):
+        self.min_limit = max(min_limit, 1)
+        self.max_limit = max(max_limit, self.min_limit)
+        self.limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.latency_target = latency_target
+        self.decrease_ratio = decrease_ratio
+        # A burst of 429s from one overload episode halves the limit once
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self._waiters = []  # heap of (priority, sequence)
+        self._sequence = itertools.count()
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+        self._counters = {"admitted": 0, "shed": 0, "increases": 0, "decreases": 0, "hedge_slots": 0}
+
+    def acquire(self, priority: int, deadline: Optional[float] = None):
+        """Wait for a slot; raises LLMUnavailable if the deadline passes first"""
+        entry = (priority, next(self._sequence))
+        with self._cond:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while self._waiters[0] != entry or self.in_flight >= int(self.limit):
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        self._counters["shed"] += 1
+                        raise LLMUnavailable("Timed out waiting for LLM capacity")
+                    self._cond.wait(remaining)
+                self.in_flight += 1
+                self._counters["admitted"] += 1
+            finally:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+    def try_acquire(self) -> bool:
+        """Take a spare slot without waiting (hedged attempts never queue)"""
+        with self._cond:
+            if self._waiters or self.in_flight >= int(self.limit):
+                return False
+            self.in_flight += 1
+            self._counters["hedge_slots"] += 1
+            return True
+
+    def release(self, latency: Optional[float] = None, overloaded: bool = False):
+        """Free a slot; latency (None = no signal) and overloaded drive the limit"""
+        with self._cond:
+            saturated = self.in_flight >= int(self.limit) * 0.5
+            self.in_flight -= 1
+            now = time.monotonic()
+            if overloaded or (latency is not None and latency > self.latency_target):
+                if now - self._last_decrease >= self.cooldown:
+                    self.limit = max(float(self.min_limit), self.limit * self.decrease_ratio)
+                    self._last_decrease = now
+                    self._counters["decreases"] += 1
+            elif latency is not None and saturated and self.limit < self.max_limit:
+                # Grow only while the limit is actually in use
+                self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+                self._counters["increases"] += 1
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            queued = {name: 0 for name in PRIORITIES}
+            names = {value: name for name, value in PRIORITIES.items()}
+            for priority, _ in self._waiters:
+                queued[names.get(priority, "standard")] += 1
+            return {
+                "limit": round(self.limit, 2),
+                "in_flight": self.in_flight,
+                **{f"queued_{name}": count for name, count in queued.items()},
+                **self._counters
+            }
+
+
+# ============================================================================
+# Circuit Breaker
+# ============================================================================
+
+class CircuitBreaker:
+    """closed -> open after failure_threshold consecutive failures -> half_open probe after reset_timeout"""
+
+    STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = max(failure_threshold, 1)
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        self._counters = {"opened": 0, "rejected": 0}
+
+    def allow(self):
+        """Raise LLMUnavailable while open (or while the half-open probe is out)"""
+        with self._lock:
+            if self.state == "open":
+                waited = time.monotonic() - self._opened_at
+                if waited < self.reset_timeout:
+                    self._counters["rejected"] += 1
+                    raise LLMUnavailable("LLM circuit open after repeated failures", self.reset_timeout - waited)
+                self.state = "half_open"
+                self._probing = False
+            if self.state == "half_open":
+                if self._probing:
+                    self._counters["rejected"] += 1
+                    raise LLMUnavailable("LLM circuit half-open; probe in progress")
+                self._probing = True
+
+    def record(self, outcome: str):
+        """outcome: 'ok', 'failure' (provider at fault) or 'neutral' (e.g. a bad prompt)"""
+        with self._lock:
+            self._probing = False
+            if outcome == "ok":
+                self.state = "closed"
+                self._failures = 0
+            elif outcome == "failure":
+                self._failures += 1
+                if self.state == "half_open" or self._failures >= self.failure_threshold:
+                    if self.state != "open":
+                        self._counters["opened"] += 1
+                    self.state = "open"
+                    self._opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "circuit": self.state,
+                "circuit_state": self.STATES[self.state],
+                "consecutive_failures": self._failures,
+                **{f"circuit_{key}": value for key, value in self._counters.items()}
+            }
+
+
+# ============================================================================
+# Client
+# ============================================================================
+
+class LLMClient:
+    """
+    Runs model calls through the breaker and limiter with deadlines and
+    retries. call(fn) / stream(fn) take fn(timeout) that issues one attempt
+    (timeout = seconds left before the deadline, or None).
+    """
+
+    def __init__(
+        self,
+        limiter: AdaptiveLimiter,
+        breaker: CircuitBreaker,
+        deadlines: Dict[str, float],
+        retries: int = 2,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        hedge_after: float = 0.0,
+        on_queue_wait: Optional[Callable[[float, str], None]] = None
+    ):
+        self.limiter = limiter
+        self.breaker = breaker
+        self.deadlines = deadlines
+        self.retries = max(retries, 0)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge_after = hedge_after
+        self.on_queue_wait = on_queue_wait
+        self._pool = ThreadPoolExecutor(max_workers=limiter.max_limit * 2, thread_name_prefix="llm-attempt")
+        self._lock = threading.Lock()
+        self._counters = {
+            "calls": 0, "failures": 0, "retries": 0, "timeouts": 0,
+            "hedges": 0, "hedge_wins": 0, "degraded": 0
+        }
+
+    def count(self, counter: str, amount: int = 1):
+        with self._lock:
+            self._counters[counter] += amount
+
+    def _context(self) -> tuple:
+        priority = llm_priority.get()
+        deadline = llm_deadline.get()
+        if deadline is None and self.deadlines.get(priority):
+            deadline = time.monotonic() + self.deadlines[priority]
+        return priority, deadline
+
+    def _remaining(self, deadline: Optional[float]) -> Optional[float]:
+        if deadline is None:
+            return None
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            self.count("timeouts")
+            raise LLMUnavailable("LLM deadline exceeded")
+        return remaining
+
+    def _admit(self, priority: str, deadline: Optional[float]):
+        self.breaker.allow()
+        queued = time.monotonic()
+        try:
+            self.limiter.acquire(PRIORITIES[priority], deadline)
+        except LLMUnavailable:
+            # The breaker let this call through; do not leave a half-open probe hanging
+            self.breaker.record("neutral")
+            raise
+        if self.on_queue_wait:
+            self.on_queue_wait(time.monotonic() - queued, priority)
+
+    def _backoff(self, attempt: int, deadline: Optional[float]) -> bool:
+        """Sleep before the next attempt; False when there is no time left for one"""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        if deadline is not None and time.monotonic() + delay >= deadline:
+            return False
+        self.count("retries")
+        time.sleep(delay)
+        return True
+
+    def _exhausted(self, error: BaseException, attempt: int) -> LLMUnavailable:
+        if isinstance(error, LLMUnavailable):
+            return error
+        retry_after = min(self.backoff_max, self.backoff_base * (2 ** (attempt + 1)))
+        return LLMUnavailable(f"LLM call failed after {attempt + 1} attempts: {str(error)}", retry_after)
+
+    def _settle(self, error: Optional[BaseException], latency: float, deadline: Optional[float] = None) -> str:
+        """
+        Feed the outcome of an attempt to the limiter and breaker; returns its
+        error class. Running out of the caller's own time ('deadline') says
+        nothing about the provider, so only the limiter sees it.
+        """
+        if error is None:
+            self.limiter.release(latency)
+            self.breaker.record("ok")
+            return "ok"
+        kind = classify_error(error)
+        if isinstance(error, LLMUnavailable):
+            kind = "deadline"
+        elif kind == "transient" and deadline is not None and deadline - time.monotonic() < DEADLINE_SLACK:
+            # The provider timed out on the time left before the request deadline
+            kind = "deadline"
+            self.count("timeouts")
+        self.limiter.release(latency if kind != "fatal" else None, overloaded=kind == "overload")
+        self.breaker.record("failure" if kind in ("overload", "transient") else "neutral")
+        self.count("failures")
+        return kind
+
+    def call(self, fn: Callable[[Optional[float]], Any], hedge: Optional[bool] = None):
+        """
+        Result of fn, retried on rate limiting and transient provider errors.
+        Raises LLMUnavailable once retries or the deadline run out; other
+        errors propagate unchanged.
+        """
+        priority, deadline = self._context()
+        hedge = priority == "interactive" if hedge is None else hedge
+        self.count("calls")
+        attempt = 0
+        while True:
+            self._remaining(deadline)
+            self._admit(priority, deadline)
+            start = time.monotonic()
+            try:
+                result = self._attempt(fn, deadline, hedge)
+            except Exception as e:
+                kind = self._settle(e, time.monotonic() - start, deadline)
+                if kind == "fatal":
+                    raise
+                if attempt >= self.retries or not self._backoff(attempt, deadline):
+                    raise self._exhausted(e, attempt) from e
+                attempt += 1
+                continue
+            self._settle(None, time.monotonic() - start)
+            return result
+
+    def _attempt(self, fn: Callable, deadline: Optional[float], hedge: bool):
+        """One attempt; a slow one gets a parallel duplicate when a spare slot is free"""
+        timeout = self._remaining(deadline)
+        if not hedge or self.hedge_after <= 0:
+            return fn(timeout)
+        primary = self._pool.submit(fn, timeout)
+        try:
+            return primary.result(timeout=self.hedge_after)
+        except FutureTimeout:
+            pass
+        if not self.limiter.try_acquire():
+            return primary.result()
+        self.count("hedges")
+        secondary = self._pool.submit(fn, self._remaining(deadline))
+        # The caller settles one slot; the other is released once its attempt finishes
+        pending, error, loser = {primary, secondary}, None, secondary
+        try:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is None:
+                        if future is secondary:
+                            self.count("hedge_wins")
+                            loser = primary
+                        return future.result()
+                    error = future.exception()
+            raise error
+        finally:
+            loser.add_done_callback(lambda f: self.limiter.release(None))
+
+    def stream(self, fn: Callable[[Optional[float]], Any]):
+        """
+        Chunks of the stream returned by fn. The time left before the
+        deadline is the request timeout of the whole stream, so a stalled
+        stream fails instead of holding its slot. Retries happen only before
+        the first chunk; the slot is held until the stream ends or is closed.
+        """
+        priority, deadline = self._context()
+        self.count("calls")
+        return self._stream(fn, priority, deadline)
+
+    def _stream(self, fn: Callable, priority: str, deadline: Optional[float]):
+        end = object()
+        attempt = 0
+        while True:
+            self._remaining(deadline)
+            self._admit(priority, deadline)
+            start = time.monotonic()
+            try:
+                chunks = iter(fn(self._remaining(deadline)))
+                first = next(chunks, end)
+            except Exception as e:
+                kind = self._settle(e, time.monotonic() - start, deadline)
+                if kind == "fatal":
+                    raise
+                if attempt >= self.retries or not self._backoff(attempt, deadline):
+                    raise self._exhausted(e, attempt) from e
+                attempt += 1
+                continue
+            break
+
+        # Time to first chunk is the latency signal for streams
+        first_latency = time.monotonic() - start
+        error = None
+        try:
+            if first is not end:
+                yield first
+                yield from chunks
+        except GeneratorExit:
+            raise
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self._settle(error, first_latency, deadline)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+        return {
+            **self.limiter.stats(),
+            **self.breaker.stats(),
+            "retries_max": self.retries,
+            "hedge_after_seconds": self.hedge_after,
+            **counters
+        }
@@ -0,0 +1,331 @@
+"""
+SQL Guard
+
+Static checks for LLM-generated SQL before it reaches the warehouse: exactly
+one read-only SELECT over allowlisted gold objects, with its result bounded by
+an injected or clamped TOP. The estimated plan cost of a checked statement can
+be read from SQL Server (SET SHOWPLAN_XML) so expensive plans are refused
+before they run.
+"""
+
+import re
+import threading
+from typing import Optional, List, Dict, Any, Iterable
+
+# ============================================================================
+# Tokenizer
+# ============================================================================
+
+TOKEN_PATTERN = re.compile(r"""
+    (?P<space>\s+)
+  | (?P<comment>--[^\n]*|/\*.*?\*/)
+  | (?P<string>[Nn]?'(?:[^']|'')*')
+  | (?P<quoted>\[(?:[^\]]|\]\])*\]|"(?:[^"]|"")*")
+  | (?P<number>(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?)
+  | (?P<variable>@@?\w+)
+  | (?P<word>[A-Za-z_#][\w$#]*)
+  | (?P<symbol><>|<=|>=|!=|!<|!>|[-+*/%=<>(),.;~&|^!:])
+""", re.VERBOSE | re.DOTALL)
+
+
+class Token:
+    __slots__ = ("kind", "text", "start", "end")
+
+    def __init__(self, kind: str, text: str, start: int, end: int):
+        self.kind = kind
+        self.text = text
+        self.start = start
+        self.end = end
+
+    @property
+    def upper(self) -> str:
+        return self.text.upper() if self.kind == "word" else ""
+
+    @property
+    def name(self) -> str:
+        """Identifier value with [] / "" quoting removed, lower-cased"""
+        if self.kind == "quoted":
+            return self.text[1:-1].replace(self.text[-1] * 2, self.text[-1]).lower()
+        return self.text.lower()
+
+
+def tokenize(sql: str) -> List[Token]:
+    """Significant tokens of a T-SQL statement (whitespace and comments dropped)"""
+    tokens, pos = [], 0
+    while pos < len(sql):
+        match = TOKEN_PATTERN.match(sql, pos)
+        if match is None:
+            raise SQLGuardError(f"Unsupported SQL near '{sql[pos:pos + 20]}'")
+        kind = match.lastgroup
+        if kind not in ("space", "comment"):
+            tokens.append(Token(kind, match.group(), match.start(), match.end()))
+        pos = match.end()
+    return tokens
+
+
+# ============================================================================
+# Guard
+# ============================================================================
+
+class SQLGuardError(ValueError):
+    """Generated SQL refused by the guard (message is safe to show to the user)"""
+
+
+# Statements and features that have no place in a read-only question
+FORBIDDEN_KEYWORDS = {
+    "INSERT", "UPDATE", "DELETE", "MERGE", "TRUNCATE", "DROP", "ALTER", "CREATE",
+    "EXEC", "EXECUTE", "GRANT", "REVOKE", "DENY", "INTO", "BULK", "OPENROWSET",
+    "OPENQUERY", "OPENDATASOURCE", "OPENXML", "DBCC", "SHUTDOWN", "KILL", "WAITFOR",
+    "BACKUP", "RESTORE", "RECONFIGURE", "CHECKPOINT", "DECLARE", "SET", "USE", "GO",
+    "BEGIN", "COMMIT", "ROLLBACK", "SAVE", "TRAN", "TRANSACTION", "PRINT", "RAISERROR",
+    "THROW", "READTEXT", "WRITETEXT", "UPDATETEXT"
+}
+# Keywords after which the next name is a table source
+SOURCE_KEYWORDS = {"FROM", "JOIN", "APPLY"}
+# Keywords that end a FROM clause's comma-separated table list
+CLAUSE_KEYWORDS = {
+    "WHERE", "GROUP", "HAVING", "ORDER", "UNION", "EXCEPT", "INTERSECT", "OPTION",
+    "FOR", "SELECT", "OFFSET", "WINDOW"
+}
+
+
+class CheckedStatement:
+    """SQL accepted by the guard, possibly rewritten to bound its row count"""
+
+    def __init__(self, sql: str, objects: List[str], max_rows: int, top_action: str):
+        self.sql = sql
+        self.objects = objects
+        self.max_rows = max_rows
+        # "kept", "injected", "clamped" or "none" (TOP not applicable, fetch cap only)
+        self.top_action = top_action
+
+
+class SQLGuard:
+    """
+    Validates and bounds generated SQL. allowed_objects are gold object names
+    (without schema); CTE names defined by the statement are also accepted.
+    """
+
+    def __init__(self, allowed_objects: Iterable[str], max_rows: int = 100, max_cost: float = 0.0):
+        self.allowed_objects = {name.lower() for name in allowed_objects}
+        self.max_rows = max(max_rows, 1)
+        self.max_cost = max_cost
+        self._lock = threading.Lock()
+        self._counters = {
+            "checked": 0,
+            "rejected": 0,
+            "top_injected": 0,
+            "top_clamped": 0,
+            "cost_checked": 0,
+            "cost_rejected": 0,
+            "cost_unavailable": 0,
+            "truncated": 0,
+            "timeouts": 0
+        }
+
+    def count(self, counter: str, amount: int = 1):
+        with self._lock:
+            self._counters[counter] += amount
+
+    def check(self, sql: str, max_rows: Optional[int] = None) -> CheckedStatement:
+        """Validate sql and bound its rows; raises SQLGuardError when refused"""
+        self.count("checked")
+        try:
+            statement = self._check(sql, max_rows or self.max_rows)
+        except SQLGuardError:
+            self.count("rejected")
+            raise
+        if statement.top_action == "injected":
+            self.count("top_injected")
+        elif statement.top_action == "clamped":
+            self.count("top_clamped")
+        return statement
+
+    def _check(self, sql: str, max_rows: int) -> CheckedStatement:
+        tokens = tokenize(sql)
+        # One optional trailing semicolon; anything else would be a second statement
+        if tokens and tokens[-1].text == ";":
+            sql = sql[:tokens[-1].start]
+            tokens = tokens[:-1]
+        if not tokens:
+            raise SQLGuardError("Empty SQL statement")
+        if any(t.text == ";" for t in tokens):
+            raise SQLGuardError("Only a single SQL statement is allowed")
+
+        for t in tokens:
+            if t.upper in FORBIDDEN_KEYWORDS:
+                raise SQLGuardError(f"{t.upper} is not allowed; only read-only SELECT queries can run")
+            if t.kind == "variable":
+                raise SQLGuardError(f"Variables such as {t.text} are not allowed")
+
+        ctes, main = self._ctes(tokens)
+        if main >= len(tokens) or tokens[main].upper != "SELECT":
+            raise SQLGuardError("Only SELECT queries are allowed")
+        objects = self._objects(tokens, ctes)
+        if not objects:
+            raise SQLGuardError("Query must read from a gold view")
+
+        sql, top_action = self._bound_rows(sql, tokens, main, max_rows)
+        return CheckedStatement(sql.strip(), objects, max_rows, top_action)
+
+    @staticmethod
+    def _closing(tokens: List[Token], i: int) -> int:
+        """Index of the parenthesis closing the one at i"""
+        depth = 0
+        for j in range(i, len(tokens)):
+            if tokens[j].text == "(":
+                depth += 1
+            elif tokens[j].text == ")":
+                depth -= 1
+                if depth == 0:
+                    return j
+        raise SQLGuardError("Unbalanced parentheses")
+
+    def _ctes(self, tokens: List[Token]) -> tuple:
+        """Names defined by a leading WITH and the index of the main SELECT"""
+        if tokens[0].upper != "WITH":
+            return set(), 0
+        names, i = set(), 1
+        while True:
+            if i >= len(tokens) or tokens[i].kind not in ("word", "quoted"):
+                raise SQLGuardError("Malformed WITH clause")
+            names.add(tokens[i].name)
+            i += 1
+            if i < len(tokens) and tokens[i].text == "(":
+                i = self._closing(tokens, i) + 1
+            if i + 1 >= len(tokens) or tokens[i].upper != "AS" or tokens[i + 1].text != "(":
+                raise SQLGuardError("Malformed WITH clause")
+            i = self._closing(tokens, i + 1) + 1
+            if i < len(tokens) and tokens[i].text == ",":
+                i += 1
+                continue
+            return names, i
+
+    def _objects(self, tokens: List[Token], ctes: set) -> List[str]:
+        """Every table source in the statement, each checked against the allowlist"""
+        objects = []
+        # Per parenthesis depth: inside a FROM clause's table list
+        in_from = [False]
+        expect_source = False
+        i = 0
+        while i < len(tokens):
+            t = tokens[i]
+            if expect_source and t.kind in ("word", "quoted"):
+                parts = [t.name]
+                while i + 2 < len(tokens) and tokens[i + 1].text == "." and tokens[i + 2].kind in ("word", "quoted"):
+                    parts.append(tokens[i + 2].name)
+                    i += 2
+                objects.append(self._resolve(parts, ctes))
+                expect_source = False
+            elif t.text == "(":
+                in_from.append(False)
+                expect_source = False
+            elif t.text == ")":
+                if len(in_from) > 1:
+                    in_from.pop()
+                expect_source = False
+            elif t.upper in SOURCE_KEYWORDS:
+                if t.upper == "FROM":
+                    in_from[-1] = True
+                expect_source = True
+            elif t.text == "," and in_from[-1]:
+                expect_source = True
+            else:
+                if t.upper in CLAUSE_KEYWORDS:
+                    in_from[-1] = False
+                expect_source = False
+            i += 1
+        return objects
+
+    def _resolve(self, parts: List[str], ctes: set) -> str:
+        if len(parts) == 1:
+            if parts[0] in ctes:
+                return parts[0]
+            raise SQLGuardError(f"Unknown object '{parts[0]}'; reference gold views as gold.<name>")
+        if len(parts) > 2:
+            raise SQLGuardError(f"Cross-database reference '{'.'.join(parts)}' is not allowed")
+        schema, name = parts
+        if schema != "gold" or name not in self.allowed_objects:
+            raise SQLGuardError(f"Object '{schema}.{name}' is not an allowed gold view")
+        return f"gold.{name}"
+
+    def _bound_rows(self, sql: str, tokens: List[Token], main: int, max_rows: int) -> tuple:
+        """Clamp the main SELECT's TOP to max_rows, or add one"""
+        # TOP cannot be combined with OFFSET / FETCH; the caller's fetch cap still applies
+        depth = 0
+        for t in tokens[main:]:
+            depth += (t.text == "(") - (t.text == ")")
+            if depth == 0 and t.upper == "OFFSET":
+                return sql, "none"
+
+        i = main + 1
+        while i < len(tokens) and tokens[i].upper in ("DISTINCT", "ALL"):
+            i += 1
+        if i >= len(tokens):
+            raise SQLGuardError("Incomplete SELECT statement")
+        if tokens[i].upper != "TOP":
+            return sql[:tokens[i].start] + f"TOP {max_rows} " + sql[tokens[i].start:], "injected"
+
+        start = i
+        j = i + 1
+        parenthesized = j < len(tokens) and tokens[j].text == "("
+        if parenthesized:
+            j += 1
+        if j >= len(tokens) or tokens[j].kind != "number" or not tokens[j].text.isdigit():
+            raise SQLGuardError("TOP must be a literal row count")
+        count = tokens[j]
+        end = j + 1
+        if parenthesized:
+            if end >= len(tokens) or tokens[end].text != ")":
+                raise SQLGuardError("TOP must be a literal row count")
+            end += 1
+        if end < len(tokens) and tokens[end].upper == "PERCENT":
+            # A percentage of a large view is unbounded; replace with a row count
+            return sql[:tokens[start].start] + f"TOP {max_rows}" + sql[tokens[end].end:], "clamped"
+        if int(count.text) > max_rows:
+            return sql[:count.start] + str(max_rows) + sql[count.end:], "clamped"
+        return sql, "kept"
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "allowed_objects": len(self.allowed_objects),
+                "max_rows": self.max_rows,
+                "max_cost": self.max_cost,
+                **self._counters
+            }
+
+
+# ============================================================================
+# Plan Cost
+# ============================================================================
+
+PLAN_COST_PATTERN = re.compile(r'StatementSubTreeCost="([0-9.eE+-]+)"')
+
+
+def showplan_cost(conn, sql: str) -> Optional[float]:
+    """
+    Estimated subtree cost of sql from SET SHOWPLAN_XML (the statement is
+    compiled, not run). None when the connection does not support it. Raises
+    if SHOWPLAN could not be switched off again, so the caller discards conn.
+    """
+    cursor = conn.cursor()
+    try:
+        try:
+            cursor.execute("SET SHOWPLAN_XML ON")
+        except Exception:
+            return None
+        try:
+            cursor.execute(sql)
+            row = cursor.fetchone()
+            while cursor.nextset():
+                pass
+        finally:
+            cursor.execute("SET SHOWPLAN_XML OFF")
+        costs = [float(cost) for cost in PLAN_COST_PATTERN.findall(str(row[0]) if row else "")]
+        return max(costs) if costs else None
+    finally:
+        try:
+            cursor.close()
+        except Exception:
+            pass
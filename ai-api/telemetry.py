@@ -0,0 +1,243 @@
+"""
+Request Telemetry
+
+Counters, histograms and timed spans for the API hot paths (LLM calls, SQL,
+serialization, caches), rendered in the Prometheus text exposition format for
+/metrics. Spans are optionally exported over OTLP/HTTP to a local collector
+when TELEMETRY_OTLP_ENDPOINT is set and the opentelemetry SDK is installed.
+"""
+
+import os
+import time
+import threading
+from contextlib import contextmanager, nullcontext
+from typing import Optional, List, Dict, Any, Callable, Iterable
+
+# ============================================================================
+# Configuration
+# ============================================================================
+
+# e.g. http://localhost:4318/v1/traces (empty = no export)
+TELEMETRY_OTLP_ENDPOINT = os.getenv("TELEMETRY_OTLP_ENDPOINT", "")
+TELEMETRY_SERVICE_NAME = os.getenv("TELEMETRY_SERVICE_NAME", "clinical-trial-ai-api")
+
+# Seconds; covers sub-millisecond cache hits up to long LLM generations
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (1, 10, 50, 100, 500, 1000, 5000, 10000, 50000, 100000, 500000)
+
+
+def label_key(labels: Dict[str, Any]) -> tuple:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(key: tuple, extra: Optional[tuple] = None) -> str:
+    pairs = list(key) + list(extra or ())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{escape_label(value)}"' for name, value in pairs) + "}"
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+# ============================================================================
+# Metrics
+# ============================================================================
+
+class Counter:
+    """Monotonic counter per label set"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{format_labels(key)} {format_value(value)}" for key, value in values]
+
+
+class Histogram:
+    """Cumulative bucket histogram per label set"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [bucket counts..., sum, count]
+        self._values: Dict[tuple, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = label_key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = [0.0] * (len(self.buckets) + 2)
+                self._values[key] = series
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = [(key, list(series)) for key, series in self._values.items()]
+        lines = []
+        for key, series in values:
+            for bound, count in zip(self.buckets, series):
+                lines.append(f"{self.name}_bucket{format_labels(key, (('le', format_value(bound)),))} {format_value(count)}")
+            lines.append(f"{self.name}_bucket{format_labels(key, (('le', '+Inf'),))} {format_value(series[-1])}")
+            lines.append(f"{self.name}_sum{format_labels(key)} {format_value(series[-2])}")
+            lines.append(f"{self.name}_count{format_labels(key)} {format_value(series[-1])}")
+        return lines
+
+
+class MetricsRegistry:
+    """Metrics owned by the registry plus collectors sampled at scrape time"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+        # callable -> iterable of (name, type, help, labels dict, value)
+        self._collectors: List[Callable[[], Iterable[tuple]]] = []
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        with self._lock:
+            return self._metrics.setdefault(name, Counter(name, help_text))
+
+    def histogram(self, name: str, help_text: str, buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+        with self._lock:
+            return self._metrics.setdefault(name, Histogram(name, help_text, buckets))
+
+    def collector(self, func: Callable[[], Iterable[tuple]]):
+        """Register a callable returning current (name, type, help, labels, value) samples"""
+        with self._lock:
+            self._collectors.append(func)
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+
+        sampled: Dict[str, Dict[str, Any]] = {}
+        for func in collectors:
+            try:
+                samples = list(func())
+            except Exception as e:
+                print(f"Warning: metrics collector failed: {str(e)}")
+                continue
+            for name, kind, help_text, labels, value in samples:
+                if value is None:
+                    continue
+                family = sampled.setdefault(name, {"kind": kind, "help": help_text, "samples": []})
+                family["samples"].append((label_key(labels), value))
+        for name, family in sampled.items():
+            lines.append(f"# HELP {name} {family['help']}")
+            lines.append(f"# TYPE {name} {family['kind']}")
+            lines.extend(f"{name}{format_labels(key)} {format_value(value)}" for key, value in family["samples"])
+        return "\n".join(lines) + "\n"
+
+
+# ============================================================================
+# Spans
+# ============================================================================
+
+class Telemetry:
+    """Timed spans recorded into a histogram and, when configured, exported over OTLP"""
+
+    def __init__(
+        self,
+        registry: MetricsRegistry,
+        otlp_endpoint: str = TELEMETRY_OTLP_ENDPOINT,
+        service_name: str = TELEMETRY_SERVICE_NAME
+    ):
+        self.registry = registry
+        self.otlp_endpoint = otlp_endpoint
+        self.service_name = service_name
+        self.span_seconds = registry.histogram(
+            "clinical_ai_span_duration_seconds", "Duration of instrumented stages by span name and outcome"
+        )
+        self._tracer = None
+        self._tracer_checked = False
+        self._provider = None
+        self._lock = threading.Lock()
+
+    def tracer(self):
+        """OpenTelemetry tracer exporting to the OTLP endpoint, or None"""
+        if self._tracer_checked:
+            return self._tracer
+        with self._lock:
+            if self._tracer_checked:
+                return self._tracer
+            self._tracer_checked = True
+            if not self.otlp_endpoint:
+                return None
+            try:
+                from opentelemetry.sdk.resources import Resource
+                from opentelemetry.sdk.trace import TracerProvider
+                from opentelemetry.sdk.trace.export import BatchSpanProcessor
+                from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+                provider = TracerProvider(resource=Resource.create({"service.name": self.service_name}))
+                provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=self.otlp_endpoint)))
+                self._provider = provider
+                self._tracer = provider.get_tracer("clinical-trial-ai")
+            except ImportError:
+                print("Warning: opentelemetry-sdk / opentelemetry-exporter-otlp not installed. OTLP export disabled.")
+            except Exception as e:
+                print(f"Warning: OTLP exporter unavailable ({str(e)}). OTLP export disabled.")
+            return self._tracer
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """Time a block; attributes annotate the exported span (not the histogram labels)"""
+        tracer = self.tracer()
+        context = tracer.start_as_current_span(name, attributes={
+            key: value if isinstance(value, (str, bool, int, float)) else str(value)
+            for key, value in attributes.items() if value is not None
+        }) if tracer else nullcontext()
+        outcome = "ok"
+        start = time.perf_counter()
+        with context as otel_span:
+            try:
+                yield otel_span
+            except BaseException as e:
+                outcome = "error"
+                if otel_span is not None:
+                    otel_span.record_exception(e)
+                raise
+            finally:
+                self.span_seconds.observe(time.perf_counter() - start, span=name, outcome=outcome)
+
+    def shutdown(self):
+        """Flush pending OTLP spans"""
+        if self._provider is not None:
+            try:
+                self._provider.shutdown()
+            except Exception:
+                pass
@@ -0,0 +1,12 @@
+import os
+import sys
+import tempfile
+
+# Import aiapi offline: no warm-up, no precompute, canned LLM answers and
+# state files outside the source tree
+os.environ.setdefault("STARTUP_WARMUP", "off")
+os.environ.setdefault("INSIGHT_PRECOMPUTE", "off")
+os.environ.setdefault("LLM_BACKEND", "stub")
+os.environ.setdefault("INSIGHT_STORE_PATH", os.path.join(tempfile.mkdtemp(prefix="ai-api-tests-"), "insights.db"))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,45 @@
+import pandas as pd
+import pytest
+
+from analytics import AnalyticsEngine
+
+
+@pytest.fixture
+def engine():
+    frame = pd.DataFrame({
+        "study_id": ["STUDY001"] * 4,
+        "site_id": ["SITE-001", "SITE-001", "SITE-002", "site-002"],
+        "subject_id": ["SUB-1", "SUB-2", "SUB-3", "SUB-4"],
+        "region": ["US", "US", "EU", "eu"],
+        "country": ["USA", "USA", "Germany", "Germany"],
+        "data_quality_index": [90, 80, 60, None],
+        "is_clean_patient": [1, 0, 0, 0],
+        "total_queries": [0, 4, 10, 2]
+    })
+    return AnalyticsEngine(loader=lambda: frame, generation=lambda: 1)
+
+
+def test_filters_ignore_case(engine):
+    snap = engine.snapshot()
+    assert snap.mask(region="us").tolist() == [True, True, False, False]
+    # Labels that differ only in case all match, as under a case-insensitive collation
+    assert snap.mask(region="Eu").tolist() == [False, False, True, True]
+    assert snap.mask(site_id="SITE-002", region="EU").tolist() == [False, False, True, True]
+    assert not snap.mask(region="APAC").any()
+
+
+def test_dashboard_summary_filtered_by_lowercase_region(engine):
+    summary = engine.dashboard(region="us")["summary"]
+    assert summary["total_subjects"] == 2
+    assert summary["avg_dqi"] == 85.0
+    assert summary["total_open_queries"] == 4
+
+
+def test_snapshot_reloads_only_when_the_generation_moves():
+    generation = [1]
+    engine = AnalyticsEngine(loader=lambda: pd.DataFrame({"subject_id": ["SUB-1"]}), generation=lambda: generation[0])
+    first = engine.snapshot()
+    assert engine.snapshot() is first
+    generation[0] = 2
+    assert engine.snapshot() is not first
+    assert engine.stats()["reloads"] == 2
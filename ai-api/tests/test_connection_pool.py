@@ -0,0 +1,163 @@
+import time
+import threading
+
+import pytest
+
+from aiapi import ConnectionPool
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.closed = False
+
+    def execute(self, sql, *params):
+        if not self.conn.healthy:
+            raise RuntimeError("connection reset")
+
+    def fetchone(self):
+        return (1,)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConnection:
+    def __init__(self):
+        self.healthy = True
+        self.closed = False
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def close(self):
+        self.closed = True
+
+
+def make_pool(**kwargs):
+    kwargs.setdefault("min_size", 0)
+    kwargs.setdefault("max_size", 2)
+    kwargs.setdefault("acquire_timeout", 1.0)
+    kwargs.setdefault("idle_timeout", 300.0)
+    kwargs.setdefault("health_check_interval", 300.0)
+    return ConnectionPool(FakeConnection, **kwargs)
+
+
+def test_released_connections_are_reused():
+    pool = make_pool()
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        assert second is first
+    stats = pool.stats()
+    assert (stats["created"], stats["open"], stats["idle"], stats["in_use"]) == (1, 1, 1, 0)
+
+
+def test_acquire_times_out_when_the_pool_is_exhausted():
+    pool = make_pool(max_size=1, acquire_timeout=0.05)
+    conn = pool.acquire()
+    with pytest.raises(Exception, match="timed out waiting"):
+        pool.acquire()
+    assert pool.stats()["acquire_waits"] >= 1
+    pool.release(conn)
+    assert pool.acquire() is conn
+
+
+def test_waiting_caller_gets_the_released_connection():
+    pool = make_pool(max_size=1)
+    conn = pool.acquire()
+    received = []
+    waiter = threading.Thread(target=lambda: received.append(pool.acquire()))
+    waiter.start()
+    time.sleep(0.05)
+    pool.release(conn)
+    waiter.join(2)
+    assert received == [conn]
+    assert pool.stats()["created"] == 1
+
+
+def test_idle_connection_failing_its_health_check_is_replaced():
+    pool = make_pool(health_check_interval=0)
+    stale = pool.acquire()
+    pool.release(stale)
+    stale.healthy = False
+
+    conn = pool.acquire()
+    assert conn is not stale
+    assert stale.closed
+    stats = pool.stats()
+    assert stats["health_check_failures"] == 1
+    assert stats["open"] == 1
+
+
+def test_idle_connections_are_reaped_down_to_min_size():
+    pool = make_pool(min_size=1, max_size=3, idle_timeout=0)
+    held = [pool.acquire() for _ in range(3)]
+    for conn in held:
+        pool.release(conn)
+    stats = pool.stats()
+    assert stats["open"] == 1
+    assert stats["recycled"] == 2
+    assert sum(conn.closed for conn in held) == 2
+
+
+def test_failed_query_discards_only_a_broken_connection():
+    pool = make_pool()
+    with pytest.raises(ValueError):
+        with pool.connection() as conn:
+            raise ValueError("bad parameter")
+    assert not conn.closed
+    assert pool.stats()["idle"] == 1
+
+    with pytest.raises(RuntimeError):
+        with pool.connection() as conn:
+            conn.healthy = False
+            raise RuntimeError("connection reset")
+    assert conn.closed
+    assert pool.stats()["open"] == 0
+
+
+def test_factory_failures_and_mock_mode_give_the_slot_back():
+    def failing():
+        raise RuntimeError("login failed")
+
+    pool = ConnectionPool(failing, min_size=0, max_size=1, acquire_timeout=0.05)
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            pool.acquire()
+    assert pool.stats()["open"] == 0
+
+    mock = ConnectionPool(lambda: None, min_size=0, max_size=1, acquire_timeout=0.05)
+    with mock.connection() as conn:
+        assert conn is None
+    assert mock.acquire() is None
+    assert mock.stats()["open"] == 0
+
+
+def test_prepared_cursors_are_reused_and_evicted_per_connection():
+    pool = make_pool(statement_cache_size=2)
+    conn = pool.acquire()
+    first = pool.prepared(conn, "SELECT 1")
+    assert pool.prepared(conn, "SELECT 1") is first
+    pool.prepared(conn, "SELECT 2")
+    pool.prepared(conn, "SELECT 3")
+    assert first.closed
+    stats = pool.stats()
+    assert (stats["statements_prepared"], stats["statement_reuses"], stats["statements_open"]) == (3, 1, 2)
+
+    pool.release(conn, discard=True)
+    assert pool.stats()["statements_open"] == 0
+
+
+def test_closed_pool_refuses_checkouts_and_closes_returned_connections():
+    pool = make_pool()
+    idle = pool.acquire()
+    busy = pool.acquire()
+    pool.release(idle)
+    pool.close()
+    assert idle.closed
+    with pytest.raises(Exception, match="closed"):
+        pool.acquire()
+    pool.release(busy)
+    assert busy.closed
+    assert pool.stats()["open"] == 0
@@ -0,0 +1,175 @@
+import asyncio
+
+import pandas as pd
+import pytest
+
+import aiapi
+from aiapi import InsightScheduler, InsightStore, insight_scope
+
+
+@pytest.fixture
+def store(tmp_path):
+    return InsightStore(str(tmp_path / "insights.db"), keep_generations=2)
+
+
+@pytest.mark.parametrize("study_id, site_id, scope", [
+    (None, None, "*"),
+    ("  ", None, "*"),
+    ("STUDY 1", None, "STUDY 1"),
+    ("STUDY 1", "SITE-001", "STUDY 1|SITE-001"),
+    (None, " SITE-001 ", "*|SITE-001"),
+])
+def test_insight_scope(study_id, site_id, scope):
+    assert insight_scope(study_id, site_id) == scope
+
+
+# ============================================================================
+# InsightStore
+# ============================================================================
+
+def test_stored_payload_is_served_for_its_generation(store):
+    store.put("insights", "*", 1, {"summary": "ok"})
+    stored = store.get("insights", "*", 1, allow_stale=False)
+    assert stored["payload"] == {"summary": "ok"}
+    assert (stored["generation"], stored["stale"]) == (1, False)
+    assert store.has("insights", "*", 1)
+    assert not store.has("insights", "*", 2)
+    assert not store.has("recommendations", "*", 1)
+
+
+def test_older_generation_is_served_only_as_stale(store):
+    store.put("insights", "*", 1, {"summary": "old"})
+    assert store.get("insights", "*", 2, allow_stale=False) is None
+
+    stored = store.get("insights", "*", 2, allow_stale=True)
+    assert stored["payload"] == {"summary": "old"}
+    assert (stored["generation"], stored["stale"]) == (1, True)
+    stats = store.stats()
+    assert (stats["misses"], stats["stale_hits"], stats["hits"]) == (1, 1, 0)
+
+
+def test_newest_generation_wins_a_stale_lookup(store):
+    for generation in (1, 2, 3):
+        store.put("insights", "*", generation, {"summary": generation})
+    assert store.get("insights", "*", 4, allow_stale=True)["payload"] == {"summary": 3}
+
+
+def test_prune_keeps_the_newest_generations(store):
+    for generation in (1, 2, 3):
+        store.put("insights", "*", generation, {})
+        store.put("recommendations", "*|SITE-001", generation, {})
+    store.prune()
+    assert store.stats()["entries"] == {
+        "insights@2": 1, "insights@3": 1, "recommendations@2": 1, "recommendations@3": 1
+    }
+    assert store.stats()["pruned"] == 2
+
+
+# ============================================================================
+# InsightScheduler
+# ============================================================================
+
+class Warehouse:
+    """Fake generation, site list and generators that record what was computed"""
+
+    def __init__(self, store, sites):
+        self.store = store
+        self.generation = 1
+        self.sites = pd.DataFrame(sites, columns=["study_id", "site_id"])
+        self.insights = []
+        self.recommendations = []
+
+    async def current_generation(self):
+        return self.generation
+
+    async def execute_query(self, query, *args, **kwargs):
+        return self.sites
+
+    async def compute_insights(self, study_id, generation):
+        self.insights.append(study_id)
+        self.store.put("insights", insight_scope(study_id), generation, {})
+
+    async def compute_recommendations(self, site_id, study_id, generation, site_scope=False):
+        self.recommendations.append((site_id, study_id, site_scope))
+        scopes = [insight_scope(study_id, site_id)] + ([insight_scope(None, site_id)] if site_scope else [])
+        for scope in scopes:
+            self.store.put("recommendations", scope, generation, {})
+
+
+@pytest.fixture
+def warehouse(store, monkeypatch):
+    # SITE-002 runs in both studies; the other sites belong to one study
+    warehouse = Warehouse(store, [
+        ("STUDY 1", "SITE-001"), ("STUDY 1", "SITE-002"), ("STUDY 2", "SITE-002"), ("STUDY 2", "SITE-003")
+    ])
+    monkeypatch.setattr(aiapi, "insight_store", store)
+    monkeypatch.setattr(aiapi, "current_generation_async", warehouse.current_generation)
+    monkeypatch.setattr(aiapi, "execute_query_async", warehouse.execute_query)
+    monkeypatch.setattr(aiapi, "compute_insights", warehouse.compute_insights)
+    monkeypatch.setattr(aiapi, "compute_recommendations", warehouse.compute_recommendations)
+    return warehouse
+
+
+def make_scheduler():
+    return InsightScheduler(enabled=False, interval=60, concurrency=2, rate_per_minute=1000)
+
+
+def test_refresh_precomputes_every_study_and_site_scope(warehouse, store):
+    scheduler = make_scheduler()
+    asyncio.run(scheduler.refresh())
+
+    assert sorted(warehouse.insights, key=str) == [None, "STUDY 1", "STUDY 2"]
+    assert set(warehouse.recommendations) == {
+        ("SITE-001", "STUDY 1", True),
+        ("SITE-002", None, False),
+        ("SITE-002", "STUDY 1", False),
+        ("SITE-002", "STUDY 2", False),
+        ("SITE-003", "STUDY 2", True),
+    }
+    for site in ("SITE-001", "SITE-002", "SITE-003"):
+        assert store.has("recommendations", insight_scope(None, site), 1)
+    stats = scheduler.stats()
+    assert (stats["runs"], stats["computed"], stats["skipped"], stats["failed"]) == (1, 8, 0, 0)
+    assert stats["last_generation"] == 1
+
+
+def test_refresh_is_a_no_op_until_the_generation_moves(warehouse):
+    scheduler = make_scheduler()
+    asyncio.run(scheduler.refresh())
+    asyncio.run(scheduler.refresh())
+    assert scheduler.stats()["runs"] == 1
+    assert len(warehouse.insights) == 3
+
+    warehouse.generation = 2
+    asyncio.run(scheduler.refresh())
+    assert scheduler.stats()["runs"] == 2
+    assert len(warehouse.insights) == 6
+
+
+def test_forced_refresh_skips_results_already_stored(warehouse):
+    scheduler = make_scheduler()
+    asyncio.run(scheduler.refresh())
+    asyncio.run(scheduler.refresh(force=True))
+    stats = scheduler.stats()
+    assert (stats["runs"], stats["computed"], stats["skipped"]) == (2, 8, 8)
+    assert len(warehouse.recommendations) == 5
+
+
+def test_failed_scope_is_counted_and_retried_next_run(warehouse, monkeypatch):
+    scheduler = make_scheduler()
+    compute = warehouse.compute_insights
+
+    async def failing(study_id, generation):
+        if study_id == "STUDY 2":
+            raise RuntimeError("model unavailable")
+        await compute(study_id, generation)
+
+    monkeypatch.setattr(aiapi, "compute_insights", failing)
+    asyncio.run(scheduler.refresh())
+    assert scheduler.stats()["failed"] == 1
+    assert "STUDY 2" in scheduler.stats()["last_error"]
+
+    monkeypatch.setattr(aiapi, "compute_insights", compute)
+    asyncio.run(scheduler.refresh(force=True))
+    assert warehouse.insights.count("STUDY 2") == 1
+    assert scheduler.stats()["computed"] == 8
@@ -0,0 +1,379 @@
+import time
+import threading
+
+import pytest
+
+from llmclient import (
+    AdaptiveLimiter, CircuitBreaker, LLMClient, LLMUnavailable, PRIORITIES, classify_error, set_llm_priority
+)
+
+
+class TooManyRequests(Exception):
+    pass
+
+
+class ServiceUnavailable(Exception):
+    pass
+
+
+@pytest.fixture(autouse=True)
+def standard_priority():
+    set_llm_priority("standard")
+    yield
+    set_llm_priority("standard")
+
+
+def make_client(**kwargs):
+    limiter = kwargs.pop("limiter", None) or AdaptiveLimiter(initial=4, max_limit=8)
+    breaker = kwargs.pop("breaker", None) or CircuitBreaker(failure_threshold=5, reset_timeout=30.0)
+    kwargs.setdefault("backoff_base", 0.001)
+    return LLMClient(limiter, breaker, {"interactive": 5.0, "standard": 5.0, "batch": 0}, **kwargs)
+
+
+def wait_until(predicate, timeout=2.0):
+    end = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < end, "condition not reached"
+        time.sleep(0.005)
+
+
+@pytest.mark.parametrize("error, kind", [
+    (TooManyRequests("slow down"), "overload"),
+    (RuntimeError("429 Resource has been exhausted"), "overload"),
+    (ServiceUnavailable("backend down"), "transient"),
+    (ConnectionError("reset by peer"), "transient"),
+    (TimeoutError(), "transient"),
+    (KeyError("candidates"), "fatal"),
+])
+def test_classify_error(error, kind):
+    assert classify_error(error) == kind
+
+
+def test_unknown_priority_is_rejected():
+    with pytest.raises(ValueError):
+        set_llm_priority("urgent")
+
+
+# ============================================================================
+# AdaptiveLimiter
+# ============================================================================
+
+def test_waiting_calls_are_admitted_in_priority_order():
+    limiter = AdaptiveLimiter(initial=1, max_limit=1)
+    limiter.acquire(PRIORITIES["standard"])
+    order = []
+
+    def waiter(name):
+        limiter.acquire(PRIORITIES[name])
+        order.append(name)
+        limiter.release()
+
+    batch = threading.Thread(target=waiter, args=("batch",))
+    batch.start()
+    wait_until(lambda: limiter.stats()["queued_batch"] == 1)
+    interactive = threading.Thread(target=waiter, args=("interactive",))
+    interactive.start()
+    wait_until(lambda: limiter.stats()["queued_interactive"] == 1)
+
+    limiter.release()
+    batch.join(2)
+    interactive.join(2)
+    assert order == ["interactive", "batch"]
+    assert limiter.in_flight == 0
+
+
+def test_acquire_sheds_when_the_deadline_passes():
+    limiter = AdaptiveLimiter(initial=1, max_limit=1)
+    limiter.acquire(PRIORITIES["standard"])
+    with pytest.raises(LLMUnavailable):
+        limiter.acquire(PRIORITIES["batch"], time.monotonic() + 0.02)
+    stats = limiter.stats()
+    assert stats["shed"] == 1
+    assert stats["queued_batch"] == 0
+    assert not limiter.try_acquire()
+
+
+def test_overload_halves_the_limit_once_per_cooldown():
+    limiter = AdaptiveLimiter(initial=8, max_limit=16, cooldown=60.0)
+    for _ in range(2):
+        limiter.acquire(PRIORITIES["standard"])
+    limiter.release(1.0, overloaded=True)
+    limiter.release(1.0, overloaded=True)
+    assert limiter.limit == 4.0
+    assert limiter.stats()["decreases"] == 1
+
+
+def test_slow_calls_decrease_the_limit():
+    limiter = AdaptiveLimiter(initial=8, latency_target=1.0)
+    limiter.acquire(PRIORITIES["standard"])
+    limiter.release(5.0)
+    assert limiter.limit == 4.0
+
+
+def test_limit_grows_only_while_saturated():
+    limiter = AdaptiveLimiter(initial=4, max_limit=8)
+    limiter.acquire(PRIORITIES["standard"])
+    limiter.release(0.1)
+    assert limiter.limit == 4.0
+
+    for _ in range(4):
+        limiter.acquire(PRIORITIES["standard"])
+    limiter.release(0.1)
+    assert limiter.limit == 4.25
+    assert limiter.stats()["increases"] == 1
+
+
+def test_limit_stays_within_bounds():
+    limiter = AdaptiveLimiter(initial=1, min_limit=1, max_limit=1, cooldown=0)
+    limiter.acquire(PRIORITIES["standard"])
+    limiter.release(0.1)
+    assert limiter.limit == 1.0
+    limiter.acquire(PRIORITIES["standard"])
+    limiter.release(0.1, overloaded=True)
+    assert limiter.limit == 1.0
+
+
+# ============================================================================
+# CircuitBreaker
+# ============================================================================
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60.0)
+    for _ in range(2):
+        breaker.allow()
+        breaker.record("failure")
+    breaker.allow()
+    breaker.record("ok")
+    for _ in range(3):
+        breaker.allow()
+        breaker.record("failure")
+    assert breaker.state == "open"
+    with pytest.raises(LLMUnavailable) as error:
+        breaker.allow()
+    assert 0 < error.value.retry_after <= 60.0
+    assert breaker.stats()["circuit_opened"] == 1
+
+
+def test_neutral_outcomes_do_not_open_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=1)
+    breaker.allow()
+    breaker.record("neutral")
+    assert breaker.state == "closed"
+
+
+def test_half_open_lets_a_single_probe_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    breaker.allow()
+    breaker.record("failure")
+    time.sleep(0.02)
+
+    breaker.allow()
+    assert breaker.state == "half_open"
+    with pytest.raises(LLMUnavailable):
+        breaker.allow()
+
+    breaker.record("ok")
+    assert breaker.state == "closed"
+    breaker.allow()
+    breaker.allow()
+
+
+def test_failed_probe_reopens_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0.01)
+    for _ in range(3):
+        breaker.allow()
+        breaker.record("failure")
+    time.sleep(0.02)
+    breaker.allow()
+    breaker.record("failure")
+    assert breaker.state == "open"
+    assert breaker.stats()["circuit_opened"] == 2
+    with pytest.raises(LLMUnavailable):
+        breaker.allow()
+
+
+def test_callers_running_out_of_time_do_not_open_the_breaker():
+    client = make_client(breaker=CircuitBreaker(failure_threshold=1, reset_timeout=60.0), retries=1)
+
+    def times_out(timeout):
+        time.sleep(timeout)
+        raise TimeoutError("request timed out")
+
+    for _ in range(3):
+        set_llm_priority("interactive", deadline_seconds=0.02)
+        with pytest.raises(LLMUnavailable):
+            client.call(times_out, hedge=False)
+    stats = client.stats()
+    assert stats["circuit"] == "closed"
+    assert stats["timeouts"] >= 3
+    assert stats["in_flight"] == 0
+
+
+def test_provider_timeouts_before_the_deadline_open_the_breaker():
+    client = make_client(breaker=CircuitBreaker(failure_threshold=1, reset_timeout=60.0), retries=0)
+    set_llm_priority("interactive", deadline_seconds=5.0)
+
+    def times_out(timeout):
+        raise TimeoutError("upstream timed out")
+
+    with pytest.raises(LLMUnavailable):
+        client.call(times_out, hedge=False)
+    assert client.breaker.state == "open"
+
+
+# ============================================================================
+# LLMClient
+# ============================================================================
+
+def flaky(*errors, result="ok"):
+    """fn(timeout) raising the given errors in turn, then returning result"""
+    remaining = list(errors)
+    timeouts = []
+
+    def fn(timeout):
+        timeouts.append(timeout)
+        if remaining:
+            raise remaining.pop(0)
+        return result
+    fn.timeouts = timeouts
+    return fn
+
+
+def test_transient_errors_are_retried():
+    client = make_client(retries=2)
+    fn = flaky(ServiceUnavailable("down"), TooManyRequests("slow down"))
+    assert client.call(fn) == "ok"
+    stats = client.stats()
+    assert (stats["calls"], stats["retries"], stats["failures"]) == (1, 2, 2)
+    assert stats["in_flight"] == 0
+    assert all(timeout is not None for timeout in fn.timeouts)
+
+
+def test_fatal_errors_propagate_without_retry():
+    client = make_client(retries=2)
+    fn = flaky(KeyError("candidates"))
+    with pytest.raises(KeyError):
+        client.call(fn)
+    assert len(fn.timeouts) == 1
+    assert client.breaker.state == "closed"
+    assert client.limiter.in_flight == 0
+
+
+def test_exhausted_retries_raise_llm_unavailable():
+    client = make_client(retries=1)
+    fn = flaky(*[ServiceUnavailable("down")] * 3)
+    with pytest.raises(LLMUnavailable) as error:
+        client.call(fn)
+    assert isinstance(error.value.__cause__, ServiceUnavailable)
+    assert len(fn.timeouts) == 2
+
+
+def test_open_breaker_fails_fast():
+    client = make_client(breaker=CircuitBreaker(failure_threshold=1, reset_timeout=60.0), retries=0)
+    with pytest.raises(LLMUnavailable):
+        client.call(flaky(ServiceUnavailable("down")))
+    fn = flaky()
+    with pytest.raises(LLMUnavailable):
+        client.call(fn)
+    assert fn.timeouts == []
+
+
+def test_batch_calls_without_a_deadline_get_no_timeout():
+    client = make_client()
+    set_llm_priority("batch")
+    fn = flaky()
+    client.call(fn)
+    assert fn.timeouts == [None]
+
+
+def test_expired_request_deadline_is_not_called():
+    client = make_client()
+    set_llm_priority("interactive", deadline_seconds=0.01)
+    time.sleep(0.02)
+    fn = flaky()
+    with pytest.raises(LLMUnavailable):
+        client.call(fn)
+    assert fn.timeouts == []
+    assert client.stats()["timeouts"] == 1
+
+
+def test_slow_interactive_call_is_hedged():
+    client = make_client(hedge_after=0.05)
+    set_llm_priority("interactive")
+    attempts = []
+    lock = threading.Lock()
+
+    def fn(timeout):
+        with lock:
+            attempts.append(timeout)
+            first = len(attempts) == 1
+        if first:
+            time.sleep(0.3)
+            return "primary"
+        return "hedge"
+
+    assert client.call(fn) == "hedge"
+    stats = client.stats()
+    assert (stats["hedges"], stats["hedge_wins"]) == (1, 1)
+    # The slow primary keeps its slot until it actually finishes
+    wait_until(lambda: client.limiter.in_flight == 0)
+
+
+def test_hedge_is_skipped_without_a_spare_slot():
+    client = make_client(limiter=AdaptiveLimiter(initial=1, max_limit=1), hedge_after=0.01)
+    set_llm_priority("interactive")
+
+    def fn(timeout):
+        time.sleep(0.05)
+        return "primary"
+
+    assert client.call(fn) == "primary"
+    assert client.stats()["hedges"] == 0
+    assert client.limiter.in_flight == 0
+
+
+def test_stream_retries_before_the_first_chunk():
+    client = make_client(retries=2)
+    timeouts = []
+
+    def fn(timeout):
+        timeouts.append(timeout)
+        if len(timeouts) == 1:
+            raise ServiceUnavailable("down")
+        return iter(["a", "b", "c"])
+
+    assert list(client.stream(fn)) == ["a", "b", "c"]
+    assert len(timeouts) == 2
+    assert all(timeout is not None for timeout in timeouts)
+    assert client.limiter.in_flight == 0
+
+
+def test_stream_error_after_first_chunk_is_not_retried():
+    client = make_client(retries=2)
+    calls = []
+
+    def chunks():
+        yield "a"
+        raise ServiceUnavailable("dropped")
+
+    def fn(timeout):
+        calls.append(timeout)
+        return chunks()
+
+    received = []
+    with pytest.raises(ServiceUnavailable):
+        for chunk in client.stream(fn):
+            received.append(chunk)
+    assert received == ["a"]
+    assert len(calls) == 1
+    assert client.limiter.in_flight == 0
+
+
+def test_closing_a_stream_early_releases_its_slot():
+    client = make_client()
+    stream = client.stream(lambda timeout: iter(["a", "b", "c"]))
+    assert next(stream) == "a"
+    assert client.limiter.in_flight == 1
+    stream.close()
+    assert client.limiter.in_flight == 0
+    assert client.breaker.state == "closed"
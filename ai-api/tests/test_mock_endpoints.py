@@ -0,0 +1,55 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import aiapi
+
+
+@pytest.fixture(scope="module")
+def client():
+    # No database driver or connection string: every query answers from get_mock_data
+    with TestClient(aiapi.app) as client:
+        yield client
+
+
+def test_query_aging_without_database_returns_empty_series(client):
+    response = client.get("/api/query-aging", params={"group_by": "site,status"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["rows"] == []
+    assert body["total_queries"] == 0
+    assert body["buckets"][-1] == aiapi.QUERY_AGE_OVERFLOW
+
+
+@pytest.mark.parametrize("limit", [1, 5])
+def test_action_items_without_database_return_an_empty_page(client, limit):
+    response = client.get("/api/action-items", params={"limit": limit})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["action_items"] == []
+    assert body["total_items"] == 0
+    assert body["next_cursor"] is None
+
+
+def test_dashboard_without_database_uses_subject_level_mock_rows(client):
+    response = client.get("/api/dashboard")
+    assert response.status_code == 200
+    summary = response.json()["summary"]
+    assert summary["total_subjects"] == 10
+    assert summary["total_sites"] == 5
+    assert summary["avg_dqi"] == 75.9
+
+
+def test_risk_scores_without_database_filter_case_insensitively(client):
+    response = client.get("/api/risk-scores", params={"region": "us"})
+    assert response.status_code == 200
+    sites = response.json()["sites"]
+    assert sorted(site["site_id"] for site in sites) == ["SITE-001", "SITE-005"]
+    assert all(site["total_subjects"] == 2 for site in sites)
+    assert any(site["risk_score"] > 0 for site in sites)
+
+
+@pytest.mark.parametrize("group_by", ["none", "site"])
+def test_trends_without_database_return_an_empty_series(client, group_by):
+    response = client.get("/api/trends", params={"grain": "week", "group_by": group_by})
+    assert response.status_code == 200
+    assert response.json()["series"] == []
@@ -0,0 +1,40 @@
+import aiapi
+from aiapi import PromptBuilder, SchemaContextCache
+
+
+class CountingBackend:
+    def __init__(self):
+        self.creates = 0
+
+    def cached_model(self, system_instruction, ttl):
+        self.creates += 1
+        return "cached-model"
+
+
+def test_schema_below_the_cache_minimum_is_sent_inline(monkeypatch):
+    backend = CountingBackend()
+    monkeypatch.setattr(aiapi, "llm_backend", backend)
+    cache = SchemaContextCache(enabled=True, min_tokens=10 ** 6)
+    assert not cache.enabled
+    assert cache.model() is None
+    assert backend.creates == 0
+
+
+def test_schema_above_the_cache_minimum_is_cached_once(monkeypatch):
+    backend = CountingBackend()
+    monkeypatch.setattr(aiapi, "llm_backend", backend)
+    cache = SchemaContextCache(enabled=True, ttl=3600, min_tokens=1)
+    assert cache.model() == "cached-model"
+    assert cache.model() == "cached-model"
+    assert backend.creates == 1
+
+
+def test_prompt_keeps_the_schema_inline_without_context_cache():
+    builder = PromptBuilder(context_cache=SchemaContextCache(enabled=False))
+    prompt = builder.build(
+        "nl_sql", "{schema}\nQuestion: {question}",
+        schema=builder.schema("Which sites have open safety queries?"), question="q"
+    )
+    assert prompt.model is None
+    assert "gold.fact_subject_metrics" in prompt
+    assert builder.stats()["kinds"]["nl_sql"]["prompts"] == 1
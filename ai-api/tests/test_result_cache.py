@@ -0,0 +1,133 @@
+import os
+
+import pandas as pd
+import pytest
+
+import aiapi
+from aiapi import QueryResultCache
+
+QUERY = "SELECT site_id, dqi_score FROM gold.vw_site_performance"
+
+
+class Warehouse:
+    """Stand-in for the load generation marker; counts how often it is read"""
+
+    def __init__(self, generation=1):
+        self.generation = generation
+        self.reads = 0
+
+    def __call__(self):
+        self.reads += 1
+        return self.generation
+
+
+@pytest.fixture
+def warehouse(monkeypatch):
+    warehouse = Warehouse()
+    monkeypatch.setattr(aiapi, "fetch_load_generation", warehouse)
+    return warehouse
+
+
+def frame(rows=3):
+    return pd.DataFrame({"site_id": [f"SITE-{i:03d}" for i in range(rows)], "dqi_score": [80.5] * rows})
+
+
+def test_stored_result_is_served_under_the_same_generation(warehouse):
+    cache = QueryResultCache(max_bytes=1 << 20, cache_dir="", generation_ttl=60)
+    df, generation = cache.get(QUERY)
+    assert (df, generation) == (None, 1)
+    cache.put(QUERY, frame(), generation)
+
+    df, generation = cache.get("  SELECT site_id, dqi_score\n FROM gold.vw_site_performance;")
+    pd.testing.assert_frame_equal(df, frame())
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["stores"]) == (1, 1, 1)
+
+
+def test_new_load_generation_invalidates_every_entry(warehouse):
+    cache = QueryResultCache(max_bytes=1 << 20, cache_dir="", generation_ttl=0)
+    _, generation = cache.get(QUERY)
+    cache.put(QUERY, frame(), generation)
+
+    warehouse.generation = 2
+    df, generation = cache.get(QUERY)
+    assert (df, generation) == (None, 2)
+    stats = cache.stats()
+    assert (stats["entries"], stats["bytes"], stats["invalidations"]) == (0, 0, 1)
+    assert stats["load_generation"] == 2
+
+
+def test_result_computed_across_a_load_is_not_stored(warehouse):
+    # The generation is re-read in put even while the TTL would still serve
+    # the remembered one, so a load committing mid-query is always caught
+    cache = QueryResultCache(max_bytes=1 << 20, cache_dir="", generation_ttl=60)
+    _, generation = cache.get(QUERY)
+    warehouse.generation = 2
+    cache.put(QUERY, frame(), generation)
+
+    stats = cache.stats()
+    assert (stats["load_races"], stats["stores"], stats["entries"]) == (1, 0, 0)
+    assert cache.get(QUERY) == (None, 2)
+
+
+def test_generation_is_re_read_at_most_once_per_ttl(warehouse):
+    cache = QueryResultCache(max_bytes=1 << 20, cache_dir="", generation_ttl=60)
+    for _ in range(3):
+        cache.get(QUERY)
+    assert warehouse.reads == 1
+    assert cache.current_generation(fresh=True) == 1
+    assert warehouse.reads == 2
+
+
+def test_unreadable_generation_bypasses_the_cache(warehouse):
+    cache = QueryResultCache(max_bytes=1 << 20, cache_dir="", generation_ttl=0)
+    warehouse.generation = None
+    assert cache.get(QUERY) == (None, None)
+    cache.put(QUERY, frame(), None)
+    stats = cache.stats()
+    assert (stats["stores"], stats["misses"]) == (0, 0)
+
+
+def test_least_recently_used_results_are_evicted_by_size(warehouse):
+    size = len(QueryResultCache(cache_dir="")._serialize(frame())[1])
+    cache = QueryResultCache(max_bytes=2 * size, cache_dir="", generation_ttl=60)
+    first, second, third = (f"{QUERY} WHERE site_id = '{i}'" for i in range(3))
+    for query in (first, second):
+        cache.put(query, frame(), 1)
+    assert cache.get(first)[0] is not None
+    cache.put(third, frame(), 1)
+
+    assert cache.get(second)[0] is None
+    assert cache.get(first)[0] is not None
+    stats = cache.stats()
+    assert (stats["entries"], stats["evictions"]) == (2, 1)
+    assert stats["bytes"] <= cache.max_bytes
+
+
+def test_disk_tier_survives_a_restart_until_the_next_load(warehouse, tmp_path):
+    cache = QueryResultCache(max_bytes=1 << 20, cache_dir=str(tmp_path), generation_ttl=0)
+    cache.put(QUERY, frame(), 1)
+    assert [name.split("_")[0] for name in os.listdir(tmp_path)] == ["1"]
+
+    restarted = QueryResultCache(max_bytes=1 << 20, cache_dir=str(tmp_path), generation_ttl=0)
+    df, _ = restarted.get(QUERY)
+    pd.testing.assert_frame_equal(df, frame())
+    assert restarted.stats()["disk_hits"] == 1
+
+    warehouse.generation = 2
+    assert restarted.get(QUERY) == (None, 2)
+    assert os.listdir(tmp_path) == []
+
+
+def test_cache_key_separates_parameters():
+    assert QueryResultCache.cache_key(QUERY, ("SITE-001",)) != QueryResultCache.cache_key(QUERY, ("SITE-002",))
+    assert QueryResultCache.cache_key(QUERY) == QueryResultCache.cache_key(QUERY + " ;")
+
+
+@pytest.mark.parametrize("query, cacheable", [
+    ("SELECT * FROM gold.vw_site_performance", True),
+    ("select * from GOLD.fact_subject_metrics", True),
+    ("SELECT * FROM silver.subjects", False),
+])
+def test_only_gold_reads_are_cacheable(query, cacheable):
+    assert QueryResultCache.is_cacheable(query) is cacheable
@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from aiapi import SingleFlight
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def slow(result, calls, delay=0.02):
+    async def func():
+        calls.append(result)
+        await asyncio.sleep(delay)
+        if isinstance(result, Exception):
+            raise result
+        return result
+    return func
+
+
+@pytest.mark.parametrize("params, equivalent", [
+    ({"study_id": "STUDY 1", "site_id": "SITE-001"}, {"site_id": " SITE-001 ", "study_id": "STUDY 1"}),
+    ({"study_id": "STUDY 1", "site_id": None}, {"study_id": "STUDY 1", "site_id": "  "}),
+    ({"limit": 10}, {"limit": "10"}),
+])
+def test_equivalent_parameters_share_a_key(params, equivalent):
+    assert SingleFlight.key("insights", **params) == SingleFlight.key("insights", **equivalent)
+
+
+def test_different_endpoints_or_parameters_get_different_keys():
+    assert SingleFlight.key("insights", study_id="STUDY 1") != SingleFlight.key("insights", study_id="STUDY 2")
+    assert SingleFlight.key("insights", study_id="STUDY 1") != SingleFlight.key("reports", study_id="STUDY 1")
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+
+    async def scenario():
+        key = flight.key("insights", study_id="STUDY 1")
+        return await asyncio.gather(*(flight.run(key, slow("result", calls)) for _ in range(5)))
+
+    assert run(scenario()) == ["result"] * 5
+    assert calls == ["result"]
+    stats = flight.stats()
+    assert (stats["in_flight"], stats["leaders"], stats["coalesced"]) == (0, 1, 4)
+    assert stats["endpoints"] == {"insights": {"leaders": 1, "coalesced": 4}}
+
+
+def test_failure_is_shared_by_every_waiting_caller():
+    flight = SingleFlight()
+    calls = []
+
+    async def scenario():
+        key = flight.key("insights")
+        return await asyncio.gather(
+            *(flight.run(key, slow(RuntimeError("query failed"), calls)) for _ in range(3)),
+            return_exceptions=True
+        )
+
+    results = run(scenario())
+    assert len(calls) == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_finished_flight_is_not_reused():
+    flight = SingleFlight()
+    calls = []
+
+    async def scenario():
+        key = flight.key("insights")
+        first = await flight.run(key, slow("first", calls, delay=0))
+        second = await flight.run(key, slow("second", calls, delay=0))
+        return first, second
+
+    assert run(scenario()) == ("first", "second")
+    assert flight.stats()["leaders"] == 2
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_work():
+    flight = SingleFlight()
+    calls = []
+
+    async def scenario():
+        key = flight.key("reports", site_id="SITE-001")
+        leaving = asyncio.ensure_future(flight.run(key, slow("report", calls, delay=0.05)))
+        staying = asyncio.ensure_future(flight.run(key, slow("report", calls, delay=0.05)))
+        await asyncio.sleep(0.01)
+        leaving.cancel()
+        return await staying, leaving.cancelled()
+
+    assert run(scenario()) == ("report", True)
+    assert calls == ["report"]
@@ -0,0 +1,91 @@
+import pytest
+
+from sqlguard import SQLGuard, SQLGuardError, tokenize
+
+
+@pytest.fixture
+def guard():
+    return SQLGuard({"agg_site_performance", "fact_subject_metrics"}, max_rows=100)
+
+
+def test_tokenizer_drops_comments_and_keeps_strings_whole():
+    tokens = tokenize("SELECT 'a;b' -- DELETE\n/* DROP */ FROM [gold].[x]")
+    assert [t.kind for t in tokens] == ["word", "string", "word", "quoted", "symbol", "quoted"]
+    assert tokens[3].name == "gold"
+
+
+@pytest.mark.parametrize("sql, bounded, action", [
+    ("SELECT site_id FROM gold.agg_site_performance",
+     "SELECT TOP 100 site_id FROM gold.agg_site_performance", "injected"),
+    ("SELECT DISTINCT site_id FROM gold.agg_site_performance",
+     "SELECT DISTINCT TOP 100 site_id FROM gold.agg_site_performance", "injected"),
+    ("SELECT TOP 500 * FROM gold.agg_site_performance",
+     "SELECT TOP 100 * FROM gold.agg_site_performance", "clamped"),
+    ("SELECT TOP (500) * FROM gold.agg_site_performance",
+     "SELECT TOP (100) * FROM gold.agg_site_performance", "clamped"),
+    ("SELECT TOP 100 PERCENT * FROM gold.agg_site_performance",
+     "SELECT TOP 100 * FROM gold.agg_site_performance", "clamped"),
+    ("SELECT TOP 5 * FROM gold.agg_site_performance;",
+     "SELECT TOP 5 * FROM gold.agg_site_performance", "kept"),
+])
+def test_row_bound(guard, sql, bounded, action):
+    statement = guard.check(sql)
+    assert statement.sql == bounded
+    assert statement.top_action == action
+
+
+def test_offset_fetch_is_left_alone(guard):
+    sql = "SELECT site_id FROM gold.agg_site_performance ORDER BY site_id OFFSET 0 ROWS FETCH NEXT 500 ROWS ONLY"
+    statement = guard.check(sql)
+    assert statement.sql == sql
+    assert statement.top_action == "none"
+
+
+def test_top_goes_on_the_main_select_after_ctes(guard):
+    statement = guard.check(
+        "WITH worst AS (SELECT site_id FROM gold.agg_site_performance) SELECT site_id FROM worst"
+    )
+    assert statement.sql.endswith("SELECT TOP 100 site_id FROM worst")
+    assert statement.objects == ["gold.agg_site_performance", "worst"]
+
+
+def test_keywords_inside_strings_and_comments_are_not_statements(guard):
+    statement = guard.check(
+        "SELECT * FROM gold.fact_subject_metrics WHERE subject_status = 'DELETE; DROP' -- INSERT"
+    )
+    assert statement.objects == ["gold.fact_subject_metrics"]
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT site_id FROM gold.agg_site_performance UNION SELECT name FROM sys.objects",
+    "SELECT site_id FROM gold.agg_site_performance WHERE site_id IN (SELECT name FROM sys.tables)",
+    "SELECT * FROM gold.agg_site_performance a JOIN gold.fact_subject_metrics f ON a.site_id = f.site_id, sys.objects",
+    "SELECT * FROM gold.agg_site_performance, [sys].[objects]",
+    "SELECT * FROM master.gold.agg_site_performance",
+    "SELECT * FROM agg_site_performance",
+    "SELECT * FROM gold.load_generation",
+    "DELETE FROM gold.fact_subject_metrics",
+    "SELECT * INTO gold.copy FROM gold.fact_subject_metrics",
+    "SELECT * FROM gold.fact_subject_metrics WHERE site_id = @site",
+    "SELECT 1 FROM gold.fact_subject_metrics; SELECT 2 FROM gold.fact_subject_metrics",
+    "EXEC gold.sp_refresh_fact_subject_metrics",
+    "SELECT 1",
+    "",
+])
+def test_rejected(guard, sql):
+    with pytest.raises(SQLGuardError):
+        guard.check(sql)
+
+
+def test_top_must_be_a_literal(guard):
+    with pytest.raises(SQLGuardError):
+        guard.check("SELECT TOP (SELECT COUNT(*) FROM gold.agg_site_performance) * FROM gold.agg_site_performance")
+
+
+def test_counters(guard):
+    guard.check("SELECT site_id FROM gold.agg_site_performance")
+    guard.check("SELECT TOP 500 site_id FROM gold.agg_site_performance")
+    with pytest.raises(SQLGuardError):
+        guard.check("DROP TABLE gold.agg_site_performance")
+    stats = guard.stats()
+    assert (stats["checked"], stats["rejected"], stats["top_injected"], stats["top_clamped"]) == (3, 1, 1, 1)
@@ -0,0 +1,77 @@
+import pytest
+
+import aiapi
+from aiapi import TranslationCache
+
+
+@pytest.fixture
+def cache():
+    return TranslationCache(max_size=16, ttl=3600)
+
+
+@pytest.mark.parametrize("cached, asked", [
+    ("Which sites are in the EU region?", "Which sites are in the US region?"),
+    ("How many subjects are enrolled in Spain?", "How many subjects are enrolled in Japan?"),
+    ("How many open medical queries are there?", "How many open safety queries are there?"),
+    ("Which sites have the lowest data quality?", "Which sites have the highest data quality?"),
+    ("List the top 5 underperforming sites", "List the top 10 underperforming sites"),
+    ("Sites with more queries than subjects", "Subjects with more queries than sites"),
+    ("Which sites are in the EU and US regions?", "Which sites are in the EU or US regions?"),
+    ("Open queries by region", "Open queries region"),
+])
+def test_normalized_tier_never_serves_another_entity(cache, cached, asked):
+    cache.put(cached, None, "SELECT 1")
+    assert cache.get(asked) is None
+
+
+@pytest.mark.parametrize("asked", [
+    "Which sites have the lowest data quality please",
+    "Show me the sites with the lowest data quality.",
+    "sites   lowest data quality",
+])
+def test_normalized_tier_serves_stopword_rewordings(cache, asked):
+    cache.put("Which sites have the lowest data quality?", None, "SELECT 1")
+    assert cache.get(asked) == "SELECT 1"
+    assert cache.stats()["normalized_hits"] == 1
+
+
+def test_exact_tier_ignores_case_and_punctuation(cache):
+    cache.put("Which sites have missing visits?", "study 1", "SELECT 1")
+    assert cache.get("which sites have missing visits", "STUDY 1") == "SELECT 1"
+    assert cache.get("which sites have missing visits", "STUDY 2") is None
+    assert cache.get("Show sites with missing visits", "STUDY 2") is None
+    assert cache.stats()["exact_hits"] == 1
+
+
+def test_discard_after_normalized_hit_drops_the_serving_entry(cache):
+    cache.put("Which sites have the lowest data quality?", None, "SELECT broken")
+    assert cache.get("Which sites have the lowest data quality please") == "SELECT broken"
+    cache.discard("Which sites have the lowest data quality please")
+    assert cache.get("Which sites have the lowest data quality?") is None
+    assert cache.get("Which sites have the lowest data quality please") is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TranslationCache(max_size=2, ttl=3600)
+    cache.put("Open queries by site", None, "SELECT 1")
+    cache.put("Open queries by region", None, "SELECT 2")
+    assert cache.get("Open queries by site") == "SELECT 1"
+    cache.put("Open queries by country", None, "SELECT 3")
+    assert cache.get("Open queries by region") is None
+    assert cache.get("the open queries by site") == "SELECT 1"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_expired_entries_miss():
+    cache = TranslationCache(max_size=16, ttl=-1)
+    cache.put("Open queries by site", None, "SELECT 1")
+    assert cache.get("Open queries by site please") is None
+    assert cache.stats()["expirations"] == 1
+    assert cache.stats()["size"] == 0
+
+
+def test_schema_change_invalidates_every_entry(cache, monkeypatch):
+    cache.put("Open queries by site", None, "SELECT 1")
+    monkeypatch.setattr(aiapi.prompt_builder, "schema_hash", "changed")
+    assert cache.get("Open queries by site") is None
+    assert cache.stats()["invalidations"] == 1
@@ -434,3 +434,26 @@ CREATE TABLE bronze.globalcodingreport_whodra (
     require_coding      VARCHAR(100)
 );
 GO
+-- Load manifest: one row per CSV file loaded by ai-api/ingest.py.
+-- Created only if missing so incremental-load history survives re-running this script.
+IF OBJECT_ID('bronze.load_file_manifest', 'U') IS NULL
+BEGIN
+    CREATE TABLE bronze.load_file_manifest (
+        manifest_id         BIGINT IDENTITY(1,1) NOT NULL,
+        source_name         VARCHAR(100)  NOT NULL,     -- bronze table / source folder
+        file_name           VARCHAR(400)  NOT NULL,
+        checksum            CHAR(64)      NOT NULL,     -- SHA-256 of the file contents
+        rows_loaded         INT           NOT NULL,
+        duration_ms         INT           NOT NULL,
+        load_mode           VARCHAR(20)   NOT NULL,     -- full / append
+        status              VARCHAR(20)   NOT NULL,     -- loaded / failed
+        error_message       NVARCHAR(4000) NULL,
+        is_current          BIT           NOT NULL,     -- rows of this file are in the bronze table
+        loaded_at           DATETIME2     NOT NULL DEFAULT SYSDATETIME(),
+        CONSTRAINT PK_load_file_manifest PRIMARY KEY CLUSTERED (manifest_id)
+    );
+    CREATE INDEX IX_load_file_manifest_current
+        ON bronze.load_file_manifest (source_name, is_current)
+        INCLUDE (file_name, checksum);
+END;
+GO
@@ -76,6 +76,8 @@ BEGIN
             + ' seconds';
         PRINT '================================================';
 
+        EXEC gold.sp_bump_load_generation @layer = 'bronze', @source_name = 'compiled_edrr';
+
     END TRY
     BEGIN CATCH
         PRINT '================================================';
@@ -82,6 +82,8 @@ BEGIN
             + ' seconds';
         PRINT '================================================';
 
+        EXEC gold.sp_bump_load_generation @layer = 'bronze', @source_name = 'cpid_edc_crf_freeze';
+
     END TRY
     BEGIN CATCH
         PRINT '================================================';
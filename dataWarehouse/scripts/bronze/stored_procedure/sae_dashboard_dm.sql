@@ -81,6 +81,8 @@ BEGIN
             + ' seconds';
         PRINT '================================================';
 
+        EXEC gold.sp_bump_load_generation @layer = 'bronze', @source_name = 'sae_dashboard_dm';
+
     END TRY
     BEGIN CATCH
         PRINT '================================================';
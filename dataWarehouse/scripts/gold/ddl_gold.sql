@@ -235,34 +235,125 @@ FROM (
 ) AS qt(query_type_key, query_type_code, query_type_name, query_category);
 GO
 
+-- =============================================================================
+-- Table: gold.dim_calendar (Materialized Date Dimension)
+-- One row per day, extended on demand by gold.sp_extend_calendar. Kept across
+-- re-deploys: metric snapshots join to it by date_key.
+-- =============================================================================
+IF OBJECT_ID('gold.dim_calendar', 'U') IS NULL
+BEGIN
+    CREATE TABLE gold.dim_calendar (
+        date_key            DATE            NOT NULL,
+        day_of_month        TINYINT         NOT NULL,
+        month_num           TINYINT         NOT NULL,
+        month_name          NVARCHAR(20)    NOT NULL,
+        year_num            SMALLINT        NOT NULL,
+        quarter_num         TINYINT         NOT NULL,
+        week_of_year        TINYINT         NOT NULL,
+        iso_week            TINYINT         NOT NULL,
+        day_name            NVARCHAR(20)    NOT NULL,
+        is_weekend          BIT             NOT NULL,
+        week_start_date     DATE            NOT NULL,   -- Monday
+        month_start_date    DATE            NOT NULL,
+        year_month          CHAR(7)         NOT NULL,   -- YYYY-MM
+        CONSTRAINT PK_dim_calendar PRIMARY KEY CLUSTERED (date_key)
+    );
+END;
+GO
+
+-- =============================================================================
+-- Procedure: gold.sp_extend_calendar
+-- Adds the missing days between @start_date and @end_date (idempotent)
+-- =============================================================================
+CREATE OR ALTER PROCEDURE gold.sp_extend_calendar
+    @start_date DATE,
+    @end_date DATE
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    IF @start_date IS NULL OR @end_date IS NULL OR @end_date < @start_date
+        RETURN;
+
+    -- Up to 100,000 days from stacked digits (no recursion)
+    ;WITH digits AS (
+        SELECT n FROM (VALUES (0), (1), (2), (3), (4), (5), (6), (7), (8), (9)) AS d(n)
+    ),
+    tally AS (
+        SELECT TOP (DATEDIFF(DAY, @start_date, @end_date) + 1)
+            ROW_NUMBER() OVER (ORDER BY (SELECT NULL)) - 1 AS n
+        FROM digits a CROSS JOIN digits b CROSS JOIN digits c CROSS JOIN digits d CROSS JOIN digits e
+    ),
+    days AS (
+        SELECT DATEADD(DAY, n, @start_date) AS date_key FROM tally
+    )
+    INSERT INTO gold.dim_calendar (
+        date_key, day_of_month, month_num, month_name, year_num, quarter_num,
+        week_of_year, iso_week, day_name, is_weekend,
+        week_start_date, month_start_date, year_month
+    )
+    SELECT
+        d.date_key,
+        DAY(d.date_key),
+        MONTH(d.date_key),
+        DATENAME(MONTH, d.date_key),
+        YEAR(d.date_key),
+        DATEPART(QUARTER, d.date_key),
+        DATEPART(WEEK, d.date_key),
+        DATEPART(ISO_WEEK, d.date_key),
+        DATENAME(WEEKDAY, d.date_key),
+        -- Independent of SET DATEFIRST: 1900-01-01 was a Monday
+        CASE WHEN DATEDIFF(DAY, '19000101', d.date_key) % 7 >= 5 THEN 1 ELSE 0 END,
+        DATEADD(DAY, -(DATEDIFF(DAY, '19000101', d.date_key) % 7), d.date_key),
+        DATEFROMPARTS(YEAR(d.date_key), MONTH(d.date_key), 1),
+        CONVERT(CHAR(7), d.date_key, 126)
+    FROM days d
+    WHERE NOT EXISTS (SELECT 1 FROM gold.dim_calendar c WHERE c.date_key = d.date_key);
+END;
+GO
+
+-- Cover the visit history plus a year ahead (projected visits, daily snapshots)
+DECLARE @first_date DATE, @last_date DATE = DATEADD(YEAR, 1, CAST(SYSDATETIME() AS DATE));
+
+SELECT @first_date = MIN(visit_date)
+FROM (
+    SELECT MIN(CAST(visit_date AS DATE)) AS visit_date FROM silver.cpid_edc_sdv
+    UNION ALL
+    SELECT MIN(CAST(visit_date AS DATE)) FROM silver.cpid_edc_non_conformant
+    UNION ALL
+    SELECT MIN(CAST(visit_date AS DATE)) FROM silver.cpid_edc_query_report_cumulative
+    UNION ALL
+    SELECT MIN(CAST(projected_date AS DATE)) FROM silver.visit_projection_tracker
+) dates;
+
+EXEC gold.sp_extend_calendar
+    @start_date = @first_date,
+    @end_date = @last_date;
+
+-- Extend with: EXEC gold.sp_extend_calendar @start_date = '2024-01-01', @end_date = '2026-12-31';
+GO
+
 -- =============================================================================
 -- Dimension: gold.dim_date (Date Dimension for Time-based Analysis)
+-- Contiguous days from gold.dim_calendar (previously the distinct visit dates
+-- computed from four silver tables on every query)
 -- =============================================================================
 IF OBJECT_ID('gold.dim_date', 'V') IS NOT NULL
     DROP VIEW gold.dim_date;
 GO
 
 CREATE VIEW gold.dim_date AS
-SELECT DISTINCT
-    CAST(visit_date AS DATE) AS date_key,
-    visit_date AS full_date,
-    DAY(visit_date) AS day_of_month,
-    MONTH(visit_date) AS month_num,
-    DATENAME(MONTH, visit_date) AS month_name,
-    YEAR(visit_date) AS year_num,
-    DATEPART(QUARTER, visit_date) AS quarter_num,
-    DATEPART(WEEK, visit_date) AS week_of_year,
-    DATENAME(WEEKDAY, visit_date) AS day_name
-FROM (
-    SELECT visit_date FROM silver.cpid_edc_sdv WHERE visit_date IS NOT NULL
-    UNION
-    SELECT visit_date FROM silver.cpid_edc_non_conformant WHERE visit_date IS NOT NULL
-    UNION
-    SELECT visit_date FROM silver.cpid_edc_query_report_cumulative WHERE visit_date IS NOT NULL
-    UNION
-    SELECT projected_date AS visit_date FROM silver.visit_projection_tracker WHERE projected_date IS NOT NULL
-) dates
-WHERE visit_date IS NOT NULL;
+SELECT
+    date_key,
+    CAST(date_key AS DATETIME2) AS full_date,
+    day_of_month,
+    month_num,
+    month_name,
+    year_num,
+    quarter_num,
+    week_of_year,
+    day_name
+FROM gold.dim_calendar;
 GO
 
 -- =============================================================================
@@ -295,13 +386,16 @@ GO
 -- =============================================================================
 
 -- =============================================================================
--- Fact Table: gold.fact_subject_metrics (Core Subject-Level Metrics)
+-- Source View: gold.vw_fact_subject_metrics_source
+-- Row definition of gold.fact_subject_metrics; read only by the refresh
+-- procedure below. row_hash covers every silver column except dwh_create_date
+-- so unchanged subjects are not rewritten on each load.
 -- =============================================================================
-IF OBJECT_ID('gold.fact_subject_metrics', 'V') IS NOT NULL
-    DROP VIEW gold.fact_subject_metrics;
+IF OBJECT_ID('gold.vw_fact_subject_metrics_source', 'V') IS NOT NULL
+    DROP VIEW gold.vw_fact_subject_metrics_source;
 GO
 
-CREATE VIEW  gold.fact_subject_metrics AS
+CREATE VIEW gold.vw_fact_subject_metrics_source AS
 SELECT
     sm.study_id,
     sm.site_id,
@@ -406,11 +500,679 @@ SELECT
         ELSE 0 
     END AS is_clean_patient,
     
-    sm.dwh_create_date AS snapshot_date
+    sm.dwh_create_date AS snapshot_date,
+    
+    -- Named JSON keeps NULLs in place (CONCAT_WS would skip them and shift columns)
+    HASHBYTES('SHA2_256', (
+        SELECT
+            sm.study_id, sm.site_id, sm.subject_id, sm.region, sm.country,
+            sm.latest_visit, sm.subject_status,
+            sm.missing_visits, sm.missing_pages, sm.coded_terms, sm.uncoded_terms,
+            sm.open_issues_lnr, sm.open_issues_edrr, sm.inactivated_forms,
+            sm.esae_review_dm, sm.esae_review_safety,
+            sm.expected_visits, sm.pages_entered, sm.pages_non_conformant,
+            sm.crfs_with_issues, sm.crfs_clean, sm.percent_clean_crf,
+            sm.dm_queries, sm.clinical_queries, sm.medical_queries, sm.site_queries,
+            sm.field_monitor_queries, sm.coding_queries, sm.safety_queries, sm.total_queries,
+            sm.crfs_require_verification, sm.forms_verified,
+            sm.crfs_frozen, sm.crfs_not_frozen, sm.crfs_locked, sm.crfs_unlocked,
+            sm.pds_confirmed, sm.pds_proposed,
+            sm.crfs_signed, sm.crfs_overdue_45, sm.crfs_overdue_45_90, sm.crfs_overdue_90,
+            sm.broken_signatures, sm.crfs_never_signed
+        FOR JSON PATH, WITHOUT_ARRAY_WRAPPER, INCLUDE_NULL_VALUES
+    )) AS row_hash
 
 FROM silver.cpid_edc_subject_metrics sm;
 GO
 
+-- =============================================================================
+-- Fact Table: gold.fact_subject_metrics (Core Subject-Level Metrics)
+-- Materialized from gold.vw_fact_subject_metrics_source and refreshed
+-- incrementally by gold.sp_refresh_fact_subject_metrics at the end of the
+-- silver subject metrics load. Aggregates, gold procedures and the AI API
+-- read this table.
+-- =============================================================================
+IF OBJECT_ID('gold.fact_subject_metrics', 'V') IS NOT NULL
+    DROP VIEW gold.fact_subject_metrics;
+IF OBJECT_ID('gold.fact_subject_metrics', 'U') IS NOT NULL
+    DROP TABLE gold.fact_subject_metrics;
+GO
+
+CREATE TABLE gold.fact_subject_metrics (
+    study_id                NVARCHAR(50),
+    site_id                 NVARCHAR(50),
+    subject_id              NVARCHAR(50),
+    region                  NVARCHAR(50),
+    country                 NVARCHAR(50),
+    missing_visits          INT,
+    expected_visits         INT,
+    pct_missing_visits      FLOAT,
+    missing_pages           INT,
+    pages_entered           INT,
+    pages_non_conformant    INT,
+    crfs_with_issues        INT,
+    crfs_clean              INT,
+    percent_clean_crf       FLOAT,
+    coded_terms             INT,
+    uncoded_terms           INT,
+    pct_coded_terms         FLOAT,
+    open_issues_lnr         INT,
+    open_issues_edrr        INT,
+    inactivated_forms       INT,
+    esae_review_dm          INT,
+    esae_review_safety      INT,
+    dm_queries              INT,
+    clinical_queries        INT,
+    medical_queries         INT,
+    site_queries            INT,
+    field_monitor_queries   INT,
+    coding_queries          INT,
+    safety_queries          INT,
+    total_queries           INT,
+    crfs_require_sdv        INT,
+    forms_verified          INT,
+    pct_sdv_complete        FLOAT,
+    crfs_frozen             INT,
+    crfs_not_frozen         INT,
+    crfs_locked             INT,
+    crfs_unlocked           INT,
+    pds_confirmed           INT,
+    pds_proposed            INT,
+    crfs_signed             INT,
+    crfs_overdue_45         INT,
+    crfs_overdue_45_90      INT,
+    crfs_overdue_90         INT,
+    broken_signatures       INT,
+    crfs_never_signed       INT,
+    subject_status          NVARCHAR(50),
+    latest_visit            NVARCHAR(50),
+    data_quality_index      DECIMAL(5,2),
+    is_clean_patient        INT,
+    snapshot_date           DATETIME2
+);
+GO
+
+-- Point lookups for site/subject drill-downs
+CREATE CLUSTERED INDEX CIX_fact_subject_metrics
+    ON gold.fact_subject_metrics (study_id, site_id, subject_id);
+GO
+
+-- Batch-mode scans for the aggregate views and gold procedures
+CREATE NONCLUSTERED COLUMNSTORE INDEX NCCI_fact_subject_metrics
+    ON gold.fact_subject_metrics (
+        study_id, site_id, subject_id, region, country,
+        missing_visits, expected_visits, missing_pages, pages_non_conformant,
+        percent_clean_crf, coded_terms, uncoded_terms,
+        open_issues_lnr, open_issues_edrr, esae_review_dm, esae_review_safety,
+        dm_queries, clinical_queries, medical_queries, site_queries,
+        field_monitor_queries, coding_queries, safety_queries, total_queries,
+        crfs_require_sdv, forms_verified, pds_confirmed, pds_proposed,
+        crfs_overdue_45, crfs_overdue_45_90, crfs_overdue_90,
+        subject_status, data_quality_index, is_clean_patient
+    );
+GO
+
+-- =============================================================================
+-- Table: gold.fact_subject_metrics_key_hash
+-- Per-subject hash of the source rows last materialized (change detection).
+-- Keys are stored with NULL as N'' (same convention as silver.subject_key_hash)
+-- so subjects without a site still match on the next refresh.
+-- =============================================================================
+IF OBJECT_ID('gold.fact_subject_metrics_key_hash', 'U') IS NOT NULL
+    DROP TABLE gold.fact_subject_metrics_key_hash;
+GO
+
+CREATE TABLE gold.fact_subject_metrics_key_hash (
+    study_id        NVARCHAR(50)    NOT NULL,
+    site_id         NVARCHAR(50)    NOT NULL,
+    subject_id      NVARCHAR(50)    NOT NULL,
+    key_hash        VARBINARY(32)   NOT NULL,
+    refreshed_at    DATETIME2       NOT NULL DEFAULT SYSDATETIME(),
+    CONSTRAINT PK_fact_subject_metrics_key_hash PRIMARY KEY CLUSTERED (study_id, site_id, subject_id)
+);
+GO
+
+-- =============================================================================
+-- Table: gold.subject_change_log
+-- Subjects added (I), changed (U) or removed (D) by each refresh, keyed by the
+-- load generation the refresh recorded (NULL keys stored as N''). Downstream
+-- materializations refresh only these keys.
+-- =============================================================================
+IF OBJECT_ID('gold.subject_change_log', 'U') IS NULL
+BEGIN
+    CREATE TABLE gold.subject_change_log (
+        generation_id   BIGINT          NOT NULL,
+        study_id        NVARCHAR(50)    NOT NULL,
+        site_id         NVARCHAR(50)    NOT NULL,
+        subject_id      NVARCHAR(50)    NOT NULL,
+        change_type     CHAR(1)         NOT NULL,   -- I / U / D
+        logged_at       DATETIME2       NOT NULL DEFAULT SYSDATETIME(),
+        CONSTRAINT PK_subject_change_log PRIMARY KEY CLUSTERED (generation_id, study_id, site_id, subject_id)
+    );
+END;
+GO
+
+-- =============================================================================
+-- Table: gold.materialization_watermark
+-- Last load generation applied by each incrementally maintained gold object
+-- (agg_query_open_day tracks silver.subject_change_log change_id instead)
+-- =============================================================================
+IF OBJECT_ID('gold.materialization_watermark', 'U') IS NULL
+BEGIN
+    CREATE TABLE gold.materialization_watermark (
+        object_name     NVARCHAR(100)   NOT NULL,
+        generation_id   BIGINT          NOT NULL,
+        refreshed_at    DATETIME2       NOT NULL DEFAULT SYSDATETIME(),
+        CONSTRAINT PK_materialization_watermark PRIMARY KEY CLUSTERED (object_name)
+    );
+END;
+GO
+
+-- =============================================================================
+-- View: gold.vw_priority_action_source
+-- Action item definitions (one branch per action category) over
+-- gold.fact_subject_metrics folded to one row per subject: keys are returned
+-- with NULL as '' (same convention as fact_subject_metrics_key_hash) and
+-- duplicate source rows of a subject are summed, so each subject yields at
+-- most one row per action. Read only by sp_refresh_priority_action_queue,
+-- joined to the changed subjects on those keys.
+-- =============================================================================
+IF OBJECT_ID('gold.vw_priority_action_source', 'V') IS NOT NULL
+    DROP VIEW gold.vw_priority_action_source;
+GO
+
+CREATE VIEW gold.vw_priority_action_source AS
+WITH subject_metrics AS (
+    SELECT
+        COALESCE(study_id, '') AS study_id,
+        COALESCE(site_id, '') AS site_id,
+        COALESCE(subject_id, '') AS subject_id,
+        MAX(region) AS region,
+        MAX(country) AS country,
+        SUM(safety_queries) AS safety_queries,
+        SUM(crfs_overdue_90) AS crfs_overdue_90,
+        SUM(total_queries) AS total_queries,
+        SUM(missing_visits) AS missing_visits,
+        SUM(crfs_overdue_45_90) AS crfs_overdue_45_90,
+        SUM(crfs_require_sdv) AS crfs_require_sdv,
+        SUM(forms_verified) AS forms_verified,
+        SUM(uncoded_terms) AS uncoded_terms,
+        SUM(pages_non_conformant) AS pages_non_conformant,
+        SUM(open_issues_lnr) AS open_issues_lnr,
+        SUM(pds_proposed) AS pds_proposed,
+        SUM(open_issues_edrr) AS open_issues_edrr
+    FROM gold.fact_subject_metrics
+    GROUP BY COALESCE(study_id, ''), COALESCE(site_id, ''), COALESCE(subject_id, '')
+)
+-- P1: Safety Queries (CRITICAL)
+SELECT 'P1' AS priority, 1 AS sort_order,
+    'Safety Query - Immediate Resolution Required' AS action_type,
+    study_id, site_id, subject_id, region, country,
+    CONCAT(CAST(safety_queries AS VARCHAR), ' open safety queries require immediate attention') AS action_description,
+    'Safety Team' AS responsible_party, 'Within 24 hours' AS due_date,
+    safety_queries AS item_count, 'SAFETY_QUERY' AS action_category
+FROM subject_metrics WHERE safety_queries > 0
+UNION ALL
+-- P1: Signatures Overdue >90 days (CRITICAL)
+SELECT 'P1', 2, 'PI Signature Critically Overdue (>90 days)',
+    study_id, site_id, subject_id, region, country,
+    CONCAT(CAST(crfs_overdue_90 AS VARCHAR), ' CRFs need PI signature - regulatory compliance risk'),
+    'Investigator', 'Within 48 hours', crfs_overdue_90, 'SIGNATURE_OVERDUE'
+FROM subject_metrics WHERE crfs_overdue_90 > 0
+UNION ALL
+-- P2: Open Queries >30 days (HIGH); sites with significant query backlog
+SELECT 'P2', 3, 'Query Aging >30 Days',
+    study_id, site_id, subject_id, region, country,
+    CONCAT(CAST(total_queries AS VARCHAR), ' queries open - follow up with site'),
+    'CRA', 'Within 1 week', total_queries, 'QUERY_AGING'
+FROM subject_metrics WHERE total_queries > 5
+UNION ALL
+-- P2: Missing Visits >14 days (HIGH)
+SELECT 'P2', 4, 'Missing Visit Follow-up Required',
+    study_id, site_id, subject_id, region, country,
+    CONCAT(CAST(missing_visits AS VARCHAR), ' scheduled visits missing - contact site'),
+    'CRA', 'Within 1 week', missing_visits, 'MISSING_VISIT'
+FROM subject_metrics WHERE missing_visits > 2
+UNION ALL
+-- P2: Signatures Overdue 45-90 days (HIGH)
+SELECT 'P2', 5, 'PI Signature Overdue (45-90 days)',
+    study_id, site_id, subject_id, region, country,
+    CONCAT(CAST(crfs_overdue_45_90 AS VARCHAR), ' CRFs approaching critical signature deadline'),
+    'Investigator', 'Within 1 week', crfs_overdue_45_90, 'SIGNATURE_WARNING'
+FROM subject_metrics WHERE crfs_overdue_45_90 > 0
+UNION ALL
+-- P3: SDV Pending (MEDIUM)
+SELECT 'P3', 6, 'Source Data Verification Pending',
+    study_id, site_id, subject_id, region, country,
+    CONCAT(CAST(crfs_require_sdv - forms_verified AS VARCHAR), ' CRFs require SDV'),
+    'CRA', 'Next monitoring visit', crfs_require_sdv - forms_verified, 'SDV_PENDING'
+FROM subject_metrics WHERE crfs_require_sdv > forms_verified
+UNION ALL
+-- P3: Coding Required (MEDIUM)
+SELECT 'P3', 7, 'Medical/Drug Coding Required',
+    study_id, site_id, subject_id, region, country,
+    CONCAT(CAST(uncoded_terms AS VARCHAR), ' terms require MedDRA/WHODrug coding'),
+    'Coder', 'Within 2 weeks', uncoded_terms, 'CODING_REQUIRED'
+FROM subject_metrics WHERE uncoded_terms > 0
+UNION ALL
+-- P3: Non-conformant Data (MEDIUM)
+SELECT 'P3', 8, 'Non-Conformant Data Requires Review',
+    study_id, site_id, subject_id, region, country,
+    CONCAT(CAST(pages_non_conformant AS VARCHAR), ' pages with non-conformant data'),
+    'DM', 'Within 2 weeks', pages_non_conformant, 'NON_CONFORMANT'
+FROM subject_metrics WHERE pages_non_conformant > 0
+UNION ALL
+-- P3: Lab Issues (MEDIUM)
+SELECT 'P3', 9, 'Lab Data Issues - Missing Ranges/Names',
+    study_id, site_id, subject_id, region, country,
+    CONCAT(CAST(open_issues_lnr AS VARCHAR), ' lab issues require resolution'),
+    'CRA', 'Within 2 weeks', open_issues_lnr, 'LAB_ISSUES'
+FROM subject_metrics WHERE open_issues_lnr > 0
+UNION ALL
+-- P4: Protocol Deviations to Confirm (LOW)
+SELECT 'P4', 10, 'Protocol Deviation - Pending Confirmation',
+    study_id, site_id, subject_id, region, country,
+    CONCAT(CAST(pds_proposed AS VARCHAR), ' protocol deviations pending confirmation'),
+    'DM', 'Within 30 days', pds_proposed, 'PD_PENDING'
+FROM subject_metrics WHERE pds_proposed > 0
+UNION ALL
+-- P4: EDRR Issues (LOW)
+SELECT 'P4', 11, 'Third Party Data Reconciliation',
+    study_id, site_id, subject_id, region, country,
+    CONCAT(CAST(open_issues_edrr AS VARCHAR), ' EDRR issues pending reconciliation'),
+    'DM', 'Within 30 days', open_issues_edrr, 'EDRR_ISSUES'
+FROM subject_metrics WHERE open_issues_edrr > 0;
+GO
+
+-- =============================================================================
+-- Table: gold.priority_action_queue
+-- Persisted action items, one row per subject and action category (keys
+-- with NULL stored as N'', as in gold.vw_priority_action_source). The
+-- clustered key is the worklist order, so filtered pages and keyset
+-- continuations are index seeks instead of sorting the whole backlog.
+-- =============================================================================
+IF OBJECT_ID('gold.priority_action_queue', 'U') IS NOT NULL
+    DROP TABLE gold.priority_action_queue;
+GO
+
+CREATE TABLE gold.priority_action_queue (
+    priority            VARCHAR(2)      NOT NULL,   -- P1 (critical) .. P4 (low)
+    sort_order          INT             NOT NULL,   -- action category rank within the worklist
+    study_id            NVARCHAR(50)    NOT NULL,
+    site_id             NVARCHAR(50)    NOT NULL,
+    subject_id          NVARCHAR(50)    NOT NULL,
+    responsible_party   NVARCHAR(50)    NOT NULL,
+    action_type         NVARCHAR(100)   NOT NULL,
+    action_category     VARCHAR(30)     NOT NULL,
+    region              NVARCHAR(50),
+    country             NVARCHAR(50),
+    action_description  NVARCHAR(200),
+    due_date            NVARCHAR(50),
+    item_count          INT             NOT NULL,
+    generation_id       BIGINT          NOT NULL,   -- load generation that last wrote the row
+    CONSTRAINT PK_priority_action_queue 
+        PRIMARY KEY CLUSTERED (priority, sort_order, study_id, site_id, subject_id)
+);
+GO
+
+-- Owner worklists (CRA / DM / Safety / Coder / Investigator) in worklist order
+CREATE NONCLUSTERED INDEX IX_priority_action_queue_party
+    ON gold.priority_action_queue (responsible_party, priority, sort_order, study_id, site_id, subject_id);
+GO
+
+-- Incremental refresh deletes by subject
+CREATE NONCLUSTERED INDEX IX_priority_action_queue_subject
+    ON gold.priority_action_queue (study_id, site_id, subject_id);
+GO
+
+-- The queue was just recreated empty: the next refresh must rebuild it
+DELETE FROM gold.materialization_watermark WHERE object_name = 'priority_action_queue';
+GO
+
+-- =============================================================================
+-- Procedure: gold.sp_refresh_priority_action_queue
+-- Re-derives action items only for subjects in gold.subject_change_log newer
+-- than the queue's watermark. Rebuilds everything when @full_rebuild = 1, when
+-- the queue has never been built, or when the watermark is older than the
+-- change log retention (changes may have been purged).
+-- =============================================================================
+CREATE OR ALTER PROCEDURE gold.sp_refresh_priority_action_queue
+    @full_rebuild BIT = 0,
+    @log_retention_days INT = 30
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    DECLARE 
+        @start_time         DATETIME,
+        @end_time           DATETIME,
+        @rows_deleted       INT = 0,
+        @rows_inserted      INT = 0,
+        @subjects_changed   INT = 0,
+        @watermark          BIGINT,
+        @watermark_at       DATETIME2,
+        @generation_id      BIGINT;
+
+    BEGIN TRY
+        SET @start_time = GETDATE();
+
+        SELECT @watermark = generation_id, @watermark_at = refreshed_at
+        FROM gold.materialization_watermark
+        WHERE object_name = 'priority_action_queue';
+
+        SELECT @generation_id = generation_id FROM gold.vw_current_load_generation;
+
+        IF @watermark IS NULL OR @watermark_at < DATEADD(DAY, -@log_retention_days, SYSDATETIME())
+            SET @full_rebuild = 1;
+
+        PRINT '================================================';
+        PRINT 'Refreshing gold.priority_action_queue';
+        PRINT 'Mode: ' + CASE WHEN @full_rebuild = 1 THEN 'FULL' ELSE 'INCREMENTAL' END;
+        PRINT '================================================';
+
+        BEGIN TRANSACTION;
+
+        IF @full_rebuild = 1
+        BEGIN
+            TRUNCATE TABLE gold.priority_action_queue;
+
+            INSERT INTO gold.priority_action_queue (
+                priority, sort_order, study_id, site_id, subject_id, responsible_party,
+                action_type, action_category, region, country, action_description,
+                due_date, item_count, generation_id
+            )
+            SELECT
+                priority, sort_order, study_id, site_id, subject_id, responsible_party,
+                action_type, action_category, region, country, action_description,
+                due_date, item_count, @generation_id
+            FROM gold.vw_priority_action_source
+            WHERE item_count > 0;
+
+            SET @rows_inserted = @@ROWCOUNT;
+        END
+        ELSE
+        BEGIN
+            -- Subjects added, changed or removed since the queue was last refreshed
+            SELECT DISTINCT study_id, site_id, subject_id
+            INTO #changed_subjects
+            FROM gold.subject_change_log
+            WHERE generation_id > @watermark;
+
+            SET @subjects_changed = @@ROWCOUNT;
+            PRINT '>> Subjects Changed: ' + CAST(@subjects_changed AS NVARCHAR);
+
+            DELETE q
+            FROM gold.priority_action_queue q
+            INNER JOIN #changed_subjects c
+                ON q.study_id = c.study_id
+               AND q.site_id = c.site_id
+               AND q.subject_id = c.subject_id;
+
+            SET @rows_deleted = @@ROWCOUNT;
+
+            -- Removed subjects are gone from the fact table and yield no rows
+            INSERT INTO gold.priority_action_queue (
+                priority, sort_order, study_id, site_id, subject_id, responsible_party,
+                action_type, action_category, region, country, action_description,
+                due_date, item_count, generation_id
+            )
+            SELECT
+                src.priority, src.sort_order, src.study_id, src.site_id, src.subject_id, src.responsible_party,
+                src.action_type, src.action_category, src.region, src.country, src.action_description,
+                src.due_date, src.item_count, @generation_id
+            FROM gold.vw_priority_action_source src
+            INNER JOIN #changed_subjects c
+                ON src.study_id = c.study_id
+               AND src.site_id = c.site_id
+               AND src.subject_id = c.subject_id
+            WHERE src.item_count > 0;
+
+            SET @rows_inserted = @@ROWCOUNT;
+
+            DROP TABLE #changed_subjects;
+        END;
+
+        MERGE gold.materialization_watermark AS w
+        USING (SELECT 'priority_action_queue' AS object_name) AS s
+            ON w.object_name = s.object_name
+        WHEN MATCHED THEN
+            UPDATE SET generation_id = @generation_id, refreshed_at = SYSDATETIME()
+        WHEN NOT MATCHED THEN
+            INSERT (object_name, generation_id) VALUES (s.object_name, @generation_id);
+
+        COMMIT TRANSACTION;
+
+        SET @end_time = GETDATE();
+        PRINT '>> Rows Deleted : ' + CAST(@rows_deleted AS NVARCHAR);
+        PRINT '>> Rows Inserted: ' + CAST(@rows_inserted AS NVARCHAR);
+        PRINT '>> Watermark    : ' + CAST(@generation_id AS NVARCHAR);
+        PRINT '>> Refresh Duration: ' 
+            + CAST(DATEDIFF(SECOND, @start_time, @end_time) AS NVARCHAR) 
+            + ' seconds';
+        PRINT '================================================';
+
+    END TRY
+    BEGIN CATCH
+        IF @@TRANCOUNT > 0
+            ROLLBACK TRANSACTION;
+
+        PRINT '================================================';
+        PRINT 'ERROR OCCURRED DURING gold.priority_action_queue REFRESH';
+        PRINT 'Error Message : ' + ERROR_MESSAGE();
+        PRINT 'Error Number  : ' + CAST(ERROR_NUMBER() AS NVARCHAR);
+        PRINT 'Error State   : ' + CAST(ERROR_STATE() AS NVARCHAR);
+        PRINT '================================================';
+
+        THROW;
+    END CATCH
+END;
+GO
+
+-- =============================================================================
+-- Procedure: gold.sp_refresh_fact_subject_metrics
+-- Incremental refresh: only subjects whose source rows hash differently from
+-- the last refresh are deleted and re-inserted. @full_rebuild = 1 reloads all.
+-- =============================================================================
+CREATE OR ALTER PROCEDURE gold.sp_refresh_fact_subject_metrics
+    @full_rebuild BIT = 0,
+    @log_retention_days INT = 30
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    DECLARE 
+        @start_time     DATETIME,
+        @end_time       DATETIME,
+        @rows_deleted   INT = 0,
+        @rows_inserted  INT = 0,
+        @keys_changed   INT = 0,
+        @generation_id  BIGINT;
+
+    BEGIN TRY
+        SET @start_time = GETDATE();
+
+        PRINT '================================================';
+        PRINT 'Refreshing gold.fact_subject_metrics';
+        PRINT 'Mode: ' + CASE WHEN @full_rebuild = 1 THEN 'FULL' ELSE 'INCREMENTAL' END;
+        PRINT '================================================';
+
+        -- Hash of every source row, folded per subject (NULL keys as N'' so they join)
+        SELECT
+            k.study_id,
+            k.site_id,
+            k.subject_id,
+            HASHBYTES('SHA2_256',
+                STRING_AGG(CONVERT(NVARCHAR(MAX), CONVERT(VARCHAR(64), src.row_hash, 2)), ',')
+                    WITHIN GROUP (ORDER BY src.row_hash)
+            ) AS key_hash
+        INTO #source_keys
+        FROM gold.vw_fact_subject_metrics_source src
+        CROSS APPLY (
+            SELECT
+                ISNULL(src.study_id, N'') AS study_id,
+                ISNULL(src.site_id, N'') AS site_id,
+                ISNULL(src.subject_id, N'') AS subject_id
+        ) k
+        GROUP BY k.study_id, k.site_id, k.subject_id;
+
+        IF @full_rebuild = 1
+        BEGIN
+            TRUNCATE TABLE gold.fact_subject_metrics;
+            TRUNCATE TABLE gold.fact_subject_metrics_key_hash;
+        END;
+
+        -- Subjects added, changed or removed since the last refresh
+        SELECT
+            COALESCE(s.study_id, h.study_id) AS study_id,
+            COALESCE(s.site_id, h.site_id) AS site_id,
+            COALESCE(s.subject_id, h.subject_id) AS subject_id,
+            CASE 
+                WHEN h.study_id IS NULL THEN 'I'
+                WHEN s.study_id IS NULL THEN 'D'
+                ELSE 'U'
+            END AS change_type,
+            s.key_hash
+        INTO #changed_keys
+        FROM #source_keys s
+        FULL OUTER JOIN gold.fact_subject_metrics_key_hash h
+            ON s.study_id = h.study_id
+           AND s.site_id = h.site_id
+           AND s.subject_id = h.subject_id
+        WHERE h.study_id IS NULL
+           OR s.study_id IS NULL
+           OR s.key_hash <> h.key_hash;
+
+        SET @keys_changed = @@ROWCOUNT;
+        PRINT '>> Subjects Changed: ' + CAST(@keys_changed AS NVARCHAR);
+
+        BEGIN TRANSACTION;
+
+        -- 'I' keys too: a subject missing from the hash table may still have fact rows
+        DELETE f
+        FROM gold.fact_subject_metrics f
+        INNER JOIN #changed_keys c
+            ON ISNULL(f.study_id, N'') = c.study_id
+           AND ISNULL(f.site_id, N'') = c.site_id
+           AND ISNULL(f.subject_id, N'') = c.subject_id;
+
+        SET @rows_deleted = @@ROWCOUNT;
+
+        INSERT INTO gold.fact_subject_metrics (
+            study_id, site_id, subject_id, region, country,
+            missing_visits, expected_visits, pct_missing_visits,
+            missing_pages, pages_entered, pages_non_conformant, crfs_with_issues, crfs_clean, percent_clean_crf,
+            coded_terms, uncoded_terms, pct_coded_terms,
+            open_issues_lnr, open_issues_edrr, inactivated_forms, esae_review_dm, esae_review_safety,
+            dm_queries, clinical_queries, medical_queries, site_queries,
+            field_monitor_queries, coding_queries, safety_queries, total_queries,
+            crfs_require_sdv, forms_verified, pct_sdv_complete,
+            crfs_frozen, crfs_not_frozen, crfs_locked, crfs_unlocked,
+            pds_confirmed, pds_proposed,
+            crfs_signed, crfs_overdue_45, crfs_overdue_45_90, crfs_overdue_90, broken_signatures, crfs_never_signed,
+            subject_status, latest_visit, data_quality_index, is_clean_patient, snapshot_date
+        )
+        SELECT
+            src.study_id, src.site_id, src.subject_id, src.region, src.country,
+            src.missing_visits, src.expected_visits, src.pct_missing_visits,
+            src.missing_pages, src.pages_entered, src.pages_non_conformant, src.crfs_with_issues, src.crfs_clean, src.percent_clean_crf,
+            src.coded_terms, src.uncoded_terms, src.pct_coded_terms,
+            src.open_issues_lnr, src.open_issues_edrr, src.inactivated_forms, src.esae_review_dm, src.esae_review_safety,
+            src.dm_queries, src.clinical_queries, src.medical_queries, src.site_queries,
+            src.field_monitor_queries, src.coding_queries, src.safety_queries, src.total_queries,
+            src.crfs_require_sdv, src.forms_verified, src.pct_sdv_complete,
+            src.crfs_frozen, src.crfs_not_frozen, src.crfs_locked, src.crfs_unlocked,
+            src.pds_confirmed, src.pds_proposed,
+            src.crfs_signed, src.crfs_overdue_45, src.crfs_overdue_45_90, src.crfs_overdue_90, src.broken_signatures, src.crfs_never_signed,
+            src.subject_status, src.latest_visit, src.data_quality_index, src.is_clean_patient, src.snapshot_date
+        FROM gold.vw_fact_subject_metrics_source src
+        INNER JOIN #changed_keys c
+            ON ISNULL(src.study_id, N'') = c.study_id
+           AND ISNULL(src.site_id, N'') = c.site_id
+           AND ISNULL(src.subject_id, N'') = c.subject_id
+        WHERE c.change_type <> 'D';
+
+        SET @rows_inserted = @@ROWCOUNT;
+
+        -- Remember what was materialized
+        DELETE h
+        FROM gold.fact_subject_metrics_key_hash h
+        INNER JOIN #changed_keys c
+            ON h.study_id = c.study_id
+           AND h.site_id = c.site_id
+           AND h.subject_id = c.subject_id;
+
+        INSERT INTO gold.fact_subject_metrics_key_hash (study_id, site_id, subject_id, key_hash)
+        SELECT study_id, site_id, subject_id, key_hash
+        FROM #changed_keys
+        WHERE change_type <> 'D';
+
+        COMMIT TRANSACTION;
+
+        -- Publish the change set under a new load generation
+        EXEC gold.sp_bump_load_generation 
+            @layer = 'gold', 
+            @source_name = 'fact_subject_metrics', 
+            @generation_id = @generation_id OUTPUT;
+
+        INSERT INTO gold.subject_change_log (generation_id, study_id, site_id, subject_id, change_type)
+        SELECT @generation_id, study_id, site_id, subject_id, change_type
+        FROM #changed_keys;
+
+        DELETE FROM gold.subject_change_log
+        WHERE logged_at < DATEADD(DAY, -@log_retention_days, SYSDATETIME());
+
+        -- Re-derive action items for the changed subjects
+        EXEC gold.sp_refresh_priority_action_queue 
+            @full_rebuild = @full_rebuild,
+            @log_retention_days = @log_retention_days;
+
+        -- Append the day's trend snapshot once gold/ddl_metric_snapshots.sql is deployed
+        IF OBJECT_ID('gold.sp_append_metric_snapshot', 'P') IS NOT NULL
+            EXEC gold.sp_append_metric_snapshot @generation_id = @generation_id;
+
+        -- Re-aggregate the query aging cube for sites with changed queries
+        IF OBJECT_ID('gold.sp_refresh_query_aging', 'P') IS NOT NULL
+            EXEC gold.sp_refresh_query_aging @full_rebuild = @full_rebuild;
+
+        DROP TABLE #changed_keys;
+        DROP TABLE #source_keys;
+
+        SET @end_time = GETDATE();
+        PRINT '>> Rows Deleted : ' + CAST(@rows_deleted AS NVARCHAR);
+        PRINT '>> Rows Inserted: ' + CAST(@rows_inserted AS NVARCHAR);
+        PRINT '>> Load Generation: ' + CAST(@generation_id AS NVARCHAR);
+        PRINT '>> Refresh Duration: ' 
+            + CAST(DATEDIFF(SECOND, @start_time, @end_time) AS NVARCHAR) 
+            + ' seconds';
+        PRINT '================================================';
+
+    END TRY
+    BEGIN CATCH
+        IF @@TRANCOUNT > 0
+            ROLLBACK TRANSACTION;
+
+        PRINT '================================================';
+        PRINT 'ERROR OCCURRED DURING gold.fact_subject_metrics REFRESH';
+        PRINT 'Error Message : ' + ERROR_MESSAGE();
+        PRINT 'Error Number  : ' + CAST(ERROR_NUMBER() AS NVARCHAR);
+        PRINT 'Error State   : ' + CAST(ERROR_STATE() AS NVARCHAR);
+        PRINT '================================================';
+
+        THROW;
+    END CATCH
+END;
+GO
+
+-- Initial population. Needs gold.sp_bump_load_generation and
+-- gold.vw_current_load_generation: run gold/ddl_load_generation.sql before
+-- this script, or run this EXEC once it has been deployed.
+IF OBJECT_ID('gold.sp_bump_load_generation', 'P') IS NOT NULL
+   AND OBJECT_ID('gold.vw_current_load_generation', 'V') IS NOT NULL
+    EXEC gold.sp_refresh_fact_subject_metrics @full_rebuild = 1;
+ELSE
+    PRINT 'Skipping initial gold.fact_subject_metrics population: run gold/ddl_load_generation.sql first, then EXEC gold.sp_refresh_fact_subject_metrics @full_rebuild = 1';
+GO
+
 -- =============================================================================
 -- Fact Table: gold.fact_query_metrics
 -- =============================================================================
@@ -435,19 +1197,303 @@ SELECT
     q.marking_group_name,
     q.query_open_date,
     q.query_response,
-    q.days_since_open,
-    q.days_since_response,
+    d.days_since_open,
+    d.days_since_response,
     CASE WHEN q.query_status = 'Open' THEN 1 ELSE 0 END AS is_open,
     CASE WHEN q.query_status = 'Answered' THEN 1 ELSE 0 END AS is_answered,
     CASE WHEN q.query_status = 'Closed' THEN 1 ELSE 0 END AS is_closed,
     CASE 
-        WHEN q.days_since_open <= 7 THEN '0-7 Days'
-        WHEN q.days_since_open <= 14 THEN '8-14 Days'
-        WHEN q.days_since_open <= 30 THEN '15-30 Days'
-        WHEN q.days_since_open <= 60 THEN '31-60 Days'
+        WHEN d.days_since_open <= 7 THEN '0-7 Days'
+        WHEN d.days_since_open <= 14 THEN '8-14 Days'
+        WHEN d.days_since_open <= 30 THEN '15-30 Days'
+        WHEN d.days_since_open <= 60 THEN '31-60 Days'
         ELSE '60+ Days'
     END AS query_age_bucket
-FROM silver.cpid_edc_query_report_cumulative q;
+FROM silver.cpid_edc_query_report_cumulative q
+-- Ages as of today rather than as of the last load
+CROSS APPLY (
+    SELECT
+        ISNULL(DATEDIFF(DAY, q.query_open_date, CAST(GETDATE() AS DATE)), q.days_since_open) AS days_since_open,
+        ISNULL(DATEDIFF(DAY, q.query_response, CAST(GETDATE() AS DATE)), q.days_since_response) AS days_since_response
+) d;
+GO
+
+-- =============================================================================
+-- Table: gold.agg_query_open_day
+-- Query counts by study / site / form / action owner / marking group / status
+-- and open date. Ages and age buckets are derived from query_open_date at read
+-- time (gold.vw_query_aging, /api/query-aging), so the cube never goes stale
+-- between loads. Maintained per site by gold.sp_refresh_query_aging.
+-- =============================================================================
+IF OBJECT_ID('gold.agg_query_open_day', 'U') IS NOT NULL
+    DROP TABLE gold.agg_query_open_day;
+GO
+
+CREATE TABLE gold.agg_query_open_day (
+    study_id                NVARCHAR(50),
+    site_id                 NVARCHAR(50),
+    form_name               NVARCHAR(50),
+    action_owner            NVARCHAR(50),
+    marking_group_name      NVARCHAR(50),
+    query_status            NVARCHAR(50),
+    query_open_date         DATE,
+    query_count             INT             NOT NULL,
+    responded_count         INT             NOT NULL,
+    response_days_sum       BIGINT          NOT NULL    -- open -> response, responded queries only
+);
+GO
+
+CREATE CLUSTERED INDEX CIX_agg_query_open_day
+    ON gold.agg_query_open_day (study_id, site_id, query_status, query_open_date);
+GO
+
+-- Site of every subject counted in the cube, so removed or moved subjects
+-- still identify the site whose cube rows must be rebuilt
+IF OBJECT_ID('gold.agg_query_subject_site', 'U') IS NOT NULL
+    DROP TABLE gold.agg_query_subject_site;
+GO
+
+CREATE TABLE gold.agg_query_subject_site (
+    study_id                NVARCHAR(100)   NOT NULL,
+    subject_id              NVARCHAR(100)   NOT NULL,
+    site_id                 NVARCHAR(100)   NOT NULL,
+    CONSTRAINT PK_agg_query_subject_site PRIMARY KEY CLUSTERED (study_id, subject_id, site_id)
+);
+GO
+
+DELETE FROM gold.materialization_watermark WHERE object_name = 'agg_query_open_day';
+GO
+
+-- =============================================================================
+-- View: gold.vw_query_aging
+-- Query aging cube relative to today: counts per dimension x age bucket x
+-- status, read from gold.agg_query_open_day instead of the query history
+-- =============================================================================
+IF OBJECT_ID('gold.vw_query_aging', 'V') IS NOT NULL
+    DROP VIEW gold.vw_query_aging;
+GO
+
+CREATE VIEW gold.vw_query_aging AS
+SELECT
+    study_id,
+    site_id,
+    form_name,
+    action_owner,
+    marking_group_name,
+    query_status,
+    query_age_bucket,
+    SUM(query_count) AS query_count,
+    SUM(responded_count) AS responded_count,
+    CAST(SUM(response_days_sum) * 1.0 / NULLIF(SUM(responded_count), 0) AS DECIMAL(10,2)) AS avg_days_to_response,
+    MIN(query_open_date) AS oldest_open_date,
+    MAX(days_since_open) AS max_days_since_open
+FROM (
+    SELECT
+        a.*,
+        d.days_since_open,
+        CASE 
+            WHEN d.days_since_open <= 7 THEN '0-7 Days'
+            WHEN d.days_since_open <= 14 THEN '8-14 Days'
+            WHEN d.days_since_open <= 30 THEN '15-30 Days'
+            WHEN d.days_since_open <= 60 THEN '31-60 Days'
+            ELSE '60+ Days'
+        END AS query_age_bucket
+    FROM gold.agg_query_open_day a
+    CROSS APPLY (
+        SELECT DATEDIFF(DAY, a.query_open_date, CAST(GETDATE() AS DATE)) AS days_since_open
+    ) d
+) aged
+GROUP BY
+    study_id, site_id, form_name, action_owner, marking_group_name, query_status, query_age_bucket;
+GO
+
+-- =============================================================================
+-- Procedure: gold.sp_refresh_query_aging
+-- Rebuilds the cube rows of the sites whose subjects changed in
+-- silver.cpid_edc_query_report_cumulative since the last refresh (per
+-- silver.subject_change_log). Falls back to a full rebuild when
+-- @full_rebuild = 1, on first run, without incremental silver loads, or when
+-- changes past the watermark have been purged from the log.
+-- =============================================================================
+CREATE OR ALTER PROCEDURE gold.sp_refresh_query_aging
+    @full_rebuild BIT = 0
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    DECLARE 
+        @start_time     DATETIME,
+        @end_time       DATETIME,
+        @rows_deleted   INT = 0,
+        @rows_inserted  INT = 0,
+        @sites_changed  INT = 0,
+        @watermark      BIGINT,
+        @last_change    BIGINT = 0;
+
+    BEGIN TRY
+        SET @start_time = GETDATE();
+
+        -- Watermark: last silver.subject_change_log change_id applied
+        SELECT @watermark = generation_id
+        FROM gold.materialization_watermark
+        WHERE object_name = 'agg_query_open_day';
+
+        IF OBJECT_ID('silver.subject_change_log', 'U') IS NULL
+            SET @full_rebuild = 1;
+        ELSE
+        BEGIN
+            SELECT @last_change = ISNULL(MAX(change_id), ISNULL(@watermark, 0)) FROM silver.subject_change_log;
+
+            IF @watermark IS NULL
+               OR @watermark < (SELECT ISNULL(MIN(change_id), 0) - 1 FROM silver.subject_change_log)
+                SET @full_rebuild = 1;
+        END;
+
+        PRINT '================================================';
+        PRINT 'Refreshing gold.agg_query_open_day';
+        PRINT 'Mode: ' + CASE WHEN @full_rebuild = 1 THEN 'FULL' ELSE 'INCREMENTAL' END;
+        PRINT '================================================';
+
+        CREATE TABLE #changed_subjects (
+            study_id    NVARCHAR(100) NOT NULL,
+            subject_id  NVARCHAR(100) NOT NULL,
+            PRIMARY KEY (study_id, subject_id)
+        );
+        CREATE TABLE #changed_sites (
+            study_id    NVARCHAR(100) NOT NULL,
+            site_id     NVARCHAR(100) NOT NULL,
+            PRIMARY KEY (study_id, site_id)
+        );
+
+        IF @full_rebuild = 0
+        BEGIN
+            INSERT INTO #changed_subjects (study_id, subject_id)
+            SELECT DISTINCT study_id, subject_id
+            FROM silver.subject_change_log
+            WHERE change_id > @watermark
+              AND change_id <= @last_change
+              AND source_name = 'cpid_edc_query_report_cumulative';
+
+            -- Sites the changed subjects were counted under, and are now under
+            INSERT INTO #changed_sites (study_id, site_id)
+            SELECT m.study_id, m.site_id
+            FROM gold.agg_query_subject_site m
+            INNER JOIN #changed_subjects c
+                ON m.study_id = c.study_id
+               AND m.subject_id = c.subject_id
+            UNION
+            SELECT ISNULL(q.study_id, N''), ISNULL(q.site_id, N'')
+            FROM silver.cpid_edc_query_report_cumulative q
+            INNER JOIN #changed_subjects c
+                ON ISNULL(q.study_id, N'') = c.study_id
+               AND ISNULL(q.subject_id, N'') = c.subject_id;
+
+            SET @sites_changed = @@ROWCOUNT;
+            PRINT '>> Sites Changed: ' + CAST(@sites_changed AS NVARCHAR);
+        END;
+
+        BEGIN TRANSACTION;
+
+        IF @full_rebuild = 1
+        BEGIN
+            TRUNCATE TABLE gold.agg_query_open_day;
+            TRUNCATE TABLE gold.agg_query_subject_site;
+        END
+        ELSE
+        BEGIN
+            DELETE a
+            FROM gold.agg_query_open_day a
+            INNER JOIN #changed_sites s
+                ON ISNULL(a.study_id, N'') = s.study_id
+               AND ISNULL(a.site_id, N'') = s.site_id;
+
+            SET @rows_deleted = @@ROWCOUNT;
+
+            DELETE m
+            FROM gold.agg_query_subject_site m
+            INNER JOIN #changed_subjects c
+                ON m.study_id = c.study_id
+               AND m.subject_id = c.subject_id;
+        END;
+
+        INSERT INTO gold.agg_query_open_day (
+            study_id, site_id, form_name, action_owner, marking_group_name, query_status,
+            query_open_date, query_count, responded_count, response_days_sum
+        )
+        SELECT
+            q.study_id,
+            q.site_id,
+            q.form_name,
+            q.action_owner,
+            q.marking_group_name,
+            q.query_status,
+            q.query_open_date,
+            COUNT(*),
+            COUNT(q.query_response),
+            ISNULL(SUM(CAST(DATEDIFF(DAY, q.query_open_date, q.query_response) AS BIGINT)), 0)
+        FROM silver.cpid_edc_query_report_cumulative q
+        WHERE @full_rebuild = 1
+           OR EXISTS (
+                SELECT 1 FROM #changed_sites s
+                WHERE s.study_id = ISNULL(q.study_id, N'')
+                  AND s.site_id = ISNULL(q.site_id, N'')
+           )
+        GROUP BY
+            q.study_id, q.site_id, q.form_name, q.action_owner, q.marking_group_name,
+            q.query_status, q.query_open_date;
+
+        SET @rows_inserted = @@ROWCOUNT;
+
+        INSERT INTO gold.agg_query_subject_site (study_id, subject_id, site_id)
+        SELECT DISTINCT ISNULL(q.study_id, N''), ISNULL(q.subject_id, N''), ISNULL(q.site_id, N'')
+        FROM silver.cpid_edc_query_report_cumulative q
+        WHERE @full_rebuild = 1
+           OR EXISTS (
+                SELECT 1 FROM #changed_subjects c
+                WHERE c.study_id = ISNULL(q.study_id, N'')
+                  AND c.subject_id = ISNULL(q.subject_id, N'')
+           );
+
+        MERGE gold.materialization_watermark AS w
+        USING (SELECT 'agg_query_open_day' AS object_name) AS s
+            ON w.object_name = s.object_name
+        WHEN MATCHED THEN
+            UPDATE SET generation_id = @last_change, refreshed_at = SYSDATETIME()
+        WHEN NOT MATCHED THEN
+            INSERT (object_name, generation_id) VALUES (s.object_name, @last_change);
+
+        COMMIT TRANSACTION;
+
+        DROP TABLE #changed_sites;
+        DROP TABLE #changed_subjects;
+
+        SET @end_time = GETDATE();
+        PRINT '>> Rows Deleted : ' + CAST(@rows_deleted AS NVARCHAR);
+        PRINT '>> Rows Inserted: ' + CAST(@rows_inserted AS NVARCHAR);
+        PRINT '>> Refresh Duration: ' 
+            + CAST(DATEDIFF(SECOND, @start_time, @end_time) AS NVARCHAR) 
+            + ' seconds';
+        PRINT '================================================';
+
+    END TRY
+    BEGIN CATCH
+        IF @@TRANCOUNT > 0
+            ROLLBACK TRANSACTION;
+
+        PRINT '================================================';
+        PRINT 'ERROR OCCURRED DURING gold.agg_query_open_day REFRESH';
+        PRINT 'Error Message : ' + ERROR_MESSAGE();
+        PRINT 'Error Number  : ' + CAST(ERROR_NUMBER() AS NVARCHAR);
+        PRINT 'Error State   : ' + CAST(ERROR_STATE() AS NVARCHAR);
+        PRINT '================================================';
+
+        THROW;
+    END CATCH
+END;
+GO
+
+-- Initial population
+EXEC gold.sp_refresh_query_aging @full_rebuild = 1;
 GO
 
 -- =============================================================================
@@ -883,30 +1929,33 @@ GO
 
 -- =============================================================================
 -- View: gold.vw_action_items
+-- Prioritized action list served from gold.priority_action_queue
+-- (P1 critical .. P4 low), in worklist order by clustered key
 -- =============================================================================
 IF OBJECT_ID('gold.vw_action_items', 'V') IS NOT NULL
     DROP VIEW gold.vw_action_items;
 GO
 
-CREATE VIEW  select * from  gold.vw_action_items AS
-SELECT 'CRITICAL' AS priority, 'Signature Overdue >90 Days' AS action_type,
-    study_id, site_id, subject_id, region, country,
-    CONCAT(CAST(crfs_overdue_90 AS VARCHAR), ' CRFs overdue') AS action_description,
-    'Investigator' AS responsible_party
-FROM gold.fact_subject_metrics WHERE crfs_overdue_90 > 0
-UNION ALL
-SELECT 'HIGH', 'Safety Query Resolution',
-    study_id, site_id, subject_id, region, country,
-    CONCAT(CAST(safety_queries AS VARCHAR), ' safety queries'), 'Safety Team'
-FROM gold.fact_subject_metrics WHERE safety_queries > 0
-UNION ALL
-SELECT 'MEDIUM', 'Missing Visit Follow-up',
-    study_id, site_id, subject_id, region, country,
-    CONCAT(CAST(missing_visits AS VARCHAR), ' visits missing'), 'Site/CRA'
-FROM gold.fact_subject_metrics WHERE missing_visits > 0
-UNION ALL
-SELECT 'MEDIUM', 'Coding Required',
-    study_id, site_id, subject_id, region, country,
-    CONCAT(CAST(uncoded_terms AS VARCHAR), ' terms need coding'), 'Coder'
-FROM gold.fact_subject_metrics WHERE uncoded_terms > 0;
+CREATE VIEW gold.vw_action_items AS
+SELECT
+    priority,
+    sort_order,
+    action_type,
+    study_id,
+    site_id,
+    subject_id,
+    region,
+    country,
+    action_description,
+    responsible_party,
+    due_date,
+    item_count,
+    action_category,
+    CASE priority
+        WHEN 'P1' THEN '#DC2626'  -- Red
+        WHEN 'P2' THEN '#F97316'  -- Orange
+        WHEN 'P3' THEN '#EAB308'  -- Yellow
+        WHEN 'P4' THEN '#22C55E'  -- Green
+    END AS priority_color
+FROM gold.priority_action_queue;
 GO
@@ -0,0 +1,64 @@
+/*
+===============================================================================
+DDL Script: Warehouse Load Generation Marker
+===============================================================================
+Purpose: Every bronze and silver load procedure records a new generation when
+         it completes. Consumers that cache gold-layer results (AI API query
+         result cache) compare the current generation with the one their
+         entries were built from and drop stale entries when it moves.
+
+Notes:
+- Created only if missing so the generation never moves backwards on re-run
+- Current generation: SELECT generation_id FROM gold.vw_current_load_generation
+===============================================================================
+*/
+
+IF OBJECT_ID('gold.load_generation', 'U') IS NULL
+BEGIN
+    CREATE TABLE gold.load_generation (
+        generation_id   BIGINT IDENTITY(1,1) NOT NULL,
+        layer           NVARCHAR(20)  NOT NULL,     -- bronze / silver / gold
+        source_name     NVARCHAR(100) NOT NULL,     -- e.g. cpid_edc_sdv
+        loaded_at       DATETIME2     NOT NULL DEFAULT SYSDATETIME(),
+        CONSTRAINT PK_load_generation PRIMARY KEY CLUSTERED (generation_id)
+    );
+END;
+GO
+
+-- =============================================================================
+-- Procedure: gold.sp_bump_load_generation
+-- =============================================================================
+CREATE OR ALTER PROCEDURE gold.sp_bump_load_generation
+    @layer NVARCHAR(20),
+    @source_name NVARCHAR(100),
+    @generation_id BIGINT = NULL OUTPUT
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    INSERT INTO gold.load_generation (layer, source_name)
+    VALUES (@layer, @source_name);
+
+    SET @generation_id = CAST(SCOPE_IDENTITY() AS BIGINT);
+END;
+GO
+
+-- =============================================================================
+-- View: gold.vw_current_load_generation
+-- =============================================================================
+IF OBJECT_ID('gold.vw_current_load_generation', 'V') IS NOT NULL
+    DROP VIEW gold.vw_current_load_generation;
+GO
+
+CREATE VIEW gold.vw_current_load_generation AS
+SELECT
+    ISNULL(MAX(generation_id), 0) AS generation_id,
+    MAX(loaded_at) AS loaded_at
+FROM gold.load_generation;
+GO
+
+/*
+-- Usage Examples:
+EXEC gold.sp_bump_load_generation @layer = 'silver', @source_name = 'cpid_edc_sdv';
+SELECT generation_id, loaded_at FROM gold.vw_current_load_generation;
+*/
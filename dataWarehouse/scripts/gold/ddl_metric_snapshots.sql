@@ -0,0 +1,286 @@
+/*
+===============================================================================
+DDL Script: Subject and Site Metric Snapshots
+===============================================================================
+Purpose: gold.fact_subject_metrics (and silver.cpid_edc_subject_metrics
+         beneath it) only hold the current state. This script keeps a daily
+         history of the trend metrics (DQI, open queries, SDV completion,
+         clean subjects) so "over time" questions and GET /api/trends have
+         something to read.
+
+Objects:
+- gold.fact_subject_metrics_snapshot: one row per subject per day, clustered
+  columnstore, partitioned by month on snapshot_date
+- gold.agg_site_metrics_snapshot: one row per site per day with additive
+  measures (sums and counts), so any rollup over sites and days is a SUM
+- gold.vw_site_metric_trend: site snapshots with ratios and calendar columns
+- gold.sp_append_metric_snapshot: appends (or replaces) a day's snapshot
+
+Notes:
+- Run after gold/ddl_gold.sql; sp_refresh_fact_subject_metrics then appends
+  a snapshot after every refresh
+- Tables are created only if missing so re-running never drops history
+- Re-running on the same day replaces that day's rows (latest load wins)
+- Month partitions are added one month ahead, so new boundaries always split
+  an empty partition
+===============================================================================
+*/
+
+-- =============================================================================
+-- Partitioning: one partition per snapshot month
+-- =============================================================================
+IF NOT EXISTS (SELECT 1 FROM sys.partition_functions WHERE name = 'pf_metric_snapshot_month')
+    CREATE PARTITION FUNCTION pf_metric_snapshot_month (DATE)
+        AS RANGE RIGHT FOR VALUES ();
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.partition_schemes WHERE name = 'ps_metric_snapshot_month')
+    CREATE PARTITION SCHEME ps_metric_snapshot_month
+        AS PARTITION pf_metric_snapshot_month ALL TO ([PRIMARY]);
+GO
+
+-- =============================================================================
+-- Table: gold.fact_subject_metrics_snapshot
+-- =============================================================================
+IF OBJECT_ID('gold.fact_subject_metrics_snapshot', 'U') IS NULL
+BEGIN
+    CREATE TABLE gold.fact_subject_metrics_snapshot (
+        snapshot_date           DATE            NOT NULL,
+        generation_id           BIGINT          NOT NULL,
+        study_id                NVARCHAR(50)    NOT NULL,
+        site_id                 NVARCHAR(50)    NOT NULL,
+        subject_id              NVARCHAR(50)    NOT NULL,
+        region                  NVARCHAR(50),
+        country                 NVARCHAR(50),
+        subject_status          NVARCHAR(50),
+        data_quality_index      DECIMAL(5,2),
+        total_queries           INT,
+        safety_queries          INT,
+        missing_visits          INT,
+        missing_pages           INT,
+        uncoded_terms           INT,
+        crfs_require_sdv        INT,
+        forms_verified          INT,
+        crfs_overdue_90         INT,
+        is_clean_patient        INT
+    ) ON ps_metric_snapshot_month (snapshot_date);
+
+    CREATE CLUSTERED COLUMNSTORE INDEX CCI_fact_subject_metrics_snapshot
+        ON gold.fact_subject_metrics_snapshot
+        ON ps_metric_snapshot_month (snapshot_date);
+END;
+GO
+
+-- =============================================================================
+-- Table: gold.agg_site_metrics_snapshot
+-- =============================================================================
+IF OBJECT_ID('gold.agg_site_metrics_snapshot', 'U') IS NULL
+BEGIN
+    CREATE TABLE gold.agg_site_metrics_snapshot (
+        snapshot_date           DATE            NOT NULL,
+        study_id                NVARCHAR(50)    NOT NULL,
+        site_id                 NVARCHAR(50)    NOT NULL,
+        region                  NVARCHAR(50),
+        country                 NVARCHAR(50),
+        subjects                INT             NOT NULL,
+        dqi_sum                 DECIMAL(18,2)   NOT NULL,
+        dqi_count               INT             NOT NULL,
+        open_queries            INT             NOT NULL,
+        safety_queries          INT             NOT NULL,
+        missing_visits          INT             NOT NULL,
+        sdv_required            INT             NOT NULL,
+        sdv_verified            INT             NOT NULL,
+        clean_subjects          INT             NOT NULL,
+        generation_id           BIGINT          NOT NULL,
+        CONSTRAINT PK_agg_site_metrics_snapshot
+            PRIMARY KEY CLUSTERED (snapshot_date, study_id, site_id)
+    ) ON ps_metric_snapshot_month (snapshot_date);
+
+    -- Single site / study trends over a date range
+    CREATE NONCLUSTERED INDEX IX_agg_site_metrics_snapshot_site
+        ON gold.agg_site_metrics_snapshot (study_id, site_id, snapshot_date)
+        INCLUDE (dqi_sum, dqi_count, open_queries, sdv_required, sdv_verified, clean_subjects, subjects)
+        ON ps_metric_snapshot_month (snapshot_date);
+END;
+GO
+
+-- =============================================================================
+-- View: gold.vw_site_metric_trend
+-- =============================================================================
+IF OBJECT_ID('gold.vw_site_metric_trend', 'V') IS NOT NULL
+    DROP VIEW gold.vw_site_metric_trend;
+GO
+
+CREATE VIEW gold.vw_site_metric_trend AS
+SELECT
+    s.snapshot_date,
+    c.week_start_date,
+    c.month_start_date,
+    c.year_month,
+    s.study_id,
+    s.site_id,
+    s.region,
+    s.country,
+    s.subjects,
+    CAST(s.dqi_sum / NULLIF(s.dqi_count, 0) AS DECIMAL(5,2)) AS avg_data_quality_index,
+    s.open_queries,
+    s.safety_queries,
+    s.missing_visits,
+    CAST(s.sdv_verified * 100.0 / NULLIF(s.sdv_required, 0) AS DECIMAL(5,2)) AS pct_sdv_complete,
+    CAST(s.clean_subjects * 100.0 / NULLIF(s.subjects, 0) AS DECIMAL(5,2)) AS pct_clean_subjects
+FROM gold.agg_site_metrics_snapshot s
+INNER JOIN gold.dim_calendar c
+    ON c.date_key = s.snapshot_date;
+GO
+
+-- =============================================================================
+-- Procedure: gold.sp_append_metric_snapshot
+-- =============================================================================
+CREATE OR ALTER PROCEDURE gold.sp_append_metric_snapshot
+    @snapshot_date DATE = NULL,
+    @generation_id BIGINT = NULL,
+    @retention_days INT = 730
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    DECLARE
+        @start_time     DATETIME,
+        @end_time       DATETIME,
+        @subject_rows   INT = 0,
+        @site_rows      INT = 0,
+        @boundary       DATE,
+        @cutoff         DATE;
+
+    BEGIN TRY
+        SET @start_time = GETDATE();
+        SET @snapshot_date = ISNULL(@snapshot_date, CAST(SYSDATETIME() AS DATE));
+        SET @cutoff = DATEADD(DAY, -@retention_days, @snapshot_date);
+
+        IF @generation_id IS NULL
+            SELECT @generation_id = generation_id FROM gold.vw_current_load_generation;
+
+        PRINT '================================================';
+        PRINT 'Appending metric snapshot for ' + CONVERT(NVARCHAR(10), @snapshot_date, 126);
+        PRINT '================================================';
+
+        EXEC gold.sp_extend_calendar
+            @start_date = @snapshot_date,
+            @end_date = @snapshot_date;
+
+        -- Partition boundaries for this month and the next
+        SET @boundary = DATEFROMPARTS(YEAR(@snapshot_date), MONTH(@snapshot_date), 1);
+        WHILE @boundary <= DATEADD(MONTH, 1, @snapshot_date)
+        BEGIN
+            IF NOT EXISTS (
+                SELECT 1
+                FROM sys.partition_range_values rv
+                INNER JOIN sys.partition_functions pf ON pf.function_id = rv.function_id
+                WHERE pf.name = 'pf_metric_snapshot_month'
+                  AND CAST(rv.value AS DATE) = @boundary
+            )
+            BEGIN
+                ALTER PARTITION SCHEME ps_metric_snapshot_month NEXT USED [PRIMARY];
+                ALTER PARTITION FUNCTION pf_metric_snapshot_month() SPLIT RANGE (@boundary);
+            END;
+            SET @boundary = DATEADD(MONTH, 1, @boundary);
+        END;
+
+        BEGIN TRANSACTION;
+
+        DELETE FROM gold.fact_subject_metrics_snapshot WHERE snapshot_date = @snapshot_date;
+        DELETE FROM gold.agg_site_metrics_snapshot WHERE snapshot_date = @snapshot_date;
+
+        INSERT INTO gold.fact_subject_metrics_snapshot (
+            snapshot_date, generation_id, study_id, site_id, subject_id, region, country,
+            subject_status, data_quality_index, total_queries, safety_queries,
+            missing_visits, missing_pages, uncoded_terms, crfs_require_sdv, forms_verified,
+            crfs_overdue_90, is_clean_patient
+        )
+        SELECT
+            @snapshot_date, @generation_id, study_id, site_id, subject_id, region, country,
+            subject_status, data_quality_index, total_queries, safety_queries,
+            missing_visits, missing_pages, uncoded_terms, crfs_require_sdv, forms_verified,
+            crfs_overdue_90, is_clean_patient
+        FROM gold.fact_subject_metrics
+        WHERE study_id IS NOT NULL
+          AND site_id IS NOT NULL
+          AND subject_id IS NOT NULL;
+
+        SET @subject_rows = @@ROWCOUNT;
+
+        INSERT INTO gold.agg_site_metrics_snapshot (
+            snapshot_date, study_id, site_id, region, country, subjects,
+            dqi_sum, dqi_count, open_queries, safety_queries, missing_visits,
+            sdv_required, sdv_verified, clean_subjects, generation_id
+        )
+        SELECT
+            @snapshot_date,
+            study_id,
+            site_id,
+            MAX(region),
+            MAX(country),
+            COUNT(*),
+            ISNULL(SUM(data_quality_index), 0),
+            COUNT(data_quality_index),
+            ISNULL(SUM(total_queries), 0),
+            ISNULL(SUM(safety_queries), 0),
+            ISNULL(SUM(missing_visits), 0),
+            ISNULL(SUM(crfs_require_sdv), 0),
+            ISNULL(SUM(forms_verified), 0),
+            ISNULL(SUM(is_clean_patient), 0),
+            @generation_id
+        FROM gold.fact_subject_metrics_snapshot
+        WHERE snapshot_date = @snapshot_date
+        GROUP BY study_id, site_id;
+
+        SET @site_rows = @@ROWCOUNT;
+
+        DELETE FROM gold.fact_subject_metrics_snapshot WHERE snapshot_date < @cutoff;
+        DELETE FROM gold.agg_site_metrics_snapshot WHERE snapshot_date < @cutoff;
+
+        COMMIT TRANSACTION;
+
+        SET @end_time = GETDATE();
+        PRINT '>> Subject Rows: ' + CAST(@subject_rows AS NVARCHAR);
+        PRINT '>> Site Rows   : ' + CAST(@site_rows AS NVARCHAR);
+        PRINT '>> Duration: '
+            + CAST(DATEDIFF(SECOND, @start_time, @end_time) AS NVARCHAR)
+            + ' seconds';
+        PRINT '================================================';
+
+    END TRY
+    BEGIN CATCH
+        IF @@TRANCOUNT > 0
+            ROLLBACK TRANSACTION;
+
+        PRINT '================================================';
+        PRINT 'ERROR OCCURRED DURING METRIC SNAPSHOT APPEND';
+        PRINT 'Error Message : ' + ERROR_MESSAGE();
+        PRINT 'Error Number  : ' + CAST(ERROR_NUMBER() AS NVARCHAR);
+        PRINT 'Error State   : ' + CAST(ERROR_STATE() AS NVARCHAR);
+        PRINT '================================================';
+
+        THROW;
+    END CATCH
+END;
+GO
+
+-- Initial snapshot of the current state
+EXEC gold.sp_append_metric_snapshot;
+GO
+
+/*
+-- Usage Examples:
+EXEC gold.sp_append_metric_snapshot;  -- Today's snapshot (replaces an earlier one from today)
+EXEC gold.sp_append_metric_snapshot @snapshot_date = '2025-09-30', @retention_days = 365;
+
+-- Weekly DQI trend per country
+SELECT week_start_date, country,
+       SUM(s.dqi_sum) / NULLIF(SUM(s.dqi_count), 0) AS avg_dqi
+FROM gold.agg_site_metrics_snapshot s
+INNER JOIN gold.dim_calendar c ON c.date_key = s.snapshot_date
+WHERE s.snapshot_date >= DATEADD(DAY, -90, CAST(SYSDATETIME() AS DATE))
+GROUP BY week_start_date, country
+ORDER BY week_start_date, country;
+*/
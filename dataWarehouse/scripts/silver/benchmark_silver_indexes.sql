@@ -0,0 +1,310 @@
+/*
+===============================================================================
+Benchmark: Silver Normalized Keys and Indexes
+===============================================================================
+Purpose: Loads a deterministic synthetic multi-study dataset into the silver
+         sources (and bronze.cpid_edc_subject_metrics), then times the
+         subject metrics load and the gold views that read silver, first with
+         the silver tables as heaps and then with the indexes from
+         ddl_silver_indexes.sql.
+
+Notes:
+- OVERWRITES silver and bronze.cpid_edc_subject_metrics: run it only in a
+  scratch database whose name contains 'bench'
+- Requires ddl_silver2.sql, ddl_silver_incremental.sql, ddl_silver_indexes.sql,
+  the silver procedures and the gold DDL
+- Same parameters give the same rows: values derive from CHECKSUM of the
+  subject and row number, never NEWID()
+- Results: one row per (target, phase) with the average and best of
+  @repeat runs, plus the speedup of the indexed phase
+===============================================================================
+*/
+
+IF DB_NAME() NOT LIKE '%bench%'
+BEGIN
+    RAISERROR('benchmark_silver_indexes.sql overwrites silver data; run it in a *bench* database', 16, 1);
+    SET NOEXEC ON;
+END;
+GO
+
+SET NOCOUNT ON;
+
+DECLARE
+    @studies            INT = 10,
+    @sites_per_study    INT = 25,
+    @subjects_per_study INT = 2000,
+    @rows_per_subject   INT = 20,
+    @repeat             INT = 3,
+    @cold_cache         BIT = 0;      -- 1 = DBCC DROPCLEANBUFFERS before each run (needs sysadmin)
+
+PRINT '================================================';
+PRINT 'Silver Index Benchmark';
+PRINT 'Studies: ' + CAST(@studies AS NVARCHAR)
+    + ' | Subjects: ' + CAST(@studies * @subjects_per_study AS NVARCHAR)
+    + ' | Rows per source: ' + CAST(@studies * @subjects_per_study * @rows_per_subject AS NVARCHAR);
+PRINT '================================================';
+
+-- =============================================================================
+-- Synthetic data
+-- =============================================================================
+IF OBJECT_ID('tempdb..#numbers') IS NOT NULL DROP TABLE #numbers;
+IF OBJECT_ID('tempdb..#subjects') IS NOT NULL DROP TABLE #subjects;
+IF OBJECT_ID('tempdb..#rows') IS NOT NULL DROP TABLE #rows;
+
+SELECT TOP (CASE WHEN @studies * @subjects_per_study > @rows_per_subject THEN @studies * @subjects_per_study ELSE @rows_per_subject END)
+    ROW_NUMBER() OVER (ORDER BY (SELECT NULL)) AS n
+INTO #numbers
+FROM sys.all_columns a CROSS JOIN sys.all_columns b;
+
+SELECT
+    n AS subject_no,
+    'Study ' + CAST((n - 1) / @subjects_per_study + 1 AS NVARCHAR(10)) AS study_id,
+    'Site ' + CAST(((n - 1) / @subjects_per_study) * @sites_per_study + n % @sites_per_study + 1 AS NVARCHAR(10)) AS site_id,
+    CAST(10000 + n AS NVARCHAR(20)) AS subject_no_text,
+    CASE (n / @subjects_per_study) % 4 WHEN 0 THEN 'EMEA' WHEN 1 THEN 'NA' WHEN 2 THEN 'APAC' ELSE 'LATAM' END AS region,
+    CASE n % 6 WHEN 0 THEN 'DEU' WHEN 1 THEN 'USA' WHEN 2 THEN 'JPN' WHEN 3 THEN 'BRA' WHEN 4 THEN 'FRA' ELSE 'IND' END AS country
+INTO #subjects
+FROM #numbers
+WHERE n <= @studies * @subjects_per_study;
+
+SELECT
+    s.*,
+    'Subject ' + s.subject_no_text AS subject_id,
+    r.n AS row_no,
+    ABS(CHECKSUM(s.subject_no, r.n)) AS h,
+    'Visit ' + CAST(r.n % 12 + 1 AS NVARCHAR(10)) AS folder_name,
+    'Form ' + CAST(ABS(CHECKSUM(s.subject_no, r.n, 1)) % 40 + 1 AS NVARCHAR(10)) AS form_name,
+    DATEADD(DAY, r.n * 14 + s.subject_no % 30, CAST('2024-01-01' AS DATE)) AS visit_date
+INTO #rows
+FROM #subjects s
+CROSS JOIN #numbers r
+WHERE r.n <= @rows_per_subject;
+
+TRUNCATE TABLE bronze.cpid_edc_subject_metrics;
+INSERT INTO bronze.cpid_edc_subject_metrics (
+    study_id, region, country, site_id, subject_id, latest_visit, subject_status,
+    expected_visits, pages_entered, dm_queries, clinical_queries, medical_queries, site_queries,
+    field_monitor_queries, coding_queries, safety_queries, total_queries
+)
+SELECT
+    study_id, region, country, site_id, 'Subject ' + subject_no_text,
+    'Visit ' + CAST(subject_no % 12 + 1 AS VARCHAR(10)),
+    CASE subject_no % 5 WHEN 0 THEN 'Screening' WHEN 1 THEN 'Completed' ELSE 'On Trial' END,
+    '12', CAST(@rows_per_subject * 2 AS VARCHAR(10)),
+    CAST(subject_no % 4 AS VARCHAR(10)), CAST(subject_no % 3 AS VARCHAR(10)), CAST(subject_no % 2 AS VARCHAR(10)), '1',
+    '0', CAST(subject_no % 2 AS VARCHAR(10)), '0', CAST(subject_no % 4 + subject_no % 3 + subject_no % 2 * 2 + 1 AS VARCHAR(10))
+FROM #subjects;
+
+TRUNCATE TABLE silver.cpid_edc_sdv;
+INSERT INTO silver.cpid_edc_sdv (study_id, region, country, site_id, subject_id, folder_name, data_page_name, visit_date, verification_status)
+SELECT study_id, region, country, site_id, subject_id, folder_name, form_name, visit_date, CASE WHEN h % 3 = 0 THEN 'Require Verification' ELSE 'Verified' END
+FROM #rows;
+
+TRUNCATE TABLE silver.cpid_edc_crf_freeze;
+INSERT INTO silver.cpid_edc_crf_freeze (study_id, region, country, site_id, subject_id, page_name, freeze_status, visit_date)
+SELECT study_id, region, country, site_id, subject_id, form_name, CASE WHEN h % 2 = 0 THEN 'Frozen' ELSE 'Not Frozen' END, visit_date
+FROM #rows;
+
+TRUNCATE TABLE silver.cpid_edc_crf_locked;
+INSERT INTO silver.cpid_edc_crf_locked (study_id, region, country, site_id, subject_id, page_name, lock_status, visit_date)
+SELECT study_id, region, country, site_id, subject_id, form_name, CASE WHEN h % 4 = 0 THEN 'Locked' ELSE 'Unlocked' END, visit_date
+FROM #rows;
+
+TRUNCATE TABLE silver.cpid_edc_pi_signature_report;
+INSERT INTO silver.cpid_edc_pi_signature_report (study_id, region, country, site_id, subject_id, visit_name, form_name, page_require_signature, audit_action, visit_date, date_last_pi_sign, no_of_days)
+SELECT study_id, region, country, site_id, subject_id, folder_name, form_name, 'Yes',
+    CASE WHEN h % 50 = 0 THEN 'Signature Broken' ELSE 'Signed' END, visit_date,
+    CASE WHEN h % 5 = 0 THEN NULL ELSE visit_date END, h % 120
+FROM #rows;
+
+TRUNCATE TABLE silver.cpid_edc_non_conformant;
+INSERT INTO silver.cpid_edc_non_conformant (study_id, region, country, site_id, subject_id, folder_name, page_name, log_no, field_oid, visit_date)
+SELECT study_id, region, country, site_id, subject_id, folder_name, form_name, row_no, 'FIELD' + CAST(h % 20 AS NVARCHAR(10)), visit_date
+FROM #rows WHERE h % 4 = 0;
+
+TRUNCATE TABLE silver.cpid_edc_query_protocol_deviation;
+INSERT INTO silver.cpid_edc_query_protocol_deviation (study_id, region, country, site_id, subject_id, folder_name, form_name, log_no, pd_status, visit_date)
+SELECT study_id, region, country, site_id, subject_id, folder_name, form_name, row_no, CASE WHEN h % 2 = 0 THEN 'Confirmed' ELSE 'Proposed' END, visit_date
+FROM #rows WHERE h % 10 = 0;
+
+TRUNCATE TABLE silver.cpid_edc_query_report_cumulative;
+INSERT INTO silver.cpid_edc_query_report_cumulative (study_id, region, country, site_id, subject_id, folder_name, form_name, field_oid, log_no, visit_date, query_status, action_owner, marking_group_name, query_open_date, days_since_open)
+SELECT study_id, region, country, site_id, subject_id, folder_name, form_name, 'FIELD' + CAST(h % 20 AS NVARCHAR(10)), row_no, visit_date,
+    CASE h % 3 WHEN 0 THEN 'Open' WHEN 1 THEN 'Answered' ELSE 'Closed' END,
+    CASE h % 2 WHEN 0 THEN 'Site' ELSE 'CRA' END,
+    CASE h % 7 WHEN 0 THEN 'DM' WHEN 1 THEN 'Clinical' WHEN 2 THEN 'Medical' WHEN 3 THEN 'Site' WHEN 4 THEN 'Field Monitor' WHEN 5 THEN 'Coding' ELSE 'Safety' END,
+    visit_date, h % 90
+FROM #rows;
+
+TRUNCATE TABLE silver.cpid_edc_query_report_cra_action;
+INSERT INTO silver.cpid_edc_query_report_cra_action (study_id, region, country, site_id, subject_id, folder_name, form_name, field_oid, log_no, visit_date, query_status, action_owner, days_since_open)
+SELECT study_id, region, country, site_id, subject_id, folder_name, form_name, field_oid, log_no, visit_date, query_status, 'CRA', days_since_open
+FROM silver.cpid_edc_query_report_cumulative WHERE action_owner = 'CRA';
+
+TRUNCATE TABLE silver.cpid_edc_query_report_site_action;
+INSERT INTO silver.cpid_edc_query_report_site_action (study_id, region, country, site_id, subject_id, folder_name, form_name, field_oid, log_no, visit_date, query_status, action_owner, days_since_open)
+SELECT study_id, region, country, site_id, subject_id, folder_name, form_name, field_oid, log_no, visit_date, query_status, 'Site', days_since_open
+FROM silver.cpid_edc_query_report_cumulative WHERE action_owner = 'Site';
+
+TRUNCATE TABLE silver.compiled_edrr;
+INSERT INTO silver.compiled_edrr (study_id, subject_id, total_open_issue_count_per_subject)
+SELECT study_id, 'Subject ' + subject_no_text, subject_no % 5 FROM #subjects;
+
+TRUNCATE TABLE silver.globalcodingreport_meddra;
+INSERT INTO silver.globalcodingreport_meddra (study_id, dictionary, dictionary_version, subject_id, form_oid, logline, field_oid, coding_status, require_coding)
+SELECT study_id, 'MedDRA', '27.0', subject_id, form_name, row_no, 'AETERM', CASE WHEN h % 6 = 0 THEN 'UnCoded Term' ELSE 'Coded Term' END, 'Yes'
+FROM #rows WHERE h % 2 = 0;
+
+TRUNCATE TABLE silver.globalcodingreport_whodra;
+INSERT INTO silver.globalcodingreport_whodra (study_id, dictionary, dictionary_version, subject_id, form_oid, logline, field_oid, coding_status, require_coding)
+SELECT study_id, 'WHODrug', 'B3', subject_id, form_name, row_no, 'CMTRT', CASE WHEN h % 8 = 0 THEN 'UnCoded Term' ELSE 'Coded Term' END, 'Yes'
+FROM #rows WHERE h % 2 = 1;
+
+TRUNCATE TABLE silver.missing_pages_visit_level;
+INSERT INTO silver.missing_pages_visit_level (study_id, site_id, subject_id, visit_name, folder_name, form_name, visit_date, days_page_missing)
+SELECT study_id, site_id, subject_id, folder_name, folder_name, form_name, visit_date, h % 60
+FROM #rows WHERE h % 8 = 0;
+
+TRUNCATE TABLE silver.missing_pages_all;
+INSERT INTO silver.missing_pages_all (study_id, site_id, subject_id, folder_name, page_name, visit_date, days_page_missing)
+SELECT study_id, site_id, subject_id, folder_name, form_name, visit_date, h % 60
+FROM #rows WHERE h % 6 = 0;
+
+TRUNCATE TABLE silver.inactivated_forms_loglines;
+INSERT INTO silver.inactivated_forms_loglines (study_id, country, site_id, subject_id, folder, form, data_on_form, record_position, audit_action)
+SELECT study_id, country, site_id, subject_id, folder_name, form_name, 'Y', row_no, 'Record inactivated'
+FROM #rows WHERE h % 12 = 0;
+
+-- SAE sources key on patient_id without the 'Subject ' prefix
+TRUNCATE TABLE silver.sae_dashboard_dm;
+INSERT INTO silver.sae_dashboard_dm (discrepancy_id, study_id, country, site_id, patient_id, form_name, discrepancy_ts, review_status, action_status)
+SELECT CAST(subject_no * 100 + row_no AS NVARCHAR(20)), study_id, country, site_id, subject_no_text, form_name, visit_date,
+    CASE WHEN h % 3 = 0 THEN 'Pending' ELSE 'Completed' END, 'No action required'
+FROM #rows WHERE h % 15 = 0;
+
+TRUNCATE TABLE silver.sae_dashboard_safety;
+INSERT INTO silver.sae_dashboard_safety (discrepancy_id, study_id, site_id, patient_id, case_status, discrepancy_ts, review_status, action_status)
+SELECT CAST(subject_no * 100 + row_no AS NVARCHAR(20)), study_id, site_id, subject_no_text, 'Open', visit_date,
+    CASE WHEN h % 4 = 0 THEN 'Pending' ELSE 'Completed' END, 'No action required'
+FROM #rows WHERE h % 15 = 1;
+
+TRUNCATE TABLE silver.missing_lab_ranges;
+INSERT INTO silver.missing_lab_ranges (study_id, country, site_id, subject_id, visit, form_name, lab_category, lab_date, test_name, issue)
+SELECT study_id, country, site_id, subject_id, folder_name, 'Chemistry', 'LAB', visit_date, 'ALT', 'Missing lab range'
+FROM #rows WHERE h % 20 = 0;
+
+TRUNCATE TABLE silver.visit_projection_tracker;
+INSERT INTO silver.visit_projection_tracker (study_id, country, site_id, subject_id, visit, projected_date, days_outstanding)
+SELECT study_id, country, site_id, subject_id, folder_name, visit_date, CAST(h % 40 - 10 AS VARCHAR(10))
+FROM #rows WHERE row_no <= 3;
+
+-- =============================================================================
+-- Timed targets
+-- =============================================================================
+IF OBJECT_ID('tempdb..#benchmark') IS NOT NULL DROP TABLE #benchmark;
+CREATE TABLE #benchmark (
+    phase       NVARCHAR(20),
+    target      NVARCHAR(100),
+    run_no      INT,
+    elapsed_ms  INT,
+    result_rows INT
+);
+
+DECLARE
+    @phase      NVARCHAR(20),
+    @phase_no   INT = 1,
+    @run_no     INT,
+    @target     NVARCHAR(100),
+    @sql        NVARCHAR(MAX),
+    @started    DATETIME2,
+    @sink       INT,
+    @lookup_study   NVARCHAR(50) = 'STUDY 1',
+    @lookup_subject NVARCHAR(50) = CAST(10000 + @subjects_per_study / 2 AS NVARCHAR(20));
+
+DECLARE @targets TABLE (target NVARCHAR(100), statement NVARCHAR(MAX));
+INSERT INTO @targets (target, statement)
+VALUES
+    ('silver.load_cpid_edc_subject_metrics',
+        N'EXEC silver.load_cpid_edc_subject_metrics; SELECT @sink = COUNT(*) FROM silver.cpid_edc_subject_metrics;'),
+    ('gold.vw_fact_subject_metrics_source',
+        N'SELECT @sink = COUNT(*) FROM (SELECT study_id, site_id, subject_id FROM gold.vw_fact_subject_metrics_source GROUP BY study_id, site_id, subject_id) x;'),
+    ('gold.fact_query_metrics by site',
+        N'SELECT @sink = COUNT(*) FROM (SELECT study_id, site_id, SUM(is_open) AS open_queries, AVG(days_since_open) AS avg_age FROM gold.fact_query_metrics GROUP BY study_id, site_id) x;'),
+    ('gold.fact_sdv_status by site',
+        N'SELECT @sink = COUNT(*) FROM (SELECT study_id, site_id, SUM(is_verified) AS verified FROM gold.fact_sdv_status GROUP BY study_id, site_id) x;'),
+    ('subject lookup across sources',
+        N'SELECT @sink =
+            (SELECT COUNT(*) FROM silver.cpid_edc_query_report_cumulative WHERE norm_study_id = @study AND norm_subject_id = @subject)
+          + (SELECT COUNT(*) FROM silver.cpid_edc_sdv WHERE norm_study_id = @study AND norm_subject_id = @subject)
+          + (SELECT COUNT(*) FROM silver.cpid_edc_pi_signature_report WHERE norm_study_id = @study AND norm_subject_id = @subject)
+          + (SELECT COUNT(*) FROM silver.sae_dashboard_dm WHERE norm_study_id = @study AND norm_subject_id = @subject);');
+
+WHILE @phase_no <= 2
+BEGIN
+    SET @phase = CASE @phase_no WHEN 1 THEN 'heap' ELSE 'indexed' END;
+    IF @phase_no = 1
+        EXEC silver.sp_apply_silver_indexes @drop_only = 1;
+    ELSE
+        EXEC silver.sp_apply_silver_indexes;
+
+    DECLARE target_cursor CURSOR LOCAL FAST_FORWARD FOR SELECT target, statement FROM @targets;
+    OPEN target_cursor;
+    FETCH NEXT FROM target_cursor INTO @target, @sql;
+
+    WHILE @@FETCH_STATUS = 0
+    BEGIN
+        SET @run_no = 1;
+        WHILE @run_no <= @repeat
+        BEGIN
+            IF @cold_cache = 1
+            BEGIN
+                CHECKPOINT;
+                DBCC DROPCLEANBUFFERS WITH NO_INFOMSGS;
+            END;
+
+            SET @started = SYSDATETIME();
+            EXEC sp_executesql @sql,
+                N'@sink INT OUTPUT, @study NVARCHAR(50), @subject NVARCHAR(50)',
+                @sink = @sink OUTPUT, @study = @lookup_study, @subject = @lookup_subject;
+
+            INSERT INTO #benchmark (phase, target, run_no, elapsed_ms, result_rows)
+            VALUES (@phase, @target, @run_no, DATEDIFF(MILLISECOND, @started, SYSDATETIME()), @sink);
+
+            SET @run_no += 1;
+        END;
+
+        FETCH NEXT FROM target_cursor INTO @target, @sql;
+    END;
+
+    CLOSE target_cursor;
+    DEALLOCATE target_cursor;
+    SET @phase_no += 1;
+END;
+
+-- =============================================================================
+-- Results
+-- =============================================================================
+SELECT
+    b.target,
+    b.phase,
+    MAX(b.result_rows) AS result_rows,
+    AVG(b.elapsed_ms) AS avg_ms,
+    MIN(b.elapsed_ms) AS best_ms,
+    CAST(
+        (SELECT AVG(CAST(h.elapsed_ms AS FLOAT)) FROM #benchmark h WHERE h.target = b.target AND h.phase = 'heap')
+        / NULLIF(AVG(CAST(b.elapsed_ms AS FLOAT)), 0)
+    AS DECIMAL(10, 2)) AS speedup_vs_heap
+FROM #benchmark b
+GROUP BY b.target, b.phase
+ORDER BY b.target, b.phase;
+GO
+
+SET NOEXEC OFF;
+GO
+
+/*
+-- Usage Examples:
+CREATE DATABASE clinical_dwh_bench;   -- then deploy bronze/silver/gold DDL and procedures into it
+USE clinical_dwh_bench;
+-- edit the parameters at the top of the script (@studies, @subjects_per_study, ...) and run it
+*/
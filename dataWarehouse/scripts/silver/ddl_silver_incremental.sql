@@ -0,0 +1,333 @@
+/*
+===============================================================================
+DDL Script: Incremental Silver Loads
+===============================================================================
+Purpose: Bronze sources carry no modification timestamps, so silver loads
+         detect change by hashing. Each silver procedure stages its cleaned
+         rows in #silver_stage and hands them to
+         silver.sp_merge_changed_subjects, which folds the row hashes per
+         (study, subject), compares them with the hashes from the previous
+         load and rewrites only the subjects that were added, changed or
+         removed. The affected keys are logged per run in
+         silver.subject_change_log so downstream refreshes can target them.
+
+Notes:
+- Tables are created only if missing so hashes survive a re-run
+- @incremental = 0 (the default) truncates and reloads as before but still
+  records the hashes and the change set
+- A source with no recorded hashes (first run after deployment) is always
+  loaded in full, since the silver table may already hold its rows
+- Run everything with: EXEC silver.sp_load_silver @incremental = 1;
+===============================================================================
+*/
+
+IF OBJECT_ID('silver.subject_key_hash', 'U') IS NULL
+BEGIN
+    CREATE TABLE silver.subject_key_hash (
+        source_name     NVARCHAR(100) NOT NULL,     -- silver table, e.g. cpid_edc_sdv
+        study_id        NVARCHAR(100) NOT NULL,
+        subject_id      NVARCHAR(100) NOT NULL,
+        key_hash        VARBINARY(32) NOT NULL,     -- SHA2_256 over the subject's rows
+        refreshed_at    DATETIME2     NOT NULL DEFAULT SYSDATETIME(),
+        CONSTRAINT PK_subject_key_hash PRIMARY KEY CLUSTERED (source_name, study_id, subject_id)
+    );
+END;
+GO
+
+IF OBJECT_ID('silver.subject_change_log', 'U') IS NULL
+BEGIN
+    CREATE TABLE silver.subject_change_log (
+        change_id       BIGINT IDENTITY(1,1) NOT NULL,
+        run_id          UNIQUEIDENTIFIER NOT NULL,
+        source_name     NVARCHAR(100) NOT NULL,
+        study_id        NVARCHAR(100) NOT NULL,
+        subject_id      NVARCHAR(100) NOT NULL,
+        change_type     CHAR(1)       NOT NULL,     -- I = inserted, U = updated, D = deleted
+        logged_at       DATETIME2     NOT NULL DEFAULT SYSDATETIME(),
+        CONSTRAINT PK_subject_change_log PRIMARY KEY CLUSTERED (change_id)
+    );
+
+    CREATE NONCLUSTERED INDEX IX_subject_change_log_run
+        ON silver.subject_change_log (run_id)
+        INCLUDE (source_name, study_id, subject_id, change_type);
+END;
+GO
+
+-- =============================================================================
+-- Procedure: silver.sp_merge_changed_subjects
+-- Applies #silver_stage (created by the calling load procedure) to
+-- silver.<@source_name>. Only subjects whose staged rows hash differently
+-- from the last load are deleted and re-inserted.
+-- =============================================================================
+CREATE OR ALTER PROCEDURE silver.sp_merge_changed_subjects
+    @source_name    NVARCHAR(100),
+    @incremental    BIT = 1,
+    @study_column   SYSNAME = 'study_id',
+    @subject_column SYSNAME = 'subject_id',
+    @keys_changed   INT = NULL OUTPUT
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    DECLARE
+        @run_id         UNIQUEIDENTIFIER = ISNULL(TRY_CAST(SESSION_CONTEXT(N'silver_run_id') AS UNIQUEIDENTIFIER), NEWID()),
+        @target         NVARCHAR(300) = N'silver.' + QUOTENAME(@source_name),
+        @study_key      NVARCHAR(300) = N'ISNULL(s.' + QUOTENAME(@study_column) + N', N'''')',
+        @subject_key    NVARCHAR(300) = N'ISNULL(s.' + QUOTENAME(@subject_column) + N', N'''')',
+        @columns        NVARCHAR(MAX),
+        @hash_columns   NVARCHAR(MAX),
+        @sql            NVARCHAR(MAX),
+        @rows_deleted   INT = 0,
+        @rows_inserted  INT = 0;
+
+    BEGIN TRY
+        IF OBJECT_ID('tempdb..#silver_stage') IS NULL
+            THROW 50010, 'silver.sp_merge_changed_subjects expects the caller to stage rows in #silver_stage', 1;
+
+        -- dwh_create_date changes on every load, so it stays out of the hash;
+        -- rewritten rows pick it up from the target's default instead.
+        -- Computed key columns are copied into #silver_stage but not written.
+        SELECT
+            @columns = STRING_AGG(CAST(QUOTENAME(name) AS NVARCHAR(MAX)), ', ') WITHIN GROUP (ORDER BY column_id),
+            @hash_columns = STRING_AGG(CAST(N's.' + QUOTENAME(name) AS NVARCHAR(MAX)), ', ') WITHIN GROUP (ORDER BY column_id)
+        FROM tempdb.sys.columns
+        WHERE object_id = OBJECT_ID('tempdb..#silver_stage')
+          AND name <> 'dwh_create_date'
+          AND name NOT IN (SELECT name FROM sys.computed_columns WHERE object_id = OBJECT_ID(@target));
+
+        CREATE TABLE #stage_keys (
+            study_id    NVARCHAR(100) NOT NULL,
+            subject_id  NVARCHAR(100) NOT NULL,
+            key_hash    VARBINARY(32) NOT NULL,
+            PRIMARY KEY (study_id, subject_id)
+        );
+
+        -- Hash of every staged row, folded per subject
+        SET @sql = N'
+        INSERT INTO #stage_keys (study_id, subject_id, key_hash)
+        SELECT
+            k.study_id,
+            k.subject_id,
+            HASHBYTES(''SHA2_256'',
+                STRING_AGG(CONVERT(NVARCHAR(MAX), CONVERT(VARCHAR(64), r.row_hash, 2)), '','')
+                    WITHIN GROUP (ORDER BY r.row_hash)
+            )
+        FROM #silver_stage s
+        CROSS APPLY (SELECT ' + @study_key + N' AS study_id, ' + @subject_key + N' AS subject_id) k
+        CROSS APPLY (
+            SELECT HASHBYTES(''SHA2_256'', (SELECT ' + @hash_columns + N' FOR JSON PATH, WITHOUT_ARRAY_WRAPPER, INCLUDE_NULL_VALUES)) AS row_hash
+        ) r
+        GROUP BY k.study_id, k.subject_id;';
+        EXEC sp_executesql @sql;
+
+        -- Without hashes from a previous load every subject would look new while the
+        -- target may already hold its rows, so rebuild the source in full
+        IF @incremental = 1
+           AND NOT EXISTS (SELECT 1 FROM silver.subject_key_hash WHERE source_name = @source_name)
+        BEGIN
+            PRINT '>> No key hashes recorded for ' + @source_name + '; loading in full';
+            SET @incremental = 0;
+        END;
+
+        -- Subjects added, changed or removed since the last load
+        SELECT
+            COALESCE(s.study_id, h.study_id) AS study_id,
+            COALESCE(s.subject_id, h.subject_id) AS subject_id,
+            CASE
+                WHEN h.study_id IS NULL THEN 'I'
+                WHEN s.study_id IS NULL THEN 'D'
+                ELSE 'U'
+            END AS change_type,
+            s.key_hash
+        INTO #changed_keys
+        FROM #stage_keys s
+        FULL OUTER JOIN (
+            SELECT study_id, subject_id, key_hash
+            FROM silver.subject_key_hash
+            WHERE source_name = @source_name
+        ) h
+            ON s.study_id = h.study_id
+           AND s.subject_id = h.subject_id
+        WHERE h.study_id IS NULL
+           OR s.study_id IS NULL
+           OR s.key_hash <> h.key_hash;
+
+        SET @keys_changed = @@ROWCOUNT;
+        PRINT '>> Subjects Changed: ' + CAST(@keys_changed AS NVARCHAR);
+
+        BEGIN TRANSACTION;
+
+        IF @incremental = 1
+        BEGIN
+            SET @sql = N'
+            DELETE s
+            FROM ' + @target + N' s
+            INNER JOIN #changed_keys c
+                ON ' + @study_key + N' = c.study_id
+               AND ' + @subject_key + N' = c.subject_id;
+
+            SET @rows_deleted = @@ROWCOUNT;
+
+            INSERT INTO ' + @target + N' (' + @columns + N')
+            SELECT ' + @columns + N'
+            FROM #silver_stage s
+            WHERE EXISTS (
+                SELECT 1 FROM #changed_keys c
+                WHERE c.study_id = ' + @study_key + N'
+                  AND c.subject_id = ' + @subject_key + N'
+                  AND c.change_type <> ''D''
+            );
+
+            SET @rows_inserted = @@ROWCOUNT;';
+
+            EXEC sp_executesql @sql, N'@rows_deleted INT OUTPUT, @rows_inserted INT OUTPUT',
+                @rows_deleted = @rows_deleted OUTPUT, @rows_inserted = @rows_inserted OUTPUT;
+
+            DELETE h
+            FROM silver.subject_key_hash h
+            INNER JOIN #changed_keys c
+                ON h.study_id = c.study_id
+               AND h.subject_id = c.subject_id
+            WHERE h.source_name = @source_name;
+
+            INSERT INTO silver.subject_key_hash (source_name, study_id, subject_id, key_hash)
+            SELECT @source_name, study_id, subject_id, key_hash
+            FROM #changed_keys
+            WHERE change_type <> 'D';
+        END
+        ELSE
+        BEGIN
+            SET @sql = N'
+            TRUNCATE TABLE ' + @target + N';
+
+            INSERT INTO ' + @target + N' (' + @columns + N')
+            SELECT ' + @columns + N' FROM #silver_stage;
+
+            SET @rows_inserted = @@ROWCOUNT;';
+
+            EXEC sp_executesql @sql, N'@rows_inserted INT OUTPUT', @rows_inserted = @rows_inserted OUTPUT;
+
+            DELETE FROM silver.subject_key_hash WHERE source_name = @source_name;
+
+            INSERT INTO silver.subject_key_hash (source_name, study_id, subject_id, key_hash)
+            SELECT @source_name, study_id, subject_id, key_hash
+            FROM #stage_keys;
+        END;
+
+        INSERT INTO silver.subject_change_log (run_id, source_name, study_id, subject_id, change_type)
+        SELECT @run_id, @source_name, study_id, subject_id, change_type
+        FROM #changed_keys;
+
+        COMMIT TRANSACTION;
+
+        DROP TABLE #changed_keys;
+        DROP TABLE #stage_keys;
+
+        PRINT '>> Mode: ' + CASE WHEN @incremental = 1 THEN 'INCREMENTAL' ELSE 'FULL' END
+            + ' | Rows Deleted: ' + CAST(@rows_deleted AS NVARCHAR)
+            + ' | Rows Inserted: ' + CAST(@rows_inserted AS NVARCHAR);
+
+    END TRY
+    BEGIN CATCH
+        IF @@TRANCOUNT > 0
+            ROLLBACK TRANSACTION;
+
+        PRINT 'ERROR: ' + ERROR_MESSAGE();
+        THROW;
+    END CATCH
+END;
+GO
+
+-- =============================================================================
+-- Procedure: silver.sp_load_silver
+-- Runs every silver load under one run id and returns the subjects that
+-- changed, one row per (study, subject) with the sources that touched it.
+-- cpid_edc_subject_metrics runs last because it reads the other tables.
+-- =============================================================================
+CREATE OR ALTER PROCEDURE silver.sp_load_silver
+    @incremental BIT = 0,
+    @log_retention_days INT = 30
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    DECLARE
+        @run_id         UNIQUEIDENTIFIER = NEWID(),
+        @batch_start_time DATETIME = GETDATE(),
+        @batch_end_time DATETIME;
+
+    BEGIN TRY
+        EXEC sp_set_session_context @key = N'silver_run_id', @value = @run_id;
+
+        PRINT '================================================';
+        PRINT 'Loading Silver Layer (' + CASE WHEN @incremental = 1 THEN 'INCREMENTAL' ELSE 'FULL' END + ')';
+        PRINT 'Run Id: ' + CAST(@run_id AS NVARCHAR(36));
+        PRINT '================================================';
+
+        EXEC silver.load_cpid_edc_sdv @incremental = @incremental;
+        EXEC silver.load_cpid_edc_crf_freeze @incremental = @incremental;
+        EXEC silver.load_cpid_edc_crf_unfreeze @incremental = @incremental;
+        EXEC silver.load_cpid_edc_crf_locked @incremental = @incremental;
+        EXEC silver.load_cpid_edc_crf_unlocked @incremental = @incremental;
+        EXEC silver.load_cpid_edc_pi_signature_report @incremental = @incremental;
+        EXEC silver.load_cpid_edc_non_conformant @incremental = @incremental;
+        EXEC silver.load_cpid_edc_query_report_cra_action @incremental = @incremental;
+        EXEC silver.load_cpid_edc_query_report_site_action @incremental = @incremental;
+        EXEC silver.load_cpid_edc_query_report_cumulative @incremental = @incremental;
+        EXEC silver.load_cpid_edc_query_protocol_deviation @incremental = @incremental;
+        EXEC silver.load_cpid_edc_sv @incremental = @incremental;
+        EXEC silver.load_compiled_edrr @incremental = @incremental;
+        EXEC silver.load_globalcodingreport_meddra @incremental = @incremental;
+        EXEC silver.load_globalcodingreport_whodra @incremental = @incremental;
+        EXEC silver.load_missing_pages_visit_level @incremental = @incremental;
+        EXEC silver.load_missing_pages_all @incremental = @incremental;
+        EXEC silver.load_inactivated_forms_loglines @incremental = @incremental;
+        EXEC silver.load_sae_dashboard_dm @incremental = @incremental;
+        EXEC silver.load_sae_dashboard_safety @incremental = @incremental;
+        EXEC silver.load_missing_lab_ranges @incremental = @incremental;
+        EXEC silver.load_visit_projection_tracker @incremental = @incremental;
+        EXEC silver.load_cpid_edc_subject_metrics @incremental = @incremental;
+
+        EXEC sp_set_session_context @key = N'silver_run_id', @value = NULL;
+
+        DELETE FROM silver.subject_change_log
+        WHERE logged_at < DATEADD(DAY, -@log_retention_days, SYSDATETIME());
+
+        SET @batch_end_time = GETDATE();
+        PRINT '================================================';
+        PRINT 'Silver Load Completed';
+        PRINT 'Total Load Duration: '
+            + CAST(DATEDIFF(SECOND, @batch_start_time, @batch_end_time) AS NVARCHAR)
+            + ' seconds';
+        PRINT '================================================';
+
+        -- Affected keys for downstream refreshes
+        SELECT
+            @run_id AS run_id,
+            study_id,
+            subject_id,
+            STRING_AGG(CAST(source_name + ':' + change_type AS NVARCHAR(MAX)), ', ')
+                WITHIN GROUP (ORDER BY source_name) AS changes
+        FROM silver.subject_change_log
+        WHERE run_id = @run_id
+        GROUP BY study_id, subject_id
+        ORDER BY study_id, subject_id;
+
+    END TRY
+    BEGIN CATCH
+        EXEC sp_set_session_context @key = N'silver_run_id', @value = NULL;
+        PRINT 'ERROR: ' + ERROR_MESSAGE();
+        THROW;
+    END CATCH
+END;
+GO
+
+/*
+-- Usage Examples:
+EXEC silver.sp_load_silver @incremental = 1;
+EXEC silver.load_cpid_edc_sdv @incremental = 1;
+SELECT source_name, change_type, COUNT(*) AS subjects
+FROM silver.subject_change_log
+WHERE run_id = (SELECT TOP 1 run_id FROM silver.subject_change_log ORDER BY change_id DESC)
+GROUP BY source_name, change_type;
+*/
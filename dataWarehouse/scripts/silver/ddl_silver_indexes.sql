@@ -0,0 +1,209 @@
+/*
+===============================================================================
+DDL Script: Silver Normalized Keys and Indexes
+===============================================================================
+Purpose: silver.load_cpid_edc_subject_metrics joins ~20 silver sources on
+         (study, subject) after normalizing both sides:
+             study   -> UPPER(LTRIM(RTRIM(study_id)))
+             subject -> 'Subject ' prefix stripped, then UPPER/LTRIM/RTRIM
+         This script persists those expressions as computed columns
+         (norm_study_id, norm_subject_id) on every silver table and clusters
+         each table on them, so the per-subject aggregations read rows in key
+         order instead of re-normalizing and sorting every source.
+
+Index design:
+- CIX_<table>_norm_key   clustered on (norm_study_id, norm_subject_id), all
+                         per-subject sources
+- cpid_edc_subject_metrics clustered on (study_id, site_id, subject_id), the
+                         grouping of gold.vw_fact_subject_metrics_source, plus
+                         a nonclustered index on the normalized key
+- NCCI_<table>           nonclustered columnstore on the query report and SDV
+                         tables that gold fact views aggregate by site/status
+
+Notes:
+- Run after ddl_silver2.sql (which drops and recreates the tables)
+- Bronze tables stay heaps: they are truncated and bulk loaded on every
+  ingest and only ever scanned once by the silver procedures
+- EXEC silver.sp_apply_silver_indexes @drop_only = 1 removes the indexes
+  (used by benchmark_silver_indexes.sql for the before/after comparison)
+===============================================================================
+*/
+
+-- =============================================================================
+-- Persisted normalized key columns
+-- =============================================================================
+DECLARE @table SYSNAME, @study_column SYSNAME, @subject_column SYSNAME, @sql NVARCHAR(MAX);
+
+DECLARE key_cursor CURSOR LOCAL FAST_FORWARD FOR
+SELECT table_name, study_column, subject_column
+FROM (VALUES
+    ('cpid_edc_sdv',                       'study_id',     'subject_id'),
+    ('cpid_edc_crf_unlocked',              'study_id',     'subject_id'),
+    ('cpid_edc_crf_freeze',                'study_id',     'subject_id'),
+    ('cpid_edc_crf_locked',                'study_id',     'subject_id'),
+    ('cpid_edc_crf_unfreeze',              'study_id',     'subject_id'),
+    ('cpid_edc_pi_signature_report',       'study_id',     'subject_id'),
+    ('cpid_edc_non_conformant',            'study_id',     'subject_id'),
+    ('cpid_edc_query_report_cra_action',   'study_id',     'subject_id'),
+    ('cpid_edc_query_protocol_deviation',  'study_id',     'subject_id'),
+    ('cpid_edc_query_report_site_action',  'study_id',     'subject_id'),
+    ('cpid_edc_query_report_cumulative',   'study_id',     'subject_id'),
+    ('cpid_edc_sv',                        'project_name', 'subject_name'),
+    ('compiled_edrr',                      'study_id',     'subject_id'),
+    ('globalcodingreport_meddra',          'study_id',     'subject_id'),
+    ('globalcodingreport_whodra',          'study_id',     'subject_id'),
+    ('missing_pages_visit_level',          'study_id',     'subject_id'),
+    ('missing_pages_all',                  'study_id',     'subject_id'),
+    ('inactivated_forms_loglines',         'study_id',     'subject_id'),
+    ('sae_dashboard_safety',               'study_id',     'patient_id'),
+    ('sae_dashboard_dm',                   'study_id',     'patient_id'),
+    ('missing_lab_ranges',                 'study_id',     'subject_id'),
+    ('visit_projection_tracker',           'study_id',     'subject_id'),
+    ('cpid_edc_subject_metrics',           'study_id',     'subject_id')
+) AS k(table_name, study_column, subject_column);
+
+OPEN key_cursor;
+FETCH NEXT FROM key_cursor INTO @table, @study_column, @subject_column;
+
+WHILE @@FETCH_STATUS = 0
+BEGIN
+    IF COL_LENGTH('silver.' + @table, 'norm_study_id') IS NULL
+    BEGIN
+        SET @sql = N'ALTER TABLE silver.' + QUOTENAME(@table) + N' ADD
+            norm_study_id AS UPPER(LTRIM(RTRIM(' + QUOTENAME(@study_column) + N'))) PERSISTED,
+            norm_subject_id AS CASE
+                WHEN ' + QUOTENAME(@subject_column) + N' LIKE ''Subject %'' THEN UPPER(LTRIM(RTRIM(SUBSTRING(' + QUOTENAME(@subject_column) + N', 9, LEN(' + QUOTENAME(@subject_column) + N')))))
+                ELSE UPPER(LTRIM(RTRIM(' + QUOTENAME(@subject_column) + N')))
+            END PERSISTED;';
+        EXEC sp_executesql @sql;
+        PRINT '>> Added normalized keys to silver.' + @table;
+    END;
+
+    FETCH NEXT FROM key_cursor INTO @table, @study_column, @subject_column;
+END;
+
+CLOSE key_cursor;
+DEALLOCATE key_cursor;
+GO
+
+-- =============================================================================
+-- Procedure: silver.sp_apply_silver_indexes
+-- Creates any missing silver index, or drops them all with @drop_only = 1.
+-- =============================================================================
+CREATE OR ALTER PROCEDURE silver.sp_apply_silver_indexes
+    @drop_only BIT = 0
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    DECLARE
+        @start_time DATETIME,
+        @table      SYSNAME,
+        @index_name SYSNAME,
+        @definition NVARCHAR(MAX),
+        @sql        NVARCHAR(MAX);
+
+    DECLARE @indexes TABLE (
+        sort_order  INT IDENTITY(1,1),
+        table_name  SYSNAME,
+        index_name  SYSNAME,
+        definition  NVARCHAR(MAX)     -- everything after "ON silver.<table>"
+    );
+
+    -- Clustered on the normalized key: every per-subject source
+    INSERT INTO @indexes (table_name, index_name, definition)
+    SELECT t.table_name, 'CIX_' + t.table_name + '_norm_key', N'CLUSTERED INDEX|(norm_study_id, norm_subject_id)'
+    FROM (VALUES
+        ('cpid_edc_sdv'), ('cpid_edc_crf_unlocked'), ('cpid_edc_crf_freeze'), ('cpid_edc_crf_locked'),
+        ('cpid_edc_crf_unfreeze'), ('cpid_edc_pi_signature_report'), ('cpid_edc_non_conformant'),
+        ('cpid_edc_query_report_cra_action'), ('cpid_edc_query_protocol_deviation'),
+        ('cpid_edc_query_report_site_action'), ('cpid_edc_query_report_cumulative'), ('cpid_edc_sv'),
+        ('compiled_edrr'), ('globalcodingreport_meddra'), ('globalcodingreport_whodra'),
+        ('missing_pages_visit_level'), ('missing_pages_all'), ('inactivated_forms_loglines'),
+        ('sae_dashboard_safety'), ('sae_dashboard_dm'), ('missing_lab_ranges'), ('visit_projection_tracker')
+    ) AS t(table_name);
+
+    INSERT INTO @indexes (table_name, index_name, definition)
+    VALUES
+        ('cpid_edc_subject_metrics', 'CIX_cpid_edc_subject_metrics_site_subject',
+            N'CLUSTERED INDEX|(study_id, site_id, subject_id)'),
+        ('cpid_edc_subject_metrics', 'IX_cpid_edc_subject_metrics_norm_key',
+            N'NONCLUSTERED INDEX|(norm_study_id, norm_subject_id)'),
+        -- Site / status / aging aggregates in gold.fact_query_metrics and the dashboards
+        ('cpid_edc_query_report_cumulative', 'NCCI_cpid_edc_query_report_cumulative',
+            N'NONCLUSTERED COLUMNSTORE INDEX|(study_id, region, country, site_id, subject_id, query_status, action_owner, marking_group_name, days_since_open, days_since_response, visit_date)'),
+        ('cpid_edc_query_report_cra_action', 'NCCI_cpid_edc_query_report_cra_action',
+            N'NONCLUSTERED COLUMNSTORE INDEX|(study_id, site_id, subject_id, folder_name, form_name, query_status, days_since_open)'),
+        ('cpid_edc_query_report_site_action', 'NCCI_cpid_edc_query_report_site_action',
+            N'NONCLUSTERED COLUMNSTORE INDEX|(study_id, site_id, subject_id, folder_name, form_name, query_status, days_since_open)'),
+        -- gold.fact_sdv_status rollups by site and status
+        ('cpid_edc_sdv', 'NCCI_cpid_edc_sdv',
+            N'NONCLUSTERED COLUMNSTORE INDEX|(study_id, region, country, site_id, subject_id, folder_name, verification_status)');
+
+    BEGIN TRY
+        SET @start_time = GETDATE();
+
+        PRINT '================================================';
+        PRINT CASE WHEN @drop_only = 1 THEN 'Dropping' ELSE 'Creating' END + ' Silver Indexes';
+        PRINT '================================================';
+
+        -- Nonclustered indexes go first on drop and last on create so the
+        -- clustered index is never rebuilt underneath them
+        DECLARE index_cursor CURSOR LOCAL FAST_FORWARD FOR
+        SELECT table_name, index_name, definition
+        FROM @indexes
+        ORDER BY
+            CASE WHEN @drop_only = 1 THEN -sort_order ELSE sort_order END;
+
+        OPEN index_cursor;
+        FETCH NEXT FROM index_cursor INTO @table, @index_name, @definition;
+
+        WHILE @@FETCH_STATUS = 0
+        BEGIN
+            IF @drop_only = 1
+            BEGIN
+                IF EXISTS (SELECT 1 FROM sys.indexes WHERE object_id = OBJECT_ID('silver.' + @table) AND name = @index_name)
+                BEGIN
+                    SET @sql = N'DROP INDEX ' + QUOTENAME(@index_name) + N' ON silver.' + QUOTENAME(@table) + N';';
+                    EXEC sp_executesql @sql;
+                    PRINT '>> Dropped ' + @index_name;
+                END;
+            END
+            ELSE IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE object_id = OBJECT_ID('silver.' + @table) AND name = @index_name)
+            BEGIN
+                SET @sql = N'CREATE ' + LEFT(@definition, CHARINDEX('|', @definition) - 1)
+                    + N' ' + QUOTENAME(@index_name) + N' ON silver.' + QUOTENAME(@table)
+                    + N' ' + SUBSTRING(@definition, CHARINDEX('|', @definition) + 1, LEN(@definition)) + N';';
+                EXEC sp_executesql @sql;
+                PRINT '>> Created ' + @index_name;
+            END;
+
+            FETCH NEXT FROM index_cursor INTO @table, @index_name, @definition;
+        END;
+
+        CLOSE index_cursor;
+        DEALLOCATE index_cursor;
+
+        PRINT '>> Duration: ' + CAST(DATEDIFF(SECOND, @start_time, GETDATE()) AS NVARCHAR) + ' seconds';
+        PRINT '================================================';
+
+    END TRY
+    BEGIN CATCH
+        PRINT 'ERROR: ' + ERROR_MESSAGE();
+        THROW;
+    END CATCH
+END;
+GO
+
+EXEC silver.sp_apply_silver_indexes;
+GO
+
+/*
+-- Usage Examples:
+EXEC silver.sp_apply_silver_indexes;                  -- create missing indexes
+EXEC silver.sp_apply_silver_indexes @drop_only = 1;   -- back to heaps
+SELECT OBJECT_NAME(object_id) AS table_name, name, type_desc
+FROM sys.indexes
+WHERE OBJECT_SCHEMA_NAME(object_id) = 'silver' AND index_id > 0
+ORDER BY table_name, index_id;
+*/
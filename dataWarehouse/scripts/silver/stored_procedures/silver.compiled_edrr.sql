@@ -1,4 +1,5 @@
 CREATE OR ALTER PROCEDURE silver.load_compiled_edrr
+    @incremental BIT = 0    -- 1 = rewrite only subjects whose rows changed
 AS
 BEGIN
     SET NOCOUNT ON;
@@ -22,11 +23,11 @@ BEGIN
 
         SET @start_time = GETDATE();
 
-        PRINT '>> Truncating Table: silver.compiled_edrr';
-        TRUNCATE TABLE silver.compiled_edrr;
+        PRINT '>> Staging cleaned rows for silver.compiled_edrr';
+        SELECT TOP 0 * INTO #silver_stage FROM silver.compiled_edrr;
 
         PRINT '>> Inserting Data Into: silver.compiled_edrr';
-        INSERT INTO silver.compiled_edrr (
+        INSERT INTO #silver_stage (
             study_id,
             subject_id,
             total_open_issue_count_per_subject
@@ -56,6 +57,9 @@ BEGIN
             + ' seconds';
         PRINT '================================================';
 
+        EXEC silver.sp_merge_changed_subjects @source_name = 'compiled_edrr', @incremental = @incremental;
+        EXEC gold.sp_bump_load_generation @layer = 'silver', @source_name = 'compiled_edrr';
+
     END TRY
     BEGIN CATCH
         PRINT '================================================';
@@ -1,5 +1,6 @@
 
 CREATE OR ALTER PROCEDURE silver.load_cpid_edc_crf_unlocked
+    @incremental BIT = 0    -- 1 = rewrite only subjects whose rows changed
 AS
 BEGIN
     SET NOCOUNT ON;
@@ -19,14 +20,14 @@ BEGIN
         PRINT 'Dataset: CPID EDC CRF Unlocked';
         PRINT '================================================';
 
-        PRINT '>> Truncating Table: silver.cpid_edc_crf_unlocked';
-        TRUNCATE TABLE silver.cpid_edc_crf_unlocked;
+        PRINT '>> Staging cleaned rows for silver.cpid_edc_crf_unlocked';
+        SELECT TOP 0 * INTO #silver_stage FROM silver.cpid_edc_crf_unlocked;
 
         SET @start_time = GETDATE();
 
         PRINT '>> Inserting cleaned data into silver.cpid_edc_crf_unlocked';
 
-        INSERT INTO silver.cpid_edc_crf_unlocked (
+        INSERT INTO #silver_stage (
             study_id,
             region,
             country,
@@ -89,6 +90,9 @@ BEGIN
             + ' seconds';
         PRINT '================================================';
 
+        EXEC silver.sp_merge_changed_subjects @source_name = 'cpid_edc_crf_unlocked', @incremental = @incremental;
+        EXEC gold.sp_bump_load_generation @layer = 'silver', @source_name = 'cpid_edc_crf_unlocked';
+
     END TRY
     BEGIN CATCH
         PRINT '================================================';
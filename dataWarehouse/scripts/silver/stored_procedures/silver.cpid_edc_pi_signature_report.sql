@@ -1,4 +1,5 @@
 CREATE OR ALTER PROCEDURE silver.load_cpid_edc_pi_signature_report
+    @incremental BIT = 0    -- 1 = rewrite only subjects whose rows changed
 AS
 BEGIN
     SET NOCOUNT ON;
@@ -9,10 +10,10 @@ BEGIN
         PRINT '================================================';
         PRINT 'Loading Silver Layer: CPID EDC PI Signature Report';
         PRINT '================================================';
-        TRUNCATE TABLE silver.cpid_edc_pi_signature_report;
+        SELECT TOP 0 * INTO #silver_stage FROM silver.cpid_edc_pi_signature_report;
         SET @start_time = GETDATE();
 
-        INSERT INTO silver.cpid_edc_pi_signature_report (study_id, region, country, site_id, subject_id, visit_name, form_name, page_require_signature, audit_action, visit_date, date_last_pi_sign, no_of_days, pending_since_pi_signed, dwh_create_date)
+        INSERT INTO #silver_stage (study_id, region, country, site_id, subject_id, visit_name, form_name, page_require_signature, audit_action, visit_date, date_last_pi_sign, no_of_days, pending_since_pi_signed, dwh_create_date)
         SELECT
             UPPER(LTRIM(RTRIM(study_id))) AS study_id,
             LTRIM(RTRIM(ISNULL(region, 'NA'))) AS region,
@@ -33,6 +34,9 @@ BEGIN
         SET @rows_affected = @@ROWCOUNT; SET @end_time = GETDATE();
         PRINT '>> Rows Loaded: ' + CAST(@rows_affected AS NVARCHAR) + ' | Duration: ' + CAST(DATEDIFF(SECOND, @start_time, @end_time) AS NVARCHAR) + 's';
         PRINT '================================================';
+        EXEC silver.sp_merge_changed_subjects @source_name = 'cpid_edc_pi_signature_report', @incremental = @incremental;
+        EXEC gold.sp_bump_load_generation @layer = 'silver', @source_name = 'cpid_edc_pi_signature_report';
+
     END TRY
     BEGIN CATCH
         PRINT 'ERROR: ' + ERROR_MESSAGE(); THROW;
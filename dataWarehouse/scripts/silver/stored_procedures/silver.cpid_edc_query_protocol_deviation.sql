@@ -1,4 +1,5 @@
 CREATE OR ALTER PROCEDURE silver.load_cpid_edc_query_protocol_deviation
+    @incremental BIT = 0    -- 1 = rewrite only subjects whose rows changed
 AS
 BEGIN
     SET NOCOUNT ON;
@@ -9,10 +10,10 @@ BEGIN
         PRINT '================================================';
         PRINT 'Loading Silver Layer: CPID EDC Query Protocol Deviation';
         PRINT '================================================';
-        TRUNCATE TABLE silver.cpid_edc_query_protocol_deviation;
+        SELECT TOP 0 * INTO #silver_stage FROM silver.cpid_edc_query_protocol_deviation;
         SET @start_time = GETDATE();
 
-        INSERT INTO silver.cpid_edc_query_protocol_deviation (study_id, region, country, site_id, subject_id, folder_name, form_name, log_no, pd_status, visit_date, dwh_create_date)
+        INSERT INTO #silver_stage (study_id, region, country, site_id, subject_id, folder_name, form_name, log_no, pd_status, visit_date, dwh_create_date)
         SELECT
             UPPER(LTRIM(RTRIM(study_id))) AS study_id,
             LTRIM(RTRIM(ISNULL(region, 'NA'))) AS region,
@@ -30,6 +31,9 @@ BEGIN
         SET @rows_affected = @@ROWCOUNT; SET @end_time = GETDATE();
         PRINT '>> Rows Loaded: ' + CAST(@rows_affected AS NVARCHAR) + ' | Duration: ' + CAST(DATEDIFF(SECOND, @start_time, @end_time) AS NVARCHAR) + 's';
         PRINT '================================================';
+        EXEC silver.sp_merge_changed_subjects @source_name = 'cpid_edc_query_protocol_deviation', @incremental = @incremental;
+        EXEC gold.sp_bump_load_generation @layer = 'silver', @source_name = 'cpid_edc_query_protocol_deviation';
+
     END TRY
     BEGIN CATCH
         PRINT 'ERROR: ' + ERROR_MESSAGE(); THROW;
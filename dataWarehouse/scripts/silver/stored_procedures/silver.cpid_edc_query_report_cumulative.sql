@@ -1,4 +1,5 @@
 CREATE OR ALTER PROCEDURE silver.load_cpid_edc_query_report_cumulative
+    @incremental BIT = 0    -- 1 = rewrite only subjects whose rows changed
 AS
 BEGIN
     SET NOCOUNT ON;
@@ -9,10 +10,10 @@ BEGIN
         PRINT '================================================';
         PRINT 'Loading Silver Layer: CPID EDC Query Report Cumulative';
         PRINT '================================================';
-        TRUNCATE TABLE silver.cpid_edc_query_report_cumulative;
+        SELECT TOP 0 * INTO #silver_stage FROM silver.cpid_edc_query_report_cumulative;
         SET @start_time = GETDATE();
 
-        INSERT INTO  silver.cpid_edc_query_report_cumulative (study_id, region, country, site_id, subject_id, folder_name, form_name, field_oid, log_no, visit_date, query_status, action_owner, marking_group_name, query_open_date, query_response, days_since_open, days_since_response, dwh_create_date)
+        INSERT INTO #silver_stage (study_id, region, country, site_id, subject_id, folder_name, form_name, field_oid, log_no, visit_date, query_status, action_owner, marking_group_name, query_open_date, query_response, days_since_open, days_since_response, dwh_create_date)
         SELECT
             UPPER(LTRIM(RTRIM(study_id))) AS study_id,
             LTRIM(RTRIM(ISNULL(region, 'NA'))) AS region,
@@ -37,6 +38,9 @@ BEGIN
         SET @rows_affected = @@ROWCOUNT; SET @end_time = GETDATE();
         PRINT '>> Rows Loaded: ' + CAST(@rows_affected AS NVARCHAR) + ' | Duration: ' + CAST(DATEDIFF(SECOND, @start_time, @end_time) AS NVARCHAR) + 's';
         PRINT '================================================';
+        EXEC silver.sp_merge_changed_subjects @source_name = 'cpid_edc_query_report_cumulative', @incremental = @incremental;
+        EXEC gold.sp_bump_load_generation @layer = 'silver', @source_name = 'cpid_edc_query_report_cumulative';
+
     END TRY
     BEGIN CATCH
         PRINT 'ERROR: ' + ERROR_MESSAGE(); THROW;
@@ -1,5 +1,6 @@
 
 CREATE OR ALTER PROCEDURE silver.load_cpid_edc_sdv
+    @incremental BIT = 0    -- 1 = rewrite only subjects whose rows changed
 AS
 BEGIN
     SET NOCOUNT ON;
@@ -15,11 +16,11 @@ BEGIN
         PRINT 'Loading Silver Layer';
         PRINT 'Dataset: CPID EDC SDV';
         PRINT '================================================';
-        PRINT '>> Truncating Table: silver.cpid_edc_sdv';
-        TRUNCATE TABLE silver.cpid_edc_sdv;
+        PRINT '>> Staging cleaned rows for silver.cpid_edc_sdv';
+        SELECT TOP 0 * INTO #silver_stage FROM silver.cpid_edc_sdv;
         SET @start_time = GETDATE();
         PRINT '>> Inserting cleaned data into silver.cpid_edc_sdv';
-        INSERT INTO silver.cpid_edc_sdv (
+        INSERT INTO #silver_stage (
             study_id,
             region,
             country,
@@ -85,6 +86,9 @@ BEGIN
             + CAST(DATEDIFF(SECOND, @batch_start_time, @batch_end_time) AS NVARCHAR) 
             + ' seconds';
         PRINT '================================================';
+        EXEC silver.sp_merge_changed_subjects @source_name = 'cpid_edc_sdv', @incremental = @incremental;
+        EXEC gold.sp_bump_load_generation @layer = 'silver', @source_name = 'cpid_edc_sdv';
+
     END TRY
     BEGIN CATCH
         PRINT '================================================';
@@ -1,4 +1,5 @@
 CREATE OR ALTER PROCEDURE silver.load_cpid_edc_subject_metrics
+    @incremental BIT = 0    -- 1 = rewrite only subjects whose rows changed
 AS
 BEGIN
     SET NOCOUNT ON;
@@ -18,8 +19,8 @@ BEGIN
         PRINT 'Dataset: CPID EDC Subject Metrics';
         PRINT '================================================';
 
-        PRINT '>> Truncating Table: silver.cpid_edc_subject_metrics';
-        TRUNCATE TABLE silver.cpid_edc_subject_metrics;
+        PRINT '>> Staging cleaned rows for silver.cpid_edc_subject_metrics';
+        SELECT TOP 0 * INTO #silver_stage FROM silver.cpid_edc_subject_metrics;
 
         SET @start_time = GETDATE();
 
@@ -39,37 +40,24 @@ BEGIN
               AND subject_id IS NOT NULL
               AND UPPER(LTRIM(study_id)) LIKE 'STUDY%'
         ),
+        -- Silver sources carry persisted norm_study_id / norm_subject_id (ddl_silver_indexes.sql)
         -- Missing Visits
         mv_calc AS (
             SELECT 
-                UPPER(LTRIM(RTRIM(study_id))) AS norm_study_id,
-                CASE 
-                    WHEN subject_id LIKE 'Subject %' THEN UPPER(LTRIM(RTRIM(SUBSTRING(subject_id, 9, LEN(subject_id)))))
-                    ELSE UPPER(LTRIM(RTRIM(subject_id)))
-                END AS norm_subject_id,
+                norm_study_id,
+                norm_subject_id,
                 COUNT(DISTINCT visit_name) AS missing_visit_count
             FROM silver.missing_pages_visit_level
-            GROUP BY UPPER(LTRIM(RTRIM(study_id))),
-                     CASE 
-                        WHEN subject_id LIKE 'Subject %' THEN UPPER(LTRIM(RTRIM(SUBSTRING(subject_id, 9, LEN(subject_id)))))
-                        ELSE UPPER(LTRIM(RTRIM(subject_id)))
-                     END
+            GROUP BY norm_study_id, norm_subject_id
         ),
         -- Missing Pages
         mp_calc AS (
             SELECT 
-                UPPER(LTRIM(RTRIM(study_id))) AS norm_study_id,
-                CASE 
-                    WHEN subject_id LIKE 'Subject %' THEN UPPER(LTRIM(RTRIM(SUBSTRING(subject_id, 9, LEN(subject_id)))))
-                    ELSE UPPER(LTRIM(RTRIM(subject_id)))
-                END AS norm_subject_id,
+                norm_study_id,
+                norm_subject_id,
                 COUNT(*) AS missing_page_count
             FROM silver.missing_pages_all
-            GROUP BY UPPER(LTRIM(RTRIM(study_id))),
-                     CASE 
-                        WHEN subject_id LIKE 'Subject %' THEN UPPER(LTRIM(RTRIM(SUBSTRING(subject_id, 9, LEN(subject_id)))))
-                        ELSE UPPER(LTRIM(RTRIM(subject_id)))
-                     END
+            GROUP BY norm_study_id, norm_subject_id
         ),
         -- Coded Terms
         coded_calc AS (
@@ -79,21 +67,15 @@ BEGIN
                 COUNT(*) AS coded_count
             FROM (
                 SELECT 
-                    UPPER(LTRIM(RTRIM(study_id))) AS norm_study_id,
-                    CASE 
-                        WHEN subject_id LIKE 'Subject %' THEN UPPER(LTRIM(RTRIM(SUBSTRING(subject_id, 9, LEN(subject_id)))))
-                        ELSE UPPER(LTRIM(RTRIM(subject_id)))
-                    END AS norm_subject_id
+                    norm_study_id,
+                    norm_subject_id
                 FROM silver.globalcodingreport_meddra 
                 WHERE UPPER(LTRIM(RTRIM(coding_status))) LIKE '%CODED%'
                   AND UPPER(LTRIM(RTRIM(coding_status))) NOT LIKE '%UNCODED%'
                 UNION ALL
                 SELECT 
-                    UPPER(LTRIM(RTRIM(study_id))) AS norm_study_id,
-                    CASE 
-                        WHEN subject_id LIKE 'Subject %' THEN UPPER(LTRIM(RTRIM(SUBSTRING(subject_id, 9, LEN(subject_id)))))
-                        ELSE UPPER(LTRIM(RTRIM(subject_id)))
-                    END AS norm_subject_id
+                    norm_study_id,
+                    norm_subject_id
                 FROM silver.globalcodingreport_whodra 
                 WHERE UPPER(LTRIM(RTRIM(coding_status))) LIKE '%CODED%'
                   AND UPPER(LTRIM(RTRIM(coding_status))) NOT LIKE '%UNCODED%'
@@ -108,20 +90,14 @@ BEGIN
                 COUNT(*) AS uncoded_count
             FROM (
                 SELECT 
-                    UPPER(LTRIM(RTRIM(study_id))) AS norm_study_id,
-                    CASE 
-                        WHEN subject_id LIKE 'Subject %' THEN UPPER(LTRIM(RTRIM(SUBSTRING(subject_id, 9, LEN(subject_id)))))
-                        ELSE UPPER(LTRIM(RTRIM(subject_id)))
-                    END AS norm_subject_id
+                    norm_study_id,
+                    norm_subject_id
                 FROM silver.globalcodingreport_meddra 
                 WHERE UPPER(LTRIM(RTRIM(ISNULL(coding_status, '')))) LIKE '%UNCODED%'
                 UNION ALL
                 SELECT 
-                    UPPER(LTRIM(RTRIM(study_id))) AS norm_study_id,
-                    CASE 
-                        WHEN subject_id LIKE 'Subject %' THEN UPPER(LTRIM(RTRIM(SUBSTRING(subject_id, 9, LEN(subject_id)))))
-                        ELSE UPPER(LTRIM(RTRIM(subject_id)))
-                    END AS norm_subject_id
+                    norm_study_id,
+                    norm_subject_id
                 FROM silver.globalcodingreport_whodra 
                 WHERE UPPER(LTRIM(RTRIM(ISNULL(coding_status, '')))) LIKE '%UNCODED%'
             ) uncoded
@@ -130,178 +106,105 @@ BEGIN
         -- Open Issues in LNR (Lab and Ranges) - FIXED!
         lnr_calc AS (
             SELECT 
-                UPPER(LTRIM(RTRIM(study_id))) AS norm_study_id,
-                CASE 
-                    WHEN subject_id LIKE 'Subject %' THEN UPPER(LTRIM(RTRIM(SUBSTRING(subject_id, 9, LEN(subject_id)))))
-                    ELSE UPPER(LTRIM(RTRIM(subject_id)))
-                END AS norm_subject_id,
+                norm_study_id,
+                norm_subject_id,
                 COUNT(*) AS open_lnr_count
             FROM silver.missing_lab_ranges
-            GROUP BY UPPER(LTRIM(RTRIM(study_id))),
-                     CASE 
-                        WHEN subject_id LIKE 'Subject %' THEN UPPER(LTRIM(RTRIM(SUBSTRING(subject_id, 9, LEN(subject_id)))))
-                        ELSE UPPER(LTRIM(RTRIM(subject_id)))
-                     END
+            GROUP BY norm_study_id, norm_subject_id
         ),
         -- EDRR Issues
         edrr_calc AS (
             SELECT 
-                UPPER(LTRIM(RTRIM(study_id))) AS norm_study_id,
-                CASE 
-                    WHEN subject_id LIKE 'Subject %' THEN UPPER(LTRIM(RTRIM(SUBSTRING(subject_id, 9, LEN(subject_id)))))
-                    ELSE UPPER(LTRIM(RTRIM(subject_id)))
-                END AS norm_subject_id,
+                norm_study_id,
+                norm_subject_id,
                 MAX(total_open_issue_count_per_subject) AS total_open_issue_count_per_subject
             FROM silver.compiled_edrr
-            GROUP BY UPPER(LTRIM(RTRIM(study_id))),
-                     CASE 
-                        WHEN subject_id LIKE 'Subject %' THEN UPPER(LTRIM(RTRIM(SUBSTRING(subject_id, 9, LEN(subject_id)))))
-                        ELSE UPPER(LTRIM(RTRIM(subject_id)))
-                     END
+            GROUP BY norm_study_id, norm_subject_id
         ),
         -- Inactivated Forms
         inact_calc AS (
             SELECT 
-                UPPER(LTRIM(RTRIM(study_id))) AS norm_study_id,
-                CASE 
-                    WHEN subject_id LIKE 'Subject %' THEN UPPER(LTRIM(RTRIM(SUBSTRING(subject_id, 9, LEN(subject_id)))))
-                    ELSE UPPER(LTRIM(RTRIM(subject_id)))
-                END AS norm_subject_id,
+                norm_study_id,
+                norm_subject_id,
                 COUNT(DISTINCT folder + '|' + form) AS inactivated_count
             FROM silver.inactivated_forms_loglines
             WHERE UPPER(LTRIM(RTRIM(audit_action))) LIKE '%INACTIVAT%'
-            GROUP BY UPPER(LTRIM(RTRIM(study_id))),
-                     CASE 
-                        WHEN subject_id LIKE 'Subject %' THEN UPPER(LTRIM(RTRIM(SUBSTRING(subject_id, 9, LEN(subject_id)))))
-                        ELSE UPPER(LTRIM(RTRIM(subject_id)))
-                     END
+            GROUP BY norm_study_id, norm_subject_id
         ),
         -- SAE DM
         sae_dm_calc AS (
             SELECT 
-                UPPER(LTRIM(RTRIM(study_id))) AS norm_study_id,
-                CASE 
-                    WHEN patient_id LIKE 'Subject %' THEN UPPER(LTRIM(RTRIM(SUBSTRING(patient_id, 9, LEN(patient_id)))))
-                    ELSE UPPER(LTRIM(RTRIM(patient_id)))
-                END AS norm_subject_id,
+                norm_study_id,
+                norm_subject_id,
                 COUNT(*) AS pending_dm_count
             FROM silver.sae_dashboard_dm
             WHERE UPPER(LTRIM(RTRIM(ISNULL(review_status, '')))) != 'COMPLETED'
-            GROUP BY UPPER(LTRIM(RTRIM(study_id))),
-                     CASE 
-                        WHEN patient_id LIKE 'Subject %' THEN UPPER(LTRIM(RTRIM(SUBSTRING(patient_id, 9, LEN(patient_id)))))
-                        ELSE UPPER(LTRIM(RTRIM(patient_id)))
-                     END
+            GROUP BY norm_study_id, norm_subject_id
         ),
         -- SAE Safety
         sae_safety_calc AS (
             SELECT 
-                UPPER(LTRIM(RTRIM(study_id))) AS norm_study_id,
-                CASE 
-                    WHEN patient_id LIKE 'Subject %' THEN UPPER(LTRIM(RTRIM(SUBSTRING(patient_id, 9, LEN(patient_id)))))
-                    ELSE UPPER(LTRIM(RTRIM(patient_id)))
-                END AS norm_subject_id,
+                norm_study_id,
+                norm_subject_id,
                 COUNT(*) AS pending_safety_count
             FROM silver.sae_dashboard_safety
             WHERE UPPER(LTRIM(RTRIM(ISNULL(review_status, '')))) != 'COMPLETED'
-            GROUP BY UPPER(LTRIM(RTRIM(study_id))),
-                     CASE 
-                        WHEN patient_id LIKE 'Subject %' THEN UPPER(LTRIM(RTRIM(SUBSTRING(patient_id, 9, LEN(patient_id)))))
-                        ELSE UPPER(LTRIM(RTRIM(patient_id)))
-                     END
+            GROUP BY norm_study_id, norm_subject_id
         ),
         -- Non-Conformant Pages
         nc_calc AS (
             SELECT 
-                UPPER(LTRIM(RTRIM(study_id))) AS norm_study_id,
-                CASE 
-                    WHEN subject_id LIKE 'Subject %' THEN UPPER(LTRIM(RTRIM(SUBSTRING(subject_id, 9, LEN(subject_id)))))
-                    ELSE UPPER(LTRIM(RTRIM(subject_id)))
-                END AS norm_subject_id,
+                norm_study_id,
+                norm_subject_id,
                 COUNT(DISTINCT folder_name + '|' + page_name) AS non_conformant_page_count
             FROM silver.cpid_edc_non_conformant
-            GROUP BY UPPER(LTRIM(RTRIM(study_id))),
-                     CASE 
-                        WHEN subject_id LIKE 'Subject %' THEN UPPER(LTRIM(RTRIM(SUBSTRING(subject_id, 9, LEN(subject_id)))))
-                        ELSE UPPER(LTRIM(RTRIM(subject_id)))
-                     END
+            GROUP BY norm_study_id, norm_subject_id
         ),
         -- SDV Verification
         sdv_calc AS (
             SELECT 
-                UPPER(LTRIM(RTRIM(study_id))) AS norm_study_id,
-                CASE 
-                    WHEN subject_id LIKE 'Subject %' THEN UPPER(LTRIM(RTRIM(SUBSTRING(subject_id, 9, LEN(subject_id)))))
-                    ELSE UPPER(LTRIM(RTRIM(subject_id)))
-                END AS norm_subject_id,
+                norm_study_id,
+                norm_subject_id,
                 COUNT(*) AS require_verification_count,
                 SUM(CASE WHEN UPPER(LTRIM(RTRIM(verification_status))) LIKE '%VERIF%' THEN 1 ELSE 0 END) AS verified_count
             FROM silver.cpid_edc_sdv
-            GROUP BY UPPER(LTRIM(RTRIM(study_id))),
-                     CASE 
-                        WHEN subject_id LIKE 'Subject %' THEN UPPER(LTRIM(RTRIM(SUBSTRING(subject_id, 9, LEN(subject_id)))))
-                        ELSE UPPER(LTRIM(RTRIM(subject_id)))
-                     END
+            GROUP BY norm_study_id, norm_subject_id
         ),
         -- Freeze Status
         frz_calc AS (
             SELECT 
-                UPPER(LTRIM(RTRIM(study_id))) AS norm_study_id,
-                CASE 
-                    WHEN subject_id LIKE 'Subject %' THEN UPPER(LTRIM(RTRIM(SUBSTRING(subject_id, 9, LEN(subject_id)))))
-                    ELSE UPPER(LTRIM(RTRIM(subject_id)))
-                END AS norm_subject_id,
+                norm_study_id,
+                norm_subject_id,
                 SUM(CASE WHEN UPPER(LTRIM(RTRIM(freeze_status))) = 'FROZEN' THEN 1 ELSE 0 END) AS frozen_count,
                 SUM(CASE WHEN UPPER(LTRIM(RTRIM(freeze_status))) != 'FROZEN' OR freeze_status IS NULL THEN 1 ELSE 0 END) AS not_frozen_count
             FROM silver.cpid_edc_crf_freeze
-            GROUP BY UPPER(LTRIM(RTRIM(study_id))),
-                     CASE 
-                        WHEN subject_id LIKE 'Subject %' THEN UPPER(LTRIM(RTRIM(SUBSTRING(subject_id, 9, LEN(subject_id)))))
-                        ELSE UPPER(LTRIM(RTRIM(subject_id)))
-                     END
+            GROUP BY norm_study_id, norm_subject_id
         ),
         -- Lock Status
         lck_calc AS (
             SELECT 
-                UPPER(LTRIM(RTRIM(study_id))) AS norm_study_id,
-                CASE 
-                    WHEN subject_id LIKE 'Subject %' THEN UPPER(LTRIM(RTRIM(SUBSTRING(subject_id, 9, LEN(subject_id)))))
-                    ELSE UPPER(LTRIM(RTRIM(subject_id)))
-                END AS norm_subject_id,
+                norm_study_id,
+                norm_subject_id,
                 SUM(CASE WHEN UPPER(LTRIM(RTRIM(lock_status))) = 'LOCKED' THEN 1 ELSE 0 END) AS locked_count,
                 SUM(CASE WHEN UPPER(LTRIM(RTRIM(lock_status))) != 'LOCKED' OR lock_status IS NULL THEN 1 ELSE 0 END) AS unlocked_count
             FROM silver.cpid_edc_crf_locked
-            GROUP BY UPPER(LTRIM(RTRIM(study_id))),
-                     CASE 
-                        WHEN subject_id LIKE 'Subject %' THEN UPPER(LTRIM(RTRIM(SUBSTRING(subject_id, 9, LEN(subject_id)))))
-                        ELSE UPPER(LTRIM(RTRIM(subject_id)))
-                     END
+            GROUP BY norm_study_id, norm_subject_id
         ),
         -- Protocol Deviations
         pd_calc AS (
             SELECT 
-                UPPER(LTRIM(RTRIM(study_id))) AS norm_study_id,
-                CASE 
-                    WHEN subject_id LIKE 'Subject %' THEN UPPER(LTRIM(RTRIM(SUBSTRING(subject_id, 9, LEN(subject_id)))))
-                    ELSE UPPER(LTRIM(RTRIM(subject_id)))
-                END AS norm_subject_id,
+                norm_study_id,
+                norm_subject_id,
                 SUM(CASE WHEN UPPER(LTRIM(RTRIM(pd_status))) = 'CONFIRMED' THEN 1 ELSE 0 END) AS confirmed_count,
                 SUM(CASE WHEN UPPER(LTRIM(RTRIM(pd_status))) = 'PROPOSED' THEN 1 ELSE 0 END) AS proposed_count
             FROM silver.cpid_edc_query_protocol_deviation
-            GROUP BY UPPER(LTRIM(RTRIM(study_id))),
-                     CASE 
-                        WHEN subject_id LIKE 'Subject %' THEN UPPER(LTRIM(RTRIM(SUBSTRING(subject_id, 9, LEN(subject_id)))))
-                        ELSE UPPER(LTRIM(RTRIM(subject_id)))
-                     END
+            GROUP BY norm_study_id, norm_subject_id
         ),
         -- PI Signatures
         sig_calc AS (
             SELECT 
-                UPPER(LTRIM(RTRIM(study_id))) AS norm_study_id,
-                CASE 
-                    WHEN subject_id LIKE 'Subject %' THEN UPPER(LTRIM(RTRIM(SUBSTRING(subject_id, 9, LEN(subject_id)))))
-                    ELSE UPPER(LTRIM(RTRIM(subject_id)))
-                END AS norm_subject_id,
+                norm_study_id,
+                norm_subject_id,
                 SUM(CASE WHEN date_last_pi_sign IS NOT NULL THEN 1 ELSE 0 END) AS signed_count,
                 SUM(CASE WHEN no_of_days > 0 AND no_of_days <= 45 THEN 1 ELSE 0 END) AS overdue_45_count,
                 SUM(CASE WHEN no_of_days > 45 AND no_of_days <= 90 THEN 1 ELSE 0 END) AS overdue_45_90_count,
@@ -309,47 +212,31 @@ BEGIN
                 SUM(CASE WHEN UPPER(LTRIM(RTRIM(audit_action))) LIKE '%BROKEN%' THEN 1 ELSE 0 END) AS broken_signatures_count,
                 SUM(CASE WHEN date_last_pi_sign IS NULL AND UPPER(LTRIM(RTRIM(page_require_signature))) LIKE '%YES%' THEN 1 ELSE 0 END) AS never_signed_count
             FROM silver.cpid_edc_pi_signature_report
-            GROUP BY UPPER(LTRIM(RTRIM(study_id))),
-                     CASE 
-                        WHEN subject_id LIKE 'Subject %' THEN UPPER(LTRIM(RTRIM(SUBSTRING(subject_id, 9, LEN(subject_id)))))
-                        ELSE UPPER(LTRIM(RTRIM(subject_id)))
-                     END
+            GROUP BY norm_study_id, norm_subject_id
         ),
         -- CRFs with issues: Pre-aggregate all pages with issues
         pages_with_issues_union AS (
             SELECT 
-                UPPER(LTRIM(RTRIM(study_id))) AS norm_study_id,
-                CASE 
-                    WHEN subject_id LIKE 'Subject %' THEN UPPER(LTRIM(RTRIM(SUBSTRING(subject_id, 9, LEN(subject_id)))))
-                    ELSE UPPER(LTRIM(RTRIM(subject_id)))
-                END AS norm_subject_id,
+                norm_study_id,
+                norm_subject_id,
                 folder_name + '|' + form_name AS page_key
             FROM silver.cpid_edc_query_report_cra_action
             UNION
             SELECT 
-                UPPER(LTRIM(RTRIM(study_id))) AS norm_study_id,
-                CASE 
-                    WHEN subject_id LIKE 'Subject %' THEN UPPER(LTRIM(RTRIM(SUBSTRING(subject_id, 9, LEN(subject_id)))))
-                    ELSE UPPER(LTRIM(RTRIM(subject_id)))
-                END AS norm_subject_id,
+                norm_study_id,
+                norm_subject_id,
                 folder_name + '|' + form_name AS page_key
             FROM silver.cpid_edc_query_report_site_action
             UNION
             SELECT 
-                UPPER(LTRIM(RTRIM(study_id))) AS norm_study_id,
-                CASE 
-                    WHEN subject_id LIKE 'Subject %' THEN UPPER(LTRIM(RTRIM(SUBSTRING(subject_id, 9, LEN(subject_id)))))
-                    ELSE UPPER(LTRIM(RTRIM(subject_id)))
-                END AS norm_subject_id,
+                norm_study_id,
+                norm_subject_id,
                 folder_name + '|' + form_name AS page_key
             FROM silver.cpid_edc_query_report_cumulative
             UNION
             SELECT 
-                UPPER(LTRIM(RTRIM(study_id))) AS norm_study_id,
-                CASE 
-                    WHEN subject_id LIKE 'Subject %' THEN UPPER(LTRIM(RTRIM(SUBSTRING(subject_id, 9, LEN(subject_id)))))
-                    ELSE UPPER(LTRIM(RTRIM(subject_id)))
-                END AS norm_subject_id,
+                norm_study_id,
+                norm_subject_id,
                 folder_name + '|' + page_name AS page_key
             FROM silver.cpid_edc_non_conformant
         ),
@@ -363,7 +250,7 @@ BEGIN
         )
 
         -- Final INSERT
-        INSERT INTO silver.cpid_edc_subject_metrics  (
+        INSERT INTO #silver_stage  (
             study_id, region, country, site_id, subject_id, latest_visit, subject_status,
             missing_visits, missing_pages, coded_terms, uncoded_terms, 
             open_issues_lnr, open_issues_edrr, inactivated_forms, 
@@ -486,6 +373,12 @@ BEGIN
         PRINT 'Total Load Duration: ' + CAST(DATEDIFF(SECOND, @batch_start_time, @batch_end_time) AS NVARCHAR) + ' seconds';
         PRINT '================================================';
 
+        -- Materialize changed subjects into gold.fact_subject_metrics
+        EXEC silver.sp_merge_changed_subjects @source_name = 'cpid_edc_subject_metrics', @incremental = @incremental;
+        EXEC gold.sp_refresh_fact_subject_metrics;
+
+        EXEC gold.sp_bump_load_generation @layer = 'silver', @source_name = 'cpid_edc_subject_metrics';
+
     END TRY
     BEGIN CATCH
         PRINT '================================================';
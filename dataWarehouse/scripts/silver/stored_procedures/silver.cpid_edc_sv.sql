@@ -1,4 +1,5 @@
 CREATE OR ALTER PROCEDURE silver.load_cpid_edc_sv
+    @incremental BIT = 0    -- 1 = rewrite only subjects whose rows changed
 AS
 BEGIN
     SET NOCOUNT ON;
@@ -9,10 +10,10 @@ BEGIN
         PRINT '================================================';
         PRINT 'Loading Silver Layer: CPID EDC SV';
         PRINT '================================================';
-        TRUNCATE TABLE silver.cpid_edc_sv;
+        SELECT TOP 0 * INTO #silver_stage FROM silver.cpid_edc_sv;
         SET @start_time = GETDATE();
 
-        INSERT INTO silver.cpid_edc_sv (project_name, region, country, site_id, subject_name, folder_name, visit_date, dwh_create_date)
+        INSERT INTO #silver_stage (project_name, region, country, site_id, subject_name, folder_name, visit_date, dwh_create_date)
         SELECT
             UPPER(LTRIM(RTRIM(project_name))) AS project_name,
             LTRIM(RTRIM(ISNULL(region, 'NA'))) AS region,
@@ -27,6 +28,9 @@ BEGIN
         SET @rows_affected = @@ROWCOUNT; SET @end_time = GETDATE();
         PRINT '>> Rows Loaded: ' + CAST(@rows_affected AS NVARCHAR) + ' | Duration: ' + CAST(DATEDIFF(SECOND, @start_time, @end_time) AS NVARCHAR) + 's';
         PRINT '================================================';
+        EXEC silver.sp_merge_changed_subjects @source_name = 'cpid_edc_sv', @incremental = @incremental, @study_column = 'project_name', @subject_column = 'subject_name';
+        EXEC gold.sp_bump_load_generation @layer = 'silver', @source_name = 'cpid_edc_sv';
+
     END TRY
     BEGIN CATCH
         PRINT 'ERROR: ' + ERROR_MESSAGE(); THROW;
@@ -1,4 +1,5 @@
 CREATE OR ALTER PROCEDURE silver.load_globalcodingreport_meddra
+    @incremental BIT = 0    -- 1 = rewrite only subjects whose rows changed
 AS
 BEGIN
     SET NOCOUNT ON;
@@ -15,12 +16,12 @@ BEGIN
         PRINT 'Dataset: Global Coding Report MedDRA';
         PRINT '================================================';
 
-        PRINT '>> Truncating Table: silver.globalcodingreport_meddra';
-        TRUNCATE TABLE silver.globalcodingreport_meddra;
+        PRINT '>> Staging cleaned rows for silver.globalcodingreport_meddra';
+        SELECT TOP 0 * INTO #silver_stage FROM silver.globalcodingreport_meddra;
 
         PRINT '>> Inserting cleaned data into silver.globalcodingreport_meddra';
 
-        INSERT INTO silver.globalcodingreport_meddra
+        INSERT INTO #silver_stage
         (
             study_id,
             dictionary,
@@ -56,6 +57,9 @@ BEGIN
             + ' seconds';
         PRINT '================================================';
 
+        EXEC silver.sp_merge_changed_subjects @source_name = 'globalcodingreport_meddra', @incremental = @incremental;
+        EXEC gold.sp_bump_load_generation @layer = 'silver', @source_name = 'globalcodingreport_meddra';
+
     END TRY
     BEGIN CATCH
         PRINT '================================================';
@@ -1,4 +1,5 @@
 CREATE OR ALTER PROCEDURE silver.load_globalcodingreport_whodra
+    @incremental BIT = 0    -- 1 = rewrite only subjects whose rows changed
 AS
 BEGIN
     SET NOCOUNT ON;
@@ -15,12 +16,12 @@ BEGIN
         PRINT 'Dataset: Global Coding Report WHO-DRA';
         PRINT '================================================';
 
-        PRINT '>> Truncating Table: silver.globalcodingreport_whodra';
-        TRUNCATE TABLE silver.globalcodingreport_whodra;
+        PRINT '>> Staging cleaned rows for silver.globalcodingreport_whodra';
+        SELECT TOP 0 * INTO #silver_stage FROM silver.globalcodingreport_whodra;
 
         PRINT '>> Inserting cleaned data into silver.globalcodingreport_whodra';
 
-        INSERT INTO silver.globalcodingreport_whodra
+        INSERT INTO #silver_stage
         (
             study_id,
             dictionary,
@@ -56,6 +57,9 @@ BEGIN
             + ' seconds';
         PRINT '================================================';
 
+        EXEC silver.sp_merge_changed_subjects @source_name = 'globalcodingreport_whodra', @incremental = @incremental;
+        EXEC gold.sp_bump_load_generation @layer = 'silver', @source_name = 'globalcodingreport_whodra';
+
     END TRY
     BEGIN CATCH
         PRINT '================================================';
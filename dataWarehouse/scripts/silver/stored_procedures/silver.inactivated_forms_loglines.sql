@@ -1,4 +1,5 @@
 CREATE OR ALTER PROCEDURE silver.load_inactivated_forms_loglines
+    @incremental BIT = 0    -- 1 = rewrite only subjects whose rows changed
 AS
 BEGIN
     SET NOCOUNT ON;
@@ -18,14 +19,14 @@ BEGIN
         PRINT 'Dataset: Inactivated Forms and Loglines';
         PRINT '================================================';
 
-        PRINT '>> Truncating Table: silver.inactivated_forms_loglines';
-        TRUNCATE TABLE silver.inactivated_forms_loglines;
+        PRINT '>> Staging cleaned rows for silver.inactivated_forms_loglines';
+        SELECT TOP 0 * INTO #silver_stage FROM silver.inactivated_forms_loglines;
 
         SET @start_time = GETDATE();
 
         PRINT '>> Inserting cleaned data into silver.inactivated_forms_loglines';
 
-        INSERT INTO silver.inactivated_forms_loglines (
+        INSERT INTO #silver_stage (
             study_id,
             country,
             site_id,
@@ -100,6 +101,9 @@ BEGIN
             + ' seconds';
         PRINT '================================================';
 
+        EXEC silver.sp_merge_changed_subjects @source_name = 'inactivated_forms_loglines', @incremental = @incremental;
+        EXEC gold.sp_bump_load_generation @layer = 'silver', @source_name = 'inactivated_forms_loglines';
+
     END TRY
     BEGIN CATCH
         PRINT '================================================';
@@ -1,4 +1,5 @@
 CREATE OR ALTER PROCEDURE silver.load_missing_lab_ranges
+    @incremental BIT = 0    -- 1 = rewrite only subjects whose rows changed
 AS
 BEGIN
     SET NOCOUNT ON;
@@ -18,14 +19,14 @@ BEGIN
         PRINT 'Dataset: Missing Lab Ranges';
         PRINT '================================================';
 
-        PRINT '>> Truncating Table: silver.missing_lab_ranges';
-        TRUNCATE TABLE silver.missing_lab_ranges;
+        PRINT '>> Staging cleaned rows for silver.missing_lab_ranges';
+        SELECT TOP 0 * INTO #silver_stage FROM silver.missing_lab_ranges;
 
         SET @start_time = GETDATE();
 
         PRINT '>> Inserting cleaned data into silver.missing_lab_ranges';
 
-        INSERT INTO silver.missing_lab_ranges (
+        INSERT INTO #silver_stage (
             study_id,
             country,
             site_id,
@@ -110,6 +111,9 @@ BEGIN
             + ' seconds';
         PRINT '================================================';
 
+        EXEC silver.sp_merge_changed_subjects @source_name = 'missing_lab_ranges', @incremental = @incremental;
+        EXEC gold.sp_bump_load_generation @layer = 'silver', @source_name = 'missing_lab_ranges';
+
     END TRY
     BEGIN CATCH
         PRINT '================================================';
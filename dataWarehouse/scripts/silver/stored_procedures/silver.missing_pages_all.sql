@@ -1,4 +1,5 @@
 CREATE OR ALTER PROCEDURE silver.load_missing_pages_all
+    @incremental BIT = 0    -- 1 = rewrite only subjects whose rows changed
 AS
 BEGIN
     SET NOCOUNT ON;
@@ -15,12 +16,12 @@ BEGIN
         PRINT 'Dataset: Missing Pages - All';
         PRINT '================================================';
 
-        PRINT '>> Truncating Table: silver.missing_pages_all';
-        TRUNCATE TABLE silver.missing_pages_all;
+        PRINT '>> Staging cleaned rows for silver.missing_pages_all';
+        SELECT TOP 0 * INTO #silver_stage FROM silver.missing_pages_all;
 
         PRINT '>> Inserting cleaned data into silver.missing_pages_all';
 
-        INSERT INTO silver.missing_pages_all
+        INSERT INTO #silver_stage
         (
             study_id,
             site_group,
@@ -65,6 +66,9 @@ BEGIN
             + ' seconds';
         PRINT '================================================';
 
+        EXEC silver.sp_merge_changed_subjects @source_name = 'missing_pages_all', @incremental = @incremental;
+        EXEC gold.sp_bump_load_generation @layer = 'silver', @source_name = 'missing_pages_all';
+
     END TRY
     BEGIN CATCH
         PRINT '================================================';
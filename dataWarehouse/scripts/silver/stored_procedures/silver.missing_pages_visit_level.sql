@@ -1,4 +1,5 @@
-CREATE OR ALTER PROCEDURE  silver.load_missing_pages_visit_level
+CREATE OR ALTER PROCEDURE silver.load_missing_pages_visit_level
+    @incremental BIT = 0    -- 1 = rewrite only subjects whose rows changed
 AS
 BEGIN
     SET NOCOUNT ON;
@@ -18,14 +19,14 @@ BEGIN
         PRINT 'Dataset: Missing Pages - Visit Level';
         PRINT '================================================';
 
-        PRINT '>> Truncating Table: silver.missing_pages_visit_level';
-        TRUNCATE TABLE silver.missing_pages_visit_level;
+        PRINT '>> Staging cleaned rows for silver.missing_pages_visit_level';
+        SELECT TOP 0 * INTO #silver_stage FROM silver.missing_pages_visit_level;
 
         SET @start_time = GETDATE();
 
         PRINT '>> Inserting cleaned data into silver.missing_pages_visit_level';
 
-        INSERT INTO silver.missing_pages_visit_level (
+        INSERT INTO #silver_stage (
             study_id,
             site_group,
             site_id,
@@ -199,6 +200,9 @@ END AS site_group,
             + ' seconds';
         PRINT '================================================';
 
+        EXEC silver.sp_merge_changed_subjects @source_name = 'missing_pages_visit_level', @incremental = @incremental;
+        EXEC gold.sp_bump_load_generation @layer = 'silver', @source_name = 'missing_pages_visit_level';
+
     END TRY
     BEGIN CATCH
         PRINT '================================================';
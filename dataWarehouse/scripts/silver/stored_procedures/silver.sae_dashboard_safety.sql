@@ -1,4 +1,5 @@
 CREATE OR ALTER PROCEDURE silver.load_sae_dashboard_safety
+    @incremental BIT = 0    -- 1 = rewrite only subjects whose rows changed
 AS
 BEGIN
     SET NOCOUNT ON;
@@ -17,14 +18,14 @@ BEGIN
         PRINT 'Dataset: SAE Dashboard Safety';
         PRINT '================================================';
 
-        PRINT '>> Truncating Table: silver.sae_dashboard_safety';
-        TRUNCATE TABLE silver.sae_dashboard_safety;
+        PRINT '>> Staging cleaned rows for silver.sae_dashboard_safety';
+        SELECT TOP 0 * INTO #silver_stage FROM silver.sae_dashboard_safety;
 
         SET @start_time = GETDATE();
 
         PRINT '>> Inserting cleaned data into silver.sae_dashboard_safety';
 
-        INSERT INTO silver.sae_dashboard_safety (
+        INSERT INTO #silver_stage (
             discrepancy_id,
             study_id,
             site_id,
@@ -90,6 +91,9 @@ BEGIN
             + ' seconds';
         PRINT '================================================';
 
+        EXEC silver.sp_merge_changed_subjects @source_name = 'sae_dashboard_safety', @incremental = @incremental, @study_column = 'study_id', @subject_column = 'patient_id';
+        EXEC gold.sp_bump_load_generation @layer = 'silver', @source_name = 'sae_dashboard_safety';
+
     END TRY
     BEGIN CATCH
         PRINT '================================================';
@@ -1,4 +1,5 @@
 CREATE OR ALTER PROCEDURE silver.load_visit_projection_tracker
+    @incremental BIT = 0    -- 1 = rewrite only subjects whose rows changed
 AS
 BEGIN
     SET NOCOUNT ON;
@@ -15,12 +16,12 @@ BEGIN
         PRINT 'Dataset: Visit Projection Tracker';
         PRINT '================================================';
 
-        PRINT '>> Truncating Table: silver.visit_projection_tracker';
-        TRUNCATE TABLE silver.visit_projection_tracker;
+        PRINT '>> Staging cleaned rows for silver.visit_projection_tracker';
+        SELECT TOP 0 * INTO #silver_stage FROM silver.visit_projection_tracker;
 
         PRINT '>> Inserting cleaned data into silver.visit_projection_tracker';
 
-        INSERT INTO silver.visit_projection_tracker
+        INSERT INTO #silver_stage
         (
             study_id,
             country,
@@ -52,6 +53,9 @@ BEGIN
             + ' seconds';
         PRINT '================================================';
 
+        EXEC silver.sp_merge_changed_subjects @source_name = 'visit_projection_tracker', @incremental = @incremental;
+        EXEC gold.sp_bump_load_generation @layer = 'silver', @source_name = 'visit_projection_tracker';
+
     END TRY
     BEGIN CATCH
         PRINT '================================================';